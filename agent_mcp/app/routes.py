@@ -8,7 +8,7 @@ from typing import Callable, List, Dict, Any # Added List, Dict, Any
 
 from starlette.routing import Route, Mount
 from starlette.staticfiles import StaticFiles
-from starlette.responses import JSONResponse, Response, PlainTextResponse
+from starlette.responses import JSONResponse, Response, PlainTextResponse, StreamingResponse
 from starlette.requests import Request
 
 # Project-specific imports
@@ -18,6 +18,14 @@ from ..core.auth import verify_token, get_agent_id as auth_get_agent_id
 from ..utils.json_utils import get_sanitized_json_body
 from ..db.connection import get_db_connection
 from ..db.actions.agent_actions_db import log_agent_action_to_db
+from ..db.actions.task_notes_db import (
+    RECENT_TASK_NOTES,
+    add_task_note,
+    attach_recent_notes,
+    cached_notes_fields,
+)
+from ..features.rag.index_queue import enqueue_rag_sources
+from ..features.rag.recent_context import get_recent_context_view
 
 from ..features.dashboard.api import (
     fetch_graph_data_logic,
@@ -174,6 +182,10 @@ async def all_tasks_api_route(request: Request) -> JSONResponse:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM tasks ORDER BY created_at DESC")
         tasks_data = [dict(row) for row in cursor.fetchall()]
+        # Most recent notes per task (?notes_limit=N for more) from task_notes
+        try: notes_limit = max(0, int(request.query_params.get('notes_limit', RECENT_TASK_NOTES)))
+        except ValueError: notes_limit = RECENT_TASK_NOTES
+        attach_recent_notes(cursor, tasks_data, notes_limit)
         return JSONResponse(tasks_data)
     except Exception as e:
         logger.error(f"Error fetching all tasks: {e}", exc_info=True)
@@ -192,9 +204,9 @@ async def update_task_details_api_route(request: Request) -> JSONResponse:
         if not verify_token(admin_auth_token, required_role='admin'): return JSONResponse({"error": "Invalid admin token"}, status_code=403)
         requesting_admin_id = auth_get_agent_id(admin_auth_token)
         conn = get_db_connection(); cursor = conn.cursor()
-        cursor.execute("SELECT notes FROM tasks WHERE task_id = ?", (task_id_to_update,)); task_row = cursor.fetchone()
+        cursor.execute("SELECT task_id FROM tasks WHERE task_id = ?", (task_id_to_update,)); task_row = cursor.fetchone()
         if not task_row: return JSONResponse({"error": "Task not found"}, status_code=404)
-        existing_notes_str = task_row["notes"]
+        new_notes: List[Dict[str, Any]] = []
         update_fields: List[str] = []; params: List[Any] = []; log_details: Dict[str, Any] = {"status_updated_to": new_status}
         update_fields.append("status = ?"); params.append(new_status)
         update_fields.append("updated_at = ?"); params.append(datetime.datetime.now().isoformat())
@@ -202,24 +214,25 @@ async def update_task_details_api_route(request: Request) -> JSONResponse:
         if 'description' in data and data['description'] is not None: update_fields.append("description = ?"); params.append(data['description']); log_details["description_changed"] = True
         if 'priority' in data and data['priority']: update_fields.append("priority = ?"); params.append(data['priority']); log_details["priority_changed"] = True
         if 'notes' in data and data['notes'] and isinstance(data['notes'], str) and data['notes'].strip():
-            try: current_notes_list = json.loads(existing_notes_str or "[]")
-            except json.JSONDecodeError: current_notes_list = []
-            new_note_entry = {"timestamp": datetime.datetime.now().isoformat(), "author": requesting_admin_id, "content": data['notes'].strip()}
-            current_notes_list.append(new_note_entry); update_fields.append("notes = ?"); params.append(json.dumps(current_notes_list)); log_details["notes_added"] = True
+            new_notes.append(add_task_note(cursor, task_id_to_update, requesting_admin_id, data['notes'].strip())); log_details["notes_added"] = True
         params.append(task_id_to_update)
         if update_fields:
             placeholders = ', '.join(update_fields)
             query = f"UPDATE tasks SET {placeholders} WHERE task_id = ?"
             cursor.execute(query, tuple(params))
         log_agent_action_to_db(cursor, requesting_admin_id, "updated_task_dashboard", task_id=task_id_to_update, details=log_details); conn.commit()
+        get_recent_context_view().refresh_tasks(cursor, [task_id_to_update])
+        enqueue_rag_sources("task", [task_id_to_update])
         if task_id_to_update in g.tasks:
             cursor.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id_to_update,)); updated_task_for_cache = cursor.fetchone()
             if updated_task_for_cache:
-                g.tasks[task_id_to_update] = dict(updated_task_for_cache)
-                for field_key in ["child_tasks", "depends_on_tasks", "notes"]:
-                    if isinstance(g.tasks[task_id_to_update].get(field_key), str):
-                        try: g.tasks[task_id_to_update][field_key] = json.loads(g.tasks[task_id_to_update][field_key] or "[]")
-                        except json.JSONDecodeError: g.tasks[task_id_to_update][field_key] = []
+                task_for_cache = dict(updated_task_for_cache)
+                for field_key in ["child_tasks", "depends_on_tasks"]:
+                    if isinstance(task_for_cache.get(field_key), str):
+                        try: task_for_cache[field_key] = json.loads(task_for_cache[field_key] or "[]")
+                        except json.JSONDecodeError: task_for_cache[field_key] = []
+                task_for_cache.update(cached_notes_fields(g.tasks.get(task_id_to_update), new_notes))
+                g.tasks[task_id_to_update] = task_for_cache
             else: del g.tasks[task_id_to_update]
         return JSONResponse({"success": True, "message": "Task updated successfully via dashboard."})
     except ValueError as e_val: return JSONResponse({"error": str(e_val)}, status_code=400)    
@@ -545,6 +558,8 @@ async def create_sample_memories_route(request: Request) -> JSONResponse:
             created_count += 1
         
         conn.commit()
+        get_recent_context_view().refresh_contexts(cursor, [m['context_key'] for m in sample_memories])
+        enqueue_rag_sources("context", [m['context_key'] for m in sample_memories])
         
         return JSONResponse({
             "success": True,
@@ -613,6 +628,8 @@ async def create_memory_api_route(request: Request) -> JSONResponse:
         # Log the action
         log_agent_action_to_db(cursor, requesting_admin_id, "created_memory", details={"context_key": context_key})
         conn.commit()
+        get_recent_context_view().refresh_contexts(cursor, [context_key])
+        enqueue_rag_sources("context", [context_key])
         
         return JSONResponse({
             "success": True,
@@ -687,6 +704,8 @@ async def update_memory_api_route(request: Request) -> JSONResponse:
         # Log the action
         log_agent_action_to_db(cursor, requesting_admin_id, "updated_memory", details={"context_key": context_key})
         conn.commit()
+        get_recent_context_view().refresh_contexts(cursor, [context_key])
+        enqueue_rag_sources("context", [context_key])
         
         return JSONResponse({
             "success": True,
@@ -743,6 +762,8 @@ async def delete_memory_api_route(request: Request) -> JSONResponse:
         # Log the action
         log_agent_action_to_db(cursor, requesting_admin_id, "deleted_memory", details={"context_key": context_key})
         conn.commit()
+        get_recent_context_view().refresh_contexts(cursor, [context_key])
+        enqueue_rag_sources("context", [context_key])
         
         return JSONResponse({
             "success": True,
@@ -769,4 +790,108 @@ routes.extend([
 ])
 
 # Add the sample data route
-routes.append(Route('/api/create-sample-memories', endpoint=create_sample_memories_route, name="create_sample_memories", methods=['POST', 'OPTIONS']))
\ No newline at end of file
+routes.append(Route('/api/create-sample-memories', endpoint=create_sample_memories_route, name="create_sample_memories", methods=['POST', 'OPTIONS']))
+# --- RAG Streaming Endpoints ---
+async def rag_stream_api_route(request: Request) -> Response:
+    """Streams a RAG answer as Server-Sent Events ('delta' events, then one 'done' event)."""
+    if request.method == 'OPTIONS':
+        return await handle_options(request)
+
+    from ..features.rag.query import stream_rag_answer
+
+    token = request.query_params.get('token') or request.headers.get('Authorization', '').replace('Bearer ', '')
+    if not (verify_token(token, required_role='admin') or verify_token(token, required_role='agent')):
+        return JSONResponse({"error": "Valid admin or agent token required"}, status_code=403)
+
+    query_text = request.query_params.get('query', '').strip()
+    if not query_text:
+        return JSONResponse({"error": "query parameter is required"}, status_code=400)
+
+    requesting_id = auth_get_agent_id(token)
+    logger.info(f"'{requesting_id}' is streaming project RAG: '{query_text[:100]}...'")
+
+    async def event_source():
+        async for event in stream_rag_answer(query_text):
+            event_type = event.pop("type")
+            yield f"event: {event_type}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'Access-Control-Allow-Origin': '*',
+        }
+    )
+
+async def rag_metrics_api_route(request: Request) -> JSONResponse:
+    """Recent RAG answer latency and time-to-first-token percentiles."""
+    if request.method == 'OPTIONS':
+        return await handle_options(request)
+
+    from ..features.rag.query import get_rag_query_metrics
+
+    return JSONResponse(get_rag_query_metrics())
+
+routes.extend([
+    Route('/api/rag/stream', endpoint=rag_stream_api_route, name="rag_stream_api", methods=['GET', 'OPTIONS']),
+    Route('/api/rag/metrics', endpoint=rag_metrics_api_route, name="rag_metrics_api", methods=['GET', 'OPTIONS']),
+])
+
+# --- Task Change Feed ---
+# Seconds between keepalive comments while no task changes
+TASK_CHANGES_KEEPALIVE_SECONDS = 15
+
+async def task_changes_stream_api_route(request: Request) -> Response:
+    """
+    Streams task changes (see core/task_changes.py) as Server-Sent Events:
+    one 'position' event, then a 'change' event per change (id = its
+    sequence number, so reconnecting with Last-Event-ID resumes), or a
+    'reset' event when the requested position is no longer available.
+    Agents only receive changes to their own tasks; admins may pass agent_id.
+    """
+    if request.method == 'OPTIONS':
+        return await handle_options(request)
+
+    token = request.query_params.get('token') or request.headers.get('Authorization', '').replace('Bearer ', '')
+    is_admin = verify_token(token, required_role='admin')
+    if not (is_admin or verify_token(token, required_role='agent')):
+        return JSONResponse({"error": "Valid admin or agent token required"}, status_code=403)
+
+    agent_id = request.query_params.get('agent_id') if is_admin else auth_get_agent_id(token)
+    since_param = request.headers.get('Last-Event-ID') or request.query_params.get('since_seq')
+    change_log = g.tasks.changes
+    try:
+        since_seq = int(since_param) if since_param else change_log.latest_seq
+    except ValueError:
+        return JSONResponse({"error": "since_seq must be an integer"}, status_code=400)
+
+    async def event_source():
+        position = since_seq
+        yield f"event: position\nid: {position}\ndata: {json.dumps({'seq': position})}\n\n"
+        while verify_token(token, required_role='admin' if is_admin else 'agent'):
+            if await request.is_disconnected():
+                break
+            changes, next_seq, reset = await change_log.wait_for_changes(
+                position, TASK_CHANGES_KEEPALIVE_SECONDS, agent_id=agent_id
+            )
+            if reset:
+                yield f"event: reset\nid: {next_seq}\ndata: {json.dumps({'seq': next_seq})}\n\n"
+            elif not changes:
+                yield ": keepalive\n\n"
+            for change in changes:
+                yield f"event: change\nid: {change['seq']}\ndata: {json.dumps(change)}\n\n"
+            position = next_seq
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'Access-Control-Allow-Origin': '*',
+        }
+    )
+
+routes.append(Route('/api/tasks/changes/stream', endpoint=task_changes_stream_api_route, name="task_changes_stream_api", methods=['GET', 'OPTIONS']))
@@ -15,8 +15,12 @@ from ..core.auth import generate_token  # For admin token generation
 from ..utils.project_utils import init_agent_directory
 from ..db.schema import init_database as initialize_database_schema
 from ..db.connection import get_db_connection, check_vss_loadability
+from ..db.actions.task_notes_db import count_task_notes, get_recent_task_notes
 from ..external.openai_service import initialize_openai_client
-from ..features.rag.indexing import run_rag_indexing_periodically
+from ..features.rag.indexing import (
+    run_rag_index_queue_worker,
+    run_rag_indexing_periodically,
+)
 
 from ..features.claude_session_monitor import run_claude_session_monitoring
 from ..utils.signal_utils import register_signal_handlers  # For graceful shutdown
@@ -221,13 +225,15 @@ async def application_startup(
             active_agents_count += 1
         logger.info(f"Loaded {active_agents_count} active agents from database.")
 
-        # Load All Tasks into g.tasks
+        # Load All Tasks into g.tasks (with only their most recent notes)
         task_count = 0
+        recent_notes = get_recent_task_notes(cursor)
+        notes_counts = count_task_notes(cursor)
         cursor.execute("SELECT * FROM tasks")  # Load all tasks
         for row_dict in (dict(row) for row in cursor.fetchall()):
             task_id_val = row_dict["task_id"]
             # Ensure complex fields are Python lists/dicts in memory
-            for field_key in ["child_tasks", "depends_on_tasks", "notes"]:
+            for field_key in ["child_tasks", "depends_on_tasks"]:
                 if isinstance(row_dict.get(field_key), str):
                     try:
                         row_dict[field_key] = json.loads(row_dict[field_key] or "[]")
@@ -236,9 +242,13 @@ async def application_startup(
                             f"Failed to parse JSON for field '{field_key}' in task '{task_id_val}'. Defaulting to empty list."
                         )
                         row_dict[field_key] = []
+            row_dict["notes"] = recent_notes.get(task_id_val, [])
+            row_dict["notes_count"] = notes_counts.get(task_id_val, 0)
             g.tasks[task_id_val] = row_dict
             task_count += 1
         logger.info(f"Loaded {task_count} tasks into memory cache.")
+        # Loading is not a change: clients of the task change feed start from here
+        g.tasks.changes.truncate()
 
         # File map (g.file_map) and audit log (g.audit_log) are transient and start empty.
         g.file_map.clear()
@@ -308,6 +318,8 @@ async def start_background_tasks(task_group: anyio.abc.TaskGroup):
         run_rag_indexing_periodically, rag_interval
     )
     logger.info(f"RAG indexing task started with interval {rag_interval}s.")
+    # Context / task writes are indexed on demand, ahead of the periodic cycle
+    g.rag_index_queue_task_scope = await task_group.start(run_rag_index_queue_worker)
 
     # Start Claude Code Session Monitor
     claude_session_interval = int(
@@ -331,6 +343,9 @@ async def application_shutdown():
         logger.info("Attempting to cancel RAG indexing task...")
         g.rag_index_task_scope.cancel()
 
+    if g.rag_index_queue_task_scope and not g.rag_index_queue_task_scope.cancel_called:
+        g.rag_index_queue_task_scope.cancel()
+
     if g.claude_session_task_scope and not g.claude_session_task_scope.cancel_called:
         logger.info("Attempting to cancel Claude session monitoring task...")
         g.claude_session_task_scope.cancel()
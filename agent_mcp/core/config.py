@@ -204,6 +204,64 @@ MAX_CONTEXT_TOKENS: int = 1000000  # GPT-4.1 has 1M token context window
 TASK_ANALYSIS_MAX_TOKENS: int = (
     1000000  # Same 1M token context window for task analysis
 )
+# Approximate token cap for retrieval-only RAG responses (no LLM synthesis)
+RAG_RETRIEVAL_MAX_TOKENS: int = int(os.getenv("RAG_RETRIEVAL_MAX_TOKENS", "4000"))
+# Vector search engine: 'auto' (sqlite-vec, falling back to NumPy), 'sqlite-vec' or 'numpy'
+RAG_VECTOR_ENGINE: str = os.getenv("RAG_VECTOR_ENGINE", "auto").lower()
+# Optional quantized first-stage index for sqlite-vec: 'none', 'int8' or 'binary'.
+# Candidates (k * RAG_RERANK_OVERSAMPLE) are re-ranked against the float vectors.
+RAG_VECTOR_QUANTIZATION: str = os.getenv("RAG_VECTOR_QUANTIZATION", "none").lower()
+RAG_RERANK_OVERSAMPLE: int = int(os.getenv("RAG_RERANK_OVERSAMPLE", "4"))
+# Diversity-aware chunk selection before prompt assembly: adjacent chunks of the
+# same source are merged, then MMR picks k from k * RAG_MMR_FETCH_MULTIPLIER hits.
+# Lambda trades relevance (1.0) against novelty (0.0).
+RAG_MMR_ENABLED: bool = os.getenv("RAG_MMR_ENABLED", "true").lower() == "true"
+RAG_MMR_LAMBDA: float = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+RAG_MMR_FETCH_MULTIPLIER: int = int(os.getenv("RAG_MMR_FETCH_MULTIPLIER", "2"))
+RAG_MERGE_ADJACENT_CHUNKS: bool = (
+    os.getenv("RAG_MERGE_ADJACENT_CHUNKS", "true").lower() == "true"
+)
+# ask_project_rag_batch limits: questions per call and concurrent completions
+RAG_BATCH_MAX_QUESTIONS: int = int(os.getenv("RAG_BATCH_MAX_QUESTIONS", "10"))
+RAG_BATCH_MAX_CONCURRENCY: int = int(os.getenv("RAG_BATCH_MAX_CONCURRENCY", "4"))
+# Stream ask_project_rag answers as MCP progress notifications when the client
+# sends a progress token; the final tool result always holds the full answer.
+RAG_STREAM_ANSWERS: bool = os.getenv("RAG_STREAM_ANSWERS", "true").lower() == "true"
+# Number of recent RAG answers kept for latency / time-to-first-token metrics
+RAG_METRICS_WINDOW: int = int(os.getenv("RAG_METRICS_WINDOW", "200"))
+# Max recent project context entries / active tasks kept in the in-memory view
+# used by query_rag_system_with_model (features/rag/recent_context.py)
+RAG_RECENT_CONTEXT_MAX_ENTRIES: int = int(os.getenv("RAG_RECENT_CONTEXT_MAX_ENTRIES", "100"))
+# Chunk sizing unit for indexing: 'chars' (chunkers' character defaults) or
+# 'tokens' (RAG_CHUNK_TARGET_TOKENS per chunk, hard-capped at RAG_CHUNK_MAX_TOKENS).
+RAG_CHUNK_SIZE_UNIT: str = os.getenv("RAG_CHUNK_SIZE_UNIT", "chars").lower()
+RAG_CHUNK_TARGET_TOKENS: int = int(os.getenv("RAG_CHUNK_TARGET_TOKENS", "300"))
+RAG_CHUNK_MAX_TOKENS: int = int(os.getenv("RAG_CHUNK_MAX_TOKENS", "800"))
+# Token counting for chunk sizing: 'exact' (tiktoken, when installed) or 'approx'
+# (~4 characters per token); RAG_TOKENIZER_ENCODING is the tiktoken encoding name.
+RAG_CHUNK_TOKEN_COUNTING: str = os.getenv("RAG_CHUNK_TOKEN_COUNTING", "exact").lower()
+RAG_TOKENIZER_ENCODING: str = os.getenv("RAG_TOKENIZER_ENCODING", "cl100k_base")
+# Persist chunker output per (content hash, chunker, params version) so sources
+# re-embedded without text changes (e.g. after a model / dimension change) skip
+# parsing and chunking; entries unused for RAG_CHUNK_CACHE_MAX_AGE_DAYS are pruned.
+RAG_CHUNK_CACHE_ENABLED: bool = os.getenv("RAG_CHUNK_CACHE_ENABLED", "true").lower() == "true"
+RAG_CHUNK_CACHE_MAX_AGE_DAYS: int = int(os.getenv("RAG_CHUNK_CACHE_MAX_AGE_DAYS", "30"))
+# Chunk code along top-level class / function spans (when the file parses), so
+# an edit re-chunks only the entities it touches and unchanged chunks keep
+# their embeddings across re-indexing.
+RAG_ENTITY_ANCHORED_CHUNKS: bool = os.getenv("RAG_ENTITY_ANCHORED_CHUNKS", "true").lower() == "true"
+# Worker processes for reading, hashing and chunking sources during indexing
+# (0 = one less than the CPU count, at most 8; 1 = a single background thread),
+# and the number of files / sources handed to a worker at a time.
+RAG_INDEX_WORKERS: int = int(os.getenv("RAG_INDEX_WORKERS", "0"))
+RAG_INDEX_WORK_UNIT_SIZE: int = max(1, int(os.getenv("RAG_INDEX_WORK_UNIT_SIZE", "32")))
+# Changed sources are indexed in priority-ordered batches of this many sources
+# (context, tasks, files modified within RAG_INDEX_RECENT_FILE_SECONDS, then
+# bulk markdown / code); context and task writes are indexed on demand after
+# RAG_INDEX_QUEUE_DEBOUNCE_SECONDS.
+RAG_INDEX_BATCH_SOURCES: int = max(1, int(os.getenv("RAG_INDEX_BATCH_SOURCES", "200")))
+RAG_INDEX_RECENT_FILE_SECONDS: int = int(os.getenv("RAG_INDEX_RECENT_FILE_SECONDS", "3600"))
+RAG_INDEX_QUEUE_DEBOUNCE_SECONDS: float = float(os.getenv("RAG_INDEX_QUEUE_DEBOUNCE_SECONDS", "0.5"))
 
 # --- Project Directory Helpers ---
 # These rely on an environment variable "MCP_PROJECT_DIR" being set,
@@ -8,6 +8,8 @@ g.admin_token = "new_token"
 import anyio  # For rag_index_task type hint
 from typing import Dict, List, Optional, Any
 
+from .task_store import TaskStore
+
 # --- Core Server State ---
 # From main.py:147
 # Client ID -> Connection data (Note: original usage of 'connections' might be simplified
@@ -23,7 +25,9 @@ active_agents: Dict[str, Dict[str, Any]] = {}  # Agent Token -> Agent data
 admin_token: Optional[str] = None
 
 # From main.py:150
-tasks: Dict[str, Dict[str, Any]] = {}  # Task ID -> Task data (in-memory cache of tasks)
+# Task ID -> Task data (in-memory cache of tasks), indexed by assignee/status/
+# priority/parent and created_at; see core/task_store.py
+tasks: TaskStore = TaskStore()
 
 # --- File and Directory State ---
 # From main.py:153
@@ -79,6 +83,9 @@ global_vss_load_successful: bool = False
 # The type hint `anyio.abc.CancelScope` is a common way to hold a reference that allows cancellation.
 rag_index_task_scope: Optional[anyio.abc.CancelScope] = None
 
+# Handle for the on-demand RAG indexing queue worker
+rag_index_queue_task_scope: Optional[anyio.abc.CancelScope] = None
+
 # Handle for the Claude Code session monitoring background task
 claude_session_task_scope: Optional[anyio.abc.CancelScope] = None
 
@@ -0,0 +1,297 @@
+# Agent-MCP/mcp_template/mcp_server_src/core/task_benchmark.py
+"""
+Benchmark for the indexed in-memory task cache (core/task_store.py).
+
+Fills a TaskStore with synthetic tasks and times the filtered lookups used by
+view_tasks / search_tasks, reverse dependency lookups (dependency analysis,
+delete cascade checks) and health aggregates (show_health_analysis) against
+the linear scans over every task they replaced, checking both agree.
+
+With --listing, times view_tasks output budgeting over a synthetic task list
+instead: the memoized per-task render + token counts (cold and warm) against
+rendering and re-encoding every task with a fresh encoder lookup per call.
+
+Usage:
+    python -m agent_mcp.core.task_benchmark --tasks 50000
+    python -m agent_mcp.core.task_benchmark --listing --tasks 10000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .task_store import TaskStore
+
+STATUSES = ["pending", "in_progress", "completed", "cancelled", "failed"]
+PRIORITIES = ["low", "medium", "high"]
+
+
+def _percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _latency_summary(latencies_s: Sequence[float]) -> Dict[str, float]:
+    latencies_ms = [t * 1000 for t in latencies_s]
+    return {
+        "p50_ms": round(_percentile(latencies_ms, 50), 4),
+        "p95_ms": round(_percentile(latencies_ms, 95), 4),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 4)
+        if latencies_ms
+        else 0.0,
+    }
+
+
+def build_synthetic_store(num_tasks: int, num_agents: int, seed: int = 0) -> TaskStore:
+    """A TaskStore of `num_tasks` tasks spread over agents, statuses and parents."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    store = TaskStore()
+    for i in range(num_tasks):
+        task_id = f"task_{i:08d}"
+        created_at = start + timedelta(seconds=rng.randrange(10**7))
+        store[task_id] = {
+            "task_id": task_id,
+            "title": f"Synthetic task {i}",
+            "assigned_to": f"agent_{rng.randrange(num_agents)}",
+            "status": rng.choice(STATUSES),
+            "priority": rng.choice(PRIORITIES),
+            "parent_task": f"task_{rng.randrange(i):08d}" if i and rng.random() < 0.8 else None,
+            "created_at": created_at.isoformat(),
+            "updated_at": (created_at + timedelta(seconds=rng.randrange(10**6))).isoformat(),
+            "depends_on_tasks": [
+                f"task_{rng.randrange(i):08d}" for _ in range(rng.randrange(4) if i else 0)
+            ],
+        }
+    return store
+
+
+def _linear_query(store: TaskStore, **filters: Optional[str]) -> List[Dict[str, Any]]:
+    """The pre-TaskStore lookup: scan every task, then sort by created_at."""
+    matches = [
+        task
+        for task in store.values()
+        if all(value is None or task.get(field) == value for field, value in filters.items())
+    ]
+    matches.sort(key=lambda task: (task.get("created_at") or "", task["task_id"]), reverse=True)
+    return matches
+
+
+def _linear_health_counts(
+    store: TaskStore, stale_before: datetime, **filters: Optional[str]
+) -> Dict[str, Any]:
+    """The pre-aggregate health metrics: decode and parse every matching task."""
+    tasks = _linear_query(store, **filters)
+    status_counts: Dict[str, int] = {}
+    priority_counts: Dict[str, int] = {}
+    blocked = stale = 0
+    for task in tasks:
+        status = task.get("status", "unknown")
+        status_counts[status] = status_counts.get(status, 0) + 1
+        priority = task.get("priority", "medium")
+        priority_counts[priority] = priority_counts.get(priority, 0) + 1
+        deps = task.get("depends_on_tasks", [])
+        if isinstance(deps, str):
+            deps = json.loads(deps)
+        if deps and status == "pending":
+            blocked += 1
+        updated_time = datetime.fromisoformat(task["updated_at"])
+        if updated_time <= stale_before and status in ("pending", "in_progress"):
+            stale += 1
+    return {
+        "total": len(tasks),
+        "status_distribution": status_counts,
+        "priority_distribution": priority_counts,
+        "blocked": blocked,
+        "stale": stale,
+    }
+
+
+def _time_calls(fn: Callable[[Any], Any], cases: Sequence[Any]) -> List[float]:
+    latencies = []
+    for case in cases:
+        start = time.perf_counter()
+        fn(case)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def benchmark_task_store(
+    num_tasks: int = 50000, num_agents: int = 200, num_queries: int = 200
+) -> Dict[str, Any]:
+    """
+    Times agent, agent + status, agent + status + priority and parent lookups
+    (the view_tasks / search_tasks filter shapes), update_fields,
+    dependents_of and health_counts on the indexes, and each by linear scan.
+    """
+    build_start = time.perf_counter()
+    store = build_synthetic_store(num_tasks, num_agents)
+    build_s = time.perf_counter() - build_start
+
+    rng = random.Random(1)
+    shapes = {
+        "agent": lambda: {"assigned_to": f"agent_{rng.randrange(num_agents)}"},
+        "agent_status": lambda: {
+            "assigned_to": f"agent_{rng.randrange(num_agents)}",
+            "status": rng.choice(STATUSES),
+        },
+        "agent_status_priority": lambda: {
+            "assigned_to": f"agent_{rng.randrange(num_agents)}",
+            "status": rng.choice(STATUSES),
+            "priority": rng.choice(PRIORITIES),
+        },
+        "parent": lambda: {"parent_task": f"task_{rng.randrange(num_tasks):08d}"},
+    }
+
+    results: Dict[str, Any] = {
+        "tasks": num_tasks,
+        "agents": num_agents,
+        "queries_per_shape": num_queries,
+        "build_s": round(build_s, 3),
+        "lookups": {},
+    }
+    for name, make_case in shapes.items():
+        cases = [make_case() for _ in range(num_queries)]
+        for filters in cases[:10]:
+            indexed_ids = [t["task_id"] for t in store.query(**filters)]
+            linear_ids = [t["task_id"] for t in _linear_query(store, **filters)]
+            if indexed_ids != linear_ids:
+                raise AssertionError(f"Indexed and linear results differ for {filters}")
+        indexed = _time_calls(lambda f: store.query(**f), cases)
+        linear = _time_calls(lambda f: _linear_query(store, **f), cases)
+        results["lookups"][name] = {
+            "mean_matches": round(sum(len(store.query(**f)) for f in cases) / len(cases), 1),
+            "indexed": _latency_summary(indexed),
+            "linear_scan": _latency_summary(linear),
+        }
+
+    update_ids = rng.sample(list(store), min(num_queries, num_tasks))
+    update_latencies = []
+    for task_id in update_ids:
+        start = time.perf_counter()
+        store.update_fields(task_id, {"status": rng.choice(STATUSES)})
+        update_latencies.append(time.perf_counter() - start)
+    results["update_fields"] = _latency_summary(update_latencies)
+
+    def linear_dependents(task_id: str) -> List[str]:
+        return sorted(
+            other_id
+            for other_id, task in store.items()
+            if task_id in task.get("depends_on_tasks", [])
+        )
+
+    dependency_cases = [f"task_{rng.randrange(num_tasks):08d}" for _ in range(num_queries)]
+    for task_id in dependency_cases[:10]:
+        if store.dependents_of(task_id) != linear_dependents(task_id):
+            raise AssertionError(f"Indexed and linear dependents differ for {task_id}")
+    results["dependents_of"] = {
+        "indexed": _latency_summary(_time_calls(store.dependents_of, dependency_cases)),
+        "linear_scan": _latency_summary(_time_calls(linear_dependents, dependency_cases)),
+    }
+
+    stale_before = datetime(2025, 3, 1)
+    health_cases = [{}] * 10 + [
+        {"assigned_to": f"agent_{rng.randrange(num_agents)}"} for _ in range(10)
+    ]
+    for filters in health_cases[::10] + health_cases[-3:]:
+        if store.health_counts(stale_before, **filters) != _linear_health_counts(
+            store, stale_before, **filters
+        ):
+            raise AssertionError(f"Indexed and linear health counts differ for {filters}")
+    for label, cases in (("all", health_cases[:10]), ("agent", health_cases[10:])):
+        results[f"health_counts_{label}"] = {
+            "indexed": _latency_summary(
+                _time_calls(lambda f: store.health_counts(stale_before, **f), cases)
+            ),
+            "linear_scan": _latency_summary(
+                _time_calls(lambda f: _linear_health_counts(store, stale_before, **f), cases)
+            ),
+        }
+    return results
+
+
+def _estimate_tokens_uncached(text: str) -> int:
+    """Token estimate as view_tasks computed it before: encoder looked up per call."""
+    try:
+        import tiktoken
+
+        return len(tiktoken.encoding_for_model("gpt-4").encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def benchmark_task_listing(num_tasks: int = 10000, repeats: int = 5) -> Dict[str, Any]:
+    """
+    Times view_tasks (admin, all tasks) with the default max_tokens and with
+    a budget large enough for every task, cold (empty render cache) and warm,
+    and the old full listing once: every task rendered and encoded, with the
+    encoder looked up per call. Runs on a scratch store swapped in for
+    g.tasks (restored afterwards).
+    """
+    from . import globals as g
+    from ..tools import task_tools
+
+    store = build_synthetic_store(num_tasks, num_agents=50)
+    for task_id, task in list(store.items()):
+        store.update_fields(task_id, {"description": f"{task['title']} description. " * 8})
+    original_tasks, original_admin_token = g.tasks, g.admin_token
+    g.tasks = store
+    g.admin_token = original_admin_token or "benchmark-admin-token"
+
+    def view(max_tokens: int, cold: bool) -> float:
+        if cold:
+            task_tools._rendered_task_cache.clear()
+        start = time.perf_counter()
+        asyncio.run(
+            task_tools.view_tasks_tool_impl(
+                {"token": g.admin_token, "max_tokens": max_tokens}
+            )
+        )
+        return time.perf_counter() - start
+
+    def old_full_listing() -> float:
+        start = time.perf_counter()
+        for task in store.iter_sorted("created_at"):
+            _estimate_tokens_uncached(task_tools._format_task_detailed(task))
+        return time.perf_counter() - start
+
+    results: Dict[str, Any] = {"tasks": num_tasks}
+    try:
+        for label, max_tokens in (("default_budget", 25000), ("full_listing", 10**9)):
+            cold = [view(max_tokens, cold=True) for _ in range(repeats)]
+            warm = [view(max_tokens, cold=False) for _ in range(repeats)]
+            results[label] = {
+                "max_tokens": max_tokens,
+                "cold": _latency_summary(cold),
+                "warm": _latency_summary(warm),
+            }
+        # Timed once: it renders and encodes every task, which is what is slow
+        results["baseline_full_listing_s"] = round(old_full_listing(), 3)
+    finally:
+        g.tasks, g.admin_token = original_tasks, original_admin_token
+        task_tools._rendered_task_cache.clear()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the indexed task cache.")
+    parser.add_argument("--tasks", type=int, default=50000, help="Number of synthetic tasks")
+    parser.add_argument("--agents", type=int, default=200, help="Number of distinct assignees")
+    parser.add_argument("--queries", type=int, default=200, help="Lookups per filter shape")
+    parser.add_argument("--listing", action="store_true", help="Benchmark view_tasks output budgeting")
+    args = parser.parse_args()
+
+    if args.listing:
+        results = benchmark_task_listing(args.tasks)
+    else:
+        results = benchmark_task_store(args.tasks, args.agents, args.queries)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# Agent-MCP/mcp_template/mcp_server_src/core/task_changes.py
+"""
+Task change feed: a monotonic log of task mutations (g.tasks.changes).
+
+TaskStore (core/task_store.py) records an entry for every task it creates,
+updates (with the fields whose value changed) or deletes, and a "ready"
+entry when completing a task leaves a dependent with nothing left to wait
+on. Each entry has a sequence number; clients keep the last one they saw
+and ask for the changes after it (wait_for_task_changes, or the SSE stream
+at /api/tasks/changes/stream), so an idle agent waits on an event instead
+of re-rendering view_tasks to find out that nothing happened.
+
+The log is in memory and bounded. Sequence numbers start at the current
+time in microseconds, so they keep increasing across server restarts; a
+client whose position is older than the buffered changes (or from a later
+sequence than this process has issued) gets `reset` and should re-read the
+tasks it cares about once before following the feed again.
+"""
+import asyncio
+import datetime
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Changes kept in memory; clients further behind than this are reset
+TASK_CHANGE_LOG_SIZE = 10000
+CHANGE_TYPES = ("created", "updated", "deleted", "ready")
+
+
+class TaskChangeLog:
+    """Bounded, sequence-numbered log of task changes with async waiters."""
+
+    def __init__(self, max_entries: int = TASK_CHANGE_LOG_SIZE):
+        self._lock = threading.Lock()
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        self._seq = time.time_ns() // 1000
+        # Sequence of the newest change no longer buffered: positions before
+        # it cannot be resumed
+        self._floor = self._seq
+        # (loop, event) of coroutines blocked in wait_for_changes
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the most recent change."""
+        return self._seq
+
+    def record(
+        self,
+        task_id: str,
+        change: str,
+        task: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+        previous_assigned_to: Optional[str] = None,
+    ) -> int:
+        """
+        Appends a change of `task` (its state after the change, or before it
+        for deletions) and wakes waiters. Returns the change's sequence number.
+        """
+        task = task or {}
+        with self._lock:
+            self._seq += 1
+            entry = {
+                "seq": self._seq,
+                "task_id": task_id,
+                "change": change,
+                "fields": fields or [],
+                "status": task.get("status"),
+                "assigned_to": task.get("assigned_to"),
+                "at": datetime.datetime.now().isoformat(),
+            }
+            if previous_assigned_to is not None:
+                entry["previous_assigned_to"] = previous_assigned_to
+            if len(self._entries) == self._entries.maxlen:
+                self._floor = self._entries[0]["seq"]
+            self._entries.append(entry)
+            self._wake_waiters()
+            return self._seq
+
+    def truncate(self) -> None:
+        """
+        Drops every buffered change (e.g. after loading the task cache at
+        startup); clients positioned before now are reset.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._floor = self._seq
+            self._wake_waiters()
+
+    def reset_all(self) -> None:
+        """Starts a new position that every existing client must reset from (cache cleared)."""
+        with self._lock:
+            self._seq += 1
+            self._entries.clear()
+            self._floor = self._seq
+            self._wake_waiters()
+
+    def changes_since(
+        self, since_seq: int, agent_id: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """
+        Changes after `since_seq` (oldest first, at most `limit`), optionally
+        only those of tasks assigned to `agent_id` before or after the change.
+        Returns (changes, next_seq, reset): next_seq is the position to ask
+        from next time; reset means changes after since_seq are no longer
+        known, so the client should re-read tasks and continue from next_seq.
+        """
+        with self._lock:
+            return self._changes_since(since_seq, agent_id, limit)
+
+    def _changes_since(
+        self, since_seq: int, agent_id: Optional[str], limit: int
+    ) -> Tuple[List[Dict[str, Any]], int, bool]:
+        if since_seq < self._floor or since_seq > self._seq:
+            return [], self._seq, True
+        newer: List[Dict[str, Any]] = []
+        for entry in reversed(self._entries):
+            if entry["seq"] <= since_seq:
+                break
+            newer.append(entry)
+        newer.reverse()
+        if agent_id is not None:
+            newer = [
+                entry
+                for entry in newer
+                if agent_id in (entry["assigned_to"], entry.get("previous_assigned_to"))
+            ]
+        if len(newer) > limit:
+            newer = newer[:limit]
+            return [dict(entry) for entry in newer], newer[-1]["seq"], False
+        return [dict(entry) for entry in newer], self._seq, False
+
+    async def wait_for_changes(
+        self,
+        since_seq: int,
+        timeout: float,
+        agent_id: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """
+        changes_since, but if there are none yet waits up to `timeout`
+        seconds for one (without polling). Returns no changes on timeout.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            waiter = (loop, asyncio.Event())
+            with self._lock:
+                changes, next_seq, reset = self._changes_since(since_seq, agent_id, limit)
+                if changes or reset:
+                    return changes, next_seq, reset
+                self._waiters.append(waiter)
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    return changes, next_seq, reset
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    return self.changes_since(since_seq, agent_id, limit)
+            finally:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+            # Changes up to next_seq were all filtered out for agent_id:
+            # keep waiting from there
+            since_seq = next_seq
+
+    def _wake_waiters(self) -> None:
+        """Wakes every waiter once (they re-register if nothing relevant changed)."""
+        waiters, self._waiters = self._waiters, []
+        for loop, event in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(event.set)
@@ -0,0 +1,137 @@
+# Agent-MCP/mcp_template/mcp_server_src/core/task_scheduler.py
+"""
+Ready-set scheduling over the task dependency DAG held by g.tasks.
+
+The TaskStore keeps per-task unmet-dependency counters and the ready set
+(pending tasks whose dependencies are all completed) up to date as tasks
+change. This module ranks ready tasks for dispatch: tasks on the longest
+chain of unfinished work first (critical-path length), then by priority,
+then oldest first. Critical-path lengths are recomputed only when the
+store's dependency structure or statuses have changed.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .task_store import TaskStore
+
+# Statuses of work still to be done ("unassigned": created without an assignee)
+UNFINISHED_STATUSES = ("pending", "in_progress", "unassigned")
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+_cp_lock = threading.Lock()
+# (id(store), structure_version) -> critical-path lengths
+_cp_cache: Tuple[Optional[Tuple[int, int]], Dict[str, int]] = (None, {})
+
+
+def _is_unfinished(store: TaskStore, task_id: str) -> bool:
+    return task_id in store and store[task_id].get("status") in UNFINISHED_STATUSES
+
+
+def critical_path_lengths(store: TaskStore) -> Dict[str, int]:
+    """
+    For every unfinished (pending / in_progress / unassigned) task, the number of tasks
+    on the longest chain of unfinished tasks starting at it and following
+    "is depended on by" edges (1 for a task nothing unfinished waits on).
+    Dependency cycles are cut where they are found.
+    """
+    global _cp_cache
+    cache_key = (id(store), store.structure_version)
+    with _cp_lock:
+        if _cp_cache[0] == cache_key:
+            return _cp_cache[1]
+
+    lengths: Dict[str, int] = {}
+    on_stack = set()
+    for root_id in list(store):
+        if root_id in lengths or not _is_unfinished(store, root_id):
+            continue
+        # Iterative post-order DFS over dependents
+        stack = [(root_id, iter(store.dependents_of(root_id)))]
+        on_stack.add(root_id)
+        while stack:
+            task_id, dependents = stack[-1]
+            advanced = False
+            for dependent_id in dependents:
+                if (
+                    dependent_id in lengths
+                    or dependent_id in on_stack
+                    or not _is_unfinished(store, dependent_id)
+                ):
+                    continue
+                stack.append((dependent_id, iter(store.dependents_of(dependent_id))))
+                on_stack.add(dependent_id)
+                advanced = True
+                break
+            if advanced:
+                continue
+            stack.pop()
+            on_stack.discard(task_id)
+            lengths[task_id] = 1 + max(
+                (lengths.get(d, 0) for d in store.dependents_of(task_id)),
+                default=0,
+            )
+
+    if store.structure_version == cache_key[1]:  # Not changed while computing
+        with _cp_lock:
+            _cp_cache = (cache_key, lengths)
+    return lengths
+
+
+def critical_path(store: TaskStore) -> List[str]:
+    """Task ids along the longest chain of unfinished tasks, first to last."""
+    lengths = critical_path_lengths(store)
+    if not lengths:
+        return []
+    task_id = min(lengths, key=lambda t: (-lengths[t], t))
+    path = [task_id]
+    while True:
+        if lengths[task_id] == 1:
+            return path
+        next_ids = [
+            dependent_id
+            for dependent_id in store.dependents_of(task_id)
+            if lengths.get(dependent_id) == lengths[task_id] - 1
+        ]
+        if not next_ids:  # Only possible where a cycle was cut
+            return path
+        task_id = min(next_ids)
+        path.append(task_id)
+
+
+def next_ready_tasks(
+    store: TaskStore,
+    agent_id: Optional[str],
+    limit: int = 1,
+    include_unassigned: bool = False,
+) -> List[Tuple[str, int]]:
+    """
+    Ready tasks for `agent_id` (all agents if None), best first, as
+    (task_id, critical-path length). With include_unassigned, tasks nobody
+    is assigned to are candidates too: ready pending ones, and tasks created
+    unassigned (status "unassigned") whose dependencies are all completed.
+    """
+    ready_ids = store.ready_ids(agent_id)
+    if include_unassigned:
+        unassigned_ids = store.ids_where("assigned_to", None)
+        if agent_id is not None:
+            ready_ids |= store.ready_ids(None) & unassigned_ids
+        ready_ids |= {
+            task_id
+            for task_id in store.ids_where("status", "unassigned") & unassigned_ids
+            if store.unmet_dependency_count(task_id) == 0
+        }
+    if not ready_ids:
+        return []
+    lengths = critical_path_lengths(store)
+
+    def rank(task_id: str) -> Tuple[int, int, str, str]:
+        task = store.get(task_id) or {}
+        return (
+            -lengths.get(task_id, 1),
+            PRIORITY_RANK.get(task.get("priority"), 1),
+            task.get("created_at") or "",
+            task_id,
+        )
+
+    ranked = sorted(ready_ids, key=rank)[:limit]
+    return [(task_id, lengths.get(task_id, 1)) for task_id in ranked]
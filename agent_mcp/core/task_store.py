@@ -0,0 +1,646 @@
+# Agent-MCP/mcp_template/mcp_server_src/core/task_store.py
+"""
+In-memory task cache with secondary indexes (g.tasks).
+
+TaskStore behaves like the Task ID -> task dict mapping it replaces
+(`in`, `[]`, `.get`, `.items()`, iteration), and additionally keeps the ids
+of each assigned_to / status / priority / parent_task value, the sort
+orders view_tasks pages through (created_at, updated_at, priority, status)
+and the depends_on_tasks graph (forward and reverse adjacency) up to date on
+every mutation, so filtered lookups, pages and "what depends on X" cost
+O(matches) instead of a scan over every task.
+
+For scheduling (core/task_scheduler.py) it also keeps, per task, the number
+of dependencies that are not completed, and the set of ready tasks (pending,
+all dependencies completed). Completing a task only touches its dependents.
+
+For health reporting (view_tasks show_health_analysis) it keeps the set of
+pending tasks that have dependencies and the unfinished tasks ordered by
+their parsed updated_at, so status / priority / blocked / stale counts are
+read off the indexes instead of recomputed over every task.
+
+Every mutation is also recorded in `changes` (core/task_changes.py), the
+change feed agents follow instead of polling view_tasks.
+
+Stored task dicts must not be modified in place; use `update_fields` (or
+assign a new dict) so the indexes follow. Re-assigning the same dict object
+raises ValueError, since the store cannot tell what changed.
+"""
+import bisect
+import datetime
+import json
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .task_changes import TaskChangeLog
+
+INDEXED_FIELDS = ("assigned_to", "status", "priority", "parent_task")
+SORT_ORDERS = ("created_at", "updated_at", "priority", "status")
+PRIORITY_SORT_RANK = {"high": 3, "medium": 2, "low": 1}
+STATUS_SORT_RANK = {
+    "failed": 5,
+    "in_progress": 4,
+    "pending": 3,
+    "completed": 2,
+    "cancelled": 1,
+}
+UNFINISHED_STATUSES = ("pending", "in_progress")
+
+
+def _sort_key(sort_by: str, task_id: str, task: Dict[str, Any]) -> Tuple:
+    """
+    Position of a task in a sort order (ascending; listed newest / highest
+    first by iterating backwards). Ties fall back to created_at, then the
+    task id, which is always the last element.
+    """
+    created_at = task.get("created_at") or ""
+    if sort_by == "updated_at":
+        return (task.get("updated_at") or "", created_at, task_id)
+    if sort_by == "priority":
+        return (PRIORITY_SORT_RANK.get(task.get("priority"), 2), created_at, task_id)
+    if sort_by == "status":
+        return (STATUS_SORT_RANK.get(task.get("status"), 3), created_at, task_id)
+    return (created_at, task_id)
+
+
+def _dependency_ids(task: Dict[str, Any]) -> Tuple[str, ...]:
+    """depends_on_tasks as a tuple of ids (cached tasks hold a list, DB rows JSON)."""
+    depends_on = task.get("depends_on_tasks") or []
+    if isinstance(depends_on, str):
+        try:
+            depends_on = json.loads(depends_on)
+        except json.JSONDecodeError:
+            return ()
+    if not isinstance(depends_on, list):
+        return ()
+    return tuple(dict.fromkeys(dep_id for dep_id in depends_on if isinstance(dep_id, str)))
+
+
+def _dependency_state(status: Optional[str]) -> Optional[str]:
+    """
+    What a task's status means to tasks depending on it (and to critical
+    paths): completed, stopped (failed / cancelled), unfinished (pending /
+    in_progress), or the status itself for any other value.
+    """
+    if status in ("failed", "cancelled"):
+        return "stopped"
+    if status in UNFINISHED_STATUSES:
+        return "unfinished"
+    return status
+
+
+def _structure(task: Dict[str, Any]) -> Tuple[Tuple[str, ...], Optional[str]]:
+    """The part of a task structure_version follows: its dependencies and dependency state."""
+    return _dependency_ids(task), _dependency_state(task.get("status"))
+
+
+def _activity_time(task: Dict[str, Any]) -> Optional[datetime.datetime]:
+    """updated_at as a naive datetime (UTC suffixes dropped), None if unusable."""
+    updated_at = task.get("updated_at")
+    if not isinstance(updated_at, str) or not updated_at:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(
+            updated_at.replace("Z", "+00:00").replace("+00:00", "")
+        )
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is None else None
+
+
+class TaskStore(MutableMapping):
+    """Task ID -> task dict, with per-field id indexes, sort orders and the dependency graph."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[Any, Set[str]]] = {
+            field: {} for field in INDEXED_FIELDS
+        }
+        # Sort order -> _sort_key of every task, ascending
+        self._orders: Dict[str, List[Tuple]] = {sort_by: [] for sort_by in SORT_ORDERS}
+        # Task ID -> ids it depends on / ids depending on it (which may
+        # include ids of tasks that are not, or no longer, cached)
+        self._depends_on: Dict[str, Tuple[str, ...]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        # Task ID -> dependencies not completed (missing ones count as unmet)
+        self._unmet_counts: Dict[str, int] = {}
+        self._ready: Set[str] = set()
+        # Bumped whenever the set of tasks, a dependency or a task's
+        # dependency state (see _dependency_state) changes
+        self._structure_version = 0
+        # Task ID -> revision, renewed on every set / update_fields (for caches
+        # of values derived from a task, e.g. rendered output)
+        self._revisions: Dict[str, int] = {}
+        self._revision_seq = 0
+        # Health aggregates: pending tasks with dependencies, and unfinished
+        # tasks by last activity ((updated_at, id) ascending + id -> updated_at)
+        self._waiting_on_dependencies: Set[str] = set()
+        self._activity: List[Tuple[datetime.datetime, str]] = []
+        self._activity_times: Dict[str, datetime.datetime] = {}
+        # Change feed, plus dependent id -> whether it was ready before the
+        # mutation in progress (to record the dependents it made ready)
+        self.changes = TaskChangeLog()
+        self._ready_before: Dict[str, bool] = {}
+
+    # --- Index maintenance ---
+
+    def _index(self, task_id: str, task: Dict[str, Any]) -> None:
+        for field in INDEXED_FIELDS:
+            self._indexes[field].setdefault(task.get(field), set()).add(task_id)
+        for sort_by, order in self._orders.items():
+            bisect.insort(order, _sort_key(sort_by, task_id, task))
+        self._link_dependencies(task_id, task)
+        self._unmet_counts[task_id] = sum(
+            1 for dep_id in self._depends_on.get(task_id, ()) if not self._is_completed(dep_id)
+        )
+        if task.get("status") == "completed":
+            self._adjust_dependents(task_id, -1)
+        self._refresh_ready(task_id)
+        if task.get("status") == "pending" and task_id in self._depends_on:
+            self._waiting_on_dependencies.add(task_id)
+        self._index_activity(task_id, task)
+
+    def _unindex(self, task_id: str, task: Dict[str, Any]) -> None:
+        if task.get("status") == "completed":
+            self._adjust_dependents(task_id, 1)
+        for field in INDEXED_FIELDS:
+            index = self._indexes[field]
+            value = task.get(field)
+            ids = index.get(value)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del index[value]
+        for sort_by, order in self._orders.items():
+            self._remove_sort_key(order, _sort_key(sort_by, task_id, task))
+        self._unlink_dependencies(task_id)
+        self._unmet_counts.pop(task_id, None)
+        self._ready.discard(task_id)
+        self._waiting_on_dependencies.discard(task_id)
+        self._unindex_activity(task_id)
+
+    def _index_activity(self, task_id: str, task: Dict[str, Any]) -> None:
+        if task.get("status") not in UNFINISHED_STATUSES:
+            return
+        activity_time = _activity_time(task)
+        if activity_time is not None:
+            bisect.insort(self._activity, (activity_time, task_id))
+            self._activity_times[task_id] = activity_time
+
+    def _unindex_activity(self, task_id: str) -> None:
+        activity_time = self._activity_times.pop(task_id, None)
+        if activity_time is not None:
+            self._remove_sort_key(self._activity, (activity_time, task_id))
+
+    def _link_dependencies(self, task_id: str, task: Dict[str, Any]) -> None:
+        depends_on = _dependency_ids(task)
+        if depends_on:
+            self._depends_on[task_id] = depends_on
+            for dep_id in depends_on:
+                self._dependents.setdefault(dep_id, set()).add(task_id)
+
+    @staticmethod
+    def _remove_sort_key(order: List[Tuple], key: Tuple) -> None:
+        position = bisect.bisect_left(order, key)
+        if position < len(order) and order[position] == key:
+            del order[position]
+
+    def _is_completed(self, task_id: str) -> bool:
+        task = self._tasks.get(task_id)
+        return task is not None and task.get("status") == "completed"
+
+    def _adjust_dependents(self, task_id: str, delta: int) -> None:
+        """A dependency became (delta -1) or stopped being (+1) completed: O(dependents)."""
+        for dependent_id in self._dependents.get(task_id, ()):
+            if dependent_id != task_id and dependent_id in self._unmet_counts:
+                self._ready_before.setdefault(dependent_id, dependent_id in self._ready)
+                self._unmet_counts[dependent_id] += delta
+                self._refresh_ready(dependent_id)
+
+    def _refresh_ready(self, task_id: str) -> None:
+        task = self._tasks.get(task_id)
+        if (
+            task is not None
+            and task.get("status") == "pending"
+            and self._unmet_counts.get(task_id) == 0
+        ):
+            self._ready.add(task_id)
+        else:
+            self._ready.discard(task_id)
+
+    def _bump_revision(self, task_id: str) -> None:
+        self._revision_seq += 1
+        self._revisions[task_id] = self._revision_seq
+
+    def _record_change(
+        self,
+        task_id: str,
+        change: str,
+        task: Dict[str, Any],
+        fields: Optional[List[str]] = None,
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Records a task's change, then the dependents it made ready."""
+        previous_assigned_to = None
+        if previous is not None and previous.get("assigned_to") != task.get("assigned_to"):
+            previous_assigned_to = previous.get("assigned_to")
+        self.changes.record(task_id, change, task, fields, previous_assigned_to)
+        ready_before, self._ready_before = self._ready_before, {}
+        for dependent_id, was_ready in ready_before.items():
+            if not was_ready and dependent_id in self._ready:
+                self.changes.record(dependent_id, "ready", self._tasks[dependent_id])
+
+    @staticmethod
+    def _changed_fields(before: Dict[str, Any], after: Dict[str, Any]) -> List[str]:
+        return sorted(
+            field
+            for field in before.keys() | after.keys()
+            if before.get(field) != after.get(field)
+        )
+
+    def _unlink_dependencies(self, task_id: str) -> None:
+        for dep_id in self._depends_on.pop(task_id, ()):
+            dependents = self._dependents.get(dep_id)
+            if dependents is not None:
+                dependents.discard(task_id)
+                if not dependents:
+                    del self._dependents[dep_id]
+
+    # --- Mapping API ---
+
+    def __getitem__(self, task_id: str) -> Dict[str, Any]:
+        return self._tasks[task_id]
+
+    def __setitem__(self, task_id: str, task: Dict[str, Any]) -> None:
+        with self._lock:
+            previous = self._tasks.get(task_id)
+            if previous is task:
+                # Its index entries were made from values it no longer has
+                raise ValueError(
+                    f"Task '{task_id}' was modified in place; use update_fields "
+                    "or assign a new dict"
+                )
+            if previous is not None:
+                self._unindex(task_id, previous)
+            self._tasks[task_id] = task
+            self._index(task_id, task)
+            self._bump_revision(task_id)
+            if previous is None or _structure(previous) != _structure(task):
+                self._structure_version += 1
+            if previous is None:
+                self._record_change(task_id, "created", task)
+            else:
+                fields = self._changed_fields(previous, task)
+                if fields:
+                    self._record_change(task_id, "updated", task, fields, previous)
+                else:
+                    self._ready_before.clear()
+
+    def __delitem__(self, task_id: str) -> None:
+        with self._lock:
+            task = self._tasks.pop(task_id)
+            self._unindex(task_id, task)
+            self._revisions.pop(task_id, None)
+            self._structure_version += 1
+            self._record_change(task_id, "deleted", task)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tasks.clear()
+            for index in self._indexes.values():
+                index.clear()
+            for order in self._orders.values():
+                order.clear()
+            self._depends_on.clear()
+            self._dependents.clear()
+            self._unmet_counts.clear()
+            self._ready.clear()
+            self._structure_version += 1
+            self._revisions.clear()
+            self._waiting_on_dependencies.clear()
+            self._activity.clear()
+            self._activity_times.clear()
+            self._ready_before.clear()
+            self.changes.reset_all()
+
+    # --- Task API ---
+
+    def update_fields(self, task_id: str, fields: Dict[str, Any]) -> bool:
+        """
+        Updates fields of a cached task, re-indexing it if an indexed field,
+        created_at or depends_on_tasks changes (only re-sorting it when just
+        updated_at changes). Returns False if the task is not cached.
+        """
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return False
+            changed = sorted(field for field in fields if fields[field] != task.get(field))
+            previous_assigned_to = task.get("assigned_to")
+            reindex = any(
+                field in fields and fields[field] != task.get(field)
+                for field in INDEXED_FIELDS + ("created_at", "depends_on_tasks")
+            )
+            resort_updated = (
+                not reindex
+                and "updated_at" in fields
+                and fields["updated_at"] != task.get("updated_at")
+            )
+            structure_before = _structure(task) if reindex else None
+            if reindex:
+                self._unindex(task_id, task)
+            elif resort_updated:
+                self._remove_sort_key(
+                    self._orders["updated_at"], _sort_key("updated_at", task_id, task)
+                )
+                self._unindex_activity(task_id)
+            task.update(fields)
+            if reindex:
+                self._index(task_id, task)
+                if _structure(task) != structure_before:
+                    self._structure_version += 1
+            elif resort_updated:
+                bisect.insort(
+                    self._orders["updated_at"], _sort_key("updated_at", task_id, task)
+                )
+                self._index_activity(task_id, task)
+            self._bump_revision(task_id)
+            if changed:
+                self._record_change(
+                    task_id, "updated", task, changed, {"assigned_to": previous_assigned_to}
+                )
+            return True
+
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        update_fields for several tasks under one lock acquisition, so readers
+        see either none or all of the changes. Returns the ids not cached.
+        """
+        with self._lock:
+            return [
+                task_id
+                for task_id, fields in updates.items()
+                if not self.update_fields(task_id, fields)
+            ]
+
+    def ids_where(self, field: str, value: Any) -> Set[str]:
+        """Ids of the tasks whose indexed `field` equals `value` (a copy)."""
+        with self._lock:
+            return set(self._indexes[field].get(value, ()))
+
+    def dependencies_of(self, task_id: str) -> List[str]:
+        """Ids the cached task depends on (its depends_on_tasks, in order)."""
+        with self._lock:
+            return list(self._depends_on.get(task_id, ()))
+
+    def dependents_of(self, task_id: str) -> List[str]:
+        """Ids of the cached tasks whose depends_on_tasks contains `task_id`."""
+        with self._lock:
+            return sorted(self._dependents.get(task_id, ()))
+
+    def unmet_dependency_count(self, task_id: str) -> int:
+        """Dependencies of the cached task that are not completed (0 if not cached)."""
+        with self._lock:
+            return self._unmet_counts.get(task_id, 0)
+
+    def ready_ids(self, assigned_to: Optional[str] = None) -> Set[str]:
+        """
+        Ids of pending tasks whose dependencies are all completed, optionally
+        only those assigned to `assigned_to` (a copy).
+        """
+        with self._lock:
+            if assigned_to is None:
+                return set(self._ready)
+            return self._ready & self._indexes["assigned_to"].get(assigned_to, set())
+
+    def revision(self, task_id: str) -> int:
+        """
+        Changes whenever the cached task is set or updated (0 if not cached);
+        unique across tasks and never reused.
+        """
+        return self._revisions.get(task_id, 0)
+
+    @property
+    def structure_version(self) -> int:
+        """
+        Changes whenever the set of tasks, a task's dependencies or its
+        dependency state (completed / stopped / unfinished / other) change;
+        not on priority, assignee or parent changes.
+        """
+        return self._structure_version
+
+    def count_by(self, field: str) -> Dict[Any, int]:
+        """Number of tasks per value of an indexed field."""
+        with self._lock:
+            return {value: len(ids) for value, ids in self._indexes[field].items()}
+
+    def query(
+        self,
+        assigned_to: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        parent_task: Optional[str] = None,
+        newest_first: bool = True,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Tasks matching every given filter (None = no filter on that field),
+        in created_at order. Starts from the smallest matching index set, so
+        the cost is proportional to the matches, not to the store size.
+        """
+        filters = self._filters(assigned_to, status, priority, parent_task)
+        with self._lock:
+            if not filters:
+                order = self._orders["created_at"]
+                keys = reversed(order) if newest_first else iter(order)
+                results = []
+                for key in keys:
+                    if limit is not None and len(results) >= limit:
+                        break
+                    results.append(self._tasks[key[-1]])
+                return results
+            matches = [self._tasks[task_id] for task_id in self._matching_ids(filters)]
+        matches.sort(
+            key=lambda task: (task.get("created_at") or "", task["task_id"]),
+            reverse=newest_first,
+        )
+        return matches if limit is None else matches[:limit]
+
+    def count_matching(
+        self,
+        assigned_to: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        parent_task: Optional[str] = None,
+    ) -> int:
+        """Number of tasks matching every given filter (None = no filter)."""
+        filters = self._filters(assigned_to, status, priority, parent_task)
+        with self._lock:
+            if not filters:
+                return len(self._tasks)
+            return len(self._matching_ids(filters))
+
+    def health_counts(
+        self,
+        stale_before: datetime.datetime,
+        assigned_to: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        parent_task: Optional[str] = None,
+        task_ids: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Aggregates for task health over the tasks matching every given filter
+        (and, if given, among `task_ids`): total, status and priority
+        distributions, "blocked" (pending with dependencies) and "stale"
+        (pending / in_progress, last updated at or before `stale_before`).
+        Unfiltered, this is read off the indexes without visiting any task;
+        filtered, it costs O(matches) dictionary lookups.
+        """
+        filters = self._filters(assigned_to, status, priority, parent_task)
+        with self._lock:
+            if not filters and task_ids is None:
+                return {
+                    "total": len(self._tasks),
+                    "status_distribution": {
+                        value if value is not None else "unknown": len(ids)
+                        for value, ids in self._indexes["status"].items()
+                    },
+                    "priority_distribution": {
+                        value if value is not None else "medium": len(ids)
+                        for value, ids in self._indexes["priority"].items()
+                    },
+                    "blocked": len(self._waiting_on_dependencies),
+                    "stale": bisect.bisect_right(
+                        self._activity, (stale_before, chr(0x10FFFF))
+                    ),
+                }
+
+            ids = self._matching_ids(filters) if filters else list(self._tasks)
+            if task_ids is not None:
+                ids = set(ids).intersection(task_ids)
+            status_counts: Dict[str, int] = {}
+            priority_counts: Dict[str, int] = {}
+            blocked = stale = 0
+            for task_id in ids:
+                task = self._tasks[task_id]
+                task_status = task.get("status") or "unknown"
+                status_counts[task_status] = status_counts.get(task_status, 0) + 1
+                task_priority = task.get("priority") or "medium"
+                priority_counts[task_priority] = priority_counts.get(task_priority, 0) + 1
+                if task_id in self._waiting_on_dependencies:
+                    blocked += 1
+                activity_time = self._activity_times.get(task_id)
+                if activity_time is not None and activity_time <= stale_before:
+                    stale += 1
+            return {
+                "total": len(ids),
+                "status_distribution": status_counts,
+                "priority_distribution": priority_counts,
+                "blocked": blocked,
+                "stale": stale,
+            }
+
+    def sort_key(self, sort_by: str, task_id: str) -> Optional[Tuple]:
+        """The cached task's position in a sort order (None if not cached)."""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return None if task is None else _sort_key(sort_by, task_id, task)
+
+    def iter_sorted(
+        self,
+        sort_by: str = "created_at",
+        after: Optional[Tuple] = None,
+        descending: bool = True,
+        assigned_to: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        parent_task: Optional[str] = None,
+        batch_size: int = 256,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yields the tasks matching every given filter in `sort_by` order
+        (see SORT_ORDERS), starting strictly after the sort key `after` (keyset
+        pagination: tasks inserted or changed before the key do not shift
+        later pages). Only as much of the order as is consumed is visited.
+        The lock is not held between batches.
+        """
+        if sort_by not in self._orders:
+            raise ValueError(f"sort_by must be one of {SORT_ORDERS}, got '{sort_by}'.")
+        filters = self._filters(assigned_to, status, priority, parent_task)
+        after = tuple(after) if after is not None else None
+
+        with self._lock:
+            matching_ids = self._matching_ids(filters) if filters else None
+            if matching_ids is not None and len(matching_ids) * 8 < len(self._tasks):
+                # Few matches: sort just those rather than walk the whole order
+                keys = sorted(
+                    (_sort_key(sort_by, task_id, self._tasks[task_id]) for task_id in matching_ids),
+                    reverse=descending,
+                )
+                if after is not None:
+                    keys = [k for k in keys if (k < after if descending else k > after)]
+                tasks = [self._tasks[key[-1]] for key in keys]
+            else:
+                tasks = None
+        if tasks is not None:
+            yield from tasks
+            return
+
+        last = after
+        while True:
+            with self._lock:
+                order = self._orders[sort_by]
+                if descending:
+                    end = bisect.bisect_left(order, last) if last is not None else len(order)
+                    batch = order[max(0, end - batch_size) : end][::-1]
+                else:
+                    start = bisect.bisect_right(order, last) if last is not None else 0
+                    batch = order[start : start + batch_size]
+                batch_tasks = [self._tasks[key[-1]] for key in batch]
+            if not batch:
+                return
+            for task in batch_tasks:
+                if all(task.get(field) == value for field, value in filters.items()):
+                    yield task
+            last = batch[-1]
+
+    # --- Filter helpers ---
+
+    @staticmethod
+    def _filters(
+        assigned_to: Optional[str],
+        status: Optional[str],
+        priority: Optional[str],
+        parent_task: Optional[str],
+    ) -> Dict[str, str]:
+        return {
+            field: value
+            for field, value in (
+                ("assigned_to", assigned_to),
+                ("status", status),
+                ("priority", priority),
+                ("parent_task", parent_task),
+            )
+            if value is not None
+        }
+
+    def _matching_ids(self, filters: Dict[str, str]) -> List[str]:
+        """Ids matching all (non-empty) filters, starting from the smallest index set."""
+        candidate_sets = sorted(
+            (self._indexes[field].get(value, set()) for field, value in filters.items()),
+            key=len,
+        )
+        smallest, others = candidate_sets[0], candidate_sets[1:]
+        return [task_id for task_id in smallest if all(task_id in ids for ids in others)]
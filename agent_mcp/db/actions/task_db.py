@@ -6,6 +6,7 @@ from typing import Optional, Dict, List, Any
 
 from ...core.config import logger
 from ..connection import get_db_connection
+from .task_notes_db import RECENT_TASK_NOTES, attach_recent_notes
 
 # This module provides reusable database operations specifically for the 'tasks' table.
 
@@ -27,7 +28,8 @@ def _parse_task_json_fields(task_data: Dict[str, Any]) -> Dict[str, Any]:
 def get_task_by_id(task_id: str) -> Optional[Dict[str, Any]]:
     """
     Fetches a single task's details from the database by task_id.
-    Parses JSON fields (child_tasks, depends_on_tasks, notes) into Python lists.
+    Parses JSON fields (child_tasks, depends_on_tasks) into Python lists and
+    attaches all of the task's notes from task_notes.
     Returns None if the task is not found.
     """
     conn = None
@@ -37,7 +39,7 @@ def get_task_by_id(task_id: str) -> Optional[Dict[str, Any]]:
         cursor.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,))
         row = cursor.fetchone()
         if row:
-            return _parse_task_json_fields(dict(row))
+            return attach_recent_notes(cursor, [_parse_task_json_fields(dict(row))], limit=None)[0]
         return None
     except sqlite3.Error as e:
         logger.error(f"Database error fetching task by ID '{task_id}': {e}", exc_info=True)
@@ -52,7 +54,7 @@ def get_task_by_id(task_id: str) -> Optional[Dict[str, Any]]:
 def get_all_tasks_from_db() -> List[Dict[str, Any]]:
     """
     Fetches all tasks from the database.
-    Parses JSON fields for each task.
+    Parses JSON fields for each task and attaches its most recent notes.
     This is used for populating g.tasks at startup and for dashboard views.
     """
     tasks_list: List[Dict[str, Any]] = []
@@ -64,7 +66,7 @@ def get_all_tasks_from_db() -> List[Dict[str, Any]]:
         cursor.execute("SELECT * FROM tasks ORDER BY created_at DESC") # Order for consistency
         for row in cursor.fetchall():
             tasks_list.append(_parse_task_json_fields(dict(row)))
-        return tasks_list
+        return attach_recent_notes(cursor, tasks_list, RECENT_TASK_NOTES)
     except sqlite3.Error as e:
         logger.error(f"Database error fetching all tasks: {e}", exc_info=True)
         return [] # Return empty list on error
@@ -78,7 +80,7 @@ def get_all_tasks_from_db() -> List[Dict[str, Any]]:
 def get_tasks_by_agent_id(agent_id: str, status_filter: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Fetches tasks assigned to a specific agent, optionally filtered by status.
-    Parses JSON fields for each task.
+    Parses JSON fields for each task and attaches its most recent notes.
     """
     tasks_list: List[Dict[str, Any]] = []
     conn = None
@@ -98,7 +100,7 @@ def get_tasks_by_agent_id(agent_id: str, status_filter: Optional[str] = None) ->
         cursor.execute(query, tuple(params))
         for row in cursor.fetchall():
             tasks_list.append(_parse_task_json_fields(dict(row)))
-        return tasks_list
+        return attach_recent_notes(cursor, tasks_list, RECENT_TASK_NOTES)
     except sqlite3.Error as e:
         logger.error(f"Database error fetching tasks for agent '{agent_id}': {e}", exc_info=True)
         return []
@@ -116,7 +118,13 @@ def update_task_fields_in_db(task_id: str, fields_to_update: Dict[str, Any]) ->
     """
     Updates specified fields for a task in the database.
     Automatically updates the 'updated_at' timestamp.
-    Handles JSON serialization for complex fields like 'notes', 'child_tasks', 'depends_on_tasks'.
+    Handles JSON serialization for complex fields like 'child_tasks', 'depends_on_tasks'.
+    'notes' is not accepted: notes are append-only (task_notes_db.add_task_note),
+    and a task's cached notes are only its most recent ones.
+    Like the other database actions this only writes the row: callers update
+    g.tasks and, for the RAG side, refresh the live context view
+    (get_recent_context_view().refresh_tasks) and queue the task for
+    re-indexing (enqueue_rag_sources), as the task tools do.
     Returns True on success, False on failure.
     """
     if not task_id or not fields_to_update:
@@ -132,11 +140,15 @@ def update_task_fields_in_db(task_id: str, fields_to_update: Dict[str, Any]) ->
         update_values: List[Any] = []
 
         for field, value in fields_to_update.items():
+            if field == "notes":
+                logger.warning(f"Notes of task {task_id} cannot be replaced; append them with add_task_note. Skipping.")
+                continue
+
             # Basic validation against known task fields from schema.py
             # This list should match columns in the 'tasks' table.
             valid_fields = [
                 "title", "description", "assigned_to", "status", "priority",
-                "parent_task", "child_tasks", "depends_on_tasks", "notes"
+                "parent_task", "child_tasks", "depends_on_tasks"
             ]
             if field not in valid_fields:
                 logger.warning(f"Attempted to update invalid task field: {field} for task {task_id}. Skipping.")
@@ -152,11 +164,10 @@ def update_task_fields_in_db(task_id: str, fields_to_update: Dict[str, Any]) ->
                 "parent_task": "parent_task",
                 "child_tasks": "child_tasks",
                 "depends_on_tasks": "depends_on_tasks",
-                "notes": "notes"
             }
             safe_field = safe_field_mapping[field]  # This will raise KeyError if invalid
             update_clauses.append(f"{safe_field} = ?")
-            if field in ["child_tasks", "depends_on_tasks", "notes"]:
+            if field in ["child_tasks", "depends_on_tasks"]:
                 update_values.append(json.dumps(value or [])) # Ensure JSON list for these
             else:
                 update_values.append(value)
@@ -0,0 +1,209 @@
+# Agent-MCP/mcp_template/mcp_server_src/db/actions/task_notes_db.py
+"""
+Append-only task notes (task_notes table).
+
+Each note is its own row, indexed by (task_id, timestamp), so adding a note
+is a single INSERT instead of rewriting the task's whole notes JSON array,
+and readers fetch only the notes they show. Tasks keep their most recent
+RECENT_TASK_NOTES notes (plus `notes_count`) in the g.tasks cache; older
+notes are read from the table on demand.
+
+Functions take the caller's cursor so notes are written in the same
+transaction as the task change they belong to.
+"""
+import datetime
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Notes listing tools show per task (and the g.tasks cache keeps) by default
+RECENT_TASK_NOTES = 5
+# Task ids per IN (...) query (stays under SQLite's bound-parameter limit)
+_TASK_ID_BATCH_SIZE = 500
+
+
+def _note_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "timestamp": row["timestamp"],
+        "author": row["author"],
+        "content": row["content"],
+    }
+
+
+def _batches(task_ids: List[str]) -> Iterable[List[str]]:
+    for start in range(0, len(task_ids), _TASK_ID_BATCH_SIZE):
+        yield task_ids[start : start + _TASK_ID_BATCH_SIZE]
+
+
+def add_task_note(
+    cursor: sqlite3.Cursor,
+    task_id: str,
+    author: Optional[str],
+    content: str,
+    timestamp: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Appends a note to a task. Returns the note as stored (timestamp, author, content)."""
+    note = {
+        "timestamp": timestamp or datetime.datetime.now().isoformat(),
+        "author": author,
+        "content": content,
+    }
+    cursor.execute(
+        "INSERT INTO task_notes (task_id, timestamp, author, content) VALUES (?, ?, ?, ?)",
+        (task_id, note["timestamp"], note["author"], note["content"]),
+    )
+    return note
+
+
+def add_task_notes(
+    cursor: sqlite3.Cursor, notes: Iterable[Tuple[str, Dict[str, Any]]]
+) -> None:
+    """Appends several (task_id, note dict) notes with one executemany."""
+    cursor.executemany(
+        "INSERT INTO task_notes (task_id, timestamp, author, content) VALUES (?, ?, ?, ?)",
+        [
+            (
+                task_id,
+                note.get("timestamp") or datetime.datetime.now().isoformat(),
+                note.get("author"),
+                note.get("content") or "",
+            )
+            for task_id, note in notes
+        ],
+    )
+
+
+def get_task_notes(
+    cursor: sqlite3.Cursor,
+    task_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    A task's notes, oldest first: all of them, or the last `limit` (optionally
+    only those written before the `before` timestamp, to page backwards).
+    """
+    sql = "SELECT timestamp, author, content FROM task_notes WHERE task_id = ?"
+    params: List[Any] = [task_id]
+    if before is not None:
+        sql += " AND timestamp < ?"
+        params.append(before)
+    sql += " ORDER BY timestamp DESC, note_id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    cursor.execute(sql, params)
+    return [_note_from_row(row) for row in reversed(cursor.fetchall())]
+
+
+def get_recent_task_notes(
+    cursor: sqlite3.Cursor,
+    task_ids: Optional[List[str]] = None,
+    limit: int = RECENT_TASK_NOTES,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    The last `limit` notes (oldest first) of each of `task_ids`, or of every
+    task with notes if task_ids is None. Tasks without notes are omitted.
+    """
+    base_sql = """
+        SELECT task_id, timestamp, author, content FROM (
+            SELECT task_id, timestamp, author, content, note_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY task_id ORDER BY timestamp DESC, note_id DESC
+                   ) AS recency
+            FROM task_notes {where}
+        )
+        WHERE recency <= ?
+        ORDER BY task_id, timestamp, note_id
+    """
+    if task_ids is None:
+        queries = [(base_sql.format(where=""), [limit])]
+    else:
+        queries = [
+            (
+                base_sql.format(
+                    where=f"WHERE task_id IN ({', '.join('?' for _ in batch)})"
+                ),
+                batch + [limit],
+            )
+            for batch in _batches(list(dict.fromkeys(task_ids)))
+        ]
+
+    notes_by_task: Dict[str, List[Dict[str, Any]]] = {}
+    for sql, params in queries:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            notes_by_task.setdefault(row["task_id"], []).append(_note_from_row(row))
+    return notes_by_task
+
+
+def count_task_notes(
+    cursor: sqlite3.Cursor, task_ids: Optional[List[str]] = None
+) -> Dict[str, int]:
+    """Number of notes per task (of `task_ids`, or of every task with notes)."""
+    if task_ids is None:
+        cursor.execute("SELECT task_id, COUNT(*) AS note_count FROM task_notes GROUP BY task_id")
+        return {row["task_id"]: row["note_count"] for row in cursor.fetchall()}
+    counts: Dict[str, int] = {}
+    for batch in _batches(list(dict.fromkeys(task_ids))):
+        cursor.execute(
+            f"SELECT task_id, COUNT(*) AS note_count FROM task_notes "
+            f"WHERE task_id IN ({', '.join('?' for _ in batch)}) GROUP BY task_id",
+            batch,
+        )
+        counts.update({row["task_id"]: row["note_count"] for row in cursor.fetchall()})
+    return counts
+
+
+def get_task_notes_text(cursor: sqlite3.Cursor, task_ids: List[str]) -> Dict[str, str]:
+    """
+    The contents of all notes of each of `task_ids`, joined with spaces (for
+    substring matching). Tasks without notes are omitted.
+    """
+    notes_text: Dict[str, str] = {}
+    for batch in _batches(list(dict.fromkeys(task_ids))):
+        cursor.execute(
+            f"SELECT task_id, GROUP_CONCAT(content, ' ') AS notes_text FROM task_notes "
+            f"WHERE task_id IN ({', '.join('?' for _ in batch)}) GROUP BY task_id",
+            batch,
+        )
+        notes_text.update({row["task_id"]: row["notes_text"] or "" for row in cursor.fetchall()})
+    return notes_text
+
+
+def attach_recent_notes(
+    cursor: sqlite3.Cursor,
+    tasks: List[Dict[str, Any]],
+    limit: Optional[int] = RECENT_TASK_NOTES,
+) -> List[Dict[str, Any]]:
+    """
+    Sets `notes` (the last `limit` notes, or all if limit is None) and
+    `notes_count` on task dicts loaded from the tasks table, in place.
+    """
+    task_ids = [task["task_id"] for task in tasks]
+    if limit is None:
+        notes_by_task = {task_id: get_task_notes(cursor, task_id) for task_id in task_ids}
+    else:
+        notes_by_task = get_recent_task_notes(cursor, task_ids, limit)
+    counts = count_task_notes(cursor, task_ids)
+    for task in tasks:
+        task["notes"] = notes_by_task.get(task["task_id"], [])
+        task["notes_count"] = counts.get(task["task_id"], 0)
+    return tasks
+
+
+def cached_notes_fields(
+    task: Optional[Dict[str, Any]], new_notes: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    The `notes` / `notes_count` fields of a cached task after appending
+    `new_notes`: only the most recent RECENT_TASK_NOTES notes are kept.
+    """
+    task = task or {}
+    current_notes = task.get("notes")
+    if not isinstance(current_notes, list):
+        current_notes = []
+    notes_count = task.get("notes_count", len(current_notes))
+    return {
+        "notes": (current_notes + list(new_notes))[-RECENT_TASK_NOTES:],
+        "notes_count": notes_count + len(new_notes),
+    }
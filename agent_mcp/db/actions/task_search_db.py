@@ -0,0 +1,118 @@
+# Agent-MCP/mcp_template/mcp_server_src/db/actions/task_search_db.py
+"""
+Full-text task search over the tasks_fts FTS5 table.
+
+tasks_fts indexes each task's title, description and note contents; triggers
+on the tasks table (db/schema.py) keep it in sync with every task write.
+Results are ranked with BM25, weighting title / description / notes matches
+3 / 2 / 1 like the substring scoring search_tasks used before.
+
+Query syntax: words match anywhere (any word is enough, more matching words
+rank higher) and "quoted words" match a phrase. Words also match as a
+prefix, like the substring search this replaced ("auth" finds
+"authentication"), but whole-word matches rank higher. For multi-word
+queries the whole query also counts as a phrase, so exact phrase matches
+rank first. A trailing `*` on a word is accepted and changes nothing.
+"""
+import re
+import sqlite3
+from typing import List, Optional, Tuple
+
+from ...core.config import logger
+from ..connection import get_db_connection
+
+TASK_FTS_TABLE = "tasks_fts"
+# bm25() weights per tasks_fts column: task_id (unindexed), title, description, notes
+TASK_SEARCH_WEIGHTS = (0.0, 3.0, 2.0, 1.0)
+MIN_TERM_LENGTH = 3
+
+_QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def parse_task_search_query(search_query: str) -> Tuple[List[str], List[List[str]]]:
+    """
+    Splits a search query into words and quoted phrases (lists of words).
+    Words shorter than MIN_TERM_LENGTH are dropped.
+    """
+    terms: List[str] = []
+    phrases: List[List[str]] = []
+    for phrase, token in _QUERY_TOKEN_RE.findall(search_query):
+        if phrase:
+            phrase_words = _words(phrase)
+            if phrase_words:
+                phrases.append(phrase_words)
+            continue
+        terms.extend(word for word in _words(token) if len(word) >= MIN_TERM_LENGTH)
+    return terms, phrases
+
+
+def build_task_match_query(search_query: str, include_notes: bool = True) -> Optional[str]:
+    """
+    FTS5 MATCH expression for a search query, or None if it has nothing to
+    search for. Every word is quoted, so user input cannot inject FTS syntax.
+    """
+    terms, phrases = parse_task_search_query(search_query)
+    if not terms and not phrases:
+        return None
+
+    # Each word as a prefix, and as a whole word so that exact matches score
+    # for both and outrank words it is merely the start of
+    parts = [part for word in terms for part in (f'"{word}"', f'"{word}"*')]
+    parts.extend(f'"{" ".join(phrase)}"' for phrase in phrases)
+    all_words = _words(search_query)
+    if not phrases and len(all_words) > 1:
+        # Whole-query phrase: exact phrase matches outrank scattered words
+        parts.append(f'"{" ".join(all_words)}"')
+
+    expression = " OR ".join(dict.fromkeys(parts))
+    if not include_notes:
+        expression = f"{{title description}} : ({expression})"
+    return expression
+
+
+def search_tasks_fts(
+    match_query: str,
+    assigned_to: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 20,
+) -> Optional[List[Tuple[str, float]]]:
+    """
+    Best matching tasks as (task_id, score), highest score first, optionally
+    restricted to an assignee and/or status. Scores are raw BM25 values
+    (negated so that higher is better); they are only comparable within one
+    query and can be tiny on small task lists. Returns None if the FTS index
+    is not available (SQLite without FTS5), so callers can fall back to
+    scanning.
+    """
+    weights = ", ".join(str(weight) for weight in TASK_SEARCH_WEIGHTS)
+    sql = f"""
+        SELECT f.task_id, bm25({TASK_FTS_TABLE}, {weights}) AS rank
+        FROM {TASK_FTS_TABLE} f JOIN tasks t ON t.rowid = f.rowid
+        WHERE {TASK_FTS_TABLE} MATCH ?
+    """
+    params: list = [match_query]
+    if assigned_to is not None:
+        sql += " AND t.assigned_to = ?"
+        params.append(assigned_to)
+    if status is not None:
+        sql += " AND t.status = ?"
+        params.append(status)
+    sql += " ORDER BY rank, t.updated_at DESC LIMIT ?"
+    params.append(limit)
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        rows = conn.execute(sql, params).fetchall()
+        return [(row["task_id"], -row["rank"]) for row in rows]
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Task full-text search unavailable, falling back to scanning: {e}")
+        return None
+    finally:
+        if conn:
+            conn.close()
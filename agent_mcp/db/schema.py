@@ -98,6 +98,8 @@ def handle_embedding_dimension_change(conn: sqlite3.Connection) -> None:
         # Drop the old virtual table
         cursor.execute("DROP TABLE IF EXISTS rag_embeddings")
         logger.debug("Dropped old rag_embeddings table")
+        # The quantized first-stage table (if any) has the old dimension too
+        cursor.execute("DROP TABLE IF EXISTS rag_embeddings_quantized")
 
         # Clear all stored hashes to force re-indexing of all content
         cursor.execute("DELETE FROM rag_meta WHERE meta_key LIKE 'hash_%'")
@@ -131,6 +133,147 @@ def handle_embedding_dimension_change(conn: sqlite3.Connection) -> None:
         raise RuntimeError(f"Embedding dimension migration failed: {e}") from e
 
 
+def migrate_task_notes(cursor: sqlite3.Cursor) -> int:
+    """
+    Moves notes still stored in the legacy tasks.notes JSON arrays into the
+    task_notes table (keeping their order) and empties those arrays.
+    Returns the number of notes moved (0 once everything is migrated).
+    """
+    # json_each / json_type raise on malformed JSON, so it is swapped for a
+    # harmless value first (malformed legacy notes are left where they are)
+    legacy_notes = "CASE WHEN json_valid({row}.notes) THEN {row}.notes ELSE '[]' END"
+    legacy_filter = (
+        f"json_type({legacy_notes.format(row='tasks')}) = 'array' "
+        f"AND json_array_length({legacy_notes.format(row='tasks')}) > 0"
+    )
+    cursor.execute(f"SELECT COUNT(*) FROM tasks WHERE {legacy_filter}")
+    if not cursor.fetchone()[0]:
+        return 0
+
+    cursor.execute(
+        f"""
+        INSERT INTO task_notes (task_id, timestamp, author, content)
+        SELECT t.task_id,
+               COALESCE(CASE WHEN n.type = 'object' THEN json_extract(n.value, '$.timestamp') END, t.updated_at),
+               CASE WHEN n.type = 'object' THEN json_extract(n.value, '$.author') END,
+               CASE WHEN n.type = 'object' THEN COALESCE(json_extract(n.value, '$.content'), '')
+                    ELSE CAST(n.value AS TEXT) END
+        FROM tasks t, json_each({legacy_notes.format(row="t")}) n
+        ORDER BY t.rowid, n.key
+    """
+    )
+    moved = cursor.rowcount
+    cursor.execute(f"UPDATE tasks SET notes = '[]' WHERE {legacy_filter}")
+    logger.info(f"Migrated {moved} task notes from tasks.notes into task_notes.")
+    return moved
+
+
+# Note contents of a task (task_notes rows, oldest first)
+_TASK_NOTES_TEXT_SQL = """(
+    SELECT group_concat(content, ' ') FROM (
+        SELECT content FROM task_notes WHERE task_id = {row}.task_id
+        ORDER BY timestamp, note_id
+    )
+)"""
+
+
+def ensure_task_search_index(cursor: sqlite3.Cursor, rebuild: bool = False) -> bool:
+    """
+    Creates the tasks_fts full-text index (title, description, note contents)
+    and the triggers that keep it in sync with the tasks and task_notes
+    tables, and (re)builds it when asked, when it is new or when it is out of
+    step (e.g. rowids renumbered by a VACUUM). Returns False if this SQLite
+    build has no FTS5.
+    """
+    try:
+        cursor.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                task_id UNINDEXED, title, description, notes,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """
+        )
+    except sqlite3.OperationalError as e:
+        logger.warning(
+            f"FTS5 not available ({e}); search_tasks will scan tasks instead of using tasks_fts."
+        )
+        return False
+
+    new_notes = _TASK_NOTES_TEXT_SQL.format(row="NEW")
+    # tasks_fts rowid = tasks rowid. Triggers whose definition depends on
+    # the notes storage are recreated so databases with older ones pick it up
+    for trigger in ("tasks_fts_after_insert", "tasks_fts_after_update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_after_insert AFTER INSERT ON tasks BEGIN
+            INSERT OR REPLACE INTO tasks_fts (rowid, task_id, title, description, notes)
+            VALUES (NEW.rowid, NEW.task_id, NEW.title, NEW.description, {new_notes});
+        END
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_after_delete AFTER DELETE ON tasks BEGIN
+            DELETE FROM tasks_fts WHERE rowid = OLD.rowid;
+        END
+    """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_after_update
+        AFTER UPDATE OF task_id, title, description ON tasks BEGIN
+            DELETE FROM tasks_fts WHERE rowid = OLD.rowid;
+            INSERT OR REPLACE INTO tasks_fts (rowid, task_id, title, description, notes)
+            VALUES (NEW.rowid, NEW.task_id, NEW.title, NEW.description, {new_notes});
+        END
+    """
+    )
+    # Appending a note only extends the notes text of that task's row
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_after_note_insert AFTER INSERT ON task_notes BEGIN
+            UPDATE tasks_fts SET notes = CASE
+                WHEN notes IS NULL OR notes = '' THEN NEW.content
+                ELSE notes || ' ' || NEW.content
+            END
+            WHERE rowid = (SELECT rowid FROM tasks WHERE task_id = NEW.task_id);
+        END
+    """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_after_note_delete AFTER DELETE ON task_notes BEGIN
+            UPDATE tasks_fts SET notes = {_TASK_NOTES_TEXT_SQL.format(row="OLD")}
+            WHERE rowid = (SELECT rowid FROM tasks WHERE task_id = OLD.task_id);
+        END
+    """
+    )
+
+    cursor.execute(
+        """
+        SELECT
+            (SELECT COUNT(*) FROM tasks) AS task_count,
+            (SELECT COUNT(*) FROM tasks_fts) AS indexed_count,
+            (SELECT COUNT(*) FROM tasks t LEFT JOIN tasks_fts f ON f.rowid = t.rowid
+             WHERE f.task_id IS NULL OR f.task_id != t.task_id) AS mismatched_count
+    """
+    )
+    task_count, indexed_count, mismatched_count = cursor.fetchone()
+    if rebuild or mismatched_count or task_count != indexed_count:
+        cursor.execute("DELETE FROM tasks_fts")
+        cursor.execute(
+            f"""
+            INSERT INTO tasks_fts (rowid, task_id, title, description, notes)
+            SELECT t.rowid, t.task_id, t.title, t.description, {_TASK_NOTES_TEXT_SQL.format(row="t")}
+            FROM tasks t
+        """
+        )
+        logger.info(f"Task full-text index (tasks_fts) rebuilt for {task_count} tasks.")
+    return True
+
+
 def init_database() -> None:
     """
     Initializes the SQLite database and creates tables if they don't exist.
@@ -193,12 +336,41 @@ def init_database() -> None:
                 parent_task TEXT,         -- Task ID of parent task or None
                 child_tasks TEXT,         -- JSON List of child Task IDs
                 depends_on_tasks TEXT,    -- JSON List of Task IDs this task depends on
-                notes TEXT                -- JSON List of note objects: [{"timestamp": "", "author": "", "content": ""}]
+                notes TEXT                -- Legacy JSON list of notes, migrated into task_notes (kept as '[]')
             )
         """
         )
         logger.debug("Tasks table ensured.")
 
+        # Task Notes Table (append-only, one row per note)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS task_notes (
+                note_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                author TEXT,           -- Agent ID or 'admin'
+                content TEXT NOT NULL
+            )
+        """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_task_notes_task_id_timestamp ON task_notes (task_id, timestamp)"
+        )
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS task_notes_after_task_delete AFTER DELETE ON tasks BEGIN
+                DELETE FROM task_notes WHERE task_id = OLD.task_id;
+            END
+        """
+        )
+        notes_migrated = migrate_task_notes(cursor)
+        logger.debug("Task_notes table ensured.")
+
+        # Full-text index over task titles, descriptions and notes (search_tasks)
+        if ensure_task_search_index(cursor, rebuild=notes_migrated > 0):
+            logger.debug("Tasks_fts table and triggers ensured.")
+
         # Agent Actions Table (Original main.py lines 306-317)
         cursor.execute(
             """
@@ -266,6 +438,13 @@ def init_database() -> None:
         cursor.execute(
             "CREATE INDEX IF NOT EXISTS idx_rag_chunks_source_type_ref ON rag_chunks (source_type, source_ref)"
         )
+        # Indexes backing the filtered vector search (path prefix and language filters)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_rag_chunks_source_ref ON rag_chunks (source_ref)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_rag_chunks_language ON rag_chunks (json_extract(metadata, '$.language'))"
+        )
         logger.debug("Rag_chunks table and index ensured.")
 
         # RAG Meta Table (for tracking indexing progress, hashes, etc.)
@@ -296,6 +475,26 @@ def init_database() -> None:
         )
         logger.debug("Rag_meta table and default entries ensured.")
 
+        # RAG chunk cache: chunker output per (content hash, chunker, params
+        # version), reused when a source is re-embedded without text changes
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rag_chunk_cache (
+                content_hash TEXT NOT NULL,
+                chunker TEXT NOT NULL,
+                params_version TEXT NOT NULL,
+                chunks TEXT NOT NULL, -- JSON list of [chunk_text, metadata]
+                created_at TEXT NOT NULL,
+                last_used_at TEXT NOT NULL,
+                PRIMARY KEY (content_hash, chunker, params_version)
+            )
+        """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_rag_chunk_cache_last_used ON rag_chunk_cache (last_used_at)"
+        )
+        logger.debug("Rag_chunk_cache table ensured.")
+
         # Agent Messages Table (for inter-agent communication)
         cursor.execute(
             """
@@ -0,0 +1,361 @@
+# Agent-MCP/mcp_template/mcp_server_src/features/rag/benchmark.py
+"""
+Benchmarks for the RAG vector search engines.
+
+Compares the in-process NumPy index against sqlite-vec's vec0 table on the
+project's existing embeddings, using stored chunk vectors as queries, and
+measures quantized (int8/binary) first-stage search with float re-ranking.
+Also times code analysis (entities, summary and chunks) over a source tree.
+
+Usage:
+    python -m agent_mcp.features.rag.benchmark --project-dir /path/to/project
+    python -m agent_mcp.features.rag.benchmark --quantization binary --oversample 4
+    python -m agent_mcp.features.rag.benchmark --code-analysis --project-dir /path/to/corpus
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from ...core.config import logger
+
+
+def _percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _latency_summary(latencies_s: Sequence[float]) -> Dict[str, float]:
+    latencies_ms = [t * 1000 for t in latencies_s]
+    return {
+        "p50_ms": round(_percentile(latencies_ms, 50), 3),
+        "p95_ms": round(_percentile(latencies_ms, 95), 3),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 3)
+        if latencies_ms
+        else 0.0,
+    }
+
+
+def _recall_at_k(truth: Sequence[int], candidate: Sequence[int]) -> float:
+    if not truth:
+        return 1.0
+    return len(set(truth) & set(candidate)) / len(truth)
+
+
+def benchmark_vector_engines(
+    conn: sqlite3.Connection, num_queries: int = 50, k: int = 13
+) -> Dict[str, Any]:
+    """
+    Runs `num_queries` KNN searches against vec0 and a NumPy index built from
+    the same vectors (in a temporary directory, leaving the live index alone).
+
+    Returns:
+        Latency percentiles, approximate vector memory and NumPy recall@k
+        measured against vec0 results. Recall is only meaningful for
+        normalized embeddings (as returned by OpenAI), where vec0's L2
+        ranking and the NumPy cosine ranking coincide.
+    """
+    from .vector_index import NumpyVectorIndex, _import_from_sqlite_vec
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT rowid FROM rag_embeddings")
+    all_ids = [row[0] for row in cursor.fetchall()]
+    if not all_ids:
+        raise RuntimeError("rag_embeddings is empty; index the project first.")
+
+    cursor.execute("SELECT embedding FROM rag_embeddings LIMIT 1")
+    dimension = len(cursor.fetchone()[0]) // 4
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        numpy_index = NumpyVectorIndex(Path(tmp_dir), dimension)
+        build_start = time.perf_counter()
+        _import_from_sqlite_vec(conn, numpy_index, set(all_ids))
+        build_seconds = time.perf_counter() - build_start
+
+        query_ids = random.sample(all_ids, min(num_queries, len(all_ids)))
+        query_vectors = numpy_index.get_vectors(query_ids)
+
+        vec0_latencies: List[float] = []
+        numpy_latencies: List[float] = []
+        recalls: List[float] = []
+        for query_id in query_ids:
+            query_vector = query_vectors[query_id].tolist()
+
+            start = time.perf_counter()
+            cursor.execute(
+                "SELECT rowid FROM rag_embeddings WHERE embedding MATCH ? AND k = ? ORDER BY distance",
+                (json.dumps(query_vector), k),
+            )
+            vec0_hits = [row[0] for row in cursor.fetchall()]
+            vec0_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            numpy_hits = [chunk_id for chunk_id, _ in numpy_index.search(query_vector, k)]
+            numpy_latencies.append(time.perf_counter() - start)
+
+            recalls.append(_recall_at_k(vec0_hits, numpy_hits))
+
+    vector_bytes = len(all_ids) * dimension * 4
+    return {
+        "vectors": len(all_ids),
+        "dimension": dimension,
+        "queries": len(query_ids),
+        "k": k,
+        "sqlite_vec": {
+            "latency": _latency_summary(vec0_latencies),
+            "vector_bytes": vector_bytes,
+        },
+        "numpy": {
+            "latency": _latency_summary(numpy_latencies),
+            "vector_bytes": vector_bytes,
+            "build_seconds": round(build_seconds, 3),
+            "recall_at_k_vs_sqlite_vec": round(sum(recalls) / len(recalls), 4),
+        },
+    }
+
+
+def benchmark_quantized_search(
+    conn: sqlite3.Connection,
+    quantization: str,
+    num_queries: int = 50,
+    k: int = 13,
+    oversample: int = 4,
+) -> Dict[str, Any]:
+    """
+    Builds a temporary quantized vec0 table from `rag_embeddings` and compares
+    quantized-only and quantized + float re-rank search against exact float KNN.
+
+    Returns:
+        Recall@k of both variants, latency percentiles and bytes per vector for
+        the float and quantized representations.
+    """
+    from .vector_index import QUANTIZATION_SCHEMES, quantize_sql
+
+    if quantization not in QUANTIZATION_SCHEMES:
+        raise ValueError(f"Unknown quantization '{quantization}'.")
+    column_type = QUANTIZATION_SCHEMES[quantization][0]
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT rowid, embedding FROM rag_embeddings")
+    rows = cursor.fetchall()
+    if not rows:
+        raise RuntimeError("rag_embeddings is empty; index the project first.")
+    all_ids = [row[0] for row in rows]
+    dimension = len(rows[0][1]) // 4
+    vector_blobs = dict(rows)
+
+    cursor.execute("DROP TABLE IF EXISTS temp.bench_quantized")
+    build_start = time.perf_counter()
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE temp.bench_quantized USING vec0(embedding {column_type}[{dimension}])"
+    )
+    cursor.executemany(
+        f"INSERT INTO temp.bench_quantized (rowid, embedding) VALUES (?, {quantize_sql(quantization)})",
+        rows,
+    )
+    build_seconds = time.perf_counter() - build_start
+
+    query_ids = random.sample(all_ids, min(num_queries, len(all_ids)))
+    exact_latencies: List[float] = []
+    quantized_latencies: List[float] = []
+    rerank_latencies: List[float] = []
+    quantized_recalls: List[float] = []
+    rerank_recalls: List[float] = []
+    try:
+        for query_id in query_ids:
+            query_blob = vector_blobs[query_id]
+
+            start = time.perf_counter()
+            cursor.execute(
+                "SELECT rowid FROM rag_embeddings WHERE embedding MATCH ? AND k = ? ORDER BY distance",
+                (query_blob, k),
+            )
+            exact_hits = [row[0] for row in cursor.fetchall()]
+            exact_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            cursor.execute(
+                f"SELECT rowid FROM temp.bench_quantized WHERE embedding MATCH {quantize_sql(quantization)} AND k = ? ORDER BY distance",
+                (query_blob, k),
+            )
+            quantized_hits = [row[0] for row in cursor.fetchall()]
+            quantized_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            cursor.execute(
+                f"SELECT rowid FROM temp.bench_quantized WHERE embedding MATCH {quantize_sql(quantization)} AND k = ?",
+                (query_blob, k * max(1, oversample)),
+            )
+            candidate_ids = [row[0] for row in cursor.fetchall()]
+            placeholders = ", ".join("?" for _ in candidate_ids)
+            cursor.execute(
+                f"SELECT rowid FROM rag_embeddings WHERE embedding MATCH ? AND k = ? "
+                f"AND rowid IN ({placeholders}) ORDER BY distance",
+                (query_blob, k, *candidate_ids),
+            )
+            rerank_hits = [row[0] for row in cursor.fetchall()]
+            rerank_latencies.append(time.perf_counter() - start)
+
+            quantized_recalls.append(_recall_at_k(exact_hits, quantized_hits))
+            rerank_recalls.append(_recall_at_k(exact_hits, rerank_hits))
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS temp.bench_quantized")
+
+    quantized_bytes = dimension if quantization == "int8" else (dimension + 7) // 8
+    return {
+        "vectors": len(all_ids),
+        "dimension": dimension,
+        "queries": len(query_ids),
+        "k": k,
+        "quantization": quantization,
+        "oversample": oversample,
+        "float": {
+            "latency": _latency_summary(exact_latencies),
+            "bytes_per_vector": dimension * 4,
+        },
+        "quantized": {
+            "latency": _latency_summary(quantized_latencies),
+            "bytes_per_vector": quantized_bytes,
+            "build_seconds": round(build_seconds, 3),
+            "recall_at_k": round(sum(quantized_recalls) / len(quantized_recalls), 4),
+        },
+        "quantized_rerank": {
+            "latency": _latency_summary(rerank_latencies),
+            "recall_at_k": round(sum(rerank_recalls) / len(rerank_recalls), 4),
+        },
+    }
+
+
+def benchmark_code_analysis(code_dir: Path, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Times the code indexing path (entities, file summary and code chunks) over
+    every code file under `code_dir`, once with a parse per step (as when the
+    public functions are called without an analysis) and once sharing a
+    single CodeFileAnalysis per file, as indexing does.
+
+    Returns:
+        File / byte counts, the parser backend used per language and, for both
+        variants, the best total seconds over `repeat` runs and throughput.
+    """
+    from .code_chunking import (
+        CODE_EXTENSIONS,
+        analyze_code,
+        chunk_code_aware,
+        create_file_summary,
+        extract_code_entities,
+    )
+    from .indexing import IGNORE_DIRS_FOR_INDEXING
+
+    files = []
+    for extension in sorted(CODE_EXTENSIONS):
+        for path_str in glob.glob(str(code_dir / f"**/*{extension}"), recursive=True):
+            path = Path(path_str)
+            relative_parts = path.relative_to(code_dir).parts
+            if any(part in IGNORE_DIRS_FOR_INDEXING or part.startswith(".") for part in relative_parts):
+                continue
+            try:
+                files.append((path, path.read_text(encoding="utf-8")))
+            except (OSError, UnicodeDecodeError):
+                continue
+    if not files:
+        raise RuntimeError(f"No code files found under {code_dir}.")
+    total_bytes = sum(len(content.encode("utf-8")) for _, content in files)
+
+    def run_separate() -> None:
+        for path, content in files:
+            entities = extract_code_entities(content, path)
+            create_file_summary(content, path, entities)
+            chunk_code_aware(content, path)
+
+    def run_shared() -> None:
+        for path, content in files:
+            analysis = analyze_code(content, path)
+            entities = extract_code_entities(content, path, analysis=analysis)
+            create_file_summary(content, path, entities, analysis=analysis)
+            chunk_code_aware(content, path, analysis=analysis)
+
+    results: Dict[str, Any] = {
+        "files": len(files),
+        "bytes": total_bytes,
+        "repeat": repeat,
+    }
+    parsers: Dict[str, Dict[str, int]] = {}
+    for path, content in files:
+        analysis = analyze_code(content, path)
+        language_parsers = parsers.setdefault(analysis.language, {})
+        language_parsers[analysis.parser] = language_parsers.get(analysis.parser, 0) + 1
+    results["parsers"] = parsers
+
+    for name, run in (("parse_per_step", run_separate), ("single_parse", run_shared)):
+        timings = []
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        results[name] = {
+            "seconds": round(best, 3),
+            "mb_per_second": round(total_bytes / 1e6 / best, 2) if best else 0.0,
+        }
+    results["speedup"] = round(
+        results["parse_per_step"]["seconds"] / results["single_parse"]["seconds"], 2
+    ) if results["single_parse"]["seconds"] else 0.0
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark RAG vector search engines.")
+    parser.add_argument("--project-dir", default=".", help="Project directory containing .agent/")
+    parser.add_argument("--queries", type=int, default=50, help="Number of sample queries")
+    parser.add_argument("-k", type=int, default=13, help="Neighbours per query")
+    parser.add_argument(
+        "--quantization",
+        choices=["int8", "binary"],
+        help="Benchmark quantized search with float re-ranking instead of engines",
+    )
+    parser.add_argument("--oversample", type=int, default=4, help="Re-rank candidates per result")
+    parser.add_argument(
+        "--code-analysis",
+        action="store_true",
+        help="Benchmark code analysis / chunking over the project's code files instead",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Code analysis runs (best is reported)")
+    args = parser.parse_args()
+
+    if args.code_analysis:
+        results = benchmark_code_analysis(Path(args.project_dir).resolve(), args.repeat)
+        logger.info(f"Code analysis benchmark: {results}")
+        print(json.dumps(results, indent=2))
+        return
+
+    os.environ["MCP_PROJECT_DIR"] = str(Path(args.project_dir).resolve())
+
+    from ...db.connection import check_vss_loadability, get_db_connection
+
+    if not check_vss_loadability():
+        raise SystemExit("sqlite-vec is not loadable; nothing to benchmark against.")
+
+    conn = get_db_connection()
+    try:
+        if args.quantization:
+            results = benchmark_quantized_search(
+                conn, args.quantization, args.queries, args.k, args.oversample
+            )
+        else:
+            results = benchmark_vector_engines(conn, args.queries, args.k)
+    finally:
+        conn.close()
+    logger.info(f"RAG vector engine benchmark: {results}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Agent-MCP/mcp_template/mcp_server_src/features/rag/chunk_cache.py
+"""
+Persistent cache of chunker output (chunk texts plus metadata).
+
+Entries live in the rag_chunk_cache table, keyed by (content hash, chunker
+name, chunker params version). The indexer consults it before chunking a
+source, so re-embedding unchanged text (e.g. after an embedding model or
+dimension change clears the stored source hashes) skips parsing and chunking.
+"""
+import datetime
+import hashlib
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...core.config import logger
+
+Chunks = List[Tuple[str, Dict[str, Any]]]
+
+
+def chunk_cache_content_hash(source_type: str, source_ref: str, content_hash: str) -> str:
+    """
+    The cache's content hash: the source's content hash salted with the other
+    inputs chunk output depends on (the source type, stored in chunk metadata,
+    and for code the file path, which drives language detection and summaries).
+    """
+    salt = f"{source_type}\n{source_ref}" if source_type == "code" else source_type
+    return hashlib.sha256(f"{salt}\n{content_hash}".encode("utf-8")).hexdigest()
+
+
+def load_cached_chunks(
+    cursor: sqlite3.Cursor, content_hash: str, chunker: str, params_version: str
+) -> Optional[Chunks]:
+    """Returns the cached chunks for the key (marking the entry used), or None."""
+    cursor.execute(
+        "SELECT chunks FROM rag_chunk_cache WHERE content_hash = ? AND chunker = ? AND params_version = ?",
+        (content_hash, chunker, params_version),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    try:
+        chunks = [(text, metadata) for text, metadata in json.loads(row[0])]
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Discarding unreadable chunk cache entry ({chunker}, {content_hash[:12]}): {e}")
+        return None
+    cursor.execute(
+        "UPDATE rag_chunk_cache SET last_used_at = ? WHERE content_hash = ? AND chunker = ? AND params_version = ?",
+        (datetime.datetime.now().isoformat(), content_hash, chunker, params_version),
+    )
+    return chunks
+
+
+def store_cached_chunks(
+    cursor: sqlite3.Cursor,
+    content_hash: str,
+    chunker: str,
+    params_version: str,
+    chunks: Chunks,
+) -> None:
+    """Stores (or replaces) the chunker output for the key."""
+    now = datetime.datetime.now().isoformat()
+    cursor.execute(
+        """
+        INSERT OR REPLACE INTO rag_chunk_cache
+            (content_hash, chunker, params_version, chunks, created_at, last_used_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+        (content_hash, chunker, params_version, json.dumps(chunks), now, now),
+    )
+
+
+def prune_chunk_cache(cursor: sqlite3.Cursor, max_age_days: int) -> int:
+    """Deletes entries not used for `max_age_days`. Returns the number removed."""
+    cutoff = (datetime.datetime.now() - datetime.timedelta(days=max_age_days)).isoformat()
+    cursor.execute("DELETE FROM rag_chunk_cache WHERE last_used_at < ?", (cutoff,))
+    return cursor.rowcount
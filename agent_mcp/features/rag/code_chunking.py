@@ -2,11 +2,14 @@
 # Ported from swarm_mcp with enhancements for agent_mcp architecture
 
 import re
+import bisect
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional
+from typing import Callable, List, Tuple, Dict, Any, Optional
 import ast
 
 from ...core.config import logger
+from .tokenization import get_size_function
 
 # Language-specific file extensions mapping
 LANGUAGE_FAMILIES = {
@@ -55,85 +58,176 @@ def detect_language_family(file_path: Path) -> str:
     return 'generic'
 
 
-def extract_code_entities(content: str, file_path: Path) -> List[Dict[str, Any]]:
+# Optional tree-sitter backend for JavaScript/TypeScript entity extraction
+try:
+    from tree_sitter_languages import get_parser as _get_tree_sitter_parser
+except ImportError:
+    _get_tree_sitter_parser = None
+
+# tree-sitter grammar per JavaScript-family extension (others use 'javascript')
+TREE_SITTER_GRAMMARS = {'.ts': 'typescript', '.tsx': 'tsx'}
+
+
+class CodeFileAnalysis:
+    """
+    Single parse of one code file.
+
+    Entities, import names and the entity start lines used as chunk
+    boundaries are all derived from one parse: `ast` for Python, tree-sitter
+    for JavaScript/TypeScript when `tree_sitter_languages` is installed, and
+    regexes otherwise (or when the parse fails).
+    """
+
+    def __init__(self, content: str, file_path: Path):
+        self.content = content
+        self.file_path = file_path
+        self.language = detect_language_family(file_path)
+        self.lines = content.split('\n')
+        self.parser = 'none'  # Backend that produced entities / imports
+        self.entities: List[Dict[str, Any]] = []
+        self.imports: List[str] = []
+        # (first line, last line, entity) of each top-level class / function,
+        # decorators included; None when the parser gives no reliable end lines
+        self.entity_spans: Optional[List[Tuple[int, int, Dict[str, Any]]]] = None
+
+        # Offsets of each line start, for O(log n) offset -> line lookups
+        self._line_starts = [0]
+        for line in self.lines[:-1]:
+            self._line_starts.append(self._line_starts[-1] + len(line) + 1)
+
+        if self.language == 'python':
+            self._analyze_python()
+        elif self.language == 'javascript':
+            self._analyze_javascript()
+        elif self.language in ['c_family', 'rust', 'go', 'java']:
+            self.parser = 'regex'
+            self.entities = _extract_generic_code_entities(content, self.language, self.line_number)
+
+        # Lines (1-based) where an entity starts: preferred chunk split points
+        self.entity_start_lines = {entity['start_line'] for entity in self.entities}
+
+    def line_number(self, offset: int) -> int:
+        """1-based line number of a character offset in the content."""
+        return bisect.bisect_right(self._line_starts, offset)
+
+    def _analyze_python(self) -> None:
+        try:
+            tree = ast.parse(self.content)
+        except (SyntaxError, ValueError) as e:
+            logger.warning(f"Failed to parse Python file: {e}")
+            # Fallback to regex-based extraction
+            self.parser = 'regex'
+            self.entities = _extract_python_entities_regex(self.content, self.line_number)
+            self.imports = _extract_python_imports_regex(self.content)
+            return
+        self.parser = 'ast'
+        self.entities, self.imports = _python_entities_and_imports(tree)
+        self.entity_spans = _python_entity_spans(tree, self.entities)
+
+    def _analyze_javascript(self) -> None:
+        if _get_tree_sitter_parser is not None:
+            try:
+                self.entities, self.imports = _javascript_entities_and_imports_tree_sitter(
+                    self.content, self.file_path
+                )
+                self.parser = 'tree_sitter'
+                self.entity_spans = _outermost_entity_spans(self.entities)
+                return
+            except Exception as e:
+                logger.debug(f"tree-sitter parse failed for {self.file_path}, using regexes: {e}")
+        self.parser = 'regex'
+        self.entities = _extract_javascript_entities(self.content, self.line_number)
+        self.imports = _extract_javascript_imports(self.content)
+
+
+def analyze_code(content: str, file_path: Path) -> CodeFileAnalysis:
+    """
+    Parse a code file once for entity extraction, chunking and summaries.
+    
+    Args:
+        content: File content
+        file_path: Path to the file
+        
+    Returns:
+        CodeFileAnalysis to pass to extract_code_entities, chunk_code_aware
+        and create_file_summary
+    """
+    return CodeFileAnalysis(content, file_path)
+
+
+def extract_code_entities(
+    content: str,
+    file_path: Path,
+    analysis: Optional[CodeFileAnalysis] = None
+) -> List[Dict[str, Any]]:
     """
     Extract code entities (functions, classes, methods) with line numbers.
     
     Args:
         content: File content
         file_path: Path to the file
+        analysis: Existing analysis of the file (parsed here if omitted)
         
     Returns:
         List of entities with metadata
     """
-    language_family = detect_language_family(file_path)
-    entities = []
-    
-    if language_family == 'python':
-        entities = _extract_python_entities(content)
-    elif language_family == 'javascript':
-        entities = _extract_javascript_entities(content)
-    elif language_family in ['c_family', 'rust', 'go', 'java']:
-        entities = _extract_generic_code_entities(content, language_family)
-    
-    return entities
+    if analysis is None:
+        analysis = analyze_code(content, file_path)
+    return analysis.entities
 
 
-def _extract_python_entities(content: str) -> List[Dict[str, Any]]:
-    """Extract Python functions, classes, and methods."""
+def _python_entities_and_imports(tree: ast.AST) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Extract Python functions, classes, methods and module-level imports from one walk."""
     entities = []
-    lines = content.split('\n')
+    imports = []
     
-    try:
-        tree = ast.parse(content)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef):
+            entity = {
+                'type': 'function',
+                'name': node.name,
+                'start_line': node.lineno,
+                'end_line': node.end_lineno or node.lineno,
+                'decorators': [d.id for d in node.decorator_list if hasattr(d, 'id')]
+            }
+            entities.append(entity)
+            
+        elif isinstance(node, ast.ClassDef):
+            entity = {
+                'type': 'class',
+                'name': node.name,
+                'start_line': node.lineno,
+                'end_line': node.end_lineno or node.lineno,
+                'methods': []
+            }
+            
+            # Extract methods within the class
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    method = {
+                        'type': 'method',
+                        'name': item.name,
+                        'parent_class': node.name,
+                        'start_line': item.lineno,
+                        'end_line': item.end_lineno or item.lineno
+                    }
+                    entity['methods'].append(method)
+                    entities.append(method)
+            
+            entities.append(entity)
         
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef) or isinstance(node, ast.AsyncFunctionDef):
-                entity = {
-                    'type': 'function',
-                    'name': node.name,
-                    'start_line': node.lineno,
-                    'end_line': node.end_lineno or node.lineno,
-                    'decorators': [d.id for d in node.decorator_list if hasattr(d, 'id')]
-                }
-                entities.append(entity)
-                
-            elif isinstance(node, ast.ClassDef):
-                entity = {
-                    'type': 'class',
-                    'name': node.name,
-                    'start_line': node.lineno,
-                    'end_line': node.end_lineno or node.lineno,
-                    'methods': []
-                }
-                
-                # Extract methods within the class
-                for item in node.body:
-                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                        method = {
-                            'type': 'method',
-                            'name': item.name,
-                            'parent_class': node.name,
-                            'start_line': item.lineno,
-                            'end_line': item.end_lineno or item.lineno
-                        }
-                        entity['methods'].append(method)
-                        entities.append(method)
-                
-                entities.append(entity)
-                
-    except SyntaxError as e:
-        logger.warning(f"Failed to parse Python file: {e}")
-        # Fallback to regex-based extraction
-        entities = _extract_python_entities_regex(content)
+        # Unindented imports only (module level, including under if/try at column 0)
+        elif isinstance(node, ast.Import) and node.col_offset == 0:
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.col_offset == 0:
+            imports.append('.' * (node.level or 0) + (node.module or ''))
     
-    return entities
+    return entities, imports
 
 
-def _extract_python_entities_regex(content: str) -> List[Dict[str, Any]]:
+def _extract_python_entities_regex(content: str, line_number) -> List[Dict[str, Any]]:
     """Fallback regex-based Python entity extraction."""
     entities = []
-    lines = content.split('\n')
     
     # Function pattern
     func_pattern = re.compile(r'^(async\s+)?def\s+(\w+)\s*\(', re.MULTILINE)
@@ -141,7 +235,7 @@ def _extract_python_entities_regex(content: str) -> List[Dict[str, Any]]:
     class_pattern = re.compile(r'^class\s+(\w+)[\s\(:]', re.MULTILINE)
     
     for match in func_pattern.finditer(content):
-        line_no = content[:match.start()].count('\n') + 1
+        line_no = line_number(match.start())
         entities.append({
             'type': 'function',
             'name': match.group(2),
@@ -150,7 +244,7 @@ def _extract_python_entities_regex(content: str) -> List[Dict[str, Any]]:
         })
     
     for match in class_pattern.finditer(content):
-        line_no = content[:match.start()].count('\n') + 1
+        line_no = line_number(match.start())
         entities.append({
             'type': 'class',
             'name': match.group(1),
@@ -161,7 +255,22 @@ def _extract_python_entities_regex(content: str) -> List[Dict[str, Any]]:
     return entities
 
 
-def _extract_javascript_entities(content: str) -> List[Dict[str, Any]]:
+def _extract_python_imports_regex(content: str) -> List[str]:
+    """Fallback regex-based Python import extraction."""
+    imports = []
+    import_pattern = re.compile(r'^(?:from\s+(\S+)\s+)?import\s+(.+)$', re.MULTILINE)
+    for match in import_pattern.finditer(content):
+        if match.group(1):
+            imports.append(match.group(1))
+        else:
+            # Handle comma-separated imports
+            for imp in match.group(2).split(','):
+                if imp.strip():
+                    imports.append(imp.strip().split()[0])
+    return imports
+
+
+def _extract_javascript_entities(content: str, line_number) -> List[Dict[str, Any]]:
     """Extract JavaScript/TypeScript functions, classes, and components."""
     entities = []
     
@@ -181,7 +290,7 @@ def _extract_javascript_entities(content: str) -> List[Dict[str, Any]]:
     
     for pattern, entity_type in patterns:
         for match in re.finditer(pattern, content, re.MULTILINE):
-            line_no = content[:match.start()].count('\n') + 1
+            line_no = line_number(match.start())
             entities.append({
                 'type': entity_type,
                 'name': match.group(1),
@@ -192,7 +301,107 @@ def _extract_javascript_entities(content: str) -> List[Dict[str, Any]]:
     return entities
 
 
-def _extract_generic_code_entities(content: str, language: str) -> List[Dict[str, Any]]:
+def _extract_javascript_imports(content: str) -> List[str]:
+    """Extract ES6 import and CommonJS require sources."""
+    imports = []
+    # ES6 imports
+    import_pattern = re.compile(r'import\s+.*?\s+from\s+[\'"]([^\'"]+)[\'"]', re.MULTILINE)
+    imports.extend(match.group(1) for match in import_pattern.finditer(content))
+    # CommonJS requires
+    require_pattern = re.compile(r'require\s*\([\'"]([^\'"]+)[\'"]\)', re.MULTILINE)
+    imports.extend(match.group(1) for match in require_pattern.finditer(content))
+    return imports
+
+
+def _python_entity_spans(
+    tree: ast.Module, entities: List[Dict[str, Any]]
+) -> List[Tuple[int, int, Dict[str, Any]]]:
+    """Spans of the module-level classes and functions, starting at their first decorator."""
+    by_position = {
+        (entity['name'], entity['start_line']): entity
+        for entity in entities if entity['type'] in ('class', 'function')
+    }
+    spans = []
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        entity = by_position.get((node.name, node.lineno))
+        if entity is None:
+            continue
+        start_line = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        spans.append((start_line, node.end_lineno or node.lineno, entity))
+    return spans
+
+
+def _outermost_entity_spans(
+    entities: List[Dict[str, Any]]
+) -> List[Tuple[int, int, Dict[str, Any]]]:
+    """Spans of the entities not nested inside another entity."""
+    spans = []
+    for entity in sorted(entities, key=lambda e: (e['start_line'], -e['end_line'])):
+        if spans and entity['start_line'] <= spans[-1][1]:
+            continue
+        spans.append((entity['start_line'], entity['end_line'], entity))
+    return spans
+
+
+@lru_cache(maxsize=None)
+def _tree_sitter_parser(grammar: str):
+    return _get_tree_sitter_parser(grammar)
+
+
+def _javascript_entities_and_imports_tree_sitter(
+    content: str, file_path: Path
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Extract JavaScript/TypeScript entities and imports from a tree-sitter parse."""
+    grammar = TREE_SITTER_GRAMMARS.get(file_path.suffix.lower(), 'javascript')
+    tree = _tree_sitter_parser(grammar).parse(content.encode('utf-8'))
+    entities = []
+    imports = []
+
+    def add_entity(name_node, node, default_type: str) -> None:
+        if name_node is None:
+            return
+        name = name_node.text.decode('utf-8', errors='replace')
+        entity_type = default_type
+        if default_type == 'function' and name[:1].isupper():
+            entity_type = 'component'
+        entities.append({
+            'type': entity_type,
+            'name': name,
+            'start_line': node.start_point[0] + 1,
+            'end_line': node.end_point[0] + 1
+        })
+
+    stack = [tree.root_node]
+    while stack:
+        node = stack.pop()
+        if node.type in ('function_declaration', 'generator_function_declaration'):
+            add_entity(node.child_by_field_name('name'), node, 'function')
+        elif node.type in ('class_declaration', 'abstract_class_declaration'):
+            add_entity(node.child_by_field_name('name'), node, 'class')
+        elif node.type == 'variable_declarator':
+            value = node.child_by_field_name('value')
+            if value is not None and value.type in ('arrow_function', 'function', 'function_expression'):
+                add_entity(node.child_by_field_name('name'), node, 'function')
+        elif node.type == 'import_statement':
+            source = node.child_by_field_name('source')
+            if source is not None:
+                imports.append(source.text.decode('utf-8', errors='replace')[1:-1])
+        elif node.type == 'call_expression':
+            function = node.child_by_field_name('function')
+            arguments = node.child_by_field_name('arguments')
+            if (function is not None and function.type == 'identifier'
+                    and function.text == b'require' and arguments is not None
+                    and arguments.named_child_count
+                    and arguments.named_children[0].type == 'string'):
+                imports.append(arguments.named_children[0].text.decode('utf-8', errors='replace')[1:-1])
+        stack.extend(reversed(node.children))
+
+    return entities, imports
+
+
+def _extract_generic_code_entities(content: str, language: str, line_number) -> List[Dict[str, Any]]:
     """Extract entities for C-family, Rust, Go, Java languages."""
     entities = []
     
@@ -213,7 +422,7 @@ def _extract_generic_code_entities(content: str, language: str) -> List[Dict[str
         return entities
     
     for match in re.finditer(func_pattern, content, re.MULTILINE):
-        line_no = content[:match.start()].count('\n') + 1
+        line_no = line_number(match.start())
         entities.append({
             'type': 'function',
             'name': match.group(1),
@@ -229,7 +438,10 @@ def chunk_code_aware(
     file_path: Path,
     target_size: int = 1500,
     max_size: int = 3000,
-    min_size: int = 300
+    min_size: int = 300,
+    analysis: Optional[CodeFileAnalysis] = None,
+    size_unit: str = 'chars',
+    anchor_entities: bool = False
 ) -> List[Tuple[str, Dict[str, Any]]]:
     """
     Perform code-aware chunking that preserves code structure.
@@ -237,41 +449,129 @@ def chunk_code_aware(
     Args:
         content: File content to chunk
         file_path: Path to the file for language detection
-        target_size: Target chunk size in characters
+        target_size: Target chunk size in characters (or tokens)
         max_size: Maximum chunk size before forcing split
         min_size: Minimum chunk size to avoid tiny chunks
+        analysis: Existing analysis of the file (parsed here if omitted)
+        size_unit: 'chars' or 'tokens' (lines counted with the cached tokenizer)
+        anchor_entities: Chunk along top-level class / function spans when the
+            parser provides them (see _chunk_entity_anchored)
         
     Returns:
         List of (chunk_text, metadata) tuples
     """
-    language_family = detect_language_family(file_path)
+    measure = get_size_function(size_unit)
+    if analysis is None:
+        analysis = analyze_code(content, file_path)
+    language_family = analysis.language
     
+    if anchor_entities and analysis.entity_spans:
+        return _chunk_entity_anchored(analysis, target_size, max_size, min_size, measure)
     if language_family == 'python':
-        return _chunk_python_code(content, target_size, max_size, min_size)
+        return _chunk_python_code(analysis, target_size, max_size, min_size, measure)
     elif language_family == 'javascript':
-        return _chunk_javascript_code(content, target_size, max_size, min_size)
+        return _chunk_javascript_code(analysis, target_size, max_size, min_size, measure)
     elif language_family in ['c_family', 'rust', 'go', 'java']:
-        return _chunk_generic_code(content, target_size, max_size, min_size, language_family)
+        return _chunk_generic_code(analysis.lines, target_size, max_size, min_size, language_family, measure)
     else:
         # Fallback to generic code chunking
-        return _chunk_generic_code(content, target_size, max_size, min_size, 'generic')
+        return _chunk_generic_code(analysis.lines, target_size, max_size, min_size, 'generic', measure)
+
+
+def _chunk_entity_anchored(
+    analysis: CodeFileAnalysis,
+    target_size: int,
+    max_size: int,
+    min_size: int,
+    measure: Callable[[str], int] = len
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Chunk code along its top-level entity spans.
+    
+    Every chunk belongs to one anchor: a top-level class or function (with
+    the code between it and the previous entity), the module header, or the
+    module code after the last entity. A chunk's text depends only on its
+    anchor's span, so an edit changes the chunks of the spans it touches
+    and every other chunk of the file comes out byte-identical. Spans larger
+    than max_size split at nested entity starts or blank lines.
+    """
+    lines = analysis.lines
+    spans = analysis.entity_spans or []
+    line_sizes = [measure(line) + 1 for line in lines]  # +1 for newline
+
+    def span_size(first_line: int, last_line: int) -> int:
+        return sum(line_sizes[first_line - 1:last_line])
+
+    # (first line, last line, anchor, section type), 1-based and inclusive
+    segments: List[Tuple[int, int, str, str]] = []
+    next_line = 1
+    for first_line, last_line, entity in spans:
+        if first_line < next_line:
+            continue  # Overlaps the previous span (malformed parse)
+        segment_start = next_line
+        if not segments and first_line > 1 and span_size(1, first_line - 1) >= min_size:
+            segments.append((1, first_line - 1, 'module', 'module_header'))
+            segment_start = first_line
+        segments.append((
+            segment_start, last_line, f"{entity['type']}:{entity['name']}", entity['type']
+        ))
+        next_line = last_line + 1
+    if next_line <= len(lines):
+        if segments and span_size(next_line, len(lines)) < min_size:
+            first_line, _, anchor, section_type = segments[-1]
+            segments[-1] = (first_line, len(lines), anchor, section_type)
+        else:
+            segments.append((next_line, len(lines), 'module', 'code'))
+
+    entities = sorted(analysis.entities, key=lambda e: e['start_line'])
+    entity_starts = [entity['start_line'] for entity in entities]
+    chunks = []
+    for first_line, last_line, anchor, section_type in segments:
+        # Split oversized spans; pieces restart at nested entities so an edit
+        # inside one method leaves the other pieces unchanged
+        pieces = []
+        piece_start = first_line
+        piece_size = 0
+        for line_no in range(first_line, last_line + 1):
+            line_size = line_sizes[line_no - 1]
+            if line_no > piece_start and (
+                piece_size + line_size > max_size
+                or (line_no in analysis.entity_start_lines and piece_size > min_size)
+                or (piece_size > target_size and not lines[line_no - 1].strip())
+            ):
+                pieces.append((piece_start, line_no - 1))
+                piece_start = line_no
+                piece_size = 0
+            piece_size += line_size
+        pieces.append((piece_start, last_line))
+
+        for piece_start, piece_end in pieces:
+            lo = bisect.bisect_left(entity_starts, piece_start)
+            hi = bisect.bisect_right(entity_starts, piece_end)
+            chunks.append(('\n'.join(lines[piece_start - 1:piece_end]), {
+                'language': analysis.language,
+                'section_type': section_type,
+                'anchor': anchor,
+                'entities': entities[lo:hi],
+                'line_range': (piece_start, piece_end)
+            }))
+    return chunks
 
 
 def _chunk_python_code(
-    content: str, 
+    analysis: CodeFileAnalysis,
     target_size: int,
     max_size: int,
-    min_size: int
+    min_size: int,
+    measure: Callable[[str], int] = len
 ) -> List[Tuple[str, Dict[str, Any]]]:
     """Chunk Python code preserving class and function boundaries."""
     chunks = []
-    lines = content.split('\n')
-    
-    # Extract entities first
-    entities = _extract_python_entities(content)
+    lines = analysis.lines
     
-    # Sort entities by start line
-    entities.sort(key=lambda x: x['start_line'])
+    # Sort entities by start line (without reordering the shared analysis)
+    entities = sorted(analysis.entities, key=lambda x: x['start_line'])
+    entity_start_lines = analysis.entity_start_lines
     
     # Track current chunk
     current_chunk_lines = []
@@ -288,7 +588,7 @@ def _chunk_python_code(
     
     while line_num < len(lines):
         line = lines[line_num]
-        line_size = len(line) + 1  # +1 for newline
+        line_size = measure(line) + 1  # +1 for newline
         
         # Check if we're at the start of an entity
         at_entity_start = False
@@ -313,12 +613,9 @@ def _chunk_python_code(
             lookahead = min(10, len(lines) - line_num)
             for i in range(1, lookahead):
                 if line_num + i < len(lines):
-                    future_line = lines[line_num + i].strip()
                     # Good split points: empty lines, class/function definitions
-                    if (not future_line or 
-                        future_line.startswith('def ') or 
-                        future_line.startswith('class ') or
-                        future_line.startswith('async def ')):
+                    if (line_num + i + 1 in entity_start_lines or
+                        not lines[line_num + i].strip()):
                         should_split = True
                         break
         
@@ -361,18 +658,18 @@ def _chunk_python_code(
 
 
 def _chunk_javascript_code(
-    content: str,
+    analysis: CodeFileAnalysis,
     target_size: int,
     max_size: int, 
-    min_size: int
+    min_size: int,
+    measure: Callable[[str], int] = len
 ) -> List[Tuple[str, Dict[str, Any]]]:
     """Chunk JavaScript/TypeScript code preserving function and component boundaries."""
     chunks = []
-    lines = content.split('\n')
+    lines = analysis.lines
     
-    # Extract entities
-    entities = _extract_javascript_entities(content)
-    entities.sort(key=lambda x: x['start_line'])
+    # Entities sorted by start line
+    entities = sorted(analysis.entities, key=lambda x: x['start_line'])
     
     current_chunk_lines = []
     current_chunk_size = 0
@@ -389,7 +686,7 @@ def _chunk_javascript_code(
     
     while line_num < len(lines):
         line = lines[line_num]
-        line_size = len(line) + 1
+        line_size = measure(line) + 1
         
         # Update brace depth
         brace_depth += line.count('{') - line.count('}')
@@ -446,15 +743,15 @@ def _chunk_javascript_code(
 
 
 def _chunk_generic_code(
-    content: str,
+    lines: List[str],
     target_size: int,
     max_size: int,
     min_size: int,
-    language: str
+    language: str,
+    measure: Callable[[str], int] = len
 ) -> List[Tuple[str, Dict[str, Any]]]:
     """Generic code chunking for various languages."""
     chunks = []
-    lines = content.split('\n')
     
     current_chunk_lines = []
     current_chunk_size = 0
@@ -472,7 +769,7 @@ def _chunk_generic_code(
     start_line = 1
     
     for line_num, line in enumerate(lines):
-        line_size = len(line) + 1
+        line_size = measure(line) + 1
         
         # Update depth tracking
         if not in_multiline_comment:
@@ -523,7 +820,12 @@ def _chunk_generic_code(
     return chunks
 
 
-def create_file_summary(content: str, file_path: Path, entities: List[Dict[str, Any]]) -> Dict[str, Any]:
+def create_file_summary(
+    content: str,
+    file_path: Path,
+    entities: List[Dict[str, Any]],
+    analysis: Optional[CodeFileAnalysis] = None
+) -> Dict[str, Any]:
     """
     Create a summary of a code file for hierarchical indexing.
     
@@ -531,32 +833,18 @@ def create_file_summary(content: str, file_path: Path, entities: List[Dict[str,
         content: File content
         file_path: Path to file
         entities: Extracted code entities
+        analysis: Existing analysis of the file (parsed here if omitted)
         
     Returns:
         File summary metadata
     """
-    language = detect_language_family(file_path)
-    lines = content.split('\n')
-    
-    # Extract imports/dependencies
-    imports = []
-    if language == 'python':
-        import_pattern = re.compile(r'^(?:from\s+(\S+)\s+)?import\s+(.+)$', re.MULTILINE)
-        for match in import_pattern.finditer(content):
-            if match.group(1):
-                imports.append(match.group(1))
-            else:
-                # Handle comma-separated imports
-                for imp in match.group(2).split(','):
-                    imports.append(imp.strip().split()[0])
+    if analysis is None:
+        analysis = analyze_code(content, file_path)
+    language = analysis.language
+    lines = analysis.lines
     
-    elif language == 'javascript':
-        # ES6 imports
-        import_pattern = re.compile(r'import\s+.*?\s+from\s+[\'"]([^\'"]+)[\'"]', re.MULTILINE)
-        imports.extend(match.group(1) for match in import_pattern.finditer(content))
-        # CommonJS requires
-        require_pattern = re.compile(r'require\s*\([\'"]([^\'"]+)[\'"]\)', re.MULTILINE)
-        imports.extend(match.group(1) for match in require_pattern.finditer(content))
+    # Imports/dependencies come from the same parse as the entities
+    imports = analysis.imports
     
     # Group entities by type
     functions = [e for e in entities if e['type'] == 'function']
@@ -569,7 +857,7 @@ def create_file_summary(content: str, file_path: Path, entities: List[Dict[str,
         'file_path': str(file_path),
         'language': language,
         'total_lines': len(lines),
-        'imports': list(set(imports)),  # Remove duplicates
+        'imports': list(dict.fromkeys(imports)),  # Remove duplicates (keeping order, so summaries are reproducible)
         'entities': entities,
         'entity_count': {
             'functions': len(functions),
@@ -0,0 +1,146 @@
+# Agent-MCP/mcp_template/mcp_server_src/features/rag/index_queue.py
+"""
+Priority order and on-demand queue for RAG indexing.
+
+The periodic indexer processes changed sources in source_priority order
+(context entries, then tasks, then recently touched files, then bulk
+markdown and code) in batches. On top of that, the project context and
+task write paths enqueue the entries they change (enqueue_rag_sources), and
+the queue worker in indexing.py indexes them within seconds instead of on
+the next cycle.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ...core.config import RAG_INDEX_RECENT_FILE_SECONDS
+
+PRIORITY_CONTEXT = 0
+PRIORITY_TASK = 1
+PRIORITY_RECENT_FILE = 2
+PRIORITY_MARKDOWN = 3
+PRIORITY_CODE = 4
+
+
+def source_priority(source_type: str, mod_time: Any = None) -> Tuple[int, float]:
+    """
+    Sort key for a changed source (lower first). Files modified within
+    RAG_INDEX_RECENT_FILE_SECONDS count as recently touched; within a class,
+    newer files come first.
+    """
+    if source_type == "context":
+        return (PRIORITY_CONTEXT, 0.0)
+    if source_type == "task":
+        return (PRIORITY_TASK, 0.0)
+    mtime = float(mod_time) if isinstance(mod_time, (int, float)) else 0.0
+    if time.time() - mtime <= RAG_INDEX_RECENT_FILE_SECONDS:
+        return (PRIORITY_RECENT_FILE, -mtime)
+    if source_type == "markdown":
+        return (PRIORITY_MARKDOWN, -mtime)
+    return (PRIORITY_CODE, -mtime)
+
+
+class RagIndexQueue:
+    """
+    De-duplicated (source_type, source_ref) entries waiting to be indexed,
+    popped highest priority first. Safe to enqueue from any thread; entries
+    are only kept while the queue worker is running (otherwise the periodic
+    cycle picks the change up).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Sequence number of the last on-demand indexing of each source, so a
+        # periodic cycle can drop sources indexed after its own scan
+        self._indexed_seq = 0
+        self._indexed_at: Dict[Tuple[str, str], int] = {}
+
+    def bind(self) -> None:
+        """Attaches the queue to the running event loop (called by the worker)."""
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+
+    def unbind(self) -> None:
+        with self._lock:
+            self._loop = None
+            self._wakeup = None
+            self._pending.clear()
+
+    def enqueue(self, source_type: str, source_refs: Iterable[str]) -> bool:
+        """
+        Queues sources for immediate indexing. Returns False (and queues
+        nothing) when the worker is not running.
+        """
+        priority = source_priority(source_type)
+        with self._lock:
+            if self._loop is None:
+                return False
+            for source_ref in source_refs:
+                if source_ref:
+                    key = (source_type, source_ref)
+                    self._pending[key] = min(self._pending.get(key, priority), priority)
+            loop, wakeup = self._loop, self._wakeup
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:  # Loop already closed (shutdown)
+            return False
+        return True
+
+    async def wait(self) -> None:
+        """Waits until something is enqueued."""
+        wakeup = self._wakeup
+        if wakeup is None:
+            raise RuntimeError("RagIndexQueue.wait() called before bind()")
+        await wakeup.wait()
+        wakeup.clear()
+
+    def pop_batch(self, max_items: int) -> List[Tuple[str, str]]:
+        """Removes and returns up to `max_items` entries, highest priority first."""
+        with self._lock:
+            keys = sorted(self._pending, key=self._pending.__getitem__)[:max_items]
+            for key in keys:
+                del self._pending[key]
+            return keys
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def mark_indexed(self, keys: Iterable[Tuple[str, str]]) -> None:
+        with self._lock:
+            self._indexed_seq += 1
+            for key in keys:
+                self._indexed_at[key] = self._indexed_seq
+
+    def indexed_seq(self) -> int:
+        return self._indexed_seq
+
+    def indexed_since(self, seq: int, key: Tuple[str, str]) -> bool:
+        """True if the source was indexed on demand after sequence number `seq`."""
+        return self._indexed_at.get(key, 0) > seq
+
+
+_queue_instance: Optional[RagIndexQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_rag_index_queue() -> RagIndexQueue:
+    """Returns the process-wide RAG indexing queue."""
+    global _queue_instance
+    if _queue_instance is None:
+        with _queue_lock:
+            if _queue_instance is None:
+                _queue_instance = RagIndexQueue()
+    return _queue_instance
+
+
+def enqueue_rag_sources(source_type: str, source_refs: Iterable[str]) -> bool:
+    """
+    Write-path hook: index these project context keys / task ids right away.
+    Returns False if the queue worker is not running.
+    """
+    return get_rag_index_queue().enqueue(source_type, source_refs)
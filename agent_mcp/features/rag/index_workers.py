@@ -0,0 +1,131 @@
+# Agent-MCP/mcp_template/mcp_server_src/features/rag/index_workers.py
+"""
+Worker stage of the RAG indexer: reading + hashing project files and chunking
+changed sources run on a process pool (RAG_INDEX_WORKERS processes) in work
+units of RAG_INDEX_WORK_UNIT_SIZE items, so a first index of a large project
+is spread over several cores and never blocks the event loop.
+
+Results sent back are compact: (path, mtime, hash) for the scan, and for
+chunking the chunks plus the hash of the content actually chunked; file
+contents are read in the workers and never pickled back. With a single
+worker the same functions run on one background thread instead.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ...core.config import logger, RAG_INDEX_WORKERS, RAG_INDEX_WORK_UNIT_SIZE
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def index_worker_count() -> int:
+    """RAG_INDEX_WORKERS, or one less than the CPU count (at most 8) when 0."""
+    if RAG_INDEX_WORKERS > 0:
+        return RAG_INDEX_WORKERS
+    return max(1, min(8, (os.cpu_count() or 2) - 1))
+
+
+def get_index_executor() -> Executor:
+    """Returns the process-wide executor for indexing work units."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = index_worker_count()
+            if workers > 1:
+                # spawn, not fork: forking the threaded server process is unsafe
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-index")
+            logger.info(f"RAG indexing executor started with {workers} worker(s).")
+        return _executor
+
+
+def shutdown_index_executor() -> None:
+    """Stops the indexing executor (a new one is started on next use)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def run_work_units(
+    fn: Callable[..., List[Any]], items: Sequence[Any], *args: Any
+) -> List[Any]:
+    """
+    Runs fn(unit, *args) on the index executor for each work unit of `items`
+    and returns the units' result lists concatenated, in item order.
+    """
+    if not items:
+        return []
+    executor = get_index_executor()
+    units = [
+        list(items[start : start + RAG_INDEX_WORK_UNIT_SIZE])
+        for start in range(0, len(items), RAG_INDEX_WORK_UNIT_SIZE)
+    ]
+    try:
+        unit_results = await asyncio.gather(
+            *(asyncio.wrap_future(executor.submit(fn, unit, *args)) for unit in units)
+        )
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        shutdown_index_executor()
+        raise
+    return [result for results in unit_results for result in results]
+
+
+# --- Work unit functions (run in the worker processes) ---
+
+
+def read_and_hash_files(
+    paths: List[str],
+) -> List[Tuple[Optional[float], Optional[str], Optional[str]]]:
+    """
+    Reads each file as UTF-8 text. Returns (mtime, SHA-256 of the text, error)
+    per path; mtime and hash are None when the file could not be read.
+    """
+    results = []
+    for path in paths:
+        try:
+            mod_time = os.stat(path).st_mtime
+            content = Path(path).read_text(encoding="utf-8")
+            current_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            results.append((mod_time, current_hash, None))
+        except Exception as e:
+            results.append((None, None, str(e)))
+    return results
+
+
+def chunk_sources(
+    sources: List[Tuple[str, str, Optional[str], str]], project_dir: str
+) -> List[Tuple[Optional[str], List[Tuple[str, Dict[str, Any]]], Optional[str]]]:
+    """
+    Chunks (source_type, source_ref, content, chunker) sources; sources with
+    content None are files, read here from project_dir / source_ref.
+    Returns (hash of the chunked content, chunks, error) per source.
+    """
+    from .indexing import _chunk_source  # indexing imports this module
+
+    results = []
+    for source_type, source_ref, content, chunker in sources:
+        try:
+            if content is None:
+                content = (Path(project_dir) / source_ref).read_text(encoding="utf-8")
+            content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            chunks = _chunk_source(
+                source_type, source_ref, content, chunker, Path(project_dir)
+            )
+            results.append((content_hash, chunks, None))
+        except Exception as e:
+            results.append((None, [], f"{type(e).__name__}: {e}"))
+    return results
@@ -8,7 +8,7 @@ import glob
 import os
 import sqlite3
 from pathlib import Path
-from typing import List, Dict, Tuple, Any, Optional, NoReturn
+from typing import List, Dict, Tuple, Any, Optional, NoReturn, Set
 
 # Attempt to import the OpenAI library
 try:
@@ -25,9 +25,18 @@ from ...core.config import (
     get_project_dir,
     OPENAI_API_KEY_ENV,  # Also import the API key env variable
     ADVANCED_EMBEDDINGS,  # Import advanced mode flag at module level
+    RAG_CHUNK_SIZE_UNIT,
+    RAG_CHUNK_TARGET_TOKENS,
+    RAG_CHUNK_MAX_TOKENS,
+    RAG_CHUNK_CACHE_ENABLED,
+    RAG_CHUNK_CACHE_MAX_AGE_DAYS,
+    RAG_ENTITY_ANCHORED_CHUNKS,
+    RAG_INDEX_BATCH_SOURCES,
+    RAG_INDEX_QUEUE_DEBOUNCE_SECONDS,
+    RAG_TOKENIZER_ENCODING,
 )
 from ...core import globals as g  # For server_running flag
-from ...db.connection import get_db_connection, is_vss_loadable
+from ...db.connection import get_db_connection
 
 # We need the actual OpenAI client, not just the service module, for batching logic.
 # The client instance is stored in g.openai_client_instance by openai_service.initialize_openai_client()
@@ -36,8 +45,23 @@ from ...external.openai_service import (
 )  # To get the initialized client
 
 # Import chunking functions from this RAG feature package
-from .chunking import simple_chunker, markdown_aware_chunker
+from .chunking import simple_chunker, markdown_aware_chunker, split_to_token_limit
+from .chunk_cache import (
+    chunk_cache_content_hash,
+    load_cached_chunks,
+    prune_chunk_cache,
+    store_cached_chunks,
+)
+from .index_queue import get_rag_index_queue, source_priority
+from .index_workers import (
+    chunk_sources,
+    read_and_hash_files,
+    run_work_units,
+    shutdown_index_executor,
+)
+from .tokenization import get_tokenizer
 from .code_chunking import (
+    analyze_code,
     chunk_code_aware,
     detect_language_family,
     extract_code_entities,
@@ -45,6 +69,16 @@ from .code_chunking import (
     CODE_EXTENSIONS,
     DOCUMENT_EXTENSIONS,
 )
+from .vector_index import (
+    ENGINE_NUMPY,
+    QUANTIZED_TABLE_NAME,
+    ensure_quantized_table,
+    get_numpy_vector_index,
+    get_quantization,
+    get_vector_engine,
+    quantize_sql,
+    sync_numpy_index_with_chunks,
+)
 
 # Original location: main.py lines 512 - 826 (run_rag_indexing_periodically function and its logic)
 
@@ -78,6 +112,274 @@ MAX_CONCURRENT_EMBEDDING_REQUESTS = 25
 # Original main.py: 660
 PARALLEL_EMBEDDING_BATCH_SIZE = 50
 
+# Serializes writes of the periodic cycle's batches and the on-demand queue worker
+_index_lock = anyio.Lock()
+
+# Task columns read for embedding (format_task_for_embedding)
+TASK_INDEX_COLUMNS = (
+    "task_id, title, description, status, assigned_to, created_by, "
+    "parent_task, depends_on_tasks, priority, created_at, updated_at"
+)
+
+
+def _chunk_size_kwargs() -> Dict[str, Dict[str, Any]]:
+    """
+    Size arguments for the simple / markdown / code chunkers. With
+    RAG_CHUNK_SIZE_UNIT=tokens chunks target RAG_CHUNK_TARGET_TOKENS tokens;
+    otherwise each chunker keeps its character defaults.
+    """
+    if RAG_CHUNK_SIZE_UNIT != "tokens":
+        return {"simple": {}, "markdown": {}, "code": {}}
+    target = RAG_CHUNK_TARGET_TOKENS
+    return {
+        "simple": {"chunk_size": target, "overlap": target // 10, "size_unit": "tokens"},
+        "markdown": {
+            "target_chunk_size": target,
+            "min_chunk_size": max(1, target // 5),
+            "size_unit": "tokens",
+        },
+        "code": {
+            "target_size": target,
+            "max_size": max(target, RAG_CHUNK_MAX_TOKENS),
+            "min_size": max(1, target // 5),
+            "size_unit": "tokens",
+        },
+    }
+
+
+# Chunker output versions: bump when a chunker's output changes for the same
+# input and parameters, so cached chunks (chunk_cache.py) are not reused.
+CHUNKER_VERSIONS = {"simple": 1, "markdown": 1, "code": 1}
+
+
+def _select_chunker(source_type: str) -> str:
+    """Name of the chunker used for a source type ('simple', 'markdown' or 'code')."""
+    if ADVANCED_EMBEDDINGS and source_type in ("markdown", "code"):
+        return source_type
+    return "simple"
+
+
+def _chunker_params_version(chunker: str) -> str:
+    """Identifies the chunker's output version and every setting its output depends on."""
+    params: Dict[str, Any] = {
+        "version": CHUNKER_VERSIONS[chunker],
+        "kwargs": _chunk_size_kwargs()[chunker],
+    }
+    if chunker == "code":
+        params["anchor_entities"] = RAG_ENTITY_ANCHORED_CHUNKS
+    if RAG_CHUNK_SIZE_UNIT == "tokens":
+        params["max_tokens"] = RAG_CHUNK_MAX_TOKENS
+        params["tokenizer"] = RAG_TOKENIZER_ENCODING if get_tokenizer() else "approx"
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return f"v{CHUNKER_VERSIONS[chunker]}-{digest.hexdigest()[:16]}"
+
+
+def _chunk_source(
+    source_type: str,
+    source_ref: str,
+    content: str,
+    chunker: str,
+    project_dir: Path,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Chunks one source with the named chunker. Returns (chunk_text, metadata) pairs."""
+    chunks_with_metadata: List[Tuple[str, Dict[str, Any]]] = []
+    chunk_kwargs = _chunk_size_kwargs()
+
+    if chunker == "markdown":
+        # Markdown-aware chunking
+        text_chunks = markdown_aware_chunker(content, **chunk_kwargs["markdown"])
+        chunks_with_metadata = [
+            (chunk, {"source_type": "markdown"}) for chunk in text_chunks
+        ]
+    elif chunker == "code":
+        # Code-aware chunking for code files
+        file_path = project_dir / source_ref
+
+        # Parse once; the summary and the chunks share it
+        analysis = analyze_code(content, file_path)
+
+        # First, create a file summary
+        entities = extract_code_entities(content, file_path, analysis=analysis)
+        file_summary = create_file_summary(
+            content, file_path, entities, analysis=analysis
+        )
+        summary_text = f"File: {source_ref}\n{json.dumps(file_summary, indent=2)}"
+        chunks_with_metadata.append(
+            (summary_text, {"source_type": "code_summary", **file_summary})
+        )
+
+        # Then chunk the code
+        code_chunks = chunk_code_aware(
+            content,
+            file_path,
+            analysis=analysis,
+            anchor_entities=RAG_ENTITY_ANCHORED_CHUNKS,
+            **chunk_kwargs["code"],
+        )
+        chunks_with_metadata.extend(code_chunks)
+    else:
+        # Simple chunking (all types in simple mode, other types in advanced mode)
+        text_chunks = simple_chunker(content, **chunk_kwargs["simple"])
+        # Store minimal metadata
+        chunks_with_metadata = [
+            (chunk, {"source_type": source_type}) for chunk in text_chunks
+        ]
+
+    if RAG_CHUNK_SIZE_UNIT == "tokens":
+        # Hard cap so every chunk fits the embedding / prompt budget
+        chunks_with_metadata = [
+            (piece, metadata)
+            for chunk_text, metadata in chunks_with_metadata
+            for piece in split_to_token_limit(chunk_text, RAG_CHUNK_MAX_TOKENS)
+        ]
+    return chunks_with_metadata
+
+
+def _delete_source_chunks(
+    cursor: sqlite3.Cursor, vector_engine: str, source_type: str, source_ref: str
+) -> int:
+    """
+    Deletes the chunks of one source together with their vectors in the
+    active vector engine. Returns the number of chunks deleted.
+    """
+    if vector_engine == ENGINE_NUMPY:
+        cursor.execute(
+            "SELECT chunk_id FROM rag_chunks WHERE source_type = ? AND source_ref = ?",
+            (source_type, source_ref),
+        )
+        get_numpy_vector_index().remove(row[0] for row in cursor.fetchall())
+    else:
+        # Delete from embeddings first (using rowid from chunks)
+        cursor.execute(
+            "DELETE FROM rag_embeddings WHERE rowid IN (SELECT chunk_id FROM rag_chunks WHERE source_type = ? AND source_ref = ?)",
+            (source_type, source_ref),
+        )
+        if get_quantization():
+            cursor.execute(
+                f"DELETE FROM {QUANTIZED_TABLE_NAME} WHERE rowid IN (SELECT chunk_id FROM rag_chunks WHERE source_type = ? AND source_ref = ?)",
+                (source_type, source_ref),
+            )
+    res_chk = cursor.execute(
+        "DELETE FROM rag_chunks WHERE source_type = ? AND source_ref = ?",
+        (source_type, source_ref),
+    )
+    return max(res_chk.rowcount, 0)
+
+
+def _add_stage_stats(
+    stage_stats: Dict[str, Tuple[float, Dict[str, int]]],
+    stage: str,
+    seconds: float,
+    counts: Dict[str, int],
+) -> None:
+    """Accumulates one stage run (batches of a cycle add up)."""
+    total_seconds, total_counts = stage_stats.get(stage, (0.0, {}))
+    for unit, count in counts.items():
+        total_counts[unit] = total_counts.get(unit, 0) + count
+    stage_stats[stage] = (total_seconds + seconds, total_counts)
+
+
+def _format_stage_throughput(
+    stage_stats: Dict[str, Tuple[float, Dict[str, int]]]
+) -> str:
+    """Formats {stage: (seconds, {unit: count})} as per-stage counts and rates."""
+    parts = []
+    for stage, (seconds, counts) in stage_stats.items():
+        totals = ", ".join(f"{count} {unit}" for unit, count in counts.items())
+        rates = ", ".join(
+            f"{count / seconds:.1f} {unit}/s" if seconds > 0 else f"- {unit}/s"
+            for unit, count in counts.items()
+        )
+        parts.append(f"{stage}: {totals} in {seconds:.2f}s ({rates})")
+    return "; ".join(parts)
+
+
+def _load_source_chunk_ids(
+    cursor: sqlite3.Cursor,
+    vector_engine: str,
+    source_type: str,
+    source_ref: str,
+    numpy_chunk_ids: Optional[Set[int]] = None,
+) -> Tuple[Dict[str, List[int]], List[int]]:
+    """
+    Existing chunks of one source. Returns (chunk text -> ids of the chunks
+    with that text that still have a vector, ids of chunks without a vector).
+    `numpy_chunk_ids` is the NumPy index's id set, read once per cycle.
+    """
+    cursor.execute(
+        "SELECT chunk_id, chunk_text FROM rag_chunks WHERE source_type = ? AND source_ref = ? ORDER BY chunk_id",
+        (source_type, source_ref),
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return {}, []
+
+    if vector_engine == ENGINE_NUMPY:
+        embedded_ids = numpy_chunk_ids or set()
+    else:
+        embedded_ids = set()
+        chunk_ids = [row[0] for row in rows]
+        for start in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[start : start + 500]
+            placeholders = ", ".join("?" for _ in batch)
+            cursor.execute(
+                f"SELECT rowid FROM rag_embeddings WHERE rowid IN ({placeholders})",
+                batch,
+            )
+            embedded_ids.update(row[0] for row in cursor.fetchall())
+
+    ids_by_text: Dict[str, List[int]] = {}
+    unembedded_ids: List[int] = []
+    for chunk_id, chunk_text in rows:
+        if chunk_id in embedded_ids:
+            ids_by_text.setdefault(chunk_text, []).append(chunk_id)
+        else:
+            unembedded_ids.append(chunk_id)
+    return ids_by_text, unembedded_ids
+
+
+def _delete_chunk_ids(
+    cursor: sqlite3.Cursor, vector_engine: str, chunk_ids: List[int]
+) -> int:
+    """Deletes chunks by id together with their vectors. Returns the number deleted."""
+    if vector_engine == ENGINE_NUMPY:
+        get_numpy_vector_index().remove(chunk_ids)
+    deleted = 0
+    for start in range(0, len(chunk_ids), 500):
+        batch = chunk_ids[start : start + 500]
+        placeholders = ", ".join("?" for _ in batch)
+        if vector_engine != ENGINE_NUMPY:
+            cursor.execute(
+                f"DELETE FROM rag_embeddings WHERE rowid IN ({placeholders})", batch
+            )
+            if get_quantization():
+                cursor.execute(
+                    f"DELETE FROM {QUANTIZED_TABLE_NAME} WHERE rowid IN ({placeholders})",
+                    batch,
+                )
+        res_chk = cursor.execute(
+            f"DELETE FROM rag_chunks WHERE chunk_id IN ({placeholders})", batch
+        )
+        deleted += max(res_chk.rowcount, 0)
+    return deleted
+
+
+def _insert_chunk_embedding(
+    cursor: sqlite3.Cursor, chunk_id: int, embedding_vector: List[float]
+) -> None:
+    """Stores a chunk's vector in vec0 (and the quantized table, if enabled)."""
+    embedding_json_str = json.dumps(embedding_vector)
+    cursor.execute(
+        "INSERT INTO rag_embeddings (rowid, embedding) VALUES (?, ?)",
+        (chunk_id, embedding_json_str),
+    )
+    quantization = get_quantization()
+    if quantization:
+        cursor.execute(
+            f"INSERT INTO {QUANTIZED_TABLE_NAME} (rowid, embedding) VALUES (?, {quantize_sql(quantization)})",
+            (chunk_id, embedding_json_str),
+        )
+
 
 async def _get_embeddings_batch_openai(
     batch_chunks: List[str],
@@ -139,6 +441,424 @@ async def _get_embeddings_batch_openai(
         return False
 
 
+async def _index_sources(
+    conn: sqlite3.Connection,
+    vector_engine: str,
+    sources_to_process_for_embedding: List[Tuple[str, str, Optional[str], str]],
+    current_project_dir: Path,
+    openai_api_key_for_batches: str,
+    stage_stats: Dict[str, Tuple[float, Dict[str, int]]],
+) -> bool:
+    """
+    Chunks, reconciles, embeds and stores one batch of changed sources
+    (type, ref, content or None for files, current hash) and records their
+    hashes in rag_meta. Used by the periodic cycle and the on-demand queue
+    worker (callers hold _index_lock). Returns False if embedding failed.
+    """
+    cursor = conn.cursor()
+    embeddings_api_successful = True
+    processed_hashes_to_update_in_meta: Dict[str, str] = {}
+
+    # Generate chunks and prepare for embedding (Original main.py:631-647).
+    # Each source's new chunks are reconciled with its stored ones:
+    # chunks whose text is unchanged keep their row and vector, so
+    # only new texts are embedded and only leftovers are deleted.
+    all_chunks_texts_to_embed: List[str] = []
+    chunk_source_metadata_map: List[
+        Tuple[str, str, str, Dict[str, Any]]
+    ] = []  # type, ref, current_hash, metadata for each chunk
+
+    # Chunker output is cached per (content hash, chunker, params version)
+    chunker_params_versions = {
+        name: _chunker_params_version(name) for name in CHUNKER_VERSIONS
+    }
+    chunk_cache_hits = 0
+    numpy_chunk_ids = (
+        get_numpy_vector_index().chunk_ids()
+        if vector_engine == ENGINE_NUMPY
+        else None
+    )
+    reused_chunk_updates: List[Tuple[str, int]] = []  # metadata, chunk_id
+    stale_chunk_ids: List[int] = []
+    unchanged_source_hashes: Dict[str, str] = {}
+
+    # Chunk each source: cache hits here, misses on the index workers
+    source_chunks: Dict[
+        Tuple[str, str], List[Tuple[str, Dict[str, Any]]]
+    ] = {}
+    chunked_hashes: Dict[Tuple[str, str], str] = {}
+    chunk_units: List[Tuple[str, str, Optional[str], str]] = []
+    for (
+        source_type,
+        source_ref,
+        content,
+        current_hash_of_source,
+    ) in sources_to_process_for_embedding:
+        chunker = _select_chunker(source_type)
+        if RAG_CHUNK_CACHE_ENABLED:
+            cached_chunks = load_cached_chunks(
+                cursor,
+                chunk_cache_content_hash(
+                    source_type, source_ref, current_hash_of_source
+                ),
+                chunker,
+                chunker_params_versions[chunker],
+            )
+            if cached_chunks is not None:
+                chunk_cache_hits += 1
+                source_chunks[(source_type, source_ref)] = cached_chunks
+                continue
+        chunk_units.append((source_type, source_ref, content, chunker))
+
+    stage_start_time = time.time()
+    chunk_results = await run_work_units(
+        chunk_sources, chunk_units, str(current_project_dir)
+    )
+    chunked_count = 0
+    for (source_type, source_ref, _, chunker), (
+        content_hash,
+        chunks_with_metadata,
+        error,
+    ) in zip(chunk_units, chunk_results):
+        if error is not None:
+            # Left out of this cycle; its hash stays stale so it is retried
+            logger.warning(
+                f"Failed to chunk {source_type}: {source_ref}: {error}"
+            )
+            continue
+        source_chunks[(source_type, source_ref)] = chunks_with_metadata
+        # The file may have changed since it was hashed; record what was chunked
+        chunked_hashes[(source_type, source_ref)] = content_hash
+        chunked_count += len(chunks_with_metadata)
+        if RAG_CHUNK_CACHE_ENABLED:
+            store_cached_chunks(
+                cursor,
+                chunk_cache_content_hash(
+                    source_type, source_ref, content_hash
+                ),
+                chunker,
+                chunker_params_versions[chunker],
+                chunks_with_metadata,
+            )
+    _add_stage_stats(
+        stage_stats,
+        "chunk",
+        time.time() - stage_start_time,
+        {"sources": len(chunk_units), "chunks": chunked_count},
+    )
+
+    for (
+        source_type,
+        source_ref,
+        _,
+        current_hash_of_source,
+    ) in sources_to_process_for_embedding:
+        if (source_type, source_ref) not in source_chunks:
+            continue
+        chunks_with_metadata = source_chunks[(source_type, source_ref)]
+        current_hash_of_source = chunked_hashes.get(
+            (source_type, source_ref), current_hash_of_source
+        )
+
+        existing_ids_by_text, unembedded_ids = _load_source_chunk_ids(
+            cursor, vector_engine, source_type, source_ref, numpy_chunk_ids
+        )
+        stale_chunk_ids.extend(unembedded_ids)
+
+        chunk_index = 0  # Position in the source, for adjacency in query.py
+        new_chunk_count = 0
+        for chunk_text, metadata in chunks_with_metadata or []:
+            # Validate chunk before adding - skip empty or whitespace-only chunks
+            if not (chunk_text and chunk_text.strip()):
+                logger.warning(
+                    f"Skipping empty chunk from {source_type}: {source_ref}"
+                )
+                continue
+            chunk_text = chunk_text.strip()
+            metadata = {**(metadata or {}), "chunk_index": chunk_index}
+            chunk_index += 1
+
+            reusable_ids = existing_ids_by_text.get(chunk_text)
+            if reusable_ids:
+                reused_chunk_updates.append(
+                    (json.dumps(metadata), reusable_ids.pop(0))
+                )
+                continue
+            all_chunks_texts_to_embed.append(chunk_text)
+            # Store metadata along with source info
+            chunk_source_metadata_map.append(
+                (
+                    source_type,
+                    source_ref,
+                    current_hash_of_source,
+                    metadata,
+                )
+            )
+            new_chunk_count += 1
+
+        for leftover_ids in existing_ids_by_text.values():
+            stale_chunk_ids.extend(leftover_ids)
+
+        if not chunks_with_metadata:
+            logger.warning(
+                f"No chunks generated for {source_type}: {source_ref} (likely empty or only whitespace). Skipping."
+            )
+        elif chunk_index and not new_chunk_count:
+            # Every chunk was reused; nothing left to embed for this source
+            unchanged_source_hashes[f"hash_{source_type}_{source_ref}"] = (
+                current_hash_of_source
+            )
+
+    # Apply the reconciliation before embedding, as the old
+    # delete-then-reinsert did; a failed embedding cycle leaves the
+    # source's hash stale so it is reconciled again next cycle
+    deleted_count = 0
+    if stale_chunk_ids:
+        deleted_count = _delete_chunk_ids(
+            cursor, vector_engine, stale_chunk_ids
+        )
+    if reused_chunk_updates:
+        cursor.executemany(
+            "UPDATE rag_chunks SET metadata = ? WHERE chunk_id = ?",
+            reused_chunk_updates,
+        )
+    if unchanged_source_hashes:
+        cursor.executemany(
+            "INSERT OR REPLACE INTO rag_meta (meta_key, meta_value) VALUES (?, ?)",
+            list(unchanged_source_hashes.items()),
+        )
+    conn.commit()
+    logger.info(
+        f"Re-chunked {len(sources_to_process_for_embedding)} sources: "
+        f"{len(reused_chunk_updates)} unchanged chunks kept their embeddings, "
+        f"{deleted_count} stale chunks deleted, "
+        f"{len(all_chunks_texts_to_embed)} new chunks to embed."
+    )
+
+    if RAG_CHUNK_CACHE_ENABLED:
+        pruned = prune_chunk_cache(cursor, RAG_CHUNK_CACHE_MAX_AGE_DAYS)
+        conn.commit()  # Keep cached chunks even if embedding fails below
+        logger.info(
+            f"Chunk cache: {chunk_cache_hits}/{len(sources_to_process_for_embedding)} sources reused cached chunks"
+            + (f", pruned {pruned} stale entries." if pruned else ".")
+        )
+
+    if all_chunks_texts_to_embed:
+        logger.info(
+            f"Generated {len(all_chunks_texts_to_embed)} new chunks for embedding."
+        )
+
+        all_embeddings_vectors: List[Optional[List[float]]] = [None] * len(
+            all_chunks_texts_to_embed
+        )
+        embeddings_api_successful = (
+            True  # Flag to track overall success of API calls
+        )
+
+        # Parallel embedding processing (Original main.py:662-690)
+        embedding_api_call_start_time = time.time()
+        # Process batches in groups with controlled concurrency
+        for group_start_idx in range(
+            0,
+            len(all_chunks_texts_to_embed),
+            MAX_CONCURRENT_EMBEDDING_REQUESTS
+            * PARALLEL_EMBEDDING_BATCH_SIZE,
+        ):
+            # Determine how many batches to run in this parallel group
+            num_batches_in_group = 0
+            temp_idx = group_start_idx
+            while (
+                num_batches_in_group < MAX_CONCURRENT_EMBEDDING_REQUESTS
+                and temp_idx < len(all_chunks_texts_to_embed)
+            ):
+                num_batches_in_group += 1
+                temp_idx += PARALLEL_EMBEDDING_BATCH_SIZE
+
+            logger.info(
+                f"Processing up to {num_batches_in_group} embedding batches in parallel (group starting at chunk {group_start_idx})..."
+            )
+
+            try:
+                async with anyio.create_task_group() as tg_embed:
+                    for i in range(num_batches_in_group):
+                        batch_actual_start_index = (
+                            group_start_idx
+                            + i * PARALLEL_EMBEDDING_BATCH_SIZE
+                        )
+                        if batch_actual_start_index >= len(
+                            all_chunks_texts_to_embed
+                        ):
+                            break  # No more chunks
+
+                        batch_end_index = min(
+                            batch_actual_start_index
+                            + PARALLEL_EMBEDDING_BATCH_SIZE,
+                            len(all_chunks_texts_to_embed),
+                        )
+                        current_batch_chunks = all_chunks_texts_to_embed[
+                            batch_actual_start_index:batch_end_index
+                        ]
+
+                        if not current_batch_chunks:
+                            continue
+
+                        tg_embed.start_soon(
+                            _get_embeddings_batch_openai,
+                            current_batch_chunks,
+                            batch_actual_start_index,
+                            all_embeddings_vectors,
+                            openai_api_key_for_batches,  # Pass the API key
+                        )
+            except (
+                Exception
+            ) as e_tg:  # Catch errors from the task group itself
+                logger.error(
+                    f"Error in parallel embedding batch processing task group: {e_tg}"
+                )
+                embeddings_api_successful = (
+                    False  # Mark failure if task group fails
+                )
+
+            if not embeddings_api_successful:
+                break  # Stop if a task group failed
+
+            # Minimal delay between batch groups (Original main.py:689)
+            if (
+                group_start_idx
+                + MAX_CONCURRENT_EMBEDDING_REQUESTS
+                * PARALLEL_EMBEDDING_BATCH_SIZE
+                < len(all_chunks_texts_to_embed)
+            ):
+                await anyio.sleep(0.1)  # Reduced from 0.2
+
+        embedding_api_duration = time.time() - embedding_api_call_start_time
+        _add_stage_stats(
+            stage_stats,
+            "embed",
+            embedding_api_duration,
+            {"chunks": len(all_chunks_texts_to_embed)},
+        )
+        logger.info(
+            f"Completed all embedding API calls in {embedding_api_duration:.2f} seconds."
+        )
+
+        # Check for failed embeddings (None values)
+        failed_embedding_count = sum(
+            1 for emb_vec in all_embeddings_vectors if emb_vec is None
+        )
+        if failed_embedding_count > 0:
+            logger.warning(
+                f"{failed_embedding_count} out of {len(all_embeddings_vectors)} embeddings failed to generate."
+            )
+            # If a significant portion failed, mark the overall API call as unsuccessful
+            if (
+                failed_embedding_count > len(all_embeddings_vectors) // 2
+            ):  # More than half failed
+                embeddings_api_successful = False
+                logger.error(
+                    "More than half of the embeddings failed. Marking RAG indexing cycle for these sources as unsuccessful."
+                )
+
+        # Insert new chunks and embeddings into DB (Original main.py:697-722)
+        if embeddings_api_successful:
+            logger.info(
+                "Inserting new chunks and embeddings into the database..."
+            )
+            inserted_count = 0
+            indexed_at_iso = datetime.datetime.now().isoformat()
+            # NumPy engine: vectors are added in one batch after the loop
+            numpy_batch_ids: List[int] = []
+            numpy_vectors: List[List[float]] = []
+            for i, chunk_text_to_insert in enumerate(
+                all_chunks_texts_to_embed
+            ):
+                embedding_vector = all_embeddings_vectors[i]
+                if embedding_vector is None:
+                    logger.warning(
+                        f"Skipping chunk {i} for DB insertion due to missing embedding."
+                    )
+                    continue
+
+                (
+                    source_type,
+                    source_ref,
+                    current_hash_of_source,
+                    chunk_metadata,
+                ) = chunk_source_metadata_map[i]
+                try:
+                    # Store chunk with optional metadata
+                    metadata_json = (
+                        json.dumps(chunk_metadata)
+                        if chunk_metadata
+                        else None
+                    )
+                    cursor.execute(
+                        "INSERT INTO rag_chunks (source_type, source_ref, chunk_text, indexed_at, metadata) VALUES (?, ?, ?, ?, ?)",
+                        (
+                            source_type,
+                            source_ref,
+                            chunk_text_to_insert,
+                            indexed_at_iso,
+                            metadata_json,
+                        ),
+                    )
+                    chunk_rowid = cursor.lastrowid  # This is the chunk_id
+
+                    if vector_engine == ENGINE_NUMPY:
+                        numpy_batch_ids.append(chunk_rowid)
+                        numpy_vectors.append(embedding_vector)
+                    else:
+                        _insert_chunk_embedding(
+                            cursor, chunk_rowid, embedding_vector
+                        )
+                    inserted_count += 1
+                    # Mark this source's hash to be updated in rag_meta
+                    meta_key_for_hash_update = (
+                        f"hash_{source_type}_{source_ref}"
+                    )
+                    processed_hashes_to_update_in_meta[
+                        meta_key_for_hash_update
+                    ] = current_hash_of_source
+                except sqlite3.Error as db_err:
+                    logger.error(
+                        f"DB Error inserting chunk/embedding for {source_type}:{source_ref} (Chunk index {i}): {db_err}"
+                    )
+                    # If one insert fails, we might lose its hash update.
+                    # Consider if transaction should be per source or all-or-nothing for the cycle.
+                    # Original code continued, so we do too.
+                except Exception as e_ins:
+                    logger.error(
+                        f"Unexpected error inserting chunk/embedding: {e_ins}",
+                        exc_info=True,
+                    )
+
+            if numpy_batch_ids:
+                get_numpy_vector_index().add(numpy_batch_ids, numpy_vectors)
+
+            logger.info(
+                f"Successfully inserted {inserted_count} new chunks/embeddings."
+            )
+
+            # Update rag_meta with the new hashes for successfully processed sources
+            # Original main.py:725-728
+            if processed_hashes_to_update_in_meta:
+                logger.info(
+                    f"Updating {len(processed_hashes_to_update_in_meta)} source hashes in rag_meta..."
+                )
+                meta_update_tuples = list(
+                    processed_hashes_to_update_in_meta.items()
+                )
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO rag_meta (meta_key, meta_value) VALUES (?, ?)",
+                    meta_update_tuples,
+                )
+        else:
+            logger.warning(
+                "Skipping DB insertion and hash updates for this RAG batch due to embedding API errors."
+            )
+    return embeddings_api_successful
+
+
 async def run_rag_indexing_periodically(
     interval_seconds: int = 300, *, task_status=anyio.TASK_STATUS_IGNORED
 ) -> NoReturn:
@@ -181,32 +901,39 @@ async def run_rag_indexing_periodically(
             )
 
         conn = None  # Initialize conn here for broader scope in try-finally
+        # Per-stage throughput: stage -> (seconds, {unit: count})
+        stage_stats: Dict[str, Tuple[float, Dict[str, int]]] = {}
 
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
 
-            # Check if VSS is usable (vec0 table exists as a proxy)
-            # Original main.py:526-531
-            if (
-                not is_vss_loadable()
-            ):  # This checks the global flag set by initial check
+            # Check which vector engine is usable: sqlite-vec (vec0 table) or
+            # the in-process NumPy fallback. Original main.py:526-531
+            vector_engine = get_vector_engine()
+            if vector_engine is None:
                 logger.warning(
-                    "Vector Search (sqlite-vec) is not loadable. Skipping RAG indexing cycle."
+                    "No vector search engine available (sqlite-vec not loadable, NumPy fallback unavailable). Skipping RAG indexing cycle."
                 )
                 await anyio.sleep(interval_seconds * 2)  # Sleep longer if VSS fails
                 continue  # Skip to next iteration of the while loop
 
-            # Check for rag_embeddings table specifically
-            cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='rag_embeddings'"
-            )
-            if cursor.fetchone() is None:
-                logger.warning(
-                    "Vector table 'rag_embeddings' not found. Skipping RAG indexing cycle. Ensure DB schema is initialized."
+            if vector_engine == ENGINE_NUMPY:
+                # Re-queue sources whose chunks have no vector in the NumPy index
+                sync_numpy_index_with_chunks(conn)
+            else:
+                # Check for rag_embeddings table specifically
+                cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type='table' AND name='rag_embeddings'"
                 )
-                await anyio.sleep(interval_seconds * 2)
-                continue
+                if cursor.fetchone() is None:
+                    logger.warning(
+                        "Vector table 'rag_embeddings' not found. Skipping RAG indexing cycle. Ensure DB schema is initialized."
+                    )
+                    await anyio.sleep(interval_seconds * 2)
+                    continue
+                # Create/backfill or drop the quantized first-stage table
+                ensure_quantized_table(conn)
 
             # Get last indexed timestamps and stored hashes
             # Original main.py:534-535 (last_indexed) and main.py:597-598 (stored_hashes)
@@ -294,52 +1021,40 @@ async def run_rag_indexing_periodically(
                     f"Found {len(all_code_files_found)} code files to consider for indexing (after filtering ignored dirs)."
                 )
 
-            # Process markdown files (only if auto-indexing is enabled)
-            if not DISABLE_AUTO_INDEXING:
-                for md_path_obj in all_md_files_found:
-                    try:
-                        mod_time = md_path_obj.stat().st_mtime
-                        content = md_path_obj.read_text(encoding="utf-8")
-                        normalized_path = str(
-                            md_path_obj.relative_to(current_project_dir).as_posix()
-                        )
-                        current_hash = hashlib.sha256(
-                            content.encode("utf-8")
-                        ).hexdigest()
-                        sources_to_check.append(
-                            (
-                                "markdown",
-                                normalized_path,
-                                content,
-                                mod_time,
-                                current_hash,
-                            )
-                        )
-                        if mod_time > max_md_mod_timestamp:
-                            max_md_mod_timestamp = mod_time
-                    except Exception as e:
-                        logger.warning(
-                            f"Failed to read or process markdown file {md_path_obj}: {e}"
-                        )
-
-            # Process code files
-            for code_path_obj in all_code_files_found:
-                try:
-                    mod_time = code_path_obj.stat().st_mtime
-                    content = code_path_obj.read_text(encoding="utf-8")
-                    normalized_path = str(
-                        code_path_obj.relative_to(current_project_dir).as_posix()
-                    )
-                    current_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
-                    sources_to_check.append(
-                        ("code", normalized_path, content, mod_time, current_hash)
-                    )
-                    if mod_time > max_code_mod_timestamp:
-                        max_code_mod_timestamp = mod_time
-                except Exception as e:
+            # Read and hash markdown and code files on the index workers. File
+            # sources carry no content (None); changed ones are re-read by the
+            # chunking workers below.
+            file_sources = [("markdown", path) for path in all_md_files_found] + [
+                ("code", path) for path in all_code_files_found
+            ]
+            stage_start_time = time.time()
+            scan_results = await run_work_units(
+                read_and_hash_files, [str(path) for _, path in file_sources]
+            )
+            _add_stage_stats(
+                stage_stats,
+                "read+hash",
+                time.time() - stage_start_time,
+                {"files": len(file_sources)},
+            )
+            for (source_type, path_obj), (mod_time, current_hash, error) in zip(
+                file_sources, scan_results
+            ):
+                if error is not None:
                     logger.warning(
-                        f"Failed to read or process code file {code_path_obj}: {e}"
+                        f"Failed to read or process {source_type} file {path_obj}: {error}"
                     )
+                    continue
+                normalized_path = str(
+                    path_obj.relative_to(current_project_dir).as_posix()
+                )
+                sources_to_check.append(
+                    (source_type, normalized_path, None, mod_time, current_hash)
+                )
+                if source_type == "markdown":
+                    max_md_mod_timestamp = max(max_md_mod_timestamp, mod_time)
+                else:
+                    max_code_mod_timestamp = max(max_code_mod_timestamp, mod_time)
 
             # 2. Scan Project Context (Original main.py:585-603)
             last_ctx_time_str = last_indexed_timestamps.get(
@@ -360,8 +1075,8 @@ async def run_rag_indexing_periodically(
                 desc = row["description"] or ""
                 last_mod_iso = row["last_updated"]
                 # Content for hashing and embedding (main.py:593-595)
-                content_for_embedding = (
-                    f"Context Key: {key}\nDescription: {desc}\nValue: {value_str}"
+                content_for_embedding = format_context_for_embedding(
+                    key, desc, value_str
                 )
                 current_hash = hashlib.sha256(
                     content_for_embedding.encode("utf-8")
@@ -386,9 +1101,7 @@ async def run_rag_indexing_periodically(
 
                 # Get tasks that have been updated since last indexing
                 cursor.execute(
-                    "SELECT task_id, title, description, status, assigned_to, created_by, "
-                    "parent_task, depends_on_tasks, priority, created_at, updated_at "
-                    "FROM tasks WHERE updated_at > ?",
+                    f"SELECT {TASK_INDEX_COLUMNS} FROM tasks WHERE updated_at > ?",
                     (last_task_time_str,),
                 )
 
@@ -417,10 +1130,17 @@ async def run_rag_indexing_periodically(
                         max_task_mod_time_iso = last_mod_iso
 
             # Filter sources based on hash comparison (Original main.py:608-615)
-            sources_to_process_for_embedding: List[Tuple[str, str, str, str]] = (
-                []
-            )  # type, ref, content, current_hash
-            for source_type, source_ref, content, _, current_hash in sources_to_check:
+            sources_to_process_for_embedding: List[
+                Tuple[str, str, Optional[str], str]
+            ] = []  # type, ref, content (None for files), current_hash
+            source_mod_times: Dict[Tuple[str, str], Any] = {}
+            for (
+                source_type,
+                source_ref,
+                content,
+                mod_time,
+                current_hash,
+            ) in sources_to_check:
                 meta_key_for_hash = f"hash_{source_type}_{source_ref}"
                 stored_source_hash = stored_hashes.get(meta_key_for_hash)
                 if current_hash != stored_source_hash:
@@ -430,6 +1150,7 @@ async def run_rag_indexing_periodically(
                     sources_to_process_for_embedding.append(
                         (source_type, source_ref, content, current_hash)
                     )
+                    source_mod_times[(source_type, source_ref)] = mod_time
                 # else: logger.debug(f"No change for {source_type}:{source_ref} (hash match)")
 
             if not sources_to_process_for_embedding:
@@ -441,322 +1162,42 @@ async def run_rag_indexing_periodically(
                     f"Processing {len(sources_to_process_for_embedding)} updated/new sources for RAG index."
                 )
 
-                processed_hashes_to_update_in_meta: Dict[str, str] = {}
-
-                # Delete existing chunks for sources needing update (Original main.py:619-628)
-                logger.info(
-                    "Deleting existing chunks and embeddings for sources needing update..."
-                )
-                delete_count = 0
-                for source_type, source_ref, _, _ in sources_to_process_for_embedding:
-                    # Delete from embeddings first (using rowid from chunks)
-                    # Ensure rag_embeddings table exists before attempting delete
-                    cursor.execute(
-                        "SELECT name FROM sqlite_master WHERE type='table' AND name='rag_embeddings'"
-                    )
-                    if cursor.fetchone() is not None:
-                        res_emb = cursor.execute(
-                            "DELETE FROM rag_embeddings WHERE rowid IN (SELECT chunk_id FROM rag_chunks WHERE source_type = ? AND source_ref = ?)",
-                            (source_type, source_ref),
-                        )
-                    # Delete from chunks
-                    res_chk = cursor.execute(
-                        "DELETE FROM rag_chunks WHERE source_type = ? AND source_ref = ?",
-                        (source_type, source_ref),
-                    )
-                    if res_chk.rowcount > 0:
-                        delete_count += res_chk.rowcount
-                if delete_count > 0:
-                    logger.info(
-                        f"Deleted {delete_count} old chunks and their embeddings."
+                # Highest priority first (context, tasks, recently touched
+                # files, bulk markdown / code), committed batch by batch
+                sources_to_process_for_embedding.sort(
+                    key=lambda source: source_priority(
+                        source[0], source_mod_times.get((source[0], source[1]))
                     )
-                    conn.commit()  # Commit deletions
-
-                # Generate chunks and prepare for embedding (Original main.py:631-647)
-                all_chunks_texts_to_embed: List[str] = []
-                chunk_source_metadata_map: List[
-                    Tuple[str, str, str, Dict[str, Any]]
-                ] = []  # type, ref, current_hash, metadata for each chunk
-
-                # ADVANCED_EMBEDDINGS is already imported at module level
-
-                for (
-                    source_type,
-                    source_ref,
-                    content,
-                    current_hash_of_source,
-                ) in sources_to_process_for_embedding:
-                    chunks_with_metadata: List[Tuple[str, Dict[str, Any]]] = []
-
-                    if ADVANCED_EMBEDDINGS:
-                        # Advanced mode: Use sophisticated chunking
-                        if source_type == "markdown":
-                            # Markdown-aware chunking
-                            text_chunks = markdown_aware_chunker(content)
-                            chunks_with_metadata = [
-                                (chunk, {"source_type": "markdown"})
-                                for chunk in text_chunks
+                )
+                index_queue = get_rag_index_queue()
+                scan_queue_seq = index_queue.indexed_seq()
+                embeddings_api_successful = True
+                for batch_start in range(
+                    0, len(sources_to_process_for_embedding), RAG_INDEX_BATCH_SOURCES
+                ):
+                    async with _index_lock:
+                        # Entries the queue worker indexed after this scan are newer
+                        batch = [
+                            source
+                            for source in sources_to_process_for_embedding[
+                                batch_start : batch_start + RAG_INDEX_BATCH_SOURCES
                             ]
-                        elif source_type == "code":
-                            # Code-aware chunking for code files
-                            file_path = current_project_dir / source_ref
-
-                            # First, create a file summary
-                            entities = extract_code_entities(content, file_path)
-                            file_summary = create_file_summary(
-                                content, file_path, entities
-                            )
-                            summary_text = f"File: {source_ref}\n{json.dumps(file_summary, indent=2)}"
-                            chunks_with_metadata.append(
-                                (
-                                    summary_text,
-                                    {"source_type": "code_summary", **file_summary},
-                                )
+                            if not index_queue.indexed_since(
+                                scan_queue_seq, (source[0], source[1])
                             )
-
-                            # Then chunk the code
-                            code_chunks = chunk_code_aware(content, file_path)
-                            chunks_with_metadata.extend(code_chunks)
-                        else:
-                            # Simple chunking for other types
-                            text_chunks = simple_chunker(content)
-                            chunks_with_metadata = [
-                                (chunk, {"source_type": source_type})
-                                for chunk in text_chunks
-                            ]
-                    else:
-                        # Original/Simple mode: Basic chunking for all types
-                        text_chunks = simple_chunker(content)
-                        # Store minimal metadata
-                        chunks_with_metadata = [
-                            (chunk, {"source_type": source_type})
-                            for chunk in text_chunks
                         ]
-
-                    if not chunks_with_metadata:
-                        file_size = len(content) if content else 0
-                        logger.warning(
-                            f"No chunks generated for {source_type}: {source_ref} (file size: {file_size} bytes, likely empty or only whitespace). Skipping."
-                        )
-                        continue
-
-                    for chunk_text, metadata in chunks_with_metadata:
-                        # Validate chunk before adding - skip empty or whitespace-only chunks
-                        if chunk_text and chunk_text.strip():
-                            all_chunks_texts_to_embed.append(chunk_text.strip())
-                            # Store metadata along with source info
-                            chunk_source_metadata_map.append(
-                                (
-                                    source_type,
-                                    source_ref,
-                                    current_hash_of_source,
-                                    metadata,
-                                )
-                            )
-                        else:
-                            logger.warning(
-                                f"Skipping empty chunk from {source_type}: {source_ref}"
-                            )
-
-                if all_chunks_texts_to_embed:
-                    logger.info(
-                        f"Generated {len(all_chunks_texts_to_embed)} new chunks for embedding."
-                    )
-
-                    all_embeddings_vectors: List[Optional[List[float]]] = [None] * len(
-                        all_chunks_texts_to_embed
-                    )
-                    embeddings_api_successful = (
-                        True  # Flag to track overall success of API calls
-                    )
-
-                    # Parallel embedding processing (Original main.py:662-690)
-                    embedding_api_call_start_time = time.time()
-                    # Process batches in groups with controlled concurrency
-                    for group_start_idx in range(
-                        0,
-                        len(all_chunks_texts_to_embed),
-                        MAX_CONCURRENT_EMBEDDING_REQUESTS
-                        * PARALLEL_EMBEDDING_BATCH_SIZE,
-                    ):
-                        # Determine how many batches to run in this parallel group
-                        num_batches_in_group = 0
-                        temp_idx = group_start_idx
-                        while (
-                            num_batches_in_group < MAX_CONCURRENT_EMBEDDING_REQUESTS
-                            and temp_idx < len(all_chunks_texts_to_embed)
-                        ):
-                            num_batches_in_group += 1
-                            temp_idx += PARALLEL_EMBEDDING_BATCH_SIZE
-
-                        logger.info(
-                            f"Processing up to {num_batches_in_group} embedding batches in parallel (group starting at chunk {group_start_idx})..."
-                        )
-
-                        try:
-                            async with anyio.create_task_group() as tg_embed:
-                                for i in range(num_batches_in_group):
-                                    batch_actual_start_index = (
-                                        group_start_idx
-                                        + i * PARALLEL_EMBEDDING_BATCH_SIZE
-                                    )
-                                    if batch_actual_start_index >= len(
-                                        all_chunks_texts_to_embed
-                                    ):
-                                        break  # No more chunks
-
-                                    batch_end_index = min(
-                                        batch_actual_start_index
-                                        + PARALLEL_EMBEDDING_BATCH_SIZE,
-                                        len(all_chunks_texts_to_embed),
-                                    )
-                                    current_batch_chunks = all_chunks_texts_to_embed[
-                                        batch_actual_start_index:batch_end_index
-                                    ]
-
-                                    if not current_batch_chunks:
-                                        continue
-
-                                    tg_embed.start_soon(
-                                        _get_embeddings_batch_openai,
-                                        current_batch_chunks,
-                                        batch_actual_start_index,
-                                        all_embeddings_vectors,
-                                        openai_api_key_for_batches,  # Pass the API key
-                                    )
-                        except (
-                            Exception
-                        ) as e_tg:  # Catch errors from the task group itself
-                            logger.error(
-                                f"Error in parallel embedding batch processing task group: {e_tg}"
+                        if batch:
+                            embeddings_api_successful = await _index_sources(
+                                conn,
+                                vector_engine,
+                                batch,
+                                current_project_dir,
+                                openai_api_key_for_batches,
+                                stage_stats,
                             )
-                            embeddings_api_successful = (
-                                False  # Mark failure if task group fails
-                            )
-
-                        if not embeddings_api_successful:
-                            break  # Stop if a task group failed
-
-                        # Minimal delay between batch groups (Original main.py:689)
-                        if (
-                            group_start_idx
-                            + MAX_CONCURRENT_EMBEDDING_REQUESTS
-                            * PARALLEL_EMBEDDING_BATCH_SIZE
-                            < len(all_chunks_texts_to_embed)
-                        ):
-                            await anyio.sleep(0.1)  # Reduced from 0.2
-
-                    embedding_api_duration = time.time() - embedding_api_call_start_time
-                    logger.info(
-                        f"Completed all embedding API calls in {embedding_api_duration:.2f} seconds."
-                    )
-
-                    # Check for failed embeddings (None values)
-                    failed_embedding_count = sum(
-                        1 for emb_vec in all_embeddings_vectors if emb_vec is None
-                    )
-                    if failed_embedding_count > 0:
-                        logger.warning(
-                            f"{failed_embedding_count} out of {len(all_embeddings_vectors)} embeddings failed to generate."
-                        )
-                        # If a significant portion failed, mark the overall API call as unsuccessful
-                        if (
-                            failed_embedding_count > len(all_embeddings_vectors) // 2
-                        ):  # More than half failed
-                            embeddings_api_successful = False
-                            logger.error(
-                                "More than half of the embeddings failed. Marking RAG indexing cycle for these sources as unsuccessful."
-                            )
-
-                    # Insert new chunks and embeddings into DB (Original main.py:697-722)
-                    if embeddings_api_successful:
-                        logger.info(
-                            "Inserting new chunks and embeddings into the database..."
-                        )
-                        inserted_count = 0
-                        indexed_at_iso = datetime.datetime.now().isoformat()
-                        for i, chunk_text_to_insert in enumerate(
-                            all_chunks_texts_to_embed
-                        ):
-                            embedding_vector = all_embeddings_vectors[i]
-                            if embedding_vector is None:
-                                logger.warning(
-                                    f"Skipping chunk {i} for DB insertion due to missing embedding."
-                                )
-                                continue
-
-                            (
-                                source_type,
-                                source_ref,
-                                current_hash_of_source,
-                                chunk_metadata,
-                            ) = chunk_source_metadata_map[i]
-                            try:
-                                # Store chunk with optional metadata
-                                metadata_json = (
-                                    json.dumps(chunk_metadata)
-                                    if chunk_metadata
-                                    else None
-                                )
-                                cursor.execute(
-                                    "INSERT INTO rag_chunks (source_type, source_ref, chunk_text, indexed_at, metadata) VALUES (?, ?, ?, ?, ?)",
-                                    (
-                                        source_type,
-                                        source_ref,
-                                        chunk_text_to_insert,
-                                        indexed_at_iso,
-                                        metadata_json,
-                                    ),
-                                )
-                                chunk_rowid = cursor.lastrowid  # This is the chunk_id
-
-                                embedding_json_str = json.dumps(embedding_vector)
-                                cursor.execute(
-                                    "INSERT INTO rag_embeddings (rowid, embedding) VALUES (?, ?)",
-                                    (chunk_rowid, embedding_json_str),
-                                )
-                                inserted_count += 1
-                                # Mark this source's hash to be updated in rag_meta
-                                meta_key_for_hash_update = (
-                                    f"hash_{source_type}_{source_ref}"
-                                )
-                                processed_hashes_to_update_in_meta[
-                                    meta_key_for_hash_update
-                                ] = current_hash_of_source
-                            except sqlite3.Error as db_err:
-                                logger.error(
-                                    f"DB Error inserting chunk/embedding for {source_type}:{source_ref} (Chunk index {i}): {db_err}"
-                                )
-                                # If one insert fails, we might lose its hash update.
-                                # Consider if transaction should be per source or all-or-nothing for the cycle.
-                                # Original code continued, so we do too.
-                            except Exception as e_ins:
-                                logger.error(
-                                    f"Unexpected error inserting chunk/embedding: {e_ins}",
-                                    exc_info=True,
-                                )
-
-                        logger.info(
-                            f"Successfully inserted {inserted_count} new chunks/embeddings."
-                        )
-
-                        # Update rag_meta with the new hashes for successfully processed sources
-                        # Original main.py:725-728
-                        if processed_hashes_to_update_in_meta:
-                            logger.info(
-                                f"Updating {len(processed_hashes_to_update_in_meta)} source hashes in rag_meta..."
-                            )
-                            meta_update_tuples = list(
-                                processed_hashes_to_update_in_meta.items()
-                            )
-                            cursor.executemany(
-                                "INSERT OR REPLACE INTO rag_meta (meta_key, meta_value) VALUES (?, ?)",
-                                meta_update_tuples,
-                            )
-                    else:
-                        logger.warning(
-                            "Skipping DB insertion and hash updates for this RAG cycle due to embedding API errors."
-                        )
+                            conn.commit()
+                    if not embeddings_api_successful:
+                        break  # Later batches would fail the same way
 
             # Update last indexed *timestamps* in rag_meta (Original main.py:731-737)
             # Only update if the embedding part (if attempted) was successful or no embeddings were needed.
@@ -804,14 +1245,23 @@ async def run_rag_indexing_periodically(
                 )
 
             conn.commit()  # Commit all DB changes for this cycle
+            if vector_engine == ENGINE_NUMPY:
+                get_numpy_vector_index().flush()
+            if stage_stats:
+                logger.info(
+                    f"RAG index stage throughput: {_format_stage_throughput(stage_stats)}"
+                )
 
             # Diagnostic query (Original main.py:740-747)
             try:
                 diag_cursor = conn.cursor()  # Use a new cursor or the same one
                 diag_cursor.execute("SELECT COUNT(*) FROM rag_chunks")
                 chunk_count_diag = diag_cursor.fetchone()[0]
-                diag_cursor.execute("SELECT COUNT(*) FROM rag_embeddings")
-                embedding_count_diag = diag_cursor.fetchone()[0]
+                if vector_engine == ENGINE_NUMPY:
+                    embedding_count_diag = len(get_numpy_vector_index())
+                else:
+                    diag_cursor.execute("SELECT COUNT(*) FROM rag_embeddings")
+                    embedding_count_diag = diag_cursor.fetchone()[0]
                 logger.info(
                     f"DB RAG DIAGNOSTIC: Found {chunk_count_diag} chunks and {embedding_count_diag} embeddings post-cycle."
                 )
@@ -854,9 +1304,143 @@ async def run_rag_indexing_periodically(
         logger.debug(f"RAG indexer sleeping for {sleep_duration} seconds.")
         await anyio.sleep(sleep_duration)
 
+    shutdown_index_executor()
     logger.info("Background RAG indexer process stopped.")
 
 
+async def _index_queued_sources(keys: List[Tuple[str, str]]) -> None:
+    """
+    Indexes project context entries / tasks from the on-demand queue: reads
+    their current rows, skips unchanged ones (hash match) and drops the
+    chunks of deleted ones.
+    """
+    vector_engine = get_vector_engine()
+    if vector_engine is None:
+        return
+    from ...core.config import OPENAI_API_KEY_ENV as openai_api_key_for_batches
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        context_keys = [ref for source_type, ref in keys if source_type == "context"]
+        task_ids = [ref for source_type, ref in keys if source_type == "task"]
+        if not ADVANCED_EMBEDDINGS:
+            task_ids = []  # Tasks are only indexed in advanced mode
+
+        contents: Dict[Tuple[str, str], str] = {}
+        if context_keys:
+            placeholders = ", ".join("?" for _ in context_keys)
+            cursor.execute(
+                f"SELECT context_key, value, description FROM project_context WHERE context_key IN ({placeholders})",
+                context_keys,
+            )
+            for row in cursor.fetchall():
+                contents[("context", row["context_key"])] = format_context_for_embedding(
+                    row["context_key"], row["description"] or "", row["value"]
+                )
+        if task_ids:
+            placeholders = ", ".join("?" for _ in task_ids)
+            cursor.execute(
+                f"SELECT {TASK_INDEX_COLUMNS} FROM tasks WHERE task_id IN ({placeholders})",
+                task_ids,
+            )
+            for row in cursor.fetchall():
+                contents[("task", row["task_id"])] = format_task_for_embedding(dict(row))
+
+        wanted_keys = [("context", ref) for ref in context_keys] + [
+            ("task", ref) for ref in task_ids
+        ]
+        meta_keys = [f"hash_{source_type}_{ref}" for source_type, ref in wanted_keys]
+        placeholders = ", ".join("?" for _ in meta_keys)
+        cursor.execute(
+            f"SELECT meta_key, meta_value FROM rag_meta WHERE meta_key IN ({placeholders})",
+            meta_keys,
+        )
+        stored_hashes = {row["meta_key"]: row["meta_value"] for row in cursor.fetchall()}
+
+        sources: List[Tuple[str, str, Optional[str], str]] = []
+        deleted_keys: List[Tuple[str, str]] = []
+        for source_type, ref in wanted_keys:
+            meta_key = f"hash_{source_type}_{ref}"
+            content = contents.get((source_type, ref))
+            if content is None:
+                if meta_key in stored_hashes:
+                    deleted_keys.append((source_type, ref))
+                continue
+            current_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            if current_hash != stored_hashes.get(meta_key):
+                sources.append((source_type, ref, content, current_hash))
+        if not sources and not deleted_keys:
+            return
+
+        stage_stats: Dict[str, Tuple[float, Dict[str, int]]] = {}
+        async with _index_lock:
+            for source_type, ref in deleted_keys:
+                _delete_source_chunks(cursor, vector_engine, source_type, ref)
+                cursor.execute(
+                    "DELETE FROM rag_meta WHERE meta_key = ?",
+                    (f"hash_{source_type}_{ref}",),
+                )
+            successful = True
+            if sources:
+                successful = await _index_sources(
+                    conn,
+                    vector_engine,
+                    sources,
+                    get_project_dir(),
+                    openai_api_key_for_batches,
+                    stage_stats,
+                )
+            conn.commit()
+            if vector_engine == ENGINE_NUMPY:
+                get_numpy_vector_index().flush()
+            if successful:
+                get_rag_index_queue().mark_indexed(
+                    [(source_type, ref) for source_type, ref, _, _ in sources]
+                    + deleted_keys
+                )
+        logger.info(
+            f"On-demand RAG indexing: {len(sources)} updated and {len(deleted_keys)} deleted entries"
+            + (f" ({_format_stage_throughput(stage_stats)})." if stage_stats else ".")
+        )
+    except Exception as e:
+        logger.error(f"Error in on-demand RAG indexing: {e}", exc_info=True)
+        if conn:
+            conn.rollback()
+    finally:
+        if conn:
+            conn.close()
+
+
+async def run_rag_index_queue_worker(
+    *, task_status=anyio.TASK_STATUS_IGNORED
+) -> None:
+    """
+    Background task indexing project context entries and tasks as their
+    write paths enqueue them (enqueue_rag_sources), highest priority first,
+    instead of waiting for the next periodic cycle.
+    """
+    index_queue = get_rag_index_queue()
+    with anyio.CancelScope() as scope:
+        index_queue.bind()
+        task_status.started(scope)  # Cancelled by application_shutdown
+        logger.info("RAG on-demand indexing queue worker started.")
+        try:
+            while g.server_running:
+                await index_queue.wait()
+                # Coalesce bursts of writes (e.g. bulk task updates) into one batch
+                await anyio.sleep(RAG_INDEX_QUEUE_DEBOUNCE_SECONDS)
+                while True:
+                    keys = index_queue.pop_batch(RAG_INDEX_BATCH_SOURCES)
+                    if not keys:
+                        break
+                    await _index_queued_sources(keys)
+        finally:
+            index_queue.unbind()
+            logger.info("RAG on-demand indexing queue worker stopped.")
+
+
 # This function, run_rag_indexing_periodically, will be started as a background task
 # by the server lifecycle management (e.g., in app/server_lifecycle.py).
 
@@ -870,8 +1454,9 @@ async def index_task_data(task_id: str, task_data: Dict[str, Any]) -> None:
         task_id: Task ID to index
         task_data: Complete task data dictionary
     """
-    if not is_vss_loadable():
-        logger.warning("Cannot index task - VSS not available")
+    vector_engine = get_vector_engine()
+    if vector_engine is None:
+        logger.warning("Cannot index task - no vector search engine available")
         return
 
     conn = None
@@ -886,15 +1471,7 @@ async def index_task_data(task_id: str, task_data: Dict[str, Any]) -> None:
         chunks = simple_chunker(content, chunk_size=2000)
 
         # Delete existing chunks for this task
-        cursor.execute(
-            "DELETE FROM rag_embeddings WHERE rowid IN "
-            "(SELECT chunk_id FROM rag_chunks WHERE source_type = ? AND source_ref = ?)",
-            ("task", task_id),
-        )
-        cursor.execute(
-            "DELETE FROM rag_chunks WHERE source_type = ? AND source_ref = ?",
-            ("task", task_id),
-        )
+        _delete_source_chunks(cursor, vector_engine, "task", task_id)
 
         # Get OpenAI client for embeddings
         client = get_openai_client()
@@ -922,16 +1499,17 @@ async def index_task_data(task_id: str, task_data: Dict[str, Any]) -> None:
                 chunk_id = cursor.lastrowid
 
                 # Insert embedding
-                embedding_json_str = json.dumps(embedding_vector)
-                cursor.execute(
-                    "INSERT INTO rag_embeddings (rowid, embedding) VALUES (?, ?)",
-                    (chunk_id, embedding_json_str),
-                )
+                if vector_engine == ENGINE_NUMPY:
+                    get_numpy_vector_index().add([chunk_id], [embedding_vector])
+                else:
+                    _insert_chunk_embedding(cursor, chunk_id, embedding_vector)
 
             except Exception as e:
                 logger.error(f"Error generating embedding for task {task_id}: {e}")
 
         conn.commit()
+        if vector_engine == ENGINE_NUMPY:
+            get_numpy_vector_index().flush()
         logger.info(f"Successfully indexed task {task_id}")
 
     except Exception as e:
@@ -987,6 +1565,13 @@ async def index_all_tasks() -> None:
             conn.close()
 
 
+def format_context_for_embedding(
+    context_key: str, description: str, value: str
+) -> str:
+    """Format a project context entry into the text that is hashed and embedded."""
+    return f"Context Key: {context_key}\nDescription: {description}\nValue: {value}"
+
+
 def format_task_for_embedding(task_data: Dict[str, Any]) -> str:
     """
     Format task data into text suitable for embedding.
@@ -1,7 +1,11 @@
 # Agent-MCP/mcp_template/mcp_server_src/features/rag/query.py
 import json
 import sqlite3  # For type hinting and error handling
-from typing import List, Dict, Any, Optional, Tuple
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, List, Dict, Any, Optional, Tuple
+
+import anyio
 
 # Imports from our project
 from ...core.config import (
@@ -10,314 +14,908 @@ from ...core.config import (
     EMBEDDING_DIMENSION,
     CHAT_MODEL,
     MAX_CONTEXT_TOKENS,  # From main.py:182
+    RAG_RETRIEVAL_MAX_TOKENS,
+    RAG_RERANK_OVERSAMPLE,
+    RAG_MMR_ENABLED,
+    RAG_MMR_LAMBDA,
+    RAG_MMR_FETCH_MULTIPLIER,
+    RAG_MERGE_ADJACENT_CHUNKS,
+    RAG_BATCH_MAX_CONCURRENCY,
+    RAG_METRICS_WINDOW,
 )
-from ...db.connection import get_db_connection, is_vss_loadable
+from ...db.connection import get_db_connection
 from ...external.openai_service import get_openai_client
+from .recent_context import get_recent_context_view
+from .vector_index import (
+    ENGINE_NUMPY,
+    ENGINE_SQLITE_VEC,
+    QUANTIZED_TABLE_NAME,
+    get_numpy_vector_index,
+    get_quantization,
+    get_vector_engine,
+    quantize_sql,
+)
 
 # For OpenAI exceptions
 import openai
 
-# Original location: main.py lines 1432 - 1566 (ask_project_rag_tool function body)
+# Number of nearest neighbours fetched from the vector index per query
+VECTOR_SEARCH_K = 13  # Optimized based on recent RAG research
+
+
+def _embed_queries(openai_client: Any, query_texts: List[str]) -> List[List[float]]:
+    """Embeds query strings with the configured model in a single API request."""
+    response = openai_client.embeddings.create(
+        input=list(query_texts),
+        model=EMBEDDING_MODEL,
+        dimensions=EMBEDDING_DIMENSION,
+    )
+    return [item.embedding for item in response.data]
 
 
-async def query_rag_system(query_text: str) -> str:
+def _embed_query(openai_client: Any, query_text: str) -> List[float]:
+    """Embeds a single query string with the configured embedding model."""
+    return _embed_queries(openai_client, [query_text])[0]
+
+
+# Filter keys accepted by the vector search (see _build_chunk_filter_sql)
+CHUNK_FILTER_KEYS = ("source_type", "path_prefix", "language", "entity_type")
+
+
+def _build_chunk_filter_sql(
+    filters: Optional[Dict[str, Any]],
+) -> Tuple[str, List[Any]]:
     """
-    Processes a natural language query using the RAG system.
-    Fetches relevant context from live data and indexed knowledge,
-    then uses an LLM to synthesize an answer.
+    Builds a `rag_chunks` subquery selecting the chunk_ids that match `filters`.
+    The subquery is used as a `rowid IN (...)` constraint on the vec0 KNN query,
+    so sqlite-vec only ranks eligible rows and `k` results are still returned.
+
+    Supported filters:
+        source_type: a source type or list of source types (e.g. 'code', 'task')
+        path_prefix: source_ref prefix such as 'src/payments/'
+        language: metadata language (e.g. 'python')
+        entity_type: chunk section type or contained entity type
+                     (e.g. 'function', 'class', 'method', 'component')
+
+    Returns:
+        ("", []) if no filter applies, otherwise (subquery_sql, params).
+    """
+    if not filters:
+        return "", []
+
+    conditions: List[str] = []
+    params: List[Any] = []
+
+    source_type = filters.get("source_type")
+    if source_type:
+        source_types = [source_type] if isinstance(source_type, str) else list(source_type)
+        conditions.append(f"source_type IN ({', '.join('?' for _ in source_types)})")
+        params.extend(source_types)
+
+    path_prefix = filters.get("path_prefix")
+    if path_prefix:
+        # Range scan instead of LIKE so idx_rag_chunks_source_ref can be used
+        conditions.append("source_ref >= ? AND source_ref < ?")
+        params.extend([path_prefix, path_prefix[:-1] + chr(ord(path_prefix[-1]) + 1)])
+
+    language = filters.get("language")
+    if language:
+        conditions.append("json_extract(metadata, '$.language') = ?")
+        params.append(language)
+
+    entity_type = filters.get("entity_type")
+    if entity_type:
+        conditions.append(
+            "(json_extract(metadata, '$.section_type') = ? OR EXISTS ("
+            "SELECT 1 FROM json_each(metadata, '$.entities') e "
+            "WHERE json_extract(e.value, '$.type') = ?))"
+        )
+        params.extend([entity_type, entity_type])
+
+    if not conditions:
+        return "", []
+    return (
+        f"SELECT chunk_id FROM rag_chunks WHERE {' AND '.join(conditions)}",
+        params,
+    )
+
+
+def _search_vector_index(
+    cursor: sqlite3.Cursor,
+    query_embedding: List[float],
+    k: int = VECTOR_SEARCH_K,
+    filters: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs a KNN query against the active vector engine and joins the matching
+    chunks. With sqlite-vec this is a MATCH on `rag_embeddings` (or a quantized
+    first stage plus float re-ranking); with the NumPy fallback the in-process
+    index is searched. Optional `filters` are applied as a pre-filtered rowid
+    set in all cases.
+    Returns rows ordered by distance with their metadata JSON decoded.
+    """
+    filter_sql, filter_params = _build_chunk_filter_sql(filters)
+    quantization = get_quantization()
+
+    if get_vector_engine() == ENGINE_NUMPY:
+        allowed_ids = None
+        if filter_sql:
+            cursor.execute(filter_sql, filter_params)
+            allowed_ids = [row[0] for row in cursor.fetchall()]
+        hits = get_numpy_vector_index().search(query_embedding, k, allowed_ids)
+        if not hits:
+            return []
+        placeholders = ", ".join("?" for _ in hits)
+        cursor.execute(
+            f"SELECT chunk_id, chunk_text, source_type, source_ref, metadata FROM rag_chunks WHERE chunk_id IN ({placeholders})",
+            [chunk_id for chunk_id, _ in hits],
+        )
+        rows_by_id = {row["chunk_id"]: dict(row) for row in cursor.fetchall()}
+        raw_rows = [
+            {**rows_by_id[chunk_id], "distance": distance}
+            for chunk_id, distance in hits
+            if chunk_id in rows_by_id
+        ]
+    elif quantization and _quantized_table_exists(cursor):
+        # Stage 1: cheap KNN over the quantized vectors, oversampled
+        rowid_clause = f"AND q.rowid IN ({filter_sql})" if filter_sql else ""
+        cursor.execute(
+            f"""
+            SELECT q.rowid FROM {QUANTIZED_TABLE_NAME} q
+            WHERE q.embedding MATCH {quantize_sql(quantization)} AND k = ? {rowid_clause}
+            """,
+            [
+                json.dumps(query_embedding),
+                k * max(1, RAG_RERANK_OVERSAMPLE),
+                *filter_params,
+            ],
+        )
+        candidate_ids = [row[0] for row in cursor.fetchall()]
+        if not candidate_ids:
+            return []
+        # Stage 2: exact re-ranking against the full-precision vectors. A KNN
+        # restricted to the candidate rowids is much cheaper in vec0 than
+        # point lookups of each float vector.
+        placeholders = ", ".join("?" for _ in candidate_ids)
+        cursor.execute(
+            f"""
+            SELECT c.chunk_id, c.chunk_text, c.source_type, c.source_ref, c.metadata, r.distance
+            FROM rag_embeddings r
+            JOIN rag_chunks c ON r.rowid = c.chunk_id
+            WHERE r.embedding MATCH ? AND k = ? AND r.rowid IN ({placeholders})
+            ORDER BY r.distance
+            """,
+            [json.dumps(query_embedding), k, *candidate_ids],
+        )
+        raw_rows = [dict(row) for row in cursor.fetchall()]
+    else:
+        rowid_clause = f"AND r.rowid IN ({filter_sql})" if filter_sql else ""
+        sql_vector_search = f"""
+            SELECT c.chunk_id, c.chunk_text, c.source_type, c.source_ref, c.metadata, r.distance
+            FROM rag_embeddings r
+            JOIN rag_chunks c ON r.rowid = c.chunk_id
+            WHERE r.embedding MATCH ? AND k = ? {rowid_clause}
+            ORDER BY r.distance
+        """
+        cursor.execute(
+            sql_vector_search, [json.dumps(query_embedding), k, *filter_params]
+        )
+        raw_rows = [dict(row) for row in cursor.fetchall()]
+
+    results: List[Dict[str, Any]] = []
+    for result in raw_rows:
+        # Parse metadata JSON if present
+        if result.get("metadata"):
+            try:
+                result["metadata"] = json.loads(result["metadata"])
+            except json.JSONDecodeError:
+                result["metadata"] = None
+        results.append(result)
+    return results
+
+
+def _quantized_table_exists(cursor: sqlite3.Cursor) -> bool:
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name = ?", (QUANTIZED_TABLE_NAME,)
+    )
+    return cursor.fetchone() is not None
+
+
+def _vector_search_available(cursor: sqlite3.Cursor) -> bool:
+    """True if the active vector engine has an index to search."""
+    engine = get_vector_engine()
+    if engine == ENGINE_NUMPY:
+        return True
+    if engine == ENGINE_SQLITE_VEC:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='rag_embeddings'"
+        )
+        return cursor.fetchone() is not None
+    return False
+
+
+# --- Diversity-aware selection of retrieved chunks ---
+# Overlapping chunker output and neighbouring code chunks make the raw top-k
+# full of near-duplicates. MMR trades relevance against redundancy (word-set
+# Jaccard similarity between chunks), then adjacent chunks of the same source
+# are merged with their overlap removed.
+
+# Longest chunk overlap (in characters) looked for when merging neighbours
+MAX_MERGE_OVERLAP_CHARS = 2000
+
+
+def _approx_tokens(text: str) -> int:
+    return len(text.split())  # Approximation, as elsewhere in this module
+
+
+def _candidate_fetch_k(k: int) -> int:
+    """Number of vector hits to fetch so MMR has alternatives to choose from."""
+    if RAG_MMR_ENABLED:
+        return k * max(1, RAG_MMR_FETCH_MULTIPLIER)
+    return k
+
+
+def _relevance(row: Dict[str, Any]) -> float:
+    # Distances are L2 between normalized vectors, so cos = 1 - d^2 / 2
+    distance = row.get("distance")
+    if not isinstance(distance, (int, float)):
+        return 0.0
+    return max(0.0, 1.0 - (distance * distance) / 2.0)
+
+
+def _mmr_select(
+    rows: List[Dict[str, Any]], k: int, lambda_mult: float
+) -> List[Dict[str, Any]]:
+    """Greedy maximal-marginal-relevance selection of `k` rows (kept in rank order)."""
+    if len(rows) <= k:
+        return list(rows)
+
+    word_sets = [set(row["chunk_text"].lower().split()) for row in rows]
+    relevance = [_relevance(row) for row in rows]
+    max_similarity = [0.0] * len(rows)
+    remaining = set(range(len(rows)))
+    selected: List[int] = []
+
+    while remaining and len(selected) < k:
+        best = max(
+            remaining,
+            key=lambda i: (
+                lambda_mult * relevance[i] - (1 - lambda_mult) * max_similarity[i],
+                -i,
+            ),
+        )
+        remaining.remove(best)
+        selected.append(best)
+        chosen_words = word_sets[best]
+        for i in remaining:
+            if not chosen_words or not word_sets[i]:
+                continue
+            overlap = len(chosen_words & word_sets[i])
+            similarity = overlap / (len(chosen_words) + len(word_sets[i]) - overlap)
+            if similarity > max_similarity[i]:
+                max_similarity[i] = similarity
+
+    return [rows[i] for i in sorted(selected)]
+
+
+def _strip_overlap(previous: str, following: str) -> str:
+    """Removes the longest prefix of `following` that is a suffix of `previous`."""
+    limit = min(len(previous), len(following), MAX_MERGE_OVERLAP_CHARS)
+    for size in range(limit, 0, -1):
+        if previous.endswith(following[:size]):
+            return following[size:]
+    return following
+
+
+def _chunk_position(row: Dict[str, Any]) -> int:
+    """
+    Position of a chunk within its source: the indexer's metadata chunk_index
+    (unchanged chunks keep their chunk_id across re-indexing, so ids are no
+    longer in file order), else the chunk_id of rows indexed before it.
+    """
+    metadata = row.get("metadata")
+    if isinstance(metadata, dict) and isinstance(metadata.get("chunk_index"), int):
+        return metadata["chunk_index"]
+    return row["chunk_id"]
+
+
+def _merge_adjacent_chunks(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merges rows of the same source at consecutive positions (_chunk_position).
+    The merged row takes the rank of its best member and the smallest distance.
+    """
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for position, row in enumerate(rows):
+        groups.setdefault((row["source_type"], row["source_ref"]), []).append(position)
+
+    merged_into: Dict[int, int] = {}  # position -> position of the run's best row
+    merged_rows: Dict[int, Dict[str, Any]] = {}
+    for positions in groups.values():
+        if len(positions) < 2:
+            continue
+        positions.sort(key=lambda p: _chunk_position(rows[p]))
+        run = [positions[0]]
+        for position in positions[1:] + [None]:
+            if position is not None and _chunk_position(rows[position]) == _chunk_position(rows[run[-1]]) + 1:
+                run.append(position)
+                continue
+            if len(run) > 1:
+                head = min(run)
+                text = rows[run[0]]["chunk_text"]
+                entities: List[Any] = []
+                for member in run:
+                    metadata = rows[member].get("metadata")
+                    if isinstance(metadata, dict):
+                        for entity in metadata.get("entities") or []:
+                            if entity not in entities:
+                                entities.append(entity)
+                for member in run[1:]:
+                    remainder = _strip_overlap(text, rows[member]["chunk_text"])
+                    remainder = remainder.lstrip("\n")
+                    if remainder.strip():
+                        text = text + "\n" + remainder
+                merged = dict(rows[head])
+                merged["chunk_text"] = text
+                merged["distance"] = min(rows[m]["distance"] for m in run)
+                merged["merged_chunk_ids"] = [rows[m]["chunk_id"] for m in run]
+                if isinstance(merged.get("metadata"), dict) and entities:
+                    merged["metadata"] = {**merged["metadata"], "entities": entities}
+                merged_rows[head] = merged
+                for member in run:
+                    merged_into[member] = head
+            if position is not None:
+                run = [position]
+
+    results: List[Dict[str, Any]] = []
+    for position, row in enumerate(rows):
+        head = merged_into.get(position)
+        if head is None:
+            results.append(row)
+        elif head == position:
+            results.append(merged_rows[head])
+    return results
+
+
+def _redundant_tokens(rows: List[Dict[str, Any]]) -> int:
+    """Tokens spent on lines that already appeared in an earlier row."""
+    seen_lines = set()
+    redundant = 0
+    for row in rows:
+        for line in row["chunk_text"].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line in seen_lines:
+                redundant += _approx_tokens(line)
+            else:
+                seen_lines.add(line)
+    return redundant
+
+
+def _select_diverse_chunks(
+    rows: List[Dict[str, Any]], k: int
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, int]]]:
+    """
+    Picks the chunks to put in the prompt from the vector search candidates
+    (ordered by distance). Returns the selected rows and, when diversity
+    selection is enabled, token statistics against the plain top-k, where
+    `tokens_saved` is the drop in duplicated-line tokens.
+    """
+    if not RAG_MMR_ENABLED and not RAG_MERGE_ADJACENT_CHUNKS:
+        return rows[:k], None
+
+    selected = (
+        _mmr_select(rows, k, RAG_MMR_LAMBDA) if RAG_MMR_ENABLED else rows[:k]
+    )
+    if RAG_MERGE_ADJACENT_CHUNKS:
+        selected = _merge_adjacent_chunks(selected)
+
+    baseline_redundant = _redundant_tokens(rows[:k])
+    selected_redundant = _redundant_tokens(selected)
+    stats = {
+        "candidates": len(rows),
+        "selected": len(selected),
+        "baseline_tokens": sum(_approx_tokens(row["chunk_text"]) for row in rows[:k]),
+        "selected_tokens": sum(_approx_tokens(row["chunk_text"]) for row in selected),
+        "baseline_redundant_tokens": baseline_redundant,
+        "selected_redundant_tokens": selected_redundant,
+        "tokens_saved": baseline_redundant - selected_redundant,
+    }
+    logger.info(
+        f"RAG Query: Diversity selection kept {len(selected)} of {len(rows)} candidates; "
+        f"duplicated tokens {baseline_redundant} -> {selected_redundant} vs plain top-{k} "
+        f"(saved {stats['tokens_saved']})."
+    )
+    return selected, stats
+
+
+async def retrieve_rag_chunks(
+    query_text: str,
+    k: int = VECTOR_SEARCH_K,
+    max_tokens: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Retrieval-only RAG path: returns the ranked chunks for a query without
+    calling the chat completion API.
 
     Args:
-        query_text: The natural language question from the user.
+        query_text: The natural language question.
+        k: Number of nearest chunks to fetch from the vector index.
+        max_tokens: Approximate token budget for the returned chunk texts.
+                    Defaults to RAG_RETRIEVAL_MAX_TOKENS.
+        filters: Optional chunk filters (see _build_chunk_filter_sql).
 
     Returns:
-        A string containing the answer or an error message.
+        A dict with the ranked `results` (chunk_text, source_type, source_ref,
+        metadata, distance), the approximate `total_tokens` used and whether
+        the result list was `truncated` by the token cap.
+
+    Raises:
+        RuntimeError: If the OpenAI client or the vector index is unavailable.
     """
-    # Get OpenAI client (main.py:1438)
+    token_limit = max_tokens if max_tokens else RAG_RETRIEVAL_MAX_TOKENS
+
     openai_client = get_openai_client()
     if not openai_client:
-        logger.error("RAG Query: OpenAI client is not available. Cannot process query.")
-        return "RAG Error: OpenAI client not available. Please check server configuration and OpenAI API key."
+        raise RuntimeError("OpenAI client not available for query embedding.")
 
     conn = None
-    answer = (
-        "An unexpected error occurred during the RAG query."  # Default error message
-    )
-
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
+        if not _vector_search_available(cursor):
+            raise RuntimeError(
+                "Vector search is not available (sqlite-vec not loadable and NumPy fallback disabled, or index missing)."
+            )
 
-        live_context_results: List[Dict[str, Any]] = []
-        live_task_results: List[Dict[str, Any]] = []
-        vector_search_results: List[Dict[str, Any]] = (
-            []
-        )  # Store as dicts for easier access
+        query_embedding = _embed_query(openai_client, query_text)
+        rows = _search_vector_index(cursor, query_embedding, _candidate_fetch_k(k), filters)
+    finally:
+        if conn:
+            conn.close()
+    rows, diversity_stats = _select_diverse_chunks(rows, k)
 
-        # --- 1. Fetch Live Context (Recently Updated) ---
-        # Original main.py: lines 1445 - 1457
-        try:
-            cursor.execute(
-                "SELECT meta_value FROM rag_meta WHERE meta_key = ?",
-                ("last_indexed_context",),
-            )
-            last_indexed_context_row = cursor.fetchone()
-            last_indexed_context_time = (
-                last_indexed_context_row["meta_value"]
-                if last_indexed_context_row
-                else "1970-01-01T00:00:00Z"
-            )
+    results: List[Dict[str, Any]] = []
+    total_tokens = 0
+    truncated = False
+    for rank, row in enumerate(rows, start=1):
+        chunk_tokens = len(row["chunk_text"].split())  # Approximation
+        if results and total_tokens + chunk_tokens > token_limit:
+            truncated = True
+            break
+        total_tokens += chunk_tokens
+        results.append(
+            {
+                "rank": rank,
+                "source_type": row["source_type"],
+                "source_ref": row["source_ref"],
+                "distance": row["distance"],
+                "metadata": row.get("metadata"),
+                "chunk_text": row["chunk_text"],
+            }
+        )
 
-            cursor.execute(
-                """
-                SELECT context_key, value, description, last_updated
-                FROM project_context
-                WHERE last_updated > ?
-                ORDER BY last_updated DESC
-                LIMIT 5
-            """,
-                (last_indexed_context_time,),
-            )
-            # Convert rows to dicts for easier processing
-            live_context_results = [dict(row) for row in cursor.fetchall()]
-        except sqlite3.Error as e_live_ctx:
-            logger.warning(
-                f"RAG Query: Failed to fetch live project context: {e_live_ctx}"
-            )
-        except Exception as e_live_ctx_other:  # Catch any other unexpected error
+    response: Dict[str, Any] = {
+        "query": query_text,
+        "filters": filters or {},
+        "results": results,
+        "total_tokens": total_tokens,
+        "truncated": truncated,
+    }
+    if diversity_stats:
+        response["diversity"] = diversity_stats
+    return response
+
+
+RAG_SYSTEM_PROMPT = """You are an AI assistant answering questions about a software project. 
+Use the provided context, which may include recently updated live data (like project context keys or tasks) and information retrieved from an indexed knowledge base (like documentation or code summaries), to answer the user's query. 
+Prioritize information from the 'Live' sections if available and relevant for time-sensitive data. 
+Answer using *only* the information given in the context. If the context doesn't contain the answer, state that clearly.
+
+Be VERBOSE and comprehensive in your responses. It's better to give too much context than too little. 
+When answering, please also suggest additional context entries and queries that might be helpful for understanding this topic better.
+For example, suggest related files to examine, related project context keys to check, or follow-up questions that could provide more insight.
+Always err on the side of providing more detailed explanations and comprehensive information rather than brief responses."""
+
+
+def _embed_for_vector_search(
+    openai_client: Any, cursor: sqlite3.Cursor, query_texts: List[str]
+) -> Optional[List[List[float]]]:
+    """
+    Embeds the queries in a single embeddings request if vector search is
+    available. Returns None (after logging why) when it is not or the request
+    fails, so callers fall back to live data only.
+    """
+    if not get_vector_engine():  # sqlite-vec or the NumPy fallback
+        logger.warning(
+            "RAG Query: Vector search is not available (sqlite-vec not loadable, NumPy fallback unavailable). Skipping vector search."
+        )
+        return None
+    try:
+        # Check that the vector index exists (main.py:1480-1484)
+        if not _vector_search_available(cursor):
             logger.warning(
-                f"RAG Query: Unexpected error fetching live project context: {e_live_ctx_other}",
-                exc_info=True,
+                "RAG Query: 'rag_embeddings' table not found. Skipping vector search."
             )
+            return None
+        # Embed the queries (main.py:1487-1492)
+        return _embed_queries(openai_client, query_texts)
+    except sqlite3.Error as e_vec_sql:
+        logger.error(f"RAG Query: Database error during vector search: {e_vec_sql}")
+    except openai.APIError as e_openai_emb:  # Catch OpenAI errors during embedding
+        logger.error(
+            f"RAG Query: OpenAI API error during query embedding: {e_openai_emb}"
+        )
+    except Exception as e_vec_other:
+        logger.error(
+            f"RAG Query: Unexpected error during query embedding: {e_vec_other}",
+            exc_info=True,
+        )
+    return None
+
+
+def _build_rag_context(
+    cursor: sqlite3.Cursor,
+    query_text: str,
+    query_embedding: Optional[List[float]],
+    filters: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[str], int]:
+    """
+    Gathers live context, keyword-matched live tasks and (given a query
+    embedding) vector search results, and lays them out as prompt sections.
 
-        # --- 2. Fetch Live Tasks (Keyword Search) ---
-        # Original main.py: lines 1459 - 1477
+    Returns:
+        The context sections and their approximate token count.
+    """
+    live_context_results: List[Dict[str, Any]] = []
+    live_task_results: List[Dict[str, Any]] = []
+    vector_search_results: List[Dict[str, Any]] = (
+        []
+    )  # Store as dicts for easier access
+
+    # --- 1. Fetch Live Context (Recently Updated) ---
+    # Original main.py: lines 1445 - 1457
+    try:
+        cursor.execute(
+            "SELECT meta_value FROM rag_meta WHERE meta_key = ?",
+            ("last_indexed_context",),
+        )
+        last_indexed_context_row = cursor.fetchone()
+        last_indexed_context_time = (
+            last_indexed_context_row["meta_value"]
+            if last_indexed_context_row
+            else "1970-01-01T00:00:00Z"
+        )
+
+        cursor.execute(
+            """
+            SELECT context_key, value, description, last_updated
+            FROM project_context
+            WHERE last_updated > ?
+            ORDER BY last_updated DESC
+            LIMIT 5
+        """,
+            (last_indexed_context_time,),
+        )
+        # Convert rows to dicts for easier processing
+        live_context_results = [dict(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e_live_ctx:
+        logger.warning(
+            f"RAG Query: Failed to fetch live project context: {e_live_ctx}"
+        )
+    except Exception as e_live_ctx_other:  # Catch any other unexpected error
+        logger.warning(
+            f"RAG Query: Unexpected error fetching live project context: {e_live_ctx_other}",
+            exc_info=True,
+        )
+
+    # --- 2. Fetch Live Tasks (Keyword Search) ---
+    # Original main.py: lines 1459 - 1477
+    try:
+        query_keywords = [
+            f"%{word.strip().lower()}%"
+            for word in query_text.split()
+            if len(word.strip()) > 2
+        ]
+        if query_keywords:
+            # Build LIKE clauses for title and description
+            # Ensure each keyword is used for both title and description search
+            conditions = []
+            sql_params_tasks: List[str] = []
+            for kw in query_keywords:
+                conditions.append("LOWER(title) LIKE ?")
+                sql_params_tasks.append(kw)
+                conditions.append("LOWER(description) LIKE ?")
+                sql_params_tasks.append(kw)
+
+            if conditions:
+                # Validate that all conditions are safe (only LIKE patterns)
+                safe_conditions = []
+                for condition in conditions:
+                    if condition not in [
+                        "LOWER(title) LIKE ?",
+                        "LOWER(description) LIKE ?",
+                    ]:
+                        logger.warning(
+                            f"RAG Query: Skipping unsafe condition: {condition}"
+                        )
+                        continue
+                    safe_conditions.append(condition)
+
+                if safe_conditions:
+                    where_clause = " OR ".join(safe_conditions)
+                    task_query_sql = f"""
+                        SELECT task_id, title, status, description, updated_at
+                        FROM tasks
+                        WHERE {where_clause}
+                        ORDER BY updated_at DESC
+                        LIMIT 5
+                    """
+                    cursor.execute(task_query_sql, sql_params_tasks)
+                live_task_results = [dict(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e_live_task:
+        logger.warning(
+            f"RAG Query: Failed to fetch live tasks based on query keywords: {e_live_task}"
+        )
+    except Exception as e_live_task_other:
+        logger.warning(
+            f"RAG Query: Unexpected error fetching live tasks: {e_live_task_other}",
+            exc_info=True,
+        )
+
+    # --- 3. Perform Vector Search (Indexed Knowledge) ---
+    # Original main.py: lines 1479 - 1506
+    if query_embedding is not None:
         try:
-            query_keywords = [
-                f"%{word.strip().lower()}%"
-                for word in query_text.split()
-                if len(word.strip()) > 2
-            ]
-            if query_keywords:
-                # Build LIKE clauses for title and description
-                # Ensure each keyword is used for both title and description search
-                conditions = []
-                sql_params_tasks: List[str] = []
-                for kw in query_keywords:
-                    conditions.append("LOWER(title) LIKE ?")
-                    sql_params_tasks.append(kw)
-                    conditions.append("LOWER(description) LIKE ?")
-                    sql_params_tasks.append(kw)
-
-                if conditions:
-                    # Validate that all conditions are safe (only LIKE patterns)
-                    safe_conditions = []
-                    for condition in conditions:
-                        if condition not in [
-                            "LOWER(title) LIKE ?",
-                            "LOWER(description) LIKE ?",
-                        ]:
-                            logger.warning(
-                                f"RAG Query: Skipping unsafe condition: {condition}"
-                            )
-                            continue
-                        safe_conditions.append(condition)
-
-                    if safe_conditions:
-                        where_clause = " OR ".join(safe_conditions)
-                        task_query_sql = f"""
-                            SELECT task_id, title, status, description, updated_at
-                            FROM tasks
-                            WHERE {where_clause}
-                            ORDER BY updated_at DESC
-                            LIMIT 5
-                        """
-                        cursor.execute(task_query_sql, sql_params_tasks)
-                    live_task_results = [dict(row) for row in cursor.fetchall()]
-        except sqlite3.Error as e_live_task:
-            logger.warning(
-                f"RAG Query: Failed to fetch live tasks based on query keywords: {e_live_task}"
+            # Search Vector Table with metadata
+            vector_search_results, _ = _select_diverse_chunks(
+                _search_vector_index(
+                    cursor,
+                    query_embedding,
+                    _candidate_fetch_k(VECTOR_SEARCH_K),
+                    filters,
+                ),
+                VECTOR_SEARCH_K,
             )
-        except Exception as e_live_task_other:
-            logger.warning(
-                f"RAG Query: Unexpected error fetching live tasks: {e_live_task_other}",
+        except sqlite3.Error as e_vec_sql:
+            logger.error(f"RAG Query: Database error during vector search: {e_vec_sql}")
+        except Exception as e_vec_other:
+            logger.error(
+                f"RAG Query: Unexpected error during vector search part: {e_vec_other}",
                 exc_info=True,
             )
 
-        # --- 3. Perform Vector Search (Indexed Knowledge) ---
-        # Original main.py: lines 1479 - 1506
-        if is_vss_loadable():  # Check global VSS status
-            try:
-                # Check if rag_embeddings table exists (main.py:1480-1484)
-                cursor.execute(
-                    "SELECT name FROM sqlite_master WHERE type='table' AND name='rag_embeddings'"
-                )
-                if cursor.fetchone() is not None:
-                    # Embed the query (main.py:1487-1492)
-                    response = openai_client.embeddings.create(
-                        input=[query_text],
-                        model=EMBEDDING_MODEL,
-                        dimensions=EMBEDDING_DIMENSION,
-                    )
-                    query_embedding = response.data[0].embedding
-                    query_embedding_json = json.dumps(query_embedding)
-
-                    # Search Vector Table with metadata
-                    k_results = 13  # Optimized based on recent RAG research
-                    sql_vector_search = """
-                        SELECT c.chunk_text, c.source_type, c.source_ref, c.metadata, r.distance
-                        FROM rag_embeddings r
-                        JOIN rag_chunks c ON r.rowid = c.chunk_id
-                        WHERE r.embedding MATCH ? AND k = ?
-                        ORDER BY r.distance
-                    """
-                    cursor.execute(sql_vector_search, (query_embedding_json, k_results))
-                    raw_results = cursor.fetchall()
-
-                    # Process results to parse metadata
-                    for row in raw_results:
-                        result = dict(row)
-                        # Parse metadata JSON if present
-                        if result.get("metadata"):
-                            try:
-                                result["metadata"] = json.loads(result["metadata"])
-                            except json.JSONDecodeError:
-                                result["metadata"] = None
-                        vector_search_results.append(result)
-                else:
-                    logger.warning(
-                        "RAG Query: 'rag_embeddings' table not found. Skipping vector search."
-                    )
-            except sqlite3.Error as e_vec_sql:
-                logger.error(
-                    f"RAG Query: Database error during vector search: {e_vec_sql}"
-                )
-            except (
-                openai.APIError
-            ) as e_openai_emb:  # Catch OpenAI errors during embedding
-                logger.error(
-                    f"RAG Query: OpenAI API error during query embedding: {e_openai_emb}"
-                )
-            except Exception as e_vec_other:
-                logger.error(
-                    f"RAG Query: Unexpected error during vector search part: {e_vec_other}",
-                    exc_info=True,
+    # --- 4. Combine Contexts for LLM ---
+    # Original main.py: lines 1509 - 1548
+    context_parts: List[str] = []
+    current_token_count: int = 0  # Approximate token count
+
+    # Add Live Context
+    if live_context_results:
+        context_parts.append("--- Recently Updated Project Context (Live) ---")
+        for item in live_context_results:
+            entry_text = f"Key: {item['context_key']}\nValue: {item['value']}\nDescription: {item.get('description', 'N/A')}\n(Updated: {item['last_updated']})\n"
+            entry_tokens = len(entry_text.split())  # Approximation
+            if current_token_count + entry_tokens < MAX_CONTEXT_TOKENS:
+                context_parts.append(entry_text)
+                current_token_count += entry_tokens
+            else:
+                break
+        context_parts.append("---------------------------------------------")
+
+    # Add Live Tasks
+    if live_task_results:
+        context_parts.append("--- Potentially Relevant Tasks (Live) ---")
+        for task in live_task_results:
+            entry_text = f"Task ID: {task['task_id']}\nTitle: {task['title']}\nStatus: {task['status']}\nDescription: {task.get('description', 'N/A')}\n(Updated: {task['updated_at']})\n"
+            entry_tokens = len(entry_text.split())
+            if current_token_count + entry_tokens < MAX_CONTEXT_TOKENS:
+                context_parts.append(entry_text)
+                current_token_count += entry_tokens
+            else:
+                break
+        context_parts.append("---------------------------------------")
+
+    # Add Indexed Knowledge (Vector Search Results)
+    if vector_search_results:
+        context_parts.append(
+            "--- Indexed Project Knowledge (Vector Search Results) ---"
+        )
+        for i, item in enumerate(vector_search_results):
+            chunk_text = item["chunk_text"]
+            source_type = item["source_type"]
+            source_ref = item["source_ref"]
+            metadata = item.get("metadata", {})
+            distance = item.get("distance", "N/A")
+
+            # Enhanced source info with metadata
+            source_info = f"Source Type: {source_type}, Reference: {source_ref}"
+
+            # Add code-specific metadata if available
+            if metadata and source_type in ["code", "code_summary"]:
+                if metadata.get("language"):
+                    source_info += f", Language: {metadata['language']}"
+                if metadata.get("section_type"):
+                    source_info += f", Section: {metadata['section_type']}"
+                if metadata.get("entities"):
+                    entity_names = [e.get("name", "") for e in metadata["entities"]]
+                    if entity_names:
+                        source_info += f", Contains: {', '.join(entity_names[:3])}"
+                        if len(entity_names) > 3:
+                            source_info += f" (+{len(entity_names)-3} more)"
+
+            entry_text = f"Retrieved Chunk {i+1} (Similarity/Distance: {distance}):\n{source_info}\nContent:\n{chunk_text}\n"
+            chunk_tokens = len(entry_text.split())
+            if current_token_count + chunk_tokens < MAX_CONTEXT_TOKENS:
+                context_parts.append(entry_text)
+                current_token_count += chunk_tokens
+            else:
+                context_parts.append(
+                    "--- [Indexed knowledge truncated due to token limit] ---"
                 )
-        else:
-            logger.warning(
-                "RAG Query: Vector search (sqlite-vec) is not available. Skipping vector search."
-            )
+                break
+        context_parts.append(
+            "-------------------------------------------------------"
+        )
 
-        # --- 4. Combine Contexts for LLM ---
-        # Original main.py: lines 1509 - 1548
-        context_parts: List[str] = []
-        current_token_count: int = 0  # Approximate token count
-
-        # Add Live Context
-        if live_context_results:
-            context_parts.append("--- Recently Updated Project Context (Live) ---")
-            for item in live_context_results:
-                entry_text = f"Key: {item['context_key']}\nValue: {item['value']}\nDescription: {item.get('description', 'N/A')}\n(Updated: {item['last_updated']})\n"
-                entry_tokens = len(entry_text.split())  # Approximation
-                if current_token_count + entry_tokens < MAX_CONTEXT_TOKENS:
-                    context_parts.append(entry_text)
-                    current_token_count += entry_tokens
-                else:
-                    break
-            context_parts.append("---------------------------------------------")
-
-        # Add Live Tasks
-        if live_task_results:
-            context_parts.append("--- Potentially Relevant Tasks (Live) ---")
-            for task in live_task_results:
-                entry_text = f"Task ID: {task['task_id']}\nTitle: {task['title']}\nStatus: {task['status']}\nDescription: {task.get('description', 'N/A')}\n(Updated: {task['updated_at']})\n"
-                entry_tokens = len(entry_text.split())
-                if current_token_count + entry_tokens < MAX_CONTEXT_TOKENS:
-                    context_parts.append(entry_text)
-                    current_token_count += entry_tokens
-                else:
-                    break
-            context_parts.append("---------------------------------------")
+    return context_parts, current_token_count
 
-        # Add Indexed Knowledge (Vector Search Results)
-        if vector_search_results:
-            context_parts.append(
-                "--- Indexed Project Knowledge (Vector Search Results) ---"
-            )
-            for i, item in enumerate(vector_search_results):
-                chunk_text = item["chunk_text"]
-                source_type = item["source_type"]
-                source_ref = item["source_ref"]
-                metadata = item.get("metadata", {})
-                distance = item.get("distance", "N/A")
 
-                # Enhanced source info with metadata
-                source_info = f"Source Type: {source_type}, Reference: {source_ref}"
+NO_RAG_CONTEXT_ANSWER = "No relevant information found in the project knowledge base or live data for your query."
 
-                # Add code-specific metadata if available
-                if metadata and source_type in ["code", "code_summary"]:
-                    if metadata.get("language"):
-                        source_info += f", Language: {metadata['language']}"
-                    if metadata.get("section_type"):
-                        source_info += f", Section: {metadata['section_type']}"
-                    if metadata.get("entities"):
-                        entity_names = [e.get("name", "") for e in metadata["entities"]]
-                        if entity_names:
-                            source_info += f", Contains: {', '.join(entity_names[:3])}"
-                            if len(entity_names) > 3:
-                                source_info += f" (+{len(entity_names)-3} more)"
 
-                entry_text = f"Retrieved Chunk {i+1} (Similarity/Distance: {distance}):\n{source_info}\nContent:\n{chunk_text}\n"
-                chunk_tokens = len(entry_text.split())
-                if current_token_count + chunk_tokens < MAX_CONTEXT_TOKENS:
-                    context_parts.append(entry_text)
-                    current_token_count += chunk_tokens
-                else:
-                    context_parts.append(
-                        "--- [Indexed knowledge truncated due to token limit] ---"
-                    )
-                    break
-            context_parts.append(
-                "-------------------------------------------------------"
-            )
+def _rag_chat_messages(
+    query_text: str, context_parts: List[str], context_token_count: int
+) -> List[Dict[str, str]]:
+    """Builds the chat messages asking the LLM to answer from the context."""
+    combined_context_str = "\n\n".join(context_parts)
 
-        if not context_parts:
-            logger.info(
-                f"RAG Query: No relevant information found for query: '{query_text}'"
-            )
-            answer = "No relevant information found in the project knowledge base or live data for your query."
-        else:
-            combined_context_str = "\n\n".join(context_parts)
+    # --- 5. Call Chat Completion API ---
+    # Original main.py: lines 1550 - 1562
+    user_message_for_llm = f"CONTEXT:\n{combined_context_str}\n\nQUERY:\n{query_text}\n\nBased *only* on the CONTEXT provided above, please answer the QUERY."
 
-            # --- 5. Call Chat Completion API ---
-            # Original main.py: lines 1550 - 1562
-            system_prompt_for_llm = """You are an AI assistant answering questions about a software project. 
-Use the provided context, which may include recently updated live data (like project context keys or tasks) and information retrieved from an indexed knowledge base (like documentation or code summaries), to answer the user's query. 
-Prioritize information from the 'Live' sections if available and relevant for time-sensitive data. 
-Answer using *only* the information given in the context. If the context doesn't contain the answer, state that clearly.
+    logger.debug(
+        f"RAG Query: Combined context for LLM (approx tokens: {context_token_count}):\n{combined_context_str[:500]}..."
+    )  # Log excerpt
+    logger.debug(f"RAG Query: User message for LLM:\n{user_message_for_llm[:500]}...")
 
-Be VERBOSE and comprehensive in your responses. It's better to give too much context than too little. 
-When answering, please also suggest additional context entries and queries that might be helpful for understanding this topic better.
-For example, suggest related files to examine, related project context keys to check, or follow-up questions that could provide more insight.
-Always err on the side of providing more detailed explanations and comprehensive information rather than brief responses."""
+    return [
+        {"role": "system", "content": RAG_SYSTEM_PROMPT},
+        {"role": "user", "content": user_message_for_llm},
+    ]
 
-            user_message_for_llm = f"CONTEXT:\n{combined_context_str}\n\nQUERY:\n{query_text}\n\nBased *only* on the CONTEXT provided above, please answer the QUERY."
 
-            logger.debug(
-                f"RAG Query: Combined context for LLM (approx tokens: {current_token_count}):\n{combined_context_str[:500]}..."
-            )  # Log excerpt
-            logger.debug(
-                f"RAG Query: User message for LLM:\n{user_message_for_llm[:500]}..."
-            )
+def _complete_rag_answer(
+    openai_client: Any,
+    query_text: str,
+    context_parts: List[str],
+    context_token_count: int,
+) -> str:
+    """Synthesizes the answer for one query from its context sections."""
+    if not context_parts:
+        logger.info(
+            f"RAG Query: No relevant information found for query: '{query_text}'"
+        )
+        return NO_RAG_CONTEXT_ANSWER
 
-            chat_response = openai_client.chat.completions.create(
-                model=CHAT_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt_for_llm},
-                    {"role": "user", "content": user_message_for_llm},
-                ],
-                temperature=0.4,  # Increased for more diverse context discovery while maintaining accuracy
+    chat_response = openai_client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=_rag_chat_messages(query_text, context_parts, context_token_count),
+        temperature=0.4,  # Increased for more diverse context discovery while maintaining accuracy
+    )
+    return chat_response.choices[0].message.content
+
+
+# --- Answer latency metrics ---
+# Recent RAG answers (streamed or not), newest last. Exposed via
+# get_rag_query_metrics() for the dashboard and logs.
+_recent_answer_timings: Deque[Dict[str, Optional[float]]] = deque(
+    maxlen=RAG_METRICS_WINDOW
+)
+
+
+def _record_answer_timing(
+    total_seconds: float, first_token_seconds: Optional[float] = None
+) -> None:
+    _recent_answer_timings.append(
+        {"total": total_seconds, "first_token": first_token_seconds}
+    )
+
+
+def _timing_summary(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def get_rag_query_metrics() -> Dict[str, Any]:
+    """Latency percentiles over the last RAG_METRICS_WINDOW answered queries."""
+    timings = list(_recent_answer_timings)
+    first_token = [t["first_token"] for t in timings if t["first_token"] is not None]
+    return {
+        "queries": len(timings),
+        "streamed_queries": len(first_token),
+        "total_latency": _timing_summary([t["total"] for t in timings]),
+        "time_to_first_token": _timing_summary(first_token),
+    }
+
+
+# Original location: main.py lines 1432 - 1566 (ask_project_rag_tool function body)
+
+
+async def query_rag_system(
+    query_text: str,
+    retrieval_only: bool = False,
+    max_tokens: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Processes a natural language query using the RAG system.
+    Fetches relevant context from live data and indexed knowledge,
+    then uses an LLM to synthesize an answer.
+
+    Args:
+        query_text: The natural language question from the user.
+        retrieval_only: If True, skip the chat completion and return the ranked
+                        chunks from the vector index as JSON.
+        max_tokens: Token cap for the retrieval-only result set.
+        filters: Optional chunk filters (source_type, path_prefix, language,
+                 entity_type) applied inside the vector search.
+
+    Returns:
+        A string containing the answer or an error message.
+    """
+    if retrieval_only:
+        try:
+            retrieval = await retrieve_rag_chunks(
+                query_text, max_tokens=max_tokens, filters=filters
             )
-            answer = chat_response.choices[0].message.content
+            return json.dumps(retrieval, indent=2, default=str)
+        except openai.APIError as e_openai:
+            logger.error(f"RAG Retrieval: OpenAI API error: {e_openai}", exc_info=True)
+            return f"Error communicating with OpenAI: {e_openai}"
+        except sqlite3.Error as e_sql:
+            logger.error(f"RAG Retrieval: Database error: {e_sql}", exc_info=True)
+            return f"Error querying RAG database: {e_sql}"
+        except Exception as e_unexpected:
+            logger.error(f"RAG Retrieval: Error: {e_unexpected}", exc_info=True)
+            return f"RAG Retrieval Error: {str(e_unexpected)}"
+
+    # Get OpenAI client (main.py:1438)
+    openai_client = get_openai_client()
+    if not openai_client:
+        logger.error("RAG Query: OpenAI client is not available. Cannot process query.")
+        return "RAG Error: OpenAI client not available. Please check server configuration and OpenAI API key."
+
+    conn = None
+    answer = (
+        "An unexpected error occurred during the RAG query."  # Default error message
+    )
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        started_at = time.perf_counter()
+        query_embeddings = _embed_for_vector_search(
+            openai_client, cursor, [query_text]
+        )
+        context_parts, context_token_count = _build_rag_context(
+            cursor,
+            query_text,
+            query_embeddings[0] if query_embeddings else None,
+            filters,
+        )
+        answer = _complete_rag_answer(
+            openai_client, query_text, context_parts, context_token_count
+        )
+        _record_answer_timing(time.perf_counter() - started_at)
 
     except openai.APIError as e_openai:  # main.py:1563
         logger.error(f"RAG Query: OpenAI API error: {e_openai}", exc_info=True)
@@ -337,6 +935,187 @@ Always err on the side of providing more detailed explanations and comprehensive
     return answer
 
 
+async def query_rag_system_batch(
+    query_texts: List[str],
+    filters: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, str]]:
+    """
+    Answers several questions in one go: the queries are embedded in a single
+    API request, context for all of them is gathered on one DB connection and
+    the chat completions run concurrently (up to RAG_BATCH_MAX_CONCURRENCY).
+
+    Args:
+        query_texts: The natural language questions.
+        filters: Optional chunk filters applied to every question's vector search.
+
+    Returns:
+        One {"query", "answer"} dict per question, in input order. Errors are
+        reported per question in `answer`, as query_rag_system does.
+    """
+    openai_client = get_openai_client()
+    if not openai_client:
+        logger.error("RAG Batch: OpenAI client is not available. Cannot process queries.")
+        error = "RAG Error: OpenAI client not available. Please check server configuration and OpenAI API key."
+        return [{"query": query_text, "answer": error} for query_text in query_texts]
+
+    conn = None
+    contexts: List[Tuple[List[str], int]] = []
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        query_embeddings = _embed_for_vector_search(openai_client, cursor, query_texts)
+        for i, query_text in enumerate(query_texts):
+            contexts.append(
+                _build_rag_context(
+                    cursor,
+                    query_text,
+                    query_embeddings[i] if query_embeddings else None,
+                    filters,
+                )
+            )
+    except sqlite3.Error as e_sql:
+        logger.error(f"RAG Batch: Database error: {e_sql}", exc_info=True)
+        error = f"Error querying RAG database: {e_sql}"
+        return [{"query": query_text, "answer": error} for query_text in query_texts]
+    finally:
+        if conn:
+            conn.close()
+
+    answers: List[str] = [""] * len(query_texts)
+    limiter = anyio.CapacityLimiter(max(1, RAG_BATCH_MAX_CONCURRENCY))
+
+    async def _answer(index: int) -> None:
+        context_parts, context_token_count = contexts[index]
+        try:
+            answers[index] = await anyio.to_thread.run_sync(
+                _complete_rag_answer,
+                openai_client,
+                query_texts[index],
+                context_parts,
+                context_token_count,
+                limiter=limiter,
+            )
+        except openai.APIError as e_openai:
+            logger.error(f"RAG Batch: OpenAI API error: {e_openai}", exc_info=True)
+            answers[index] = f"Error communicating with OpenAI: {e_openai}"
+        except Exception as e_unexpected:
+            logger.error(f"RAG Batch: Unexpected error: {e_unexpected}", exc_info=True)
+            answers[index] = (
+                f"An unexpected error occurred during the RAG query: {str(e_unexpected)}"
+            )
+
+    async with anyio.create_task_group() as tg:
+        for index in range(len(query_texts)):
+            tg.start_soon(_answer, index)
+
+    return [
+        {"query": query_text, "answer": answer}
+        for query_text, answer in zip(query_texts, answers)
+    ]
+
+
+async def stream_rag_answer(
+    query_text: str,
+    filters: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of query_rag_system. Yields `{"type": "delta", "text"}`
+    events as the chat completion produces text, then a single
+    `{"type": "done", "answer", "metrics"}` event with the full answer and
+    this query's timings (time to first token, total). Errors end the stream
+    with a `done` event whose answer is the error message, as query_rag_system
+    would return it.
+    """
+    started_at = time.perf_counter()
+    answer_parts: List[str] = []
+    first_token_seconds: Optional[float] = None
+    answer: Optional[str] = None
+
+    openai_client = get_openai_client()
+    if not openai_client:
+        logger.error("RAG Query: OpenAI client is not available. Cannot process query.")
+        answer = "RAG Error: OpenAI client not available. Please check server configuration and OpenAI API key."
+
+    if answer is None:
+        conn = None
+        stream = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            query_embeddings = _embed_for_vector_search(
+                openai_client, cursor, [query_text]
+            )
+            context_parts, context_token_count = _build_rag_context(
+                cursor,
+                query_text,
+                query_embeddings[0] if query_embeddings else None,
+                filters,
+            )
+            conn.close()
+            conn = None
+
+            if not context_parts:
+                logger.info(
+                    f"RAG Query: No relevant information found for query: '{query_text}'"
+                )
+                answer = NO_RAG_CONTEXT_ANSWER
+            else:
+                stream = openai_client.chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=_rag_chat_messages(
+                        query_text, context_parts, context_token_count
+                    ),
+                    temperature=0.4,
+                    stream=True,
+                )
+                stream_iter = iter(stream)
+                while True:
+                    # The sync client blocks per chunk; keep the event loop free
+                    chunk = await anyio.to_thread.run_sync(next, stream_iter, None)
+                    if chunk is None:
+                        break
+                    if not chunk.choices:
+                        continue
+                    delta_text = chunk.choices[0].delta.content
+                    if not delta_text:
+                        continue
+                    if first_token_seconds is None:
+                        first_token_seconds = time.perf_counter() - started_at
+                    answer_parts.append(delta_text)
+                    yield {"type": "delta", "text": delta_text}
+                answer = "".join(answer_parts)
+        except openai.APIError as e_openai:
+            logger.error(f"RAG Query: OpenAI API error: {e_openai}", exc_info=True)
+            answer = f"Error communicating with OpenAI: {e_openai}"
+        except sqlite3.Error as e_sql:
+            logger.error(f"RAG Query: Database error: {e_sql}", exc_info=True)
+            answer = f"Error querying RAG database: {e_sql}"
+        except Exception as e_unexpected:
+            logger.error(f"RAG Query: Unexpected error: {e_unexpected}", exc_info=True)
+            answer = f"An unexpected error occurred during the RAG query: {str(e_unexpected)}"
+        finally:
+            if conn:
+                conn.close()
+            if stream is not None:
+                # Also reached when the consumer stops early (client
+                # disconnect, aclose()): release the HTTP response so OpenAI
+                # stops generating
+                stream.close()
+
+    total_seconds = time.perf_counter() - started_at
+    _record_answer_timing(total_seconds, first_token_seconds)
+    metrics = {
+        "time_to_first_token_ms": round(first_token_seconds * 1000, 1)
+        if first_token_seconds is not None
+        else None,
+        "total_ms": round(total_seconds * 1000, 1),
+    }
+    logger.info(
+        f"RAG Query: Streamed answer in {metrics['total_ms']} ms (first token: {metrics['time_to_first_token_ms']} ms)."
+    )
+    yield {"type": "done", "answer": answer, "metrics": metrics}
+
+
 async def query_rag_system_with_model(
     query_text: str, model_name: str, max_tokens: int = None
 ) -> str:
@@ -369,67 +1148,26 @@ async def query_rag_system_with_model(
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        live_context_results: List[Dict[str, Any]] = []
-        live_task_results: List[Dict[str, Any]] = []
         vector_search_results: List[Dict[str, Any]] = []
 
-        # Get live context (same as regular RAG)
-        cursor.execute(
-            "SELECT context_key, value, description, last_updated FROM project_context ORDER BY last_updated DESC"
-        )
-        live_context_results = [dict(row) for row in cursor.fetchall()]
-
-        # Get live tasks (same as regular RAG)
-        cursor.execute(
-            """
-            SELECT task_id, title, description, status, created_by, assigned_to, 
-                   priority, parent_task, depends_on_tasks, created_at, updated_at 
-            FROM tasks 
-            WHERE status IN ('pending', 'in_progress') 
-            ORDER BY updated_at DESC
-        """
-        )
-        live_task_results = [dict(row) for row in cursor.fetchall()]
+        # Live context and active tasks come from the maintained in-memory
+        # view (pre-rendered entries); it only hits the DB when cold.
+        recent = get_recent_context_view().snapshot(cursor)
 
         # Get vector search results if VSS is available
-        if is_vss_loadable():
+        if get_vector_engine():
             try:
-                # Check if rag_embeddings table exists
-                cursor.execute(
-                    "SELECT name FROM sqlite_master WHERE type='table' AND name='rag_embeddings'"
-                )
-                if cursor.fetchone() is not None:
+                # Check that the vector index exists
+                if _vector_search_available(cursor):
                     # Embed the query
-                    query_embedding_response = openai_client.embeddings.create(
-                        input=[query_text],
-                        model=EMBEDDING_MODEL,
-                        dimensions=EMBEDDING_DIMENSION,
+                    query_embedding = _embed_query(openai_client, query_text)
+                    # Perform vector search using the active engine
+                    vector_search_results, _ = _select_diverse_chunks(
+                        _search_vector_index(
+                            cursor, query_embedding, _candidate_fetch_k(VECTOR_SEARCH_K)
+                        ),
+                        VECTOR_SEARCH_K,
                     )
-                    query_embedding = query_embedding_response.data[0].embedding
-                    query_embedding_json = json.dumps(query_embedding)
-
-                    # Perform vector search using sqlite-vec (matching working implementation)
-                    k_results = 13  # Optimized based on recent RAG research
-                    vector_search_sql = """
-                        SELECT c.chunk_text, c.source_type, c.source_ref, c.metadata, r.distance
-                        FROM rag_embeddings r
-                        JOIN rag_chunks c ON r.rowid = c.chunk_id
-                        WHERE r.embedding MATCH ? AND k = ?
-                        ORDER BY r.distance
-                    """
-                    cursor.execute(vector_search_sql, (query_embedding_json, k_results))
-                    raw_results = cursor.fetchall()
-
-                    # Process results to parse metadata
-                    for row in raw_results:
-                        result = dict(row)
-                        # Parse metadata JSON if present
-                        if result.get("metadata"):
-                            try:
-                                result["metadata"] = json.loads(result["metadata"])
-                            except json.JSONDecodeError:
-                                result["metadata"] = None
-                        vector_search_results.append(result)
                 else:
                     logger.warning(
                         "RAG Query: 'rag_embeddings' table not found. Skipping vector search."
@@ -453,14 +1191,12 @@ async def query_rag_system_with_model(
         current_token_count = 0
 
         # Include live context
-        if live_context_results:
+        if recent["contexts"]:
             context_parts.append("=== Live Project Context ===")
-            for item in live_context_results:
-                entry_text = f"Key: {item['context_key']}\nDescription: {item['description']}\nValue: {item['value']}\nLast Updated: {item['last_updated']}\n"
-                chunk_tokens = len(entry_text.split())
-                if current_token_count + chunk_tokens < context_limit:
-                    context_parts.append(entry_text)
-                    current_token_count += chunk_tokens
+            for item in recent["contexts"]:
+                if current_token_count + item["tokens"] < context_limit:
+                    context_parts.append(item["text"])
+                    current_token_count += item["tokens"]
                 else:
                     context_parts.append(
                         "--- [Live context truncated due to token limit] ---"
@@ -468,19 +1204,12 @@ async def query_rag_system_with_model(
                     break
 
         # Include live tasks
-        if live_task_results:
+        if recent["tasks"]:
             context_parts.append("\n=== Live Task Information ===")
-            for item in live_task_results:
-                entry_text = f"Task ID: {item['task_id']}\nTitle: {item['title']}\nDescription: {item['description']}\nStatus: {item['status']}\n"
-                entry_text += f"Priority: {item['priority']}\nAssigned To: {item['assigned_to']}\nCreated By: {item['created_by']}\n"
-                entry_text += f"Parent Task: {item['parent_task']}\nDependencies: {item['depends_on_tasks']}\n"
-                entry_text += (
-                    f"Created: {item['created_at']}\nUpdated: {item['updated_at']}\n"
-                )
-                chunk_tokens = len(entry_text.split())
-                if current_token_count + chunk_tokens < context_limit:
-                    context_parts.append(entry_text)
-                    current_token_count += chunk_tokens
+            for item in recent["tasks"]:
+                if current_token_count + item["tokens"] < context_limit:
+                    context_parts.append(item["text"])
+                    current_token_count += item["tokens"]
                 else:
                     context_parts.append(
                         "--- [Live tasks truncated due to token limit] ---"
@@ -0,0 +1,197 @@
+# Agent-MCP/mcp_template/mcp_server_src/features/rag/recent_context.py
+"""
+Bounded in-memory view of the most recently updated project context entries
+and active (pending / in_progress) tasks, with each entry's prompt text
+rendered once.
+
+The context and task write paths report the keys / task ids they change
+(refresh_contexts / refresh_tasks, a primary-key read), so RAG calls
+(query_rag_system_with_model) read the view instead of re-reading and
+re-serializing the project_context and tasks tables on every call. The view
+loads lazily from the database on first use, and reloads only if deletions
+leave it short while older rows were evicted.
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from ...core.config import logger, RAG_RECENT_CONTEXT_MAX_ENTRIES
+
+ACTIVE_TASK_STATUSES = ("pending", "in_progress")
+TASK_COLUMNS = (
+    "task_id, title, description, status, created_by, assigned_to, "
+    "priority, parent_task, depends_on_tasks, created_at, updated_at"
+)
+
+
+def _render_context_entry(entry: Dict[str, Any]) -> str:
+    return (
+        f"Key: {entry['context_key']}\nDescription: {entry['description']}\n"
+        f"Value: {entry['value']}\nLast Updated: {entry['last_updated']}\n"
+    )
+
+
+def _render_task_entry(task: Dict[str, Any]) -> str:
+    entry_text = f"Task ID: {task['task_id']}\nTitle: {task['title']}\nDescription: {task['description']}\nStatus: {task['status']}\n"
+    entry_text += f"Priority: {task['priority']}\nAssigned To: {task['assigned_to']}\nCreated By: {task['created_by']}\n"
+    entry_text += f"Parent Task: {task['parent_task']}\nDependencies: {task['depends_on_tasks']}\n"
+    entry_text += f"Created: {task['created_at']}\nUpdated: {task['updated_at']}\n"
+    return entry_text
+
+
+class _BoundedRecentMap:
+    """Key -> rendered entry, oldest first, holding at most `max_entries`."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.evicted = False  # Rows older than the view exist in the DB
+
+    def put(self, key: str, text: str, updated_at: Any) -> None:
+        """Adds or refreshes `key` as the newest entry (writes arrive in time order)."""
+        self.entries.pop(key, None)
+        self.entries[key] = {
+            "text": text,
+            "tokens": len(text.split()),  # Approximation, as in query.py
+            "updated_at": str(updated_at or ""),
+        }
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evicted = True
+
+    def remove(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def needs_reload(self) -> bool:
+        return self.evicted and len(self.entries) < self.max_entries // 2
+
+    def newest_first(self) -> List[Dict[str, Any]]:
+        return list(reversed(self.entries.values()))
+
+
+class RecentContextView:
+    """Thread-safe holder of the recent context and active task entries."""
+
+    def __init__(self, max_entries: int = RAG_RECENT_CONTEXT_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._contexts = _BoundedRecentMap(max_entries)
+        self._tasks = _BoundedRecentMap(max_entries)
+        self._loaded = False
+
+    # --- Write-path notifications ---
+    # Write paths pass the keys / task ids they touched on their own cursor
+    # (before or after commit); the rows are re-read by primary key, so
+    # partial updates and deletes are handled the same way.
+
+    def refresh_contexts(
+        self, cursor: sqlite3.Cursor, context_keys: Iterable[str]
+    ) -> None:
+        """Re-reads the given project_context keys into the view (dropping deleted ones)."""
+        context_keys = [key for key in context_keys if key]
+        with self._lock:
+            if not self._loaded or not context_keys:
+                return
+            placeholders = ", ".join("?" for _ in context_keys)
+            cursor.execute(
+                f"SELECT context_key, value, description, last_updated FROM project_context WHERE context_key IN ({placeholders})",
+                context_keys,
+            )
+            rows = {row["context_key"]: dict(row) for row in cursor.fetchall()}
+            for key in context_keys:
+                entry = rows.get(key)
+                if entry is None:
+                    self._contexts.remove(key)
+                else:
+                    self._contexts.put(key, _render_context_entry(entry), entry["last_updated"])
+
+    def refresh_tasks(self, cursor: sqlite3.Cursor, task_ids: Iterable[str]) -> None:
+        """Re-reads the given tasks into the view; inactive or deleted ones are dropped."""
+        task_ids = [task_id for task_id in task_ids if task_id]
+        with self._lock:
+            if not self._loaded or not task_ids:
+                return
+            placeholders = ", ".join("?" for _ in task_ids)
+            cursor.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE task_id IN ({placeholders})",
+                task_ids,
+            )
+            rows = {row["task_id"]: dict(row) for row in cursor.fetchall()}
+            for task_id in task_ids:
+                task = rows.get(task_id)
+                if task is None or task.get("status") not in ACTIVE_TASK_STATUSES:
+                    self._tasks.remove(task_id)
+                else:
+                    self._tasks.put(task_id, _render_task_entry(task), task["updated_at"])
+
+    def invalidate(self) -> None:
+        """Forces a reload on next read (for bulk writes that bypass the hooks)."""
+        with self._lock:
+            self._loaded = False
+
+    # --- Read path ---
+
+    def _load(self, cursor: sqlite3.Cursor) -> None:
+        contexts = _BoundedRecentMap(self._max_entries)
+        cursor.execute(
+            "SELECT context_key, value, description, last_updated FROM project_context ORDER BY last_updated DESC LIMIT ?",
+            (self._max_entries + 1,),
+        )
+        for row in reversed(cursor.fetchall()):
+            entry = dict(row)
+            contexts.put(entry["context_key"], _render_context_entry(entry), entry["last_updated"])
+
+        tasks = _BoundedRecentMap(self._max_entries)
+        cursor.execute(
+            f"""
+            SELECT {TASK_COLUMNS}
+            FROM tasks
+            WHERE status IN ('pending', 'in_progress')
+            ORDER BY updated_at DESC
+            LIMIT ?
+        """,
+            (self._max_entries + 1,),
+        )
+        for row in reversed(cursor.fetchall()):
+            task = dict(row)
+            tasks.put(task["task_id"], _render_task_entry(task), task["updated_at"])
+
+        self._contexts = contexts
+        self._tasks = tasks
+        self._loaded = True
+        logger.debug(
+            f"Recent context view loaded: {len(contexts.entries)} context entries, {len(tasks.entries)} active tasks."
+        )
+
+    def snapshot(self, cursor: sqlite3.Cursor) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Returns {"contexts": [...], "tasks": [...]}, newest first; each item has
+        the rendered `text`, its approximate `tokens` and `updated_at`.
+        Loads from the DB via `cursor` only when the view is cold or depleted.
+        """
+        with self._lock:
+            if (
+                not self._loaded
+                or self._contexts.needs_reload()
+                or self._tasks.needs_reload()
+            ):
+                self._load(cursor)
+            return {
+                "contexts": self._contexts.newest_first(),
+                "tasks": self._tasks.newest_first(),
+            }
+
+
+_view_instance: Optional[RecentContextView] = None
+_view_lock = threading.Lock()
+
+
+def get_recent_context_view() -> RecentContextView:
+    """Returns the process-wide recent context view."""
+    global _view_instance
+    if _view_instance is None:
+        with _view_lock:
+            if _view_instance is None:
+                _view_instance = RecentContextView()
+    return _view_instance
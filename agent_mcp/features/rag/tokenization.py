@@ -0,0 +1,78 @@
+# Agent-MCP/mcp_template/mcp_server_src/features/rag/tokenization.py
+"""
+Token counting used to size RAG chunks.
+
+The tiktoken encoding (RAG_TOKENIZER_ENCODING) is loaded once per process
+when tiktoken is installed; otherwise, or with RAG_CHUNK_TOKEN_COUNTING=approx,
+counts are estimated at ~4 characters per token. Chunkers measure text line
+by line, and source files repeat many lines (blank lines, braces, common
+imports), so per-line counts are memoized.
+"""
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from ...core.config import logger, RAG_CHUNK_TOKEN_COUNTING, RAG_TOKENIZER_ENCODING
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+APPROX_CHARS_PER_TOKEN = 4
+SIZE_UNITS = ("chars", "tokens")
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer() -> Optional[Any]:
+    """Returns the cached tiktoken encoding, or None when counts are approximated."""
+    if tiktoken is None or RAG_CHUNK_TOKEN_COUNTING == "approx":
+        return None
+    try:
+        return tiktoken.get_encoding(RAG_TOKENIZER_ENCODING)
+    except Exception as e:
+        # e.g. the encoding file cannot be downloaded on an offline machine
+        logger.warning(
+            f"Could not load tiktoken encoding '{RAG_TOKENIZER_ENCODING}', approximating token counts: {e}"
+        )
+        return None
+
+
+def approx_token_count(text: str) -> int:
+    """Fast token estimate (~4 characters per token for English text and code)."""
+    return (len(text) + APPROX_CHARS_PER_TOKEN - 1) // APPROX_CHARS_PER_TOKEN
+
+
+def count_tokens(text: str) -> int:
+    """Token count of `text` with the cached tokenizer, or an estimate without one."""
+    encoding = get_tokenizer()
+    if encoding is None:
+        return approx_token_count(text)
+    return len(encoding.encode_ordinary(text))
+
+
+@lru_cache(maxsize=65536)
+def count_line_tokens(line: str) -> int:
+    """Memoized `count_tokens` for single lines (used by the line-based chunkers)."""
+    return count_tokens(line)
+
+
+def token_start_offsets(text: str) -> List[int]:
+    """
+    Character offset at which each token of `text` starts, so token windows
+    can be cut from the original string without splitting characters. Without
+    a tokenizer, estimated tokens are fixed runs of APPROX_CHARS_PER_TOKEN characters.
+    """
+    encoding = get_tokenizer()
+    if encoding is None:
+        return list(range(0, len(text), APPROX_CHARS_PER_TOKEN))
+    _, offsets = encoding.decode_with_offsets(encoding.encode_ordinary(text))
+    return offsets
+
+
+def get_size_function(size_unit: str):
+    """Returns the per-line size function for a chunker `size_unit` ('chars' or 'tokens')."""
+    if size_unit == "chars":
+        return len
+    if size_unit == "tokens":
+        return count_line_tokens
+    raise ValueError(f"size_unit must be one of {SIZE_UNITS}, got '{size_unit}'.")
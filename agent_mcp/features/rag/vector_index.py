@@ -0,0 +1,518 @@
+# Agent-MCP/mcp_template/mcp_server_src/features/rag/vector_index.py
+"""
+Vector search engines for RAG: the in-process NumPy index and the optional
+quantized sqlite-vec table.
+
+Used when the sqlite-vec extension cannot be loaded (or when selected with
+RAG_VECTOR_ENGINE=numpy). Chunk embeddings are kept in a memory-mapped float32
+matrix under the .agent directory, L2-normalized so a single matrix-vector
+product gives cosine similarity, and top-k is selected with `argpartition`.
+Rows are keyed by `rag_chunks.chunk_id`, exactly like the rowid of the vec0
+`rag_embeddings` table.
+
+With sqlite-vec, RAG_VECTOR_QUANTIZATION adds a `rag_embeddings_quantized`
+vec0 table (int8 or bit vectors) used for the first-stage KNN; candidates
+are re-ranked against the full-precision `rag_embeddings` vectors.
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# NumPy is optional; without it only the sqlite-vec engine is available.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ...core.config import (
+    logger,
+    get_agent_dir,
+    RAG_VECTOR_ENGINE,
+    RAG_VECTOR_QUANTIZATION,
+)
+from ...db.connection import is_vss_loadable
+from .index_queue import enqueue_rag_sources
+
+VECTOR_FILE_NAME = "rag_vectors.f32"
+IDS_FILE_NAME = "rag_vectors_ids.npy"
+INDEX_META_FILE_NAME = "rag_vectors.json"
+
+INITIAL_CAPACITY = 1024
+# Rewrite the matrix once this fraction of slots are tombstones
+COMPACTION_THRESHOLD = 0.25
+
+ENGINE_SQLITE_VEC = "sqlite-vec"
+ENGINE_NUMPY = "numpy"
+
+QUANTIZED_TABLE_NAME = "rag_embeddings_quantized"
+# vec0 column type and SQL quantizer for each supported quantization
+QUANTIZATION_SCHEMES: Dict[str, Tuple[str, str]] = {
+    "int8": ("INT8", "vec_quantize_int8({}, 'unit')"),
+    "binary": ("BIT", "vec_quantize_binary({})"),
+}
+
+
+class NumpyVectorIndex:
+    """
+    Append-only slot matrix of normalized embeddings with tombstoned deletes.
+
+    Slots [0, size) are in use; a slot whose id is -1 has been removed and is
+    reclaimed on compaction. All public methods are thread-safe.
+    """
+
+    def __init__(self, directory: Path, dimension: int):
+        self.directory = directory
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        self._vectors: Any = None  # np.memmap of shape (capacity, dimension)
+        self._ids: Any = None  # np.ndarray[int64] of shape (capacity,)
+        self._capacity = 0
+        self._size = 0
+        self._tombstones = 0
+        self._slot_of: Dict[int, int] = {}  # chunk_id -> slot
+        self._load()
+
+    # --- Storage ---
+
+    @property
+    def _vector_path(self) -> Path:
+        return self.directory / VECTOR_FILE_NAME
+
+    @property
+    def _ids_path(self) -> Path:
+        return self.directory / IDS_FILE_NAME
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / INDEX_META_FILE_NAME
+
+    def _open_matrix(self, capacity: int) -> None:
+        self._vectors = np.memmap(
+            self._vector_path,
+            dtype=np.float32,
+            mode="r+",
+            shape=(capacity, self.dimension),
+        )
+        self._capacity = capacity
+
+    def _reset(self, capacity: int = INITIAL_CAPACITY) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._vector_path, "wb") as f:
+            f.truncate(capacity * self.dimension * 4)
+        self._open_matrix(capacity)
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+        self._size = 0
+        self._tombstones = 0
+        self._slot_of = {}
+
+    def _load(self) -> None:
+        try:
+            meta = json.loads(self._meta_path.read_text())
+            if meta.get("dimension") != self.dimension:
+                logger.warning(
+                    f"NumPy vector index dimension {meta.get('dimension')} does not match "
+                    f"configured {self.dimension}. Rebuilding empty index."
+                )
+                self._reset()
+                return
+            capacity = int(meta["capacity"])
+            size = int(meta["size"])
+            ids = np.load(self._ids_path)
+            if len(ids) != capacity or self._vector_path.stat().st_size != (
+                capacity * self.dimension * 4
+            ):
+                raise ValueError("index files are inconsistent")
+            self._open_matrix(capacity)
+            self._ids = ids
+            self._size = size
+            self._slot_of = {
+                int(chunk_id): slot
+                for slot, chunk_id in enumerate(ids[:size])
+                if chunk_id >= 0
+            }
+            self._tombstones = size - len(self._slot_of)
+            logger.info(
+                f"Loaded NumPy vector index with {len(self._slot_of)} vectors ({self.dimension}D)."
+            )
+        except FileNotFoundError:
+            self._reset()
+        except Exception as e:
+            logger.warning(f"NumPy vector index unreadable ({e}). Rebuilding empty index.")
+            self._reset()
+
+    def _ensure_capacity(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed <= self._capacity:
+            return
+        new_capacity = max(self._capacity * 2, needed)
+        self._vectors.flush()
+        self._vectors = None
+        with open(self._vector_path, "r+b") as f:
+            f.truncate(new_capacity * self.dimension * 4)
+        self._open_matrix(new_capacity)
+        grown_ids = np.full(new_capacity, -1, dtype=np.int64)
+        grown_ids[: len(self._ids)] = self._ids
+        self._ids = grown_ids
+
+    def _compact(self) -> None:
+        live_slots = np.nonzero(self._ids[: self._size] >= 0)[0]
+        live_count = len(live_slots)
+        self._vectors[:live_count] = self._vectors[live_slots]
+        self._ids[:live_count] = self._ids[live_slots]
+        self._ids[live_count:] = -1
+        self._size = live_count
+        self._tombstones = 0
+        self._slot_of = {
+            int(chunk_id): slot for slot, chunk_id in enumerate(self._ids[:live_count])
+        }
+
+    def flush(self) -> None:
+        """Persists the matrix and id map so the index survives restarts."""
+        with self._lock:
+            self._vectors.flush()
+            np.save(self._ids_path, self._ids)
+            self._meta_path.write_text(
+                json.dumps(
+                    {
+                        "dimension": self.dimension,
+                        "capacity": self._capacity,
+                        "size": self._size,
+                    }
+                )
+            )
+
+    # --- Mutation ---
+
+    def add(self, chunk_ids: Sequence[int], vectors: Sequence[Sequence[float]]) -> None:
+        """Inserts or replaces the vectors for `chunk_ids`."""
+        if not chunk_ids:
+            return
+        matrix = np.array(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Expected vectors of dimension {self.dimension}, got shape {matrix.shape}"
+            )
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        with self._lock:
+            self._ensure_capacity(len(chunk_ids))
+            for chunk_id, row in zip(chunk_ids, matrix):
+                slot = self._slot_of.get(int(chunk_id))
+                if slot is None:
+                    slot = self._size
+                    self._size += 1
+                    self._slot_of[int(chunk_id)] = slot
+                    self._ids[slot] = int(chunk_id)
+                self._vectors[slot] = row
+
+    def remove(self, chunk_ids: Iterable[int]) -> int:
+        """Removes vectors for `chunk_ids`. Returns the number actually removed."""
+        removed = 0
+        with self._lock:
+            for chunk_id in chunk_ids:
+                slot = self._slot_of.pop(int(chunk_id), None)
+                if slot is None:
+                    continue
+                self._ids[slot] = -1
+                self._vectors[slot] = 0.0
+                removed += 1
+            self._tombstones += removed
+            if self._size and self._tombstones > self._size * COMPACTION_THRESHOLD:
+                self._compact()
+        return removed
+
+    # --- Query ---
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def chunk_ids(self) -> Set[int]:
+        with self._lock:
+            return set(self._slot_of)
+
+    def get_vectors(self, chunk_ids: Sequence[int]) -> Dict[int, Any]:
+        """Returns the stored (normalized) vectors for the given chunk_ids."""
+        with self._lock:
+            return {
+                int(chunk_id): np.array(self._vectors[self._slot_of[int(chunk_id)]])
+                for chunk_id in chunk_ids
+                if int(chunk_id) in self._slot_of
+            }
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int,
+        allowed_ids: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Returns up to `k` (chunk_id, distance) pairs ordered by distance.
+
+        Distance is the Euclidean distance between normalized vectors,
+        sqrt(2 - 2*cos), which ranks identically to cosine similarity and is
+        on the same scale as vec0's default L2 distance for normalized
+        OpenAI embeddings. `allowed_ids` restricts the search to a
+        pre-filtered candidate set.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        with self._lock:
+            if allowed_ids is not None:
+                slots = np.fromiter(
+                    (
+                        self._slot_of[int(i)]
+                        for i in allowed_ids
+                        if int(i) in self._slot_of
+                    ),
+                    dtype=np.int64,
+                )
+                if len(slots) == 0:
+                    return []
+                similarities = self._vectors[slots] @ query
+                candidate_ids = self._ids[slots]
+            else:
+                if self._size == 0:
+                    return []
+                similarities = np.asarray(self._vectors[: self._size] @ query)
+                candidate_ids = self._ids[: self._size].copy()
+                similarities[candidate_ids < 0] = -np.inf
+
+        k = min(k, len(similarities))
+        if k <= 0:
+            return []
+        if k < len(similarities):
+            top = np.argpartition(-similarities, k - 1)[:k]
+        else:
+            top = np.arange(len(similarities))
+        top = top[np.argsort(-similarities[top], kind="stable")]
+
+        results: List[Tuple[int, float]] = []
+        for pos in top:
+            similarity = float(similarities[pos])
+            if similarity == -np.inf:
+                break
+            distance = max(0.0, 2.0 - 2.0 * similarity) ** 0.5
+            results.append((int(candidate_ids[pos]), distance))
+        return results
+
+
+_index_instance: Optional[NumpyVectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_vector_engine() -> Optional[str]:
+    """
+    Returns the vector search engine to use: 'sqlite-vec', 'numpy' or None.
+    Honors RAG_VECTOR_ENGINE ('auto', 'sqlite-vec', 'numpy'); in 'auto' mode
+    sqlite-vec is preferred and NumPy is the fallback.
+    """
+    if RAG_VECTOR_ENGINE == ENGINE_NUMPY:
+        return ENGINE_NUMPY if np is not None else None
+    if RAG_VECTOR_ENGINE == ENGINE_SQLITE_VEC:
+        return ENGINE_SQLITE_VEC if is_vss_loadable() else None
+    if is_vss_loadable():
+        return ENGINE_SQLITE_VEC
+    if np is not None:
+        return ENGINE_NUMPY
+    return None
+
+
+def get_numpy_vector_index() -> NumpyVectorIndex:
+    """Returns the process-wide NumPy index, loading it on first use."""
+    global _index_instance
+    if np is None:
+        raise RuntimeError("NumPy is not installed; the NumPy vector index is unavailable.")
+
+    # Read at call time: the CLI may switch the embedding dimension after import
+    from ...core.config import EMBEDDING_DIMENSION
+
+    with _index_lock:
+        if _index_instance is None or _index_instance.dimension != EMBEDDING_DIMENSION:
+            _index_instance = NumpyVectorIndex(get_agent_dir(), EMBEDDING_DIMENSION)
+        return _index_instance
+
+
+def _import_from_sqlite_vec(
+    conn: sqlite3.Connection, index: NumpyVectorIndex, chunk_ids: Set[int]
+) -> int:
+    """Copies vectors for `chunk_ids` from the vec0 `rag_embeddings` table."""
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='rag_embeddings'"
+        )
+        if cursor.fetchone() is None:
+            return 0
+        cursor.execute("SELECT rowid, embedding FROM rag_embeddings")
+        ids: List[int] = []
+        vectors: List[Any] = []
+        for rowid, blob in cursor:
+            if rowid not in chunk_ids:
+                continue
+            vector = np.frombuffer(blob, dtype=np.float32)
+            if len(vector) != index.dimension:
+                continue
+            ids.append(rowid)
+            vectors.append(vector)
+        index.add(ids, vectors)
+        if ids:
+            logger.info(f"NumPy vector index: imported {len(ids)} vectors from sqlite-vec.")
+        return len(ids)
+    except sqlite3.Error as e:
+        logger.warning(f"NumPy vector index: could not import from sqlite-vec: {e}")
+        return 0
+
+
+def sync_numpy_index_with_chunks(conn: sqlite3.Connection) -> int:
+    """
+    Reconciles the NumPy index with `rag_chunks`.
+
+    Vectors whose chunk no longer exists are dropped. Sources that have chunks
+    without a vector (e.g. indexed under sqlite-vec, after a dimension change,
+    or lost in a crash before flush) get their stored hashes cleared, so they
+    are re-embedded: files by the next indexing cycle (which hashes every
+    file), context entries and tasks through the on-demand RAG index queue.
+    Only if the queue worker is not running is the last-indexed timestamp of
+    those two categories reset, so the next cycle rescans them.
+
+    Returns:
+        The number of sources queued for re-embedding.
+    """
+    index = get_numpy_vector_index()
+    cursor = conn.cursor()
+    cursor.execute("SELECT chunk_id, source_type, source_ref FROM rag_chunks")
+
+    indexed_ids = index.chunk_ids()
+    chunk_ids_in_db: Set[int] = set()
+    stale_sources: Set[Tuple[str, str]] = set()
+    for row in cursor.fetchall():
+        chunk_ids_in_db.add(row["chunk_id"])
+        if row["chunk_id"] not in indexed_ids:
+            stale_sources.add((row["source_type"], row["source_ref"]))
+
+    orphaned = indexed_ids - chunk_ids_in_db
+    if orphaned:
+        index.remove(orphaned)
+        logger.info(f"NumPy vector index: removed {len(orphaned)} orphaned vectors.")
+
+    missing_ids = chunk_ids_in_db - indexed_ids
+    if missing_ids and is_vss_loadable():
+        # Copy vectors already stored in vec0 instead of paying for re-embedding
+        imported = _import_from_sqlite_vec(conn, index, missing_ids)
+        if imported:
+            indexed_ids = index.chunk_ids()
+            cursor.execute("SELECT chunk_id, source_type, source_ref FROM rag_chunks")
+            stale_sources = {
+                (row["source_type"], row["source_ref"])
+                for row in cursor.fetchall()
+                if row["chunk_id"] not in indexed_ids
+            }
+
+    if stale_sources:
+        cursor.executemany(
+            "DELETE FROM rag_meta WHERE meta_key = ?",
+            [(f"hash_{source_type}_{source_ref}",) for source_type, source_ref in stale_sources],
+        )
+        conn.commit()
+        # Context entries and tasks are only rescanned when changed since the
+        # last cycle, so queue them explicitly
+        for source_type, last_indexed_key in (
+            ("context", "last_indexed_context"),
+            ("task", "last_indexed_tasks"),
+        ):
+            refs = sorted(ref for stale_type, ref in stale_sources if stale_type == source_type)
+            if refs and not enqueue_rag_sources(source_type, refs):
+                cursor.execute(
+                    "UPDATE rag_meta SET meta_value = '1970-01-01T00:00:00Z' WHERE meta_key = ?",
+                    (last_indexed_key,),
+                )
+        conn.commit()
+        logger.info(
+            f"NumPy vector index: {len(stale_sources)} sources have chunks without vectors. Queued for re-embedding."
+        )
+
+    index.flush()
+    return len(stale_sources)
+
+
+# --- Quantized sqlite-vec table ---
+
+
+def get_quantization() -> Optional[str]:
+    """Returns the active quantization ('int8' or 'binary'), or None if disabled."""
+    if RAG_VECTOR_QUANTIZATION not in QUANTIZATION_SCHEMES:
+        return None
+    if get_vector_engine() != ENGINE_SQLITE_VEC:
+        return None
+    return RAG_VECTOR_QUANTIZATION
+
+
+def quantize_sql(quantization: str, argument: str = "?") -> str:
+    """SQL expression quantizing `argument` (a float vector) for `quantization`."""
+    return QUANTIZATION_SCHEMES[quantization][1].format(argument)
+
+
+def ensure_quantized_table(conn: sqlite3.Connection) -> None:
+    """
+    Creates, rebuilds or drops `rag_embeddings_quantized` to match the
+    configured quantization, and backfills rows that exist in `rag_embeddings`
+    but not yet in the quantized table (no re-embedding needed).
+    """
+    # Read at call time: the CLI may switch the embedding dimension after import
+    from ...core.config import EMBEDDING_DIMENSION
+
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE name = ?", (QUANTIZED_TABLE_NAME,)
+    )
+    row = cursor.fetchone()
+    existing_sql = row[0] if row else None
+
+    quantization = get_quantization()
+    if quantization is None:
+        if existing_sql:
+            # Not maintained while disabled; drop so it cannot go stale
+            cursor.execute(f"DROP TABLE IF EXISTS {QUANTIZED_TABLE_NAME}")
+            conn.commit()
+            logger.info(f"Dropped '{QUANTIZED_TABLE_NAME}' (quantization disabled).")
+        return
+
+    column_type = QUANTIZATION_SCHEMES[quantization][0]
+    expected_column = f"{column_type}[{EMBEDDING_DIMENSION}]"
+    if existing_sql and expected_column not in existing_sql.upper():
+        cursor.execute(f"DROP TABLE IF EXISTS {QUANTIZED_TABLE_NAME}")
+        existing_sql = None
+    if not existing_sql:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {QUANTIZED_TABLE_NAME} USING vec0(embedding {expected_column})"
+        )
+        logger.info(
+            f"Quantized vector table '{QUANTIZED_TABLE_NAME}' ({expected_column}) created."
+        )
+
+    cursor.execute("SELECT COUNT(*) FROM rag_embeddings")
+    full_count = cursor.fetchone()[0]
+    cursor.execute(f"SELECT COUNT(*) FROM {QUANTIZED_TABLE_NAME}")
+    quantized_count = cursor.fetchone()[0]
+    if quantized_count < full_count:
+        # vec0 drops the vector subtype on INSERT ... SELECT, so quantize per row
+        cursor.execute(
+            f"SELECT rowid, embedding FROM rag_embeddings "
+            f"WHERE rowid NOT IN (SELECT rowid FROM {QUANTIZED_TABLE_NAME})"
+        )
+        missing_rows = cursor.fetchall()
+        cursor.executemany(
+            f"INSERT INTO {QUANTIZED_TABLE_NAME} (rowid, embedding) VALUES (?, {quantize_sql(quantization)})",
+            [(row[0], row[1]) for row in missing_rows],
+        )
+        logger.info(
+            f"Backfilled {full_count - quantized_count} vectors into '{QUANTIZED_TABLE_NAME}'."
+        )
+    conn.commit()
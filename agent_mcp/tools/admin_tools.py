@@ -30,6 +30,8 @@ from ..utils.tmux_utils import (
 from ..utils.prompt_templates import build_agent_prompt
 from ..db.connection import get_db_connection, execute_db_write
 from ..db.actions.agent_actions_db import log_agent_action_to_db  # For DB logging
+from ..features.rag.index_queue import enqueue_rag_sources
+from ..features.rag.recent_context import get_recent_context_view
 
 
 def get_admin_token_suffix(admin_token: str) -> str:
@@ -271,11 +273,14 @@ async def create_agent_tool_impl(
             assigned_tasks.append(task_id)
 
             # Update the in-memory global cache (g.tasks) to reflect the assignment
-            if task_id in g.tasks:
-                g.tasks[task_id]["assigned_to"] = agent_id
-                g.tasks[task_id]["status"] = "pending"
-                g.tasks[task_id]["updated_at"] = created_at_iso
-            else:
+            if not g.tasks.update_fields(
+                task_id,
+                {
+                    "assigned_to": agent_id,
+                    "status": "pending",
+                    "updated_at": created_at_iso,
+                },
+            ):
                 # If task not in cache, fetch from database and add to cache
                 cursor.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,))
                 task_row = cursor.fetchone()
@@ -309,6 +314,8 @@ async def create_agent_tool_impl(
 
         # Commit the transaction (agent creation + task assignments)
         conn.commit()
+        get_recent_context_view().refresh_tasks(cursor, assigned_tasks)
+        enqueue_rag_sources("task", assigned_tasks)
 
         # Update in-memory state (main.py:1126-1133)
         g.active_agents[new_agent_token] = {
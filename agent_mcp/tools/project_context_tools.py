@@ -13,6 +13,8 @@ from ..core.auth import get_agent_id, verify_token
 from ..utils.audit_utils import log_audit
 from ..db.connection import get_db_connection, execute_db_write
 from ..db.actions.agent_actions_db import log_agent_action_to_db
+from ..features.rag.index_queue import enqueue_rag_sources
+from ..features.rag.recent_context import get_recent_context_view
 
 
 def _analyze_context_health(context_entries: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -486,6 +488,8 @@ async def _handle_single_context_update(
                 details={"context_key": context_key_to_update, "action": "set/update"},
             )
             conn.commit()
+            get_recent_context_view().refresh_contexts(cursor, [context_key_to_update])
+            enqueue_rag_sources("context", [context_key_to_update])
 
             logger.info(
                 f"Project context for key '{context_key_to_update}' updated by '{requesting_agent_id}'."
@@ -551,6 +555,7 @@ async def _handle_bulk_context_update(
         conn = None
         results = []
         failed_updates = []
+        updated_keys: List[str] = []
 
         try:
             conn = get_db_connection()
@@ -585,6 +590,7 @@ async def _handle_bulk_context_update(
                     )
 
                     results.append(f"✓ Updated '{context_key}'")
+                    updated_keys.append(context_key)
 
                     # Log individual action
                     log_agent_action_to_db(
@@ -607,6 +613,8 @@ async def _handle_bulk_context_update(
                     )
 
             conn.commit()
+            get_recent_context_view().refresh_contexts(cursor, updated_keys)
+            enqueue_rag_sources("context", updated_keys)
 
             # Build response
             response_parts = [
@@ -761,6 +769,7 @@ async def bulk_update_project_context_tool_impl(
     conn = None
     results = []
     failed_updates = []
+    updated_keys: List[str] = []
 
     try:
         conn = get_db_connection()
@@ -793,6 +802,7 @@ async def bulk_update_project_context_tool_impl(
                 )
 
                 results.append(f"✓ Updated '{context_key}'")
+                updated_keys.append(context_key)
 
                 # Log individual action
                 log_agent_action_to_db(
@@ -815,6 +825,8 @@ async def bulk_update_project_context_tool_impl(
                 )
 
         conn.commit()
+        get_recent_context_view().refresh_contexts(cursor, updated_keys)
+        enqueue_rag_sources("context", updated_keys)
 
         # Build response
         response_parts = [
@@ -1453,6 +1465,10 @@ async def delete_project_context_tool_impl(
         )
 
         conn.commit()
+        get_recent_context_view().refresh_contexts(
+            cursor, [d["key"] for d in deletion_details]
+        )
+        enqueue_rag_sources("context", [d["key"] for d in deletion_details])
 
         # Prepare response
         response_parts = [
@@ -1,15 +1,83 @@
 # Agent-MCP/mcp_template/mcp_server_src/tools/rag_tools.py
-from typing import List, Dict, Any
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
 
 import mcp.types as mcp_types # Assuming this is your mcp.types path
 
 from .registry import register_tool
-from ..core.config import logger
+from ..core.config import logger, RAG_BATCH_MAX_QUESTIONS, RAG_STREAM_ANSWERS
 # No direct use of g (globals) here, auth and RAG core logic handle that.
 from ..core.auth import get_agent_id # Corrected
 from ..utils.audit_utils import log_audit # Corrected
 # Import the core RAG querying logic
-from ..features.rag.query import query_rag_system # Corrected
+from ..features.rag.query import query_rag_system, query_rag_system_batch, stream_rag_answer, CHUNK_FILTER_KEYS # Corrected
+
+# Request context of the MCP call being handled (used for progress notifications)
+try:
+    from mcp.server.lowlevel.server import request_ctx as mcp_request_ctx
+except ImportError:  # SDK without a module-level request context
+    mcp_request_ctx = None
+
+
+def _get_progress_notifier() -> Optional[Callable[[float, str], Awaitable[None]]]:
+    """
+    Returns a coroutine function sending MCP progress notifications for the
+    current tool call, or None if the client did not ask for progress (no
+    progressToken) or the call did not come through an MCP session.
+    """
+    if mcp_request_ctx is None:
+        return None
+    try:
+        ctx = mcp_request_ctx.get()
+    except LookupError:
+        return None
+    progress_token = getattr(ctx.meta, "progressToken", None) if ctx.meta else None
+    if progress_token is None:
+        return None
+
+    async def notify(progress: float, message: str) -> None:
+        await ctx.session.send_progress_notification(
+            progress_token, progress, message=message, related_request_id=ctx.request_id
+        )
+
+    return notify
+
+
+async def _stream_rag_answer_as_progress(
+    query_text: str,
+    filters: Dict[str, Any],
+    notify: Optional[Callable[[float, str], Awaitable[None]]],
+) -> str:
+    """
+    Runs a streamed RAG query, forwarding each answer delta as a progress
+    notification (progress = characters generated so far). Returns the full answer.
+    """
+    answer = ""
+    generated_chars = 0
+    async for event in stream_rag_answer(query_text, filters=filters):
+        if event["type"] == "delta":
+            generated_chars += len(event["text"])
+            if notify is not None:
+                try:
+                    await notify(generated_chars, event["text"])
+                except Exception as e:
+                    # Keep generating; the final result still carries the full answer
+                    logger.warning(f"RAG Query: Progress notification failed, no longer streaming: {e}")
+                    notify = None
+        else:
+            answer = event["answer"]
+    return answer
+
+
+def _parse_chunk_filters(arguments: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Collects the vector search filter arguments. Returns (filters, error message)."""
+    filters = {key: arguments.get(key) for key in CHUNK_FILTER_KEYS if arguments.get(key)}
+    for key, value in filters.items():
+        if key == "source_type" and isinstance(value, list) and all(isinstance(v, str) for v in value):
+            continue
+        if not isinstance(value, str):
+            return filters, f"Error: {key} must be a string."
+    return filters, None
+
 
 # --- ask_project_rag tool ---
 # Original logic for the tool part from main.py: lines 1572-1578 (ask_project_rag_tool function shell)
@@ -17,6 +85,9 @@ from ..features.rag.query import query_rag_system # Corrected
 async def ask_project_rag_tool_impl(arguments: Dict[str, Any]) -> List[mcp_types.TextContent]:
     agent_auth_token = arguments.get("token")
     query_text = arguments.get("query")
+    retrieval_only = arguments.get("retrieval_only", False)
+    max_tokens = arguments.get("max_tokens")
+    filters, filter_error = _parse_chunk_filters(arguments)
 
     requesting_agent_id = get_agent_id(agent_auth_token) # main.py:1575
     if not requesting_agent_id:
@@ -25,15 +96,30 @@ async def ask_project_rag_tool_impl(arguments: Dict[str, Any]) -> List[mcp_types
     if not query_text or not isinstance(query_text, str):
         return [mcp_types.TextContent(type="text", text="Error: query text is required and must be a string.")]
 
+    if not isinstance(retrieval_only, bool):
+        return [mcp_types.TextContent(type="text", text="Error: retrieval_only must be a boolean.")]
+    if max_tokens is not None and (not isinstance(max_tokens, int) or isinstance(max_tokens, bool) or max_tokens <= 0):
+        return [mcp_types.TextContent(type="text", text="Error: max_tokens must be a positive integer.")]
+    if filter_error:
+        return [mcp_types.TextContent(type="text", text=filter_error)]
+
     # Log audit (main.py:1578)
-    log_audit(requesting_agent_id, "ask_project_rag", {"query": query_text})
+    log_audit(requesting_agent_id, "ask_project_rag", {"query": query_text, "retrieval_only": retrieval_only, "filters": filters})
     
     logger.info(f"Agent '{requesting_agent_id}' is asking project RAG: '{query_text[:100]}...'")
 
     try:
-        # Call the core RAG system function from features/rag/query.py
-        # This function (query_rag_system) handles all the complex RAG logic.
-        answer_text = await query_rag_system(query_text)
+        # SSE clients that send a progress token get the answer streamed as
+        # progress notifications; everyone gets the consolidated answer below.
+        notify = _get_progress_notifier() if RAG_STREAM_ANSWERS and not retrieval_only else None
+        if notify:
+            answer_text = await _stream_rag_answer_as_progress(query_text, filters, notify)
+        else:
+            # Call the core RAG system function from features/rag/query.py
+            # This function (query_rag_system) handles all the complex RAG logic.
+            answer_text = await query_rag_system(
+                query_text, retrieval_only=retrieval_only, max_tokens=max_tokens, filters=filters
+            )
         
         # The query_rag_system already handles internal errors and returns a string.
         return [mcp_types.TextContent(type="text", text=answer_text)]
@@ -45,16 +131,69 @@ async def ask_project_rag_tool_impl(arguments: Dict[str, Any]) -> List[mcp_types
         return [mcp_types.TextContent(type="text", text=f"An unexpected error occurred while processing your RAG query: {str(e)}")]
 
 
+# --- ask_project_rag_batch tool ---
+async def ask_project_rag_batch_tool_impl(arguments: Dict[str, Any]) -> List[mcp_types.TextContent]:
+    agent_auth_token = arguments.get("token")
+    queries = arguments.get("queries")
+
+    requesting_agent_id = get_agent_id(agent_auth_token)
+    if not requesting_agent_id:
+        return [mcp_types.TextContent(type="text", text="Unauthorized: Valid agent token required")]
+
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+        return [mcp_types.TextContent(type="text", text="Error: queries must be a non-empty list of question strings.")]
+    if len(queries) > RAG_BATCH_MAX_QUESTIONS:
+        return [mcp_types.TextContent(type="text", text=f"Error: at most {RAG_BATCH_MAX_QUESTIONS} queries per batch.")]
+
+    filters, filter_error = _parse_chunk_filters(arguments)
+    if filter_error:
+        return [mcp_types.TextContent(type="text", text=filter_error)]
+
+    log_audit(requesting_agent_id, "ask_project_rag_batch", {"queries": queries, "filters": filters})
+    logger.info(f"Agent '{requesting_agent_id}' is asking project RAG a batch of {len(queries)} questions.")
+
+    try:
+        results = await query_rag_system_batch(queries, filters=filters)
+        return [
+            mcp_types.TextContent(
+                type="text",
+                text=f"Question {i}: {result['query']}\n\n{result['answer']}"
+            )
+            for i, result in enumerate(results, start=1)
+        ]
+    except Exception as e:
+        logger.error(f"Unexpected error in ask_project_rag_batch_tool_impl for agent '{requesting_agent_id}': {e}", exc_info=True)
+        return [mcp_types.TextContent(type="text", text=f"An unexpected error occurred while processing your RAG queries: {str(e)}")]
+
+
+# Filter properties shared by the RAG tool schemas
+CHUNK_FILTER_SCHEMA_PROPERTIES = {
+    "source_type": {
+        "oneOf": [
+            {"type": "string"},
+            {"type": "array", "items": {"type": "string"}}
+        ],
+        "description": "Only search chunks of this source type (e.g. 'code', 'code_summary', 'markdown', 'context', 'task')."
+    },
+    "path_prefix": {"type": "string", "description": "Only search chunks whose source reference starts with this prefix (e.g. 'src/payments/')."},
+    "language": {"type": "string", "description": "Only search code chunks in this language family (e.g. 'python', 'javascript')."},
+    "entity_type": {"type": "string", "description": "Only search code chunks containing this entity type (e.g. 'function', 'class', 'method', 'component')."}
+}
+
+
 # --- Register RAG tools ---
 def register_rag_tools():
     register_tool(
         name="ask_project_rag", # main.py:1869 (schema name)
-        description="Ask a natural language question about the project. The system uses RAG (Retrieval Augmented Generation) to find relevant information from indexed documentation, context, and metadata to synthesize an answer.",
+        description="Ask a natural language question about the project. The system uses RAG (Retrieval Augmented Generation) to find relevant information from indexed documentation, context, and metadata to synthesize an answer. Set retrieval_only to skip answer synthesis and get the ranked source chunks back as JSON. If the request carries a progress token, answer text is streamed as progress notifications before the final result.",
         input_schema={ # From main.py:1870-1881
             "type": "object",
             "properties": {
                 "token": {"type": "string", "description": "Authentication token for the agent making the query."},
-                "query": {"type": "string", "description": "The natural language question to ask about the project."}
+                "query": {"type": "string", "description": "The natural language question to ask about the project."},
+                "retrieval_only": {"type": "boolean", "description": "Return ranked chunks (source_type, source_ref, metadata, distance) without LLM synthesis. Much faster.", "default": False},
+                "max_tokens": {"type": "integer", "description": "Approximate token cap for retrieval_only results (default: RAG_RETRIEVAL_MAX_TOKENS).", "minimum": 1},
+                **CHUNK_FILTER_SCHEMA_PROPERTIES
             },
             "required": ["token", "query"],
             "additionalProperties": False
@@ -62,5 +201,27 @@ def register_rag_tools():
         implementation=ask_project_rag_tool_impl
     )
 
+    register_tool(
+        name="ask_project_rag_batch",
+        description="Ask several natural language questions about the project in one call. Questions are embedded together, searched on one database connection and answered concurrently; one answer is returned per question, in order. Prefer this over repeated ask_project_rag calls when decomposing work.",
+        input_schema={
+            "type": "object",
+            "properties": {
+                "token": {"type": "string", "description": "Authentication token for the agent making the queries."},
+                "queries": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "minItems": 1,
+                    "maxItems": RAG_BATCH_MAX_QUESTIONS,
+                    "description": "The natural language questions to ask about the project."
+                },
+                **CHUNK_FILTER_SCHEMA_PROPERTIES
+            },
+            "required": ["token", "queries"],
+            "additionalProperties": False
+        },
+        implementation=ask_project_rag_batch_tool_impl
+    )
+
 # Call registration when this module is imported
 register_rag_tools()
\ No newline at end of file
@@ -1,11 +1,15 @@
 # Agent-MCP/mcp_template/mcp_server_src/tools/task_tools.py
+import base64
 import json
 import datetime
 import secrets  # For task_id generation
 import os  # For request_assistance (notifications path)
 import sqlite3  # For database operations
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path  # For request_assistance
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
 import mcp.types as mcp_types
 
@@ -13,6 +17,8 @@ from .registry import register_tool
 from ..core.config import logger, ENABLE_TASK_PLACEMENT_RAG, ALLOW_RAG_OVERRIDE
 from ..core import globals as g
 from ..core.auth import verify_token, get_agent_id
+from ..core.task_store import TaskStore, SORT_ORDERS as TASK_SORT_ORDERS
+from ..core.task_scheduler import next_ready_tasks
 from ..utils.audit_utils import log_audit
 from ..db.connection import get_db_connection, execute_db_write
 from ..db.actions.agent_actions_db import log_agent_action_to_db
@@ -22,7 +28,21 @@ from ..features.task_placement.suggestions import (
     format_override_reason,
     should_escalate_to_admin,
 )
-from ..features.rag.indexing import index_task_data
+from ..features.rag.index_queue import enqueue_rag_sources
+from ..features.rag.recent_context import get_recent_context_view
+from ..db.actions.task_notes_db import (
+    RECENT_TASK_NOTES,
+    add_task_note,
+    add_task_notes,
+    cached_notes_fields,
+    get_task_notes,
+    get_task_notes_text,
+)
+from ..db.actions.task_search_db import (
+    build_task_match_query,
+    parse_task_search_query,
+    search_tasks_fts,
+)
 
 # For request_assistance, generate_id was used. Let's use secrets.token_hex for consistency.
 # from main.py:1191 (generate_id - not present, assuming secrets.token_hex was intended)
@@ -40,21 +60,119 @@ from ..utils.tmux_utils import (
 from ..utils.prompt_templates import build_agent_prompt
 
 
-def estimate_tokens(text: str) -> int:
-    """Accurate token estimation using tiktoken for GPT-4"""
+@lru_cache(maxsize=1)
+def _get_token_encoding():
+    """The GPT-4 tiktoken encoding, loaded once per process (None if unavailable)."""
     try:
         import tiktoken
 
-        encoding = tiktoken.encoding_for_model("gpt-4")
-        return len(encoding.encode(text))
+        return tiktoken.encoding_for_model("gpt-4")
     except ImportError:
+        return None
+    except Exception as e:
+        # e.g. the encoding file cannot be downloaded on an offline machine
+        logger.warning(f"Could not load tiktoken encoding, estimating task tokens: {e}")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Accurate token estimation using tiktoken for GPT-4"""
+    encoding = _get_token_encoding()
+    if encoding is None:
         # Fallback to rough estimation if tiktoken not available
         return len(text) // 4
+    try:
+        return len(encoding.encode(text))
     except Exception:
         # Fallback for any other tiktoken errors
         return len(text) // 4
 
 
+# (task_id, render mode) -> (task revision, dependency structure version, text, tokens)
+_rendered_task_cache: "OrderedDict[Tuple[str, str], Tuple[int, int, str, int]]" = (
+    OrderedDict()
+)
+RENDERED_TASK_CACHE_SIZE = 20000
+
+
+def _render_task_for_listing(
+    task: Dict[str, Any], mode: str, notes_limit: int = RECENT_TASK_NOTES
+) -> Tuple[str, int]:
+    """
+    Renders a task for view_tasks ('dependencies', 'summary' or 'detailed')
+    and returns (text, token count). Memoized per task until the task (or,
+    for 'dependencies', any status or dependency) changes in g.tasks; only
+    renders with the default number of notes are memoized.
+    """
+    task_id = task.get("task_id")
+    memoize = task_id and notes_limit == RECENT_TASK_NOTES
+    revision = g.tasks.revision(task_id) if memoize else 0
+    structure_version = g.tasks.structure_version if mode == "dependencies" else 0
+    key = (task_id, mode)
+    cached = _rendered_task_cache.get(key) if revision else None
+    if cached and cached[0] == revision and cached[1] == structure_version:
+        _rendered_task_cache.move_to_end(key)
+        return cached[2], cached[3]
+
+    if mode == "dependencies":
+        text = _format_task_with_dependencies(task, notes_limit)
+    elif mode == "summary":
+        text = _format_task_summary(task)
+    else:
+        text = _format_task_detailed(task, notes_limit)
+    tokens = estimate_tokens(text)
+
+    if revision:
+        _rendered_task_cache[key] = (revision, structure_version, text, tokens)
+        _rendered_task_cache.move_to_end(key)
+        if len(_rendered_task_cache) > RENDERED_TASK_CACHE_SIZE:
+            _rendered_task_cache.popitem(last=False)
+    return text, tokens
+
+
+def _encode_task_cursor(sort_by: str, after_key: Tuple) -> str:
+    """Opaque view_tasks continuation cursor: sort order + sort key of the last task shown."""
+    payload = json.dumps({"sort_by": sort_by, "after": list(after_key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_task_cursor(cursor: str) -> Tuple[str, Tuple]:
+    """Returns (sort_by, sort key to continue after); ValueError if the cursor is invalid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        sort_by = payload["sort_by"]
+        after_key = tuple(payload["after"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor; use the cursor returned by view_tasks.") from e
+    # Same shape as the store's sort keys, so comparisons cannot fail
+    expected_types = {
+        "created_at": (str, str),
+        "updated_at": (str, str, str),
+        "priority": (int, str, str),
+        "status": (int, str, str),
+    }.get(sort_by)
+    if expected_types is None or len(after_key) != len(expected_types) or not all(
+        isinstance(value, value_type) for value, value_type in zip(after_key, expected_types)
+    ):
+        raise ValueError("Invalid cursor; use the cursor returned by view_tasks.")
+    return sort_by, after_key
+
+
+def _fit_to_token_budget(token_counts: Iterable[int], budget: int) -> int:
+    """
+    Number of leading items whose running token total (prefix sum) stays
+    within `budget`; at least 1 if there are any items. Stops consuming
+    `token_counts` after the first item that does not fit.
+    """
+    included = 0
+    for running_total in accumulate(token_counts):
+        if running_total > budget and included > 0:
+            break
+        included += 1
+    return included
+
+
 def _generate_task_id() -> str:
     """Generates a unique task ID."""
     return f"task_{secrets.token_hex(6)}"
@@ -401,18 +519,14 @@ async def _update_single_task(
     update_fields_sql = ["status = ?", "updated_at = ?"]
     update_params = [new_status, updated_at_iso]
 
-    # Handle notes
-    current_notes_list = json.loads(task_current_data.get("notes") or "[]")
+    # Handle notes (appended to task_notes, the task row is not rewritten)
+    new_notes = []
     if notes_content:
-        current_notes_list.append(
-            {
-                "timestamp": updated_at_iso,
-                "author": requesting_agent_id,
-                "content": notes_content,
-            }
+        new_notes.append(
+            add_task_note(
+                cursor, task_id, requesting_agent_id, notes_content, updated_at_iso
+            )
         )
-    update_fields_sql.append("notes = ?")
-    update_params.append(json.dumps(current_notes_list))
 
     # Admin-only field updates
     if is_admin_request:
@@ -440,7 +554,6 @@ async def _update_single_task(
         allowed_field_patterns = [
             "status = ?",
             "updated_at = ?",
-            "notes = ?",
             "title = ?",
             "description = ?",
             "priority = ?",
@@ -464,50 +577,55 @@ async def _update_single_task(
 
     # Update in-memory cache
     if task_id in g.tasks:
-        g.tasks[task_id]["status"] = new_status
-        g.tasks[task_id]["updated_at"] = updated_at_iso
-        g.tasks[task_id]["notes"] = current_notes_list
+        cache_fields = {
+            "status": new_status,
+            "updated_at": updated_at_iso,
+            **cached_notes_fields(g.tasks.get(task_id), new_notes),
+        }
         if is_admin_request:
             if new_title is not None:
-                g.tasks[task_id]["title"] = new_title
+                cache_fields["title"] = new_title
             if new_description is not None:
-                g.tasks[task_id]["description"] = new_description
+                cache_fields["description"] = new_description
             if new_priority is not None:
-                g.tasks[task_id]["priority"] = new_priority
+                cache_fields["priority"] = new_priority
             if new_assigned_to is not None:
-                g.tasks[task_id]["assigned_to"] = new_assigned_to
+                cache_fields["assigned_to"] = new_assigned_to
             if new_depends_on_tasks is not None:
-                g.tasks[task_id]["depends_on_tasks"] = new_depends_on_tasks
+                cache_fields["depends_on_tasks"] = new_depends_on_tasks
+        g.tasks.update_fields(task_id, cache_fields)
 
     # Handle parent task notifications
     if new_status in ["completed", "cancelled", "failed"] and task_current_data.get(
         "parent_task"
     ):
         parent_task_id = task_current_data["parent_task"]
-        cursor.execute("SELECT notes FROM tasks WHERE task_id = ?", (parent_task_id,))
-        parent_row = cursor.fetchone()
-        if parent_row:
-            parent_notes_list = json.loads(parent_row["notes"] or "[]")
-            parent_notes_list.append(
-                {
-                    "timestamp": updated_at_iso,
-                    "author": "system",
-                    "content": f"Subtask '{task_id}' ({task_current_data.get('title', '')}) status changed to: {new_status}",
-                }
+        cursor.execute(
+            "UPDATE tasks SET updated_at = ? WHERE task_id = ?",
+            (updated_at_iso, parent_task_id),
+        )
+        if cursor.rowcount:
+            parent_note = add_task_note(
+                cursor,
+                parent_task_id,
+                "system",
+                f"Subtask '{task_id}' ({task_current_data.get('title', '')}) status changed to: {new_status}",
+                updated_at_iso,
             )
-            cursor.execute(
-                "UPDATE tasks SET notes = ?, updated_at = ? WHERE task_id = ?",
-                (json.dumps(parent_notes_list), updated_at_iso, parent_task_id),
+            g.tasks.update_fields(
+                parent_task_id,
+                {
+                    "updated_at": updated_at_iso,
+                    **cached_notes_fields(g.tasks.get(parent_task_id), [parent_note]),
+                },
             )
-            if parent_task_id in g.tasks:
-                g.tasks[parent_task_id]["notes"] = parent_notes_list
-                g.tasks[parent_task_id]["updated_at"] = updated_at_iso
 
     return {
         "success": True,
         "task_id": task_id,
         "old_status": task_current_data.get("status"),
         "new_status": new_status,
+        "parent_task": task_current_data.get("parent_task"),
         "child_tasks": json.loads(task_current_data.get("child_tasks") or "[]"),
         "depends_on_tasks": json.loads(
             task_current_data.get("depends_on_tasks") or "[]"
@@ -516,18 +634,12 @@ async def _update_single_task(
 
 
 def _analyze_task_dependencies(
-    task: Dict[str, Any], all_tasks: Dict[str, Dict[str, Any]]
+    task: Dict[str, Any], all_tasks: TaskStore
 ) -> Dict[str, Any]:
-    """Analyze task dependencies and blocking conditions"""
+    """Analyze task dependencies and blocking conditions (dependency graph lookups)"""
     task_id = task.get("task_id")
     status = task.get("status")
-    depends_on = task.get("depends_on_tasks", [])
-
-    if isinstance(depends_on, str):
-        try:
-            depends_on = json.loads(depends_on)
-        except:
-            depends_on = []
+    depends_on = all_tasks.dependencies_of(task_id)
 
     analysis = {
         "is_blocked": False,
@@ -561,16 +673,7 @@ def _analyze_task_dependencies(
             analysis["can_start"] = False
 
     # Find tasks that depend on this one
-    for other_id, other_task in all_tasks.items():
-        other_deps = other_task.get("depends_on_tasks", [])
-        if isinstance(other_deps, str):
-            try:
-                other_deps = json.loads(other_deps)
-            except:
-                other_deps = []
-
-        if task_id in other_deps:
-            analysis["blocks_tasks"].append(other_id)
+    analysis["blocks_tasks"] = all_tasks.dependents_of(task_id)
 
     # Determine health
     if analysis["missing_dependencies"]:
@@ -583,52 +686,20 @@ def _analyze_task_dependencies(
     return analysis
 
 
-def _calculate_task_health_metrics(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Calculate overall task health metrics"""
-    if not tasks:
-        return {"total": 0, "status": "no_data"}
+# Unfinished tasks without an update for longer than this count as stale
+STALE_TASK_DAYS = 7
 
-    total = len(tasks)
-    status_counts = {}
-    priority_counts = {}
-    blocked_count = 0
-    overdue_count = 0
-    stale_count = 0
 
-    current_time = datetime.datetime.now()
-
-    for task in tasks:
-        # Status distribution
-        status = task.get("status", "unknown")
-        status_counts[status] = status_counts.get(status, 0) + 1
-
-        # Priority distribution
-        priority = task.get("priority", "medium")
-        priority_counts[priority] = priority_counts.get(priority, 0) + 1
-
-        # Check for blocked tasks (has dependencies but can't proceed)
-        deps = task.get("depends_on_tasks", [])
-        if isinstance(deps, str):
-            try:
-                deps = json.loads(deps)
-            except:
-                deps = []
-
-        if deps and status == "pending":
-            blocked_count += 1
+def _calculate_task_health_metrics(counts: Dict[str, Any]) -> Dict[str, Any]:
+    """Calculate overall task health metrics from TaskStore.health_counts aggregates"""
+    total = counts["total"]
+    if not total:
+        return {"total": 0, "status": "no_data"}
 
-        # Check for stale tasks (no updates in 7+ days)
-        updated_at = task.get("updated_at")
-        if updated_at:
-            try:
-                updated_time = datetime.datetime.fromisoformat(
-                    updated_at.replace("Z", "+00:00").replace("+00:00", "")
-                )
-                days_since_update = (current_time - updated_time).days
-                if days_since_update > 7 and status in ["in_progress", "pending"]:
-                    stale_count += 1
-            except:
-                pass
+    status_counts = counts["status_distribution"]
+    priority_counts = counts["priority_distribution"]
+    blocked_count = counts["blocked"]
+    stale_count = counts["stale"]
 
     # Calculate health score (0-100)
     completed_ratio = status_counts.get("completed", 0) / total
@@ -928,6 +999,13 @@ async def _assign_to_existing_tasks(
             )
 
         conn.commit()
+        # Update the cache (and so the task change feed) only once committed
+        for task_id in task_ids:
+            g.tasks.update_fields(
+                task_id, {"assigned_to": target_agent_id, "updated_at": updated_at}
+            )
+        get_recent_context_view().refresh_tasks(cursor, task_ids)
+        enqueue_rag_sources("task", task_ids)
 
         # Build response
         task_titles = [task["title"] for task in found_tasks]
@@ -982,6 +1060,7 @@ async def _create_and_assign_multiple_tasks(
             ]
 
         created_tasks = []
+        tasks_for_cache: Dict[str, Dict[str, Any]] = {}
         created_at = datetime.datetime.now().isoformat()
 
         # Create each task
@@ -1033,6 +1112,9 @@ async def _create_and_assign_multiple_tasks(
                 },
             )
 
+            task_for_cache = dict(task_data, child_tasks=[], depends_on_tasks=[])
+            task_for_cache.update(cached_notes_fields(None, []))
+            tasks_for_cache[task_id] = task_for_cache
             created_tasks.append(
                 {"task_id": task_id, "title": title, "priority": priority}
             )
@@ -1049,6 +1131,14 @@ async def _create_and_assign_multiple_tasks(
             )
 
         conn.commit()
+        # Cache the new tasks (and so record them in the task change feed)
+        # only once committed
+        for task_id, task_for_cache in tasks_for_cache.items():
+            g.tasks[task_id] = task_for_cache
+        get_recent_context_view().refresh_tasks(
+            cursor, [task["task_id"] for task in created_tasks]
+        )
+        enqueue_rag_sources("task", [task["task_id"] for task in created_tasks])
 
         # Build response
         response_parts = [
@@ -1510,7 +1600,7 @@ async def assign_task_tool_impl(
             "depends_on_tasks": json.dumps(
                 final_depends_on_tasks or []
             ),  # Use validated value
-            "notes": json.dumps(initial_notes),
+            "notes": json.dumps([]),  # Notes live in task_notes
         }
 
         # Save task to database (main.py:1370-1373)
@@ -1523,6 +1613,7 @@ async def assign_task_tool_impl(
         """,
             task_data_for_db,
         )
+        add_task_notes(cursor, [(new_task_id, note) for note in initial_notes])
 
         # Update agent's current task in DB if they don't have one (main.py:1376-1387)
         should_update_agent_current_task = False
@@ -1554,6 +1645,10 @@ async def assign_task_tool_impl(
             details={"agent_id": target_agent_id, "title": task_title},
         )
         conn.commit()
+        get_recent_context_view().refresh_tasks(
+            cursor, [new_task_id, final_parent_task_id]
+        )
+        enqueue_rag_sources("task", [new_task_id, final_parent_task_id])
 
         # Update agent's current task in memory if needed (main.py:1390-1391)
         if (
@@ -1570,18 +1665,9 @@ async def assign_task_tool_impl(
         task_data_for_memory["depends_on_tasks"] = (
             final_depends_on_tasks or []
         )  # Use validated value
-        task_data_for_memory["notes"] = []
+        task_data_for_memory.update(cached_notes_fields(None, initial_notes))
         g.tasks[new_task_id] = task_data_for_memory
 
-        # System 8: Index the new task for RAG
-        # Convert database format to the format expected by indexing
-        index_data = task_data_for_memory.copy()
-        index_data["depends_on_tasks"] = final_depends_on_tasks or []
-        # Start indexing asynchronously (fire and forget)
-        import asyncio
-
-        asyncio.create_task(index_task_data(new_task_id, index_data))
-
         log_audit(
             "admin",
             "assign_task",
@@ -1884,6 +1970,10 @@ async def create_self_task_tool_impl(
             details={"title": task_title},
         )
         conn.commit()
+        get_recent_context_view().refresh_tasks(
+            cursor, [new_task_id, final_parent_task_id]
+        )
+        enqueue_rag_sources("task", [new_task_id, final_parent_task_id])
 
         if should_update_agent_current_task and agent_auth_token in g.active_agents:
             g.active_agents[agent_auth_token]["current_task"] = new_task_id
@@ -1896,15 +1986,6 @@ async def create_self_task_tool_impl(
         task_data_for_memory["notes"] = []
         g.tasks[new_task_id] = task_data_for_memory
 
-        # System 8: Index the new task for RAG
-        # Convert database format to the format expected by indexing
-        index_data = task_data_for_memory.copy()
-        # No need to override depends_on_tasks again, it's already the validated value
-        # Start indexing asynchronously (fire and forget)
-        import asyncio
-
-        asyncio.create_task(index_task_data(new_task_id, index_data))
-
         log_audit(
             requesting_agent_id,
             "create_self_task",
@@ -2086,52 +2167,37 @@ async def update_task_status_tool_impl(
             for result in results:
                 if result["success"] and new_status == "completed":
                     # Find tasks that depend on this completed task
-                    cursor.execute("SELECT task_id, depends_on_tasks FROM tasks")
-                    all_tasks = cursor.fetchall()
-
-                    for task_row in all_tasks:
-                        task_deps = json.loads(task_row["depends_on_tasks"] or "[]")
-                        if result["task_id"] in task_deps:
-                            # Check if all dependencies are now completed
-                            all_deps_completed = True
-                            for dep_id in task_deps:
-                                if (
-                                    dep_id != result["task_id"]
-                                ):  # Skip the one we just completed
-                                    cursor.execute(
-                                        "SELECT status FROM tasks WHERE task_id = ?",
-                                        (dep_id,),
-                                    )
-                                    dep_row = cursor.fetchone()
-                                    if not dep_row or dep_row["status"] != "completed":
-                                        all_deps_completed = False
-                                        break
-
-                            if all_deps_completed:
-                                # Auto-update dependent task to in_progress if it's pending
-                                cursor.execute(
-                                    "SELECT status FROM tasks WHERE task_id = ?",
-                                    (task_row["task_id"],),
-                                )
-                                dependent_task = cursor.fetchone()
-                                if (
-                                    dependent_task
-                                    and dependent_task["status"] == "pending"
-                                ):
-                                    dep_result = await _update_single_task(
-                                        cursor,
-                                        task_row["task_id"],
-                                        "in_progress",
-                                        requesting_agent_id,
-                                        is_admin_request,
-                                        f"Auto-advanced: all dependencies completed",
-                                        None,
-                                        None,
-                                        None,
-                                        None,
-                                        None,
-                                    )
-                                    dependency_updates.append(dep_result)
+                    for dependent_id in g.tasks.dependents_of(result["task_id"]):
+                        # Check if all dependencies are now completed
+                        all_deps_completed = all(
+                            dep_id == result["task_id"]  # the one we just completed
+                            or (
+                                dep_id in g.tasks
+                                and g.tasks[dep_id].get("status") == "completed"
+                            )
+                            for dep_id in g.tasks.dependencies_of(dependent_id)
+                        )
+
+                        # Auto-update dependent task to in_progress if it's pending
+                        if (
+                            all_deps_completed
+                            and dependent_id in g.tasks
+                            and g.tasks[dependent_id].get("status") == "pending"
+                        ):
+                            dep_result = await _update_single_task(
+                                cursor,
+                                dependent_id,
+                                "in_progress",
+                                requesting_agent_id,
+                                is_admin_request,
+                                f"Auto-advanced: all dependencies completed",
+                                None,
+                                None,
+                                None,
+                                None,
+                                None,
+                            )
+                            dependency_updates.append(dep_result)
 
         # Phase 3.5: Auto-launch testing agents for completed tasks
         testing_agent_launches = []
@@ -2164,17 +2230,14 @@ async def update_task_status_tool_impl(
 
         # Commit all changes
         conn.commit()
-
-        # Phase 4: Re-index updated tasks
-        import asyncio
-
-        for result in results + cascade_results + dependency_updates:
-            if result.get("success"):
-                task_id = result["task_id"]
-                if task_id in g.tasks:
-                    asyncio.create_task(
-                        index_task_data(task_id, g.tasks[task_id].copy())
-                    )
+        touched_task_ids = [
+            task_id
+            for result in results + cascade_results + dependency_updates
+            if result.get("success")
+            for task_id in (result["task_id"], result.get("parent_task"))
+        ]
+        get_recent_context_view().refresh_tasks(cursor, touched_task_ids)
+        enqueue_rag_sources("task", touched_task_ids)
 
         # Build comprehensive response
         successful_updates = [r for r in results if r.get("success")]
@@ -2272,6 +2335,7 @@ async def view_tasks_tool_impl(
     start_after = arguments.get(
         "start_after"
     )  # Task ID to start after (for pagination)
+    cursor = arguments.get("cursor")  # Continuation cursor from a previous page
     summary_mode = arguments.get(
         "summary_mode", False
     )  # If True, show only summary info
@@ -2291,6 +2355,12 @@ async def view_tasks_tool_impl(
     sort_by = arguments.get(
         "sort_by", "created_at"
     )  # Sort by: created_at, updated_at, priority, status
+    notes_limit = arguments.get(
+        "notes_limit", RECENT_TASK_NOTES
+    )  # Most recent notes shown per task
+    if not isinstance(notes_limit, int) or notes_limit < 0:
+        notes_limit = RECENT_TASK_NOTES
+    notes_limit = min(notes_limit, 100)
 
     requesting_agent_id = get_agent_id(agent_auth_token)
     if not requesting_agent_id:
@@ -2315,193 +2385,188 @@ async def view_tasks_tool_impl(
                 )
             ]
 
-    # Advanced filtering with dependency analysis
-    tasks_to_display: List[Dict[str, Any]] = []
-
-    # Pre-analyze all tasks for dependency checking
-    all_tasks_dict = dict(g.tasks)
+    # Keyset pagination: a cursor (or the start_after task) gives the sort key
+    # to continue after, and only the tasks of the requested page are formatted
+    if sort_by not in TASK_SORT_ORDERS:
+        sort_by = "created_at"
+    after_key = None
+    if cursor:
+        try:
+            sort_by, after_key = _decode_task_cursor(cursor)
+        except ValueError as e:
+            return [mcp_types.TextContent(type="text", text=f"Error: {e}")]
+    elif start_after:
+        after_key = g.tasks.sort_key(sort_by, start_after)
+
+    # Agent / status / priority / parent filters come from the g.tasks indexes
+    task_filters = {
+        "assigned_to": target_agent_id_for_filter or None,
+        "status": filter_status or None,
+        "priority": filter_priority or None,
+        "parent_task": filter_parent_task or None,
+    }
 
-    for task_id, task_data in g.tasks.items():
-        # Basic permission filtering
-        matches_agent = True
-        if (
-            target_agent_id_for_filter
-            and task_data.get("assigned_to") != target_agent_id_for_filter
-        ):
-            matches_agent = False
-
-        # Status filtering
-        matches_status = True
-        if filter_status and task_data.get("status") != filter_status:
-            matches_status = False
-
-        # Priority filtering
-        matches_priority = True
-        if filter_priority and task_data.get("priority") != filter_priority:
-            matches_priority = False
-
-        # Parent task filtering
-        matches_parent = True
-        if filter_parent_task and task_data.get("parent_task") != filter_parent_task:
-            matches_parent = False
-
-        # Blocked tasks filtering
-        matches_blocked = True
-        if show_blocked_tasks:
-            dependency_analysis = _analyze_task_dependencies(task_data, all_tasks_dict)
-            matches_blocked = (
-                dependency_analysis["is_blocked"]
-                or not dependency_analysis["can_start"]
+    def matching_tasks(after: Optional[Tuple] = None):
+        for task_data in g.tasks.iter_sorted(sort_by, after=after, **task_filters):
+            # Blocked tasks filtering
+            if show_blocked_tasks:
+                dependency_analysis = _analyze_task_dependencies(task_data, g.tasks)
+                if not (
+                    dependency_analysis["is_blocked"]
+                    or not dependency_analysis["can_start"]
+                ):
+                    continue
+            yield task_data
+
+    # Generate health analysis if requested (over all matching tasks)
+    health_analysis = None
+    if show_health_analysis:
+        # Aggregates come from the g.tasks indexes; only the (unindexed)
+        # blocked filter needs the matching ids
+        stale_before = datetime.datetime.now() - datetime.timedelta(
+            days=STALE_TASK_DAYS + 1
+        )
+        health_analysis = _calculate_task_health_metrics(
+            g.tasks.health_counts(
+                stale_before,
+                task_ids=(
+                    [task["task_id"] for task in matching_tasks()]
+                    if show_blocked_tasks
+                    else None
+                ),
+                **task_filters,
             )
+        )
 
-        if (
-            matches_agent
-            and matches_status
-            and matches_priority
-            and matches_parent
-            and matches_blocked
-        ):
-            # Add dependency analysis if requested
-            if show_dependencies:
-                task_data_copy = task_data.copy()
-                task_data_copy["_dependency_analysis"] = _analyze_task_dependencies(
-                    task_data, all_tasks_dict
-                )
-                tasks_to_display.append(task_data_copy)
-            else:
-                tasks_to_display.append(task_data)
-
-    # Smart sorting
-    def get_sort_key(task):
-        if sort_by == "priority":
-            priority_order = {"high": 3, "medium": 2, "low": 1}
-            return priority_order.get(task.get("priority", "medium"), 2)
-        elif sort_by == "status":
-            status_order = {
-                "failed": 5,
-                "in_progress": 4,
-                "pending": 3,
-                "completed": 2,
-                "cancelled": 1,
-            }
-            return status_order.get(task.get("status", "pending"), 3)
-        elif sort_by == "updated_at":
-            return task.get("updated_at", "")
-        else:  # created_at (default)
-            return task.get("created_at", "")
-
-    reverse_sort = sort_by in ["created_at", "updated_at", "priority", "status"]
-    tasks_to_display.sort(key=get_sort_key, reverse=reverse_sort)
-
-    # Handle pagination with start_after
-    if start_after:
-        start_index = 0
-        for i, task in enumerate(tasks_to_display):
-            if task.get("task_id") == start_after:
-                start_index = i + 1
-                break
-        tasks_to_display = tasks_to_display[start_index:]
-
-    if not tasks_to_display:
-        response_text = "No tasks found matching the criteria."
-    else:
-        # Generate health analysis if requested
-        health_analysis = None
-        if show_health_analysis:
-            health_analysis = _calculate_task_health_metrics(tasks_to_display)
-
-        # Build response with smart headers
-        filter_info = []
-        if filter_status:
-            filter_info.append(f"status={filter_status}")
-        if filter_priority:
-            filter_info.append(f"priority={filter_priority}")
-        if filter_agent_id:
-            filter_info.append(f"agent={filter_agent_id}")
-        if filter_parent_task:
-            filter_info.append(f"parent={filter_parent_task}")
-        if show_blocked_tasks:
-            filter_info.append("blocked_only=true")
-
-        header = f"Tasks ({len(tasks_to_display)} found"
-        if filter_info:
-            header += f", filtered by: {', '.join(filter_info)}"
-        header += f", sorted by: {sort_by})"
-
-        response_parts = [header + "\n"]
-
-        # Add health analysis at the top if requested
-        if health_analysis:
-            health_status = health_analysis["health_status"]
-            health_score = health_analysis["health_score"]
-
-            health_icon = (
-                "🟢"
-                if health_status == "excellent"
-                else (
-                    "🟡"
-                    if health_status == "good"
-                    else "🟠" if health_status == "needs_attention" else "🔴"
-                )
-            )
+    # Build response with smart headers
+    filter_info = []
+    if filter_status:
+        filter_info.append(f"status={filter_status}")
+    if filter_priority:
+        filter_info.append(f"priority={filter_priority}")
+    if filter_agent_id:
+        filter_info.append(f"agent={filter_agent_id}")
+    if filter_parent_task:
+        filter_info.append(f"parent={filter_parent_task}")
+    if show_blocked_tasks:
+        filter_info.append("blocked_only=true")
+
+    # The blocked filter is not indexed, so only count without it
+    total_matching = None if show_blocked_tasks else g.tasks.count_matching(**task_filters)
+    header_info = [] if total_matching is None else [f"{total_matching} found"]
+    if filter_info:
+        header_info.append(f"filtered by: {', '.join(filter_info)}")
+    header_info.append(f"sorted by: {sort_by}")
+    header = f"Tasks ({', '.join(header_info)})"
+
+    response_parts = [header + "\n"]
+
+    # Add health analysis at the top if requested
+    if health_analysis and health_analysis.get("total"):
+        health_status = health_analysis["health_status"]
+        health_score = health_analysis["health_score"]
 
-            response_parts.append(
-                f"📊 **Health Analysis:** {health_icon} {health_status.title()} ({health_score}/100)"
-            )
-            response_parts.append(
-                f"   Status: {health_analysis['status_distribution']}"
-            )
-            response_parts.append(
-                f"   Issues: {health_analysis['blocked_tasks']} blocked, {health_analysis['stale_tasks']} stale"
+        health_icon = (
+            "🟢"
+            if health_status == "excellent"
+            else (
+                "🟡"
+                if health_status == "good"
+                else "🟠" if health_status == "needs_attention" else "🔴"
             )
-            response_parts.append("")
+        )
 
-        current_tokens = estimate_tokens("\n".join(response_parts))
-        tasks_included = 0
-        last_task_id = None
-        truncated = False
-
-        for task in tasks_to_display:
-            # Format task with dependency info if requested
-            if show_dependencies and "_dependency_analysis" in task:
-                task_text = _format_task_with_dependencies(task)
-            elif summary_mode:
-                task_text = _format_task_summary(task)
-            else:
-                task_text = _format_task_detailed(task)
+        response_parts.append(
+            f"📊 **Health Analysis:** {health_icon} {health_status.title()} ({health_score}/100)"
+        )
+        response_parts.append(f"   Status: {health_analysis['status_distribution']}")
+        response_parts.append(
+            f"   Issues: {health_analysis['blocked_tasks']} blocked, {health_analysis['stale_tasks']} stale"
+        )
+        response_parts.append("")
 
-            task_tokens = estimate_tokens(task_text)
+    current_tokens = estimate_tokens("\n".join(response_parts))
 
-            # Check token limit with safety buffer
-            safety_buffer = 1000
+    # Format task with dependency info if requested
+    if show_dependencies:
+        render_mode = "dependencies"
+    elif summary_mode:
+        render_mode = "summary"
+    else:
+        render_mode = "detailed"
+    page_task_ids: List[str] = []
+    rendered_texts: List[str] = []
+    # g.tasks holds the last RECENT_TASK_NOTES notes per task; more are read
+    # from the notes store, only for the tasks that are rendered
+    notes_conn = None
+
+    def rendered_token_counts():
+        nonlocal notes_conn
+        for task_data in matching_tasks(after_key):
             if (
-                current_tokens + task_tokens > (max_tokens - safety_buffer)
-                and tasks_included > 0
+                render_mode != "summary"
+                and notes_limit > RECENT_TASK_NOTES
+                and task_data.get("notes_count", 0) > len(task_data.get("notes") or [])
             ):
-                truncated = True
-                break
+                notes_conn = notes_conn or get_db_connection()
+                task_data = {
+                    **task_data,
+                    "notes": get_task_notes(
+                        notes_conn.cursor(), task_data["task_id"], limit=notes_limit
+                    ),
+                }
+            # Add dependency analysis if requested
+            if show_dependencies:
+                task_data = task_data.copy()
+                task_data["_dependency_analysis"] = _analyze_task_dependencies(
+                    task_data, g.tasks
+                )
+            task_text, task_tokens = _render_task_for_listing(
+                task_data, render_mode, notes_limit
+            )
+            page_task_ids.append(task_data.get("task_id"))
+            rendered_texts.append(task_text)
+            yield task_tokens
+
+    # Fit as many tasks as the token limit (with safety buffer) allows, from
+    # the prefix sums of the memoized per-task counts; formatting stops at the
+    # first task that does not fit
+    safety_buffer = 1000
+    try:
+        tasks_included = _fit_to_token_budget(
+            rendered_token_counts(), max_tokens - safety_buffer - current_tokens
+        )
+    finally:
+        if notes_conn:
+            notes_conn.close()
 
-            response_parts.append(f"{task_text}\n")
-            current_tokens += task_tokens
-            tasks_included += 1
-            last_task_id = task.get("task_id")
+    if tasks_included == 0:
+        response_text = "No tasks found matching the criteria."
+    else:
+        truncated = tasks_included < len(page_task_ids)
+        response_parts.extend(f"{text}\n" for text in rendered_texts[:tasks_included])
 
         # Add smart pagination and usage tips
         if truncated:
-            remaining_count = len(tasks_to_display) - tasks_included
-            response_parts.append(
-                f"--- Response truncated to stay under {max_tokens} tokens ---"
+            next_cursor = _encode_task_cursor(
+                sort_by, g.tasks.sort_key(sort_by, page_task_ids[tasks_included - 1])
             )
             response_parts.append(
-                f"Showing {tasks_included} of {len(tasks_to_display)} tasks ({remaining_count} remaining)"
+                f"--- Response truncated to stay under {max_tokens} tokens ---"
             )
+            showing = f"Showing {tasks_included} tasks on this page"
+            if total_matching is not None:
+                showing += f" of {total_matching} matching"
+            response_parts.append(showing)
             response_parts.append(
-                f"Continue: view_tasks(start_after='{last_task_id}', max_tokens={max_tokens})"
+                f"Continue: view_tasks(cursor='{next_cursor}', max_tokens={max_tokens})"
             )
             if not summary_mode:
                 response_parts.append(f"Overview: view_tasks(summary_mode=true)")
-        else:
+        elif after_key is None:
             response_parts.append(f"--- All {tasks_included} matching tasks shown ---")
+        else:
+            response_parts.append(f"--- Last page: {tasks_included} tasks shown ---")
 
         # Add smart usage tips
         response_parts.append("\n💡 Smart Tips:")
@@ -2549,7 +2614,9 @@ Assigned to: {assigned_to}
 Description: {description}"""
 
 
-def _format_task_detailed(task: Dict[str, Any]) -> str:
+def _format_task_detailed(
+    task: Dict[str, Any], notes_limit: int = RECENT_TASK_NOTES
+) -> str:
     """Format task in detailed mode (includes notes, full description)"""
     parts = []
     parts.append(f"ID: {task.get('task_id', 'N/A')}")
@@ -2580,10 +2647,12 @@ def _format_task_detailed(task: Dict[str, Any]) -> str:
             notes_val = json.loads(notes_val or "[]")
         except:
             notes_val = [{"author": "System", "content": "Error decoding notes"}]
-    if notes_val:
+    # notes holds the most recent notes only; notes_count is the total
+    notes_count = task.get("notes_count", len(notes_val))
+    if notes_count:
         parts.append("Notes:")
         # Limit notes to prevent token explosion
-        recent_notes = notes_val[-5:] if len(notes_val) > 5 else notes_val
+        recent_notes = notes_val[-notes_limit:] if notes_limit > 0 else []
         for note in recent_notes:
             if isinstance(note, dict):
                 ts = note.get("timestamp", "Unknown time")
@@ -2592,16 +2661,18 @@ def _format_task_detailed(task: Dict[str, Any]) -> str:
                 parts.append(f"  - [{ts}] {auth}: {cont}")
             else:
                 parts.append(f"  - [Invalid Note Format: {str(note)}]")
-        if len(notes_val) > 5:
-            parts.append(f"  ... and {len(notes_val) - 5} more notes")
+        if notes_count > len(recent_notes):
+            parts.append(f"  ... and {notes_count - len(recent_notes)} more notes")
 
     return "\n".join(parts)
 
 
-def _format_task_with_dependencies(task: Dict[str, Any]) -> str:
+def _format_task_with_dependencies(
+    task: Dict[str, Any], notes_limit: int = RECENT_TASK_NOTES
+) -> str:
     """Format task with dependency analysis information"""
     # Start with detailed format
-    task_text = _format_task_detailed(task)
+    task_text = _format_task_detailed(task, notes_limit)
 
     # Add dependency analysis
     dep_analysis = task.get("_dependency_analysis", {})
@@ -2958,20 +3029,18 @@ async def request_assistance_tool_impl(
         )
         parent_child_tasks_list.append(child_task_id)
 
-        parent_notes_list = json.loads(parent_task_current_data.get("notes") or "[]")
-        parent_notes_list.append(
-            {
-                "timestamp": timestamp_iso,
-                "author": requesting_agent_id,
-                "content": f"Requested assistance: {assistance_description}. Assistance task created: {child_task_id}",
-            }
+        parent_note = add_task_note(
+            cursor,
+            parent_task_id,
+            requesting_agent_id,
+            f"Requested assistance: {assistance_description}. Assistance task created: {child_task_id}",
+            timestamp_iso,
         )
 
         cursor.execute(
-            "UPDATE tasks SET child_tasks = ?, notes = ?, updated_at = ? WHERE task_id = ?",
+            "UPDATE tasks SET child_tasks = ?, updated_at = ? WHERE task_id = ?",
             (
                 json.dumps(parent_child_tasks_list),
-                json.dumps(parent_notes_list),
                 timestamp_iso,
                 parent_task_id,
             ),
@@ -2988,13 +3057,19 @@ async def request_assistance_tool_impl(
             },
         )
         conn.commit()
+        get_recent_context_view().refresh_tasks(cursor, [child_task_id, parent_task_id])
+        enqueue_rag_sources("task", [child_task_id, parent_task_id])
 
         # Update in-memory caches (g.tasks)
         # Parent task
-        if parent_task_id in g.tasks:
-            g.tasks[parent_task_id]["child_tasks"] = parent_child_tasks_list
-            g.tasks[parent_task_id]["notes"] = parent_notes_list
-            g.tasks[parent_task_id]["updated_at"] = timestamp_iso
+        g.tasks.update_fields(
+            parent_task_id,
+            {
+                "child_tasks": parent_child_tasks_list,
+                "updated_at": timestamp_iso,
+                **cached_notes_fields(g.tasks.get(parent_task_id), [parent_note]),
+            },
+        )
         # New child task
         child_task_mem_data = child_task_db_data.copy()
         child_task_mem_data["depends_on_tasks"] = []  # from json.dumps([])
@@ -3087,6 +3162,14 @@ async def request_assistance_tool_impl(
 
 
 # --- bulk_task_operations tool ---
+BULK_TASK_STATUSES = ("pending", "in_progress", "completed", "cancelled", "failed")
+BULK_TASK_PRIORITIES = ("low", "medium", "high")
+# Columns a bulk request may write, in SET clause order
+BULK_UPDATE_COLUMNS = ("status", "priority", "assigned_to", "updated_at")
+# Task ids per prefetch SELECT (stays under SQLite's bound-parameter limit)
+BULK_PREFETCH_BATCH_SIZE = 500
+
+
 async def bulk_task_operations_tool_impl(
     arguments: Dict[str, Any],
 ) -> List[mcp_types.TextContent]:
@@ -3111,234 +3194,182 @@ async def bulk_task_operations_tool_impl(
 
     is_admin_request = verify_token(agent_auth_token, "admin")
 
-    # Process operations in a single transaction
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        results = []
-        updated_at_iso = datetime.datetime.now().isoformat()
-
-        for i, op in enumerate(operations):
-            if not isinstance(op, dict):
-                results.append(
-                    f"Operation {i+1}: Invalid operation format (must be object)"
-                )
-                continue
+    # Malformed operations are answered without touching the database
+    results: List[Optional[str]] = [None] * len(operations)
+    valid_ops = []
+    for i, op in enumerate(operations):
+        if not isinstance(op, dict):
+            results[i] = f"Operation {i+1}: Invalid operation format (must be object)"
+        elif not op.get("task_id") or not op.get("type"):
+            results[i] = f"Operation {i+1}: Missing required fields 'type' and 'task_id'"
+        else:
+            valid_ops.append((i, op))
 
-            operation_type = op.get("type")
-            task_id = op.get("task_id")
+    # The whole request is one write-queue operation and one transaction:
+    # affected rows are prefetched at once, operations are applied in memory
+    # (in order, so several operations on one task compose), and the changed
+    # rows are written with one executemany per set of changed columns
+    async def write_operation() -> Dict[str, Dict[str, Any]]:
+        conn = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            updated_at_iso = datetime.datetime.now().isoformat()
 
-            if not task_id or not operation_type:
-                results.append(
-                    f"Operation {i+1}: Missing required fields 'type' and 'task_id'"
+            task_ids = list(dict.fromkeys(op["task_id"] for _, op in valid_ops))
+            current_rows: Dict[str, Dict[str, Any]] = {}
+            for start in range(0, len(task_ids), BULK_PREFETCH_BATCH_SIZE):
+                batch = task_ids[start : start + BULK_PREFETCH_BATCH_SIZE]
+                placeholders = ", ".join("?" for _ in batch)
+                cursor.execute(
+                    f"SELECT task_id, assigned_to FROM tasks WHERE task_id IN ({placeholders})",
+                    batch,
                 )
-                continue
-
-            # Verify task exists and permissions
-            cursor.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,))
-            task_row = cursor.fetchone()
-            if not task_row:
-                results.append(f"Operation {i+1}: Task '{task_id}' not found")
-                continue
-
-            task_data = dict(task_row)
-
-            # Permission check
-            if (
-                task_data.get("assigned_to") != requesting_agent_id
-                and not is_admin_request
-            ):
-                results.append(
-                    f"Operation {i+1}: Unauthorized - can only modify own tasks"
+                for row in cursor.fetchall():
+                    current_rows[row["task_id"]] = dict(row)
+
+            # Task ID -> changed column -> new value, and notes to append
+            changes: Dict[str, Dict[str, Any]] = {}
+            new_notes: Dict[str, List[Dict[str, Any]]] = {}
+
+            for i, op in valid_ops:
+                operation_type = op["type"]
+                task_id = op["task_id"]
+                task_data = current_rows.get(task_id)
+                if task_data is None:
+                    results[i] = f"Operation {i+1}: Task '{task_id}' not found"
+                    continue
+
+                # Permission check (sees reassignments made earlier in the request)
+                assigned_to = changes.get(task_id, {}).get(
+                    "assigned_to", task_data.get("assigned_to")
                 )
-                continue
+                if assigned_to != requesting_agent_id and not is_admin_request:
+                    results[i] = f"Operation {i+1}: Unauthorized - can only modify own tasks"
+                    continue
 
-            try:
-                if operation_type == "update_status":
-                    new_status = op.get("status")
-                    notes_content = op.get("notes")
-
-                    if not new_status:
-                        results.append(
-                            f"Operation {i+1}: Missing 'status' for update_status operation"
+                try:
+                    if operation_type == "update_status":
+                        new_status = op.get("status")
+                        note_content = op.get("notes")
+                        if not new_status:
+                            results[i] = f"Operation {i+1}: Missing 'status' for update_status operation"
+                            continue
+                        if new_status not in BULK_TASK_STATUSES:
+                            results[i] = f"Operation {i+1}: Invalid status '{new_status}'"
+                            continue
+                        fields = {"status": new_status}
+                        if note_content:
+                            new_notes.setdefault(task_id, []).append(
+                                {
+                                    "timestamp": updated_at_iso,
+                                    "author": requesting_agent_id,
+                                    "content": note_content,
+                                }
+                            )
+                        results[i] = (
+                            f"Operation {i+1}: Task '{task_id}' status updated to '{new_status}'"
                         )
-                        continue
 
-                    valid_statuses = [
-                        "pending",
-                        "in_progress",
-                        "completed",
-                        "cancelled",
-                        "failed",
-                    ]
-                    if new_status not in valid_statuses:
-                        results.append(
-                            f"Operation {i+1}: Invalid status '{new_status}'"
+                    elif operation_type == "update_priority":
+                        new_priority = op.get("priority")
+                        if new_priority not in BULK_TASK_PRIORITIES:
+                            results[i] = f"Operation {i+1}: Invalid priority '{new_priority}'"
+                            continue
+                        fields = {"priority": new_priority}
+                        results[i] = (
+                            f"Operation {i+1}: Task '{task_id}' priority updated to '{new_priority}'"
                         )
-                        continue
 
-                    # Update status
-                    update_fields = ["status = ?", "updated_at = ?"]
-                    update_params = [new_status, updated_at_iso]
-
-                    # Handle notes
-                    current_notes = json.loads(task_data.get("notes") or "[]")
-                    if notes_content:
-                        current_notes.append(
+                    elif operation_type == "add_note":
+                        note_content = op.get("content")
+                        if not note_content:
+                            results[i] = f"Operation {i+1}: Missing 'content' for add_note operation"
+                            continue
+                        new_notes.setdefault(task_id, []).append(
                             {
                                 "timestamp": updated_at_iso,
                                 "author": requesting_agent_id,
-                                "content": notes_content,
+                                "content": note_content,
                             }
                         )
-                    update_fields.append("notes = ?")
-                    update_params.append(json.dumps(current_notes))
-
-                    update_params.append(task_id)
-
-                    # Validate field assignments for security
-                    allowed_bulk_fields = ["status = ?", "updated_at = ?", "notes = ?"]
-                    safe_fields = [
-                        field for field in update_fields if field in allowed_bulk_fields
-                    ]
-
-                    if safe_fields:
-                        set_clause = ", ".join(safe_fields)
-                        bulk_update_sql = (
-                            f"UPDATE tasks SET {set_clause} WHERE task_id = ?"
-                        )
-                        cursor.execute(bulk_update_sql, tuple(update_params))
-
-                    # Update in-memory cache
-                    if task_id in g.tasks:
-                        g.tasks[task_id]["status"] = new_status
-                        g.tasks[task_id]["updated_at"] = updated_at_iso
-                        g.tasks[task_id]["notes"] = current_notes
-
-                    results.append(
-                        f"Operation {i+1}: Task '{task_id}' status updated to '{new_status}'"
-                    )
-
-                elif operation_type == "update_priority":
-                    new_priority = op.get("priority")
-
-                    if not new_priority or new_priority not in [
-                        "low",
-                        "medium",
-                        "high",
-                    ]:
-                        results.append(
-                            f"Operation {i+1}: Invalid priority '{new_priority}'"
+                        fields = {}
+                        results[i] = f"Operation {i+1}: Note added to task '{task_id}'"
+
+                    elif operation_type == "reassign" and is_admin_request:
+                        new_assigned_to = op.get("assigned_to")
+                        if not new_assigned_to:
+                            results[i] = f"Operation {i+1}: Missing 'assigned_to' for reassign operation"
+                            continue
+                        fields = {"assigned_to": new_assigned_to}
+                        results[i] = (
+                            f"Operation {i+1}: Task '{task_id}' reassigned to '{new_assigned_to}'"
                         )
-                        continue
-
-                    cursor.execute(
-                        "UPDATE tasks SET priority = ?, updated_at = ? WHERE task_id = ?",
-                        (new_priority, updated_at_iso, task_id),
-                    )
 
-                    if task_id in g.tasks:
-                        g.tasks[task_id]["priority"] = new_priority
-                        g.tasks[task_id]["updated_at"] = updated_at_iso
-
-                    results.append(
-                        f"Operation {i+1}: Task '{task_id}' priority updated to '{new_priority}'"
-                    )
-
-                elif operation_type == "add_note":
-                    note_content = op.get("content")
-
-                    if not note_content:
-                        results.append(
-                            f"Operation {i+1}: Missing 'content' for add_note operation"
-                        )
+                    elif operation_type == "reassign":
+                        results[i] = f"Operation {i+1}: Reassign operation requires admin privileges"
                         continue
-
-                    current_notes = json.loads(task_data.get("notes") or "[]")
-                    current_notes.append(
-                        {
-                            "timestamp": updated_at_iso,
-                            "author": requesting_agent_id,
-                            "content": note_content,
-                        }
-                    )
-
-                    cursor.execute(
-                        "UPDATE tasks SET notes = ?, updated_at = ? WHERE task_id = ?",
-                        (json.dumps(current_notes), updated_at_iso, task_id),
-                    )
-
-                    if task_id in g.tasks:
-                        g.tasks[task_id]["notes"] = current_notes
-                        g.tasks[task_id]["updated_at"] = updated_at_iso
-
-                    results.append(f"Operation {i+1}: Note added to task '{task_id}'")
-
-                elif operation_type == "reassign" and is_admin_request:
-                    new_assigned_to = op.get("assigned_to")
-
-                    if not new_assigned_to:
-                        results.append(
-                            f"Operation {i+1}: Missing 'assigned_to' for reassign operation"
-                        )
-                        continue
-
-                    cursor.execute(
-                        "UPDATE tasks SET assigned_to = ?, updated_at = ? WHERE task_id = ?",
-                        (new_assigned_to, updated_at_iso, task_id),
-                    )
-
-                    if task_id in g.tasks:
-                        g.tasks[task_id]["assigned_to"] = new_assigned_to
-                        g.tasks[task_id]["updated_at"] = updated_at_iso
-
-                    results.append(
-                        f"Operation {i+1}: Task '{task_id}' reassigned to '{new_assigned_to}'"
-                    )
-
-                else:
-                    if operation_type == "reassign" and not is_admin_request:
-                        results.append(
-                            f"Operation {i+1}: Reassign operation requires admin privileges"
-                        )
                     else:
-                        results.append(
-                            f"Operation {i+1}: Unknown operation type '{operation_type}'"
-                        )
-
-            except Exception as e:
-                results.append(f"Operation {i+1}: Error processing - {str(e)}")
-                logger.error(f"Error in bulk operation {i+1}: {e}", exc_info=True)
-
-        # Log the bulk operation
-        log_agent_action_to_db(
-            cursor,
-            requesting_agent_id,
-            "bulk_task_operations",
-            details={
-                "operations_count": len(operations),
-                "success_count": len([r for r in results if "Error" not in r]),
-            },
-        )
-        conn.commit()
+                        results[i] = f"Operation {i+1}: Unknown operation type '{operation_type}'"
+                        continue
+                except Exception as e:
+                    results[i] = f"Operation {i+1}: Error processing - {str(e)}"
+                    logger.error(f"Error in bulk operation {i+1}: {e}", exc_info=True)
+                    continue
+
+                changes.setdefault(task_id, {}).update(fields)
+
+            # One executemany per distinct set of changed columns (whitelisted)
+            rows_by_columns: Dict[Tuple[str, ...], List[Tuple[Any, ...]]] = {}
+            for task_id, fields in changes.items():
+                fields["updated_at"] = updated_at_iso
+                columns = tuple(
+                    column for column in BULK_UPDATE_COLUMNS if column in fields
+                )
+                rows_by_columns.setdefault(columns, []).append(
+                    tuple(fields[column] for column in columns) + (task_id,)
+                )
+            for columns, rows in rows_by_columns.items():
+                set_clause = ", ".join(f"{column} = ?" for column in columns)
+                cursor.executemany(
+                    f"UPDATE tasks SET {set_clause} WHERE task_id = ?", rows
+                )
+            add_task_notes(
+                cursor,
+                [(task_id, note) for task_id, notes in new_notes.items() for note in notes],
+            )
 
-        response_text = (
-            f"Bulk Task Operations Results ({len(operations)} operations):\n\n"
-            + "\n".join(results)
-        )
+            # Log the bulk operation
+            log_agent_action_to_db(
+                cursor,
+                requesting_agent_id,
+                "bulk_task_operations",
+                details={
+                    "operations_count": len(operations),
+                    "success_count": len(
+                        [r for r in results if r is not None and "Error" not in r]
+                    ),
+                },
+            )
+            conn.commit()
 
-        log_audit(
-            requesting_agent_id,
-            "bulk_task_operations",
-            {"operations_count": len(operations)},
-        )
-        return [mcp_types.TextContent(type="text", text=response_text)]
+            # Cache follows the committed transaction in one step
+            for task_id, notes in new_notes.items():
+                changes[task_id].update(cached_notes_fields(g.tasks.get(task_id), notes))
+            g.tasks.update_many(changes)
+            get_recent_context_view().refresh_tasks(cursor, list(changes))
+            return changes
+        except Exception:
+            if conn:
+                conn.rollback()
+            raise
+        finally:
+            if conn:
+                conn.close()
 
+    try:
+        changes = await execute_db_write(write_operation)
     except sqlite3.Error as e_sql:
-        if conn:
-            conn.rollback()
         logger.error(f"Database error in bulk task operations: {e_sql}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -3346,17 +3377,72 @@ async def bulk_task_operations_tool_impl(
             )
         ]
     except Exception as e:
-        if conn:
-            conn.rollback()
         logger.error(f"Unexpected error in bulk task operations: {e}", exc_info=True)
         return [
             mcp_types.TextContent(
                 type="text", text=f"Unexpected error in bulk operations: {e}"
             )
         ]
-    finally:
-        if conn:
-            conn.close()
+
+    enqueue_rag_sources("task", list(changes))
+
+    response_text = (
+        f"Bulk Task Operations Results ({len(operations)} operations):\n\n"
+        + "\n".join(results)
+    )
+
+    log_audit(
+        requesting_agent_id,
+        "bulk_task_operations",
+        {"operations_count": len(operations), "tasks_updated": len(changes)},
+    )
+    return [mcp_types.TextContent(type="text", text=response_text)]
+
+
+def _substring_match_score(
+    task: Dict[str, Any],
+    search_query: str,
+    search_terms: List[str],
+    notes_text: Optional[str],
+) -> Tuple[float, List[str]]:
+    """
+    Substring relevance of a task (title x3, description x2, notes x1 per
+    matching term, +2 for the exact phrase) and the fields that matched.
+    `notes_text` is the content of all the task's notes (from task_notes;
+    g.tasks only caches the recent ones), or None to leave notes out.
+    """
+    score = 0.0
+    matched_fields = []
+
+    # Search in title (highest weight)
+    title = (task.get("title") or "").lower()
+    title_matches = sum(1 for term in search_terms if term in title)
+    if title_matches > 0:
+        score += title_matches * 3.0
+        matched_fields.append(f"title ({title_matches} terms)")
+
+    # Search in description (medium weight)
+    description = (task.get("description") or "").lower()
+    desc_matches = sum(1 for term in search_terms if term in description)
+    if desc_matches > 0:
+        score += desc_matches * 2.0
+        matched_fields.append(f"description ({desc_matches} terms)")
+
+    # Search in notes (lower weight)
+    if notes_text is not None:
+        notes_content = notes_text.lower()
+        notes_matches = sum(1 for term in search_terms if term in notes_content)
+        if notes_matches > 0:
+            score += notes_matches * 1.0
+            matched_fields.append(f"notes ({notes_matches} terms)")
+
+    # Exact phrase bonus
+    full_text = f"{title} {description}".lower()
+    if search_query.lower() in full_text:
+        score += 2.0
+        matched_fields.append("exact phrase")
+
+    return score, matched_fields
 
 
 # --- search_tasks tool ---
@@ -3386,84 +3472,77 @@ async def search_tasks_tool_impl(
 
     is_admin_request = verify_token(agent_auth_token, "admin")
 
-    # Prepare search terms
-    search_terms = [
-        term.strip().lower() for term in search_query.split() if len(term.strip()) > 2
-    ]
-    if not search_terms:
+    # Full-text search over the tasks_fts index (BM25 with title / description
+    # / notes weights); words (also matched as prefixes) and "quoted phrases"
+    match_query = build_task_match_query(search_query, include_notes=include_notes)
+    if match_query is None:
         return [
             mcp_types.TextContent(
                 type="text",
                 text="Error: Search query must contain terms longer than 2 characters.",
             )
         ]
+    search_terms = parse_task_search_query(search_query)[0]
 
-    # Get tasks user can see
-    candidate_tasks = []
-    for task_id, task_data in g.tasks.items():
-        # Permission check
-        if not is_admin_request and task_data.get("assigned_to") != requesting_agent_id:
-            continue
-
-        # Status filter
-        if status_filter and task_data.get("status") != status_filter:
-            continue
-
-        candidate_tasks.append(task_data)
-
-    if not candidate_tasks:
-        return [
-            mcp_types.TextContent(
-                type="text", text="No tasks found matching the criteria."
+    fts_results = search_tasks_fts(
+        match_query,
+        assigned_to=None if is_admin_request else requesting_agent_id,
+        status=status_filter or None,
+        limit=max_results,
+    )
+    if fts_results is not None:
+        candidates = [
+            (g.tasks[task_id], score)
+            for task_id, score in fts_results
+            if task_id in g.tasks
+        ]
+    else:
+        # No FTS5 in this SQLite build: score the visible tasks in memory
+        # (permission + status filter via the g.tasks indexes)
+        candidates = [
+            (task, None)
+            for task in g.tasks.query(
+                assigned_to=None if is_admin_request else requesting_agent_id,
+                status=status_filter or None,
             )
         ]
 
-    # Score tasks by relevance
+    # Notes are matched against every note in task_notes, not only the
+    # recent ones cached in g.tasks
+    notes_text: Dict[str, str] = {}
+    if include_notes and candidates:
+        notes_conn = None
+        try:
+            notes_conn = get_db_connection()
+            notes_text = get_task_notes_text(
+                notes_conn.cursor(), [task["task_id"] for task, _ in candidates]
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read task notes for search: {e}")
+        finally:
+            if notes_conn:
+                notes_conn.close()
+
     scored_results = []
-    for task in candidate_tasks:
-        score = 0.0
-        matched_fields = []
-
-        # Search in title (highest weight)
-        title = (task.get("title") or "").lower()
-        title_matches = sum(1 for term in search_terms if term in title)
-        if title_matches > 0:
-            score += title_matches * 3.0
-            matched_fields.append(f"title ({title_matches} terms)")
-
-        # Search in description (medium weight)
-        description = (task.get("description") or "").lower()
-        desc_matches = sum(1 for term in search_terms if term in description)
-        if desc_matches > 0:
-            score += desc_matches * 2.0
-            matched_fields.append(f"description ({desc_matches} terms)")
-
-        # Search in notes (lower weight)
-        if include_notes:
-            notes = task.get("notes", [])
-            if isinstance(notes, str):
-                try:
-                    notes = json.loads(notes)
-                except:
-                    notes = []
-
-            notes_content = " ".join(
-                [note.get("content", "") for note in notes if isinstance(note, dict)]
-            ).lower()
-            notes_matches = sum(1 for term in search_terms if term in notes_content)
-            if notes_matches > 0:
-                score += notes_matches * 1.0
-                matched_fields.append(f"notes ({notes_matches} terms)")
-
-        # Exact phrase bonus
-        full_text = f"{title} {description}".lower()
-        if search_query.lower() in full_text:
-            score += 2.0
-            matched_fields.append("exact phrase")
-
-        if score > 0:
+    for task, fts_score in candidates:
+        score, matched_fields = _substring_match_score(
+            task,
+            search_query,
+            search_terms,
+            notes_text.get(task["task_id"], "") if include_notes else None,
+        )
+        if fts_score is not None:
+            scored_results.append((task, fts_score, matched_fields))
+        elif score > 0:
             scored_results.append((task, score, matched_fields))
 
+    if fts_results is None:
+        # Sort by relevance (score descending, then by updated_at descending)
+        scored_results.sort(
+            key=lambda x: (x[1], x[0].get("updated_at", "")), reverse=True
+        )
+        scored_results = scored_results[:max_results]
+
     if not scored_results:
         return [
             mcp_types.TextContent(
@@ -3471,18 +3550,17 @@ async def search_tasks_tool_impl(
             )
         ]
 
-    # Sort by relevance (score descending, then by updated_at descending)
-    scored_results.sort(key=lambda x: (x[1], x[0].get("updated_at", "")), reverse=True)
-
-    # Limit results
-    scored_results = scored_results[:max_results]
-
     # Format response with token awareness
     response_parts = [
         f"Search Results for '{search_query}' ({len(scored_results)} found):\n"
     ]
     current_tokens = len("\n".join(response_parts)) // 4  # Simple token estimation
 
+    # BM25 values only compare within one query and can be tiny on small
+    # task lists (FTS5 floors the weight of words most tasks contain), so
+    # they are shown unrounded, next to their share of the best match's
+    best_fts_score = scored_results[0][1] if fts_results is not None else None
+
     for i, (task, score, matched_fields) in enumerate(scored_results):
         if current_tokens >= 20000:  # Leave room for truncation message
             remaining = len(scored_results) - i
@@ -3497,8 +3575,12 @@ async def search_tasks_tool_impl(
         # Format task result
         task_text = f"\n{i+1}. **{task.get('title', 'Untitled')}** (ID: {task.get('task_id', 'N/A')})"
         task_text += f"\n   Status: {task.get('status', 'N/A')} | Priority: {task.get('priority', 'medium')} | Assigned: {task.get('assigned_to', 'None')}"
+        if best_fts_score:
+            relevance = f"{100 * score / best_fts_score:.0f}% of best (BM25 {score:.3g})"
+        else:
+            relevance = f"{score:.1f}"
         task_text += (
-            f"\n   Relevance Score: {score:.1f} | Matched: {', '.join(matched_fields)}"
+            f"\n   Relevance Score: {relevance} | Matched: {', '.join(matched_fields)}"
         )
 
         # Add truncated description
@@ -3534,6 +3616,185 @@ async def search_tasks_tool_impl(
     return [mcp_types.TextContent(type="text", text="\n".join(response_parts))]
 
 
+# --- get_next_ready_task tool ---
+async def get_next_ready_task_tool_impl(
+    arguments: Dict[str, Any],
+) -> List[mcp_types.TextContent]:
+    agent_auth_token = arguments.get("token")
+    target_agent_id = arguments.get("agent_id")
+    limit = arguments.get("limit", 1)
+    include_unassigned = arguments.get("include_unassigned", False)
+
+    requesting_agent_id = get_agent_id(agent_auth_token)
+    if not requesting_agent_id:
+        return [
+            mcp_types.TextContent(
+                type="text", text="Unauthorized: Valid token required"
+            )
+        ]
+
+    is_admin_request = verify_token(agent_auth_token, "admin")
+    if target_agent_id is None:
+        target_agent_id = requesting_agent_id
+    elif target_agent_id != requesting_agent_id and not is_admin_request:
+        return [
+            mcp_types.TextContent(
+                type="text",
+                text="Unauthorized: Non-admin agents can only get their own next task.",
+            )
+        ]
+
+    if not isinstance(limit, int) or isinstance(limit, bool):
+        return [
+            mcp_types.TextContent(
+                type="text", text="Error: limit must be an integer between 1 and 20."
+            )
+        ]
+    limit = max(1, min(limit, 20))
+
+    # Ready = pending with all dependencies completed, maintained incrementally
+    # by g.tasks; ranked by critical-path length, priority, then age
+    next_tasks = next_ready_tasks(
+        g.tasks, target_agent_id, limit=limit, include_unassigned=include_unassigned
+    )
+    if not next_tasks:
+        return [
+            mcp_types.TextContent(
+                type="text",
+                text=f"No ready tasks for agent '{target_agent_id}' (every pending task is waiting on dependencies, or none are pending).",
+            )
+        ]
+
+    response_parts = [f"Next ready task(s) for '{target_agent_id}':"]
+    for i, (task_id, path_length) in enumerate(next_tasks):
+        task = g.tasks.get(task_id) or {}
+        response_parts.append(
+            f"\n{i+1}. **{task.get('title', 'Untitled')}** (ID: {task_id})"
+        )
+        response_parts.append(
+            f"   Priority: {task.get('priority', 'medium')} | Assigned: {task.get('assigned_to') or 'None'} | Critical path: {path_length} task(s)"
+        )
+        unblocks = g.tasks.dependents_of(task_id)
+        if unblocks:
+            response_parts.append(f"   Unblocks: {', '.join(unblocks[:10])}")
+        desc = task.get("description") or "No description"
+        if len(desc) > 200:
+            desc = desc[:200] + "..."
+        response_parts.append(f"   Description: {desc}")
+
+    response_parts.append(
+        "\n💡 Set the task to in_progress with update_task_status before starting."
+    )
+
+    log_audit(
+        requesting_agent_id,
+        "get_next_ready_task",
+        {"agent_id": target_agent_id, "results": len(next_tasks)},
+    )
+    return [mcp_types.TextContent(type="text", text="\n".join(response_parts))]
+
+
+# --- wait_for_task_changes tool ---
+TASK_CHANGES_DEFAULT_TIMEOUT = 30
+TASK_CHANGES_MAX_TIMEOUT = 120
+TASK_CHANGES_DEFAULT_LIMIT = 100
+TASK_CHANGES_MAX_LIMIT = 1000
+
+
+def _format_task_change(change: Dict[str, Any]) -> str:
+    """One line per change feed entry."""
+    line = f"#{change['seq']} {change['task_id']} {change['change']}"
+    if change["fields"]:
+        line += f": {', '.join(change['fields'])}"
+    details = [f"status: {change.get('status') or 'unknown'}"]
+    details.append(f"assigned: {change.get('assigned_to') or 'None'}")
+    if "previous_assigned_to" in change:
+        details.append(f"was: {change['previous_assigned_to'] or 'None'}")
+    return f"{line} ({', '.join(details)})"
+
+
+async def wait_for_task_changes_tool_impl(
+    arguments: Dict[str, Any],
+) -> List[mcp_types.TextContent]:
+    agent_auth_token = arguments.get("token")
+    since_seq = arguments.get("since_seq")
+    timeout = arguments.get("timeout", TASK_CHANGES_DEFAULT_TIMEOUT)
+    limit = arguments.get("limit", TASK_CHANGES_DEFAULT_LIMIT)
+    target_agent_id = arguments.get("agent_id")
+
+    requesting_agent_id = get_agent_id(agent_auth_token)
+    if not requesting_agent_id:
+        return [
+            mcp_types.TextContent(
+                type="text", text="Unauthorized: Valid token required"
+            )
+        ]
+
+    if not verify_token(agent_auth_token, "admin"):
+        if target_agent_id is not None and target_agent_id != requesting_agent_id:
+            return [
+                mcp_types.TextContent(
+                    type="text",
+                    text="Unauthorized: Non-admin agents can only follow changes to their own tasks.",
+                )
+            ]
+        target_agent_id = requesting_agent_id
+
+    change_log = g.tasks.changes
+    if since_seq is None:
+        latest_seq = change_log.latest_seq
+        return [
+            mcp_types.TextContent(
+                type="text",
+                text=f"Current task change position: {latest_seq}\nNext: wait_for_task_changes(since_seq={latest_seq})",
+            )
+        ]
+    if not isinstance(since_seq, int) or isinstance(since_seq, bool):
+        return [
+            mcp_types.TextContent(
+                type="text", text="Error: since_seq must be an integer."
+            )
+        ]
+
+    if not isinstance(timeout, (int, float)) or isinstance(timeout, bool):
+        return [
+            mcp_types.TextContent(
+                type="text", text="Error: timeout must be a number of seconds."
+            )
+        ]
+    if not isinstance(limit, int) or isinstance(limit, bool):
+        return [
+            mcp_types.TextContent(
+                type="text", text="Error: limit must be an integer."
+            )
+        ]
+
+    timeout = max(0, min(float(timeout), TASK_CHANGES_MAX_TIMEOUT))
+    changes, next_seq, reset = await change_log.wait_for_changes(
+        since_seq, timeout, agent_id=target_agent_id, limit=max(1, min(limit, TASK_CHANGES_MAX_LIMIT))
+    )
+
+    if reset:
+        response_parts = [
+            f"Change position {since_seq} is no longer available (server restarted or too far behind). "
+            "Re-read your tasks with view_tasks, then continue from the position below."
+        ]
+    elif not changes:
+        response_parts = [f"No task changes within {timeout:g}s."]
+    else:
+        response_parts = [f"Task changes after {since_seq} ({len(changes)}):"]
+        response_parts.extend(_format_task_change(change) for change in changes)
+    response_parts.append(f"Next: wait_for_task_changes(since_seq={next_seq})")
+
+    if changes or reset:
+        log_audit(
+            requesting_agent_id,
+            "wait_for_task_changes",
+            {"since_seq": since_seq, "changes": len(changes), "reset": reset},
+        )
+    return [mcp_types.TextContent(type="text", text="\n".join(response_parts))]
+
+
 # --- Register all task tools ---
 def register_task_tools():
     register_tool(
@@ -3793,9 +4054,13 @@ def register_task_tools():
                     "minimum": 1000,
                     "maximum": 25000,
                 },
+                "cursor": {
+                    "type": "string",
+                    "description": "Continuation cursor returned by the previous page (keeps its sort order)",
+                },
                 "start_after": {
                     "type": "string",
-                    "description": "Task ID to start after (for pagination)",
+                    "description": "Task ID to start after (for pagination; prefer cursor)",
                 },
                 "summary_mode": {
                     "type": "boolean",
@@ -3831,6 +4096,13 @@ def register_task_tools():
                     "enum": ["created_at", "updated_at", "priority", "status"],
                     "default": "created_at",
                 },
+                "notes_limit": {
+                    "type": "integer",
+                    "description": f"Most recent notes shown per task (default: {RECENT_TASK_NOTES}); older notes are read from the notes store",
+                    "minimum": 0,
+                    "maximum": 100,
+                    "default": RECENT_TASK_NOTES,
+                },
             },
             "required": ["token"],
             "additionalProperties": False,
@@ -3840,14 +4112,14 @@ def register_task_tools():
 
     register_tool(
         name="search_tasks",
-        description="Full-text search across task titles, descriptions, and notes. Critical for finding related work and avoiding duplication.",
+        description="Full-text search across task titles, descriptions, and notes, ranked by relevance (BM25; title matches weigh most). Critical for finding related work and avoiding duplication.",
         input_schema={
             "type": "object",
             "properties": {
                 "token": {"type": "string", "description": "Authentication token"},
                 "search_query": {
                     "type": "string",
-                    "description": "Search terms to find in tasks",
+                    "description": "Search terms to find in tasks. Any term may match, and words also match as a prefix (auth finds authentication; whole words rank higher); use \"quoted words\" for an exact phrase",
                 },
                 "status_filter": {
                     "type": "string",
@@ -3877,6 +4149,68 @@ def register_task_tools():
         implementation=search_tasks_tool_impl,
     )
 
+    register_tool(
+        name="get_next_ready_task",
+        description="Get the next task(s) an agent can start now: pending tasks whose dependencies are all completed, ranked by critical-path length (longest chain of work they unblock), then priority, then age. Avoids scanning the full task list with view_tasks.",
+        input_schema={
+            "type": "object",
+            "properties": {
+                "token": {"type": "string", "description": "Authentication token"},
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent to get tasks for (default: the calling agent; other agents require admin)",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Number of ready tasks to return (default: 1)",
+                    "minimum": 1,
+                    "maximum": 20,
+                },
+                "include_unassigned": {
+                    "type": "boolean",
+                    "description": "Also consider tasks not assigned to anyone whose dependencies are all completed, including tasks created unassigned (default: false)",
+                },
+            },
+            "required": ["token"],
+            "additionalProperties": False,
+        },
+        implementation=get_next_ready_task_tool_impl,
+    )
+
+    register_tool(
+        name="wait_for_task_changes",
+        description="Wait for task changes instead of polling view_tasks. Returns only what changed since `since_seq` (created / updated with the changed fields / deleted / ready when a task's last dependency completed), waiting up to `timeout` seconds if nothing has yet. Call without since_seq to get the current position, then pass the returned `Next` position each time. Non-admin agents see changes to tasks assigned to them.",
+        input_schema={
+            "type": "object",
+            "properties": {
+                "token": {"type": "string", "description": "Authentication token"},
+                "since_seq": {
+                    "type": "integer",
+                    "description": "Change position to continue from (omit to get the current position without waiting)",
+                },
+                "timeout": {
+                    "type": "number",
+                    "description": f"Seconds to wait for a change (default: {TASK_CHANGES_DEFAULT_TIMEOUT})",
+                    "minimum": 0,
+                    "maximum": TASK_CHANGES_MAX_TIMEOUT,
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": f"Maximum changes to return (default: {TASK_CHANGES_DEFAULT_LIMIT})",
+                    "minimum": 1,
+                    "maximum": TASK_CHANGES_MAX_LIMIT,
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Only changes to this agent's tasks (default for non-admin: the calling agent; admin: all tasks)",
+                },
+            },
+            "required": ["token"],
+            "additionalProperties": False,
+        },
+        implementation=wait_for_task_changes_tool_impl,
+    )
+
     register_tool(
         name="request_assistance",  # main.py:1808
         description="Request assistance with a task. This creates a child task assigned to 'None' and notifies admin.",
@@ -4054,11 +4388,11 @@ async def delete_task_tool_impl(
             ]
 
         # Check for tasks that depend on this one
-        cursor.execute(
-            "SELECT task_id, title FROM tasks WHERE json_extract(depends_on_tasks, '$') LIKE ?",
-            (f'%"{task_id}"%',),
-        )
-        dependent_tasks = cursor.fetchall()
+        dependent_tasks = [
+            {"task_id": dep_id, "title": g.tasks[dep_id].get("title")}
+            for dep_id in g.tasks.dependents_of(task_id)
+            if dep_id in g.tasks
+        ]
 
         if dependent_tasks and not force_delete:
             dependent_list = [
@@ -4073,6 +4407,8 @@ async def delete_task_tool_impl(
 
         # Begin cascade deletion operations
         cascade_operations = []
+        # Field updates for g.tasks, applied once the deletion is committed
+        cache_updates: Dict[str, Dict[str, Any]] = {}
 
         # Update parent task to remove this child
         if task_data.get("parent_task"):
@@ -4086,14 +4422,15 @@ async def delete_task_tool_impl(
                 parent_children = json.loads(parent_row["child_tasks"] or "[]")
                 if task_id in parent_children:
                     parent_children.remove(task_id)
+                    parent_updated_at = datetime.datetime.now().isoformat()
                     cursor.execute(
                         "UPDATE tasks SET child_tasks = ?, updated_at = ? WHERE task_id = ?",
-                        (
-                            json.dumps(parent_children),
-                            datetime.datetime.now().isoformat(),
-                            parent_id,
-                        ),
+                        (json.dumps(parent_children), parent_updated_at, parent_id),
                     )
+                    cache_updates[parent_id] = {
+                        "child_tasks": parent_children,
+                        "updated_at": parent_updated_at,
+                    }
                     cascade_operations.append(
                         f"Updated parent task '{parent_id}' to remove child reference"
                     )
@@ -4120,14 +4457,15 @@ async def delete_task_tool_impl(
                     )
                     if task_id in dep_dependencies:
                         dep_dependencies.remove(task_id)
+                        dep_updated_at = datetime.datetime.now().isoformat()
                         cursor.execute(
                             "UPDATE tasks SET depends_on_tasks = ?, updated_at = ? WHERE task_id = ?",
-                            (
-                                json.dumps(dep_dependencies),
-                                datetime.datetime.now().isoformat(),
-                                dep_id,
-                            ),
+                            (json.dumps(dep_dependencies), dep_updated_at, dep_id),
                         )
+                        cache_updates[dep_id] = {
+                            "depends_on_tasks": dep_dependencies,
+                            "updated_at": dep_updated_at,
+                        }
                         cascade_operations.append(
                             f"Updated task '{dep_id}' to remove dependency on '{task_id}'"
                         )
@@ -4136,6 +4474,7 @@ async def delete_task_tool_impl(
         cursor.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
 
         if cursor.rowcount == 0:
+            conn.rollback()
             return [
                 mcp_types.TextContent(
                     type="text", text=f"Error: Failed to delete task '{task_id}'"
@@ -4156,6 +4495,17 @@ async def delete_task_tool_impl(
         )
 
         conn.commit()
+        g.tasks.pop(task_id, None)
+        if force_delete:
+            for child_id in child_tasks:
+                g.tasks.pop(child_id, None)
+        for updated_id, fields in cache_updates.items():
+            g.tasks.update_fields(updated_id, fields)
+        touched_task_ids = [task_id, task_data.get("parent_task"), *child_tasks] + [
+            row["task_id"] for row in dependent_tasks
+        ]
+        get_recent_context_view().refresh_tasks(cursor, touched_task_ids)
+        enqueue_rag_sources("task", touched_task_ids)
 
         # Prepare response
         response_parts = [
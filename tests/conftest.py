@@ -0,0 +1,99 @@
+"""Shared fixtures: a fresh project database and empty in-memory state per test."""
+import json
+import os
+import tempfile
+
+# agent_mcp.core.config reads the project directory at import time
+os.environ.setdefault("MCP_PROJECT_DIR", tempfile.mkdtemp(prefix="agent-mcp-tests-"))
+
+import pytest
+
+from agent_mcp.core import globals as g
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def project_db(tmp_path, monkeypatch):
+    """Initializes an empty project database under tmp_path and resets g.tasks / agents."""
+    from agent_mcp.db.schema import init_database
+
+    monkeypatch.setenv("MCP_PROJECT_DIR", str(tmp_path))
+    (tmp_path / ".agent").mkdir(exist_ok=True)
+    init_database()
+    g.tasks.clear()
+    g.active_agents.clear()
+    previous_admin_token = g.admin_token
+    g.admin_token = ADMIN_TOKEN
+    yield tmp_path
+    g.tasks.clear()
+    g.active_agents.clear()
+    g.admin_token = previous_admin_token
+
+
+def insert_agent(agent_id: str, token: str) -> None:
+    """Registers an active agent in the database and in g.active_agents."""
+    from agent_mcp.db.connection import get_db_connection
+
+    conn = get_db_connection()
+    conn.execute(
+        "INSERT INTO agents (token, agent_id, capabilities, created_at, status, working_directory) "
+        "VALUES (?, ?, '[]', '2025-01-01T00:00:00', 'active', '.')",
+        (token, agent_id),
+    )
+    conn.commit()
+    conn.close()
+    g.active_agents[token] = {"agent_id": agent_id}
+
+
+def insert_task(task_id: str, **fields) -> dict:
+    """Inserts a task row and caches it in g.tasks (as loaded at startup). Returns the cached dict."""
+    from agent_mcp.db.connection import get_db_connection
+
+    task = {
+        "task_id": task_id,
+        "title": f"Task {task_id}",
+        "description": "",
+        "assigned_to": None,
+        "created_by": "admin",
+        "status": "pending",
+        "priority": "medium",
+        "created_at": "2025-01-01T00:00:00",
+        "updated_at": "2025-01-01T00:00:00",
+        "parent_task": None,
+        "child_tasks": [],
+        "depends_on_tasks": [],
+        **fields,
+    }
+    row = dict(task, notes="[]")
+    for field in ("child_tasks", "depends_on_tasks"):
+        row[field] = json.dumps(row[field])
+    conn = get_db_connection()
+    conn.execute(
+        f"INSERT INTO tasks ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})",
+        list(row.values()),
+    )
+    conn.commit()
+    conn.close()
+    cached = dict(task, notes=[], notes_count=0)
+    g.tasks[task_id] = cached
+    return cached
+
+
+def run_with_write_queue(coroutine):
+    """asyncio.run(coroutine) with a fresh database write queue running in that loop."""
+    import asyncio
+
+    from agent_mcp.db import write_queue
+
+    async def run():
+        write_queue._global_write_queue = None
+        queue = write_queue.get_write_queue()
+        await queue.start()
+        try:
+            return await coroutine
+        finally:
+            await queue.stop()
+            write_queue._global_write_queue = None
+
+    return asyncio.run(run())
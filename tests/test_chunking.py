@@ -0,0 +1,99 @@
+"""
+Golden tests for the Markdown chunker (agent_mcp/features/rag/chunking.py).
+
+The expected chunks were produced by the original list-based
+markdown_aware_chunker; iter_markdown_chunks must keep yielding exactly the
+same chunks, whether given the text or a file object.
+"""
+import io
+
+import pytest
+
+from agent_mcp.features.rag.chunking import iter_markdown_chunks, markdown_aware_chunker
+
+DOCUMENTS = {
+    "headings_and_paragraphs": (
+        "# Title\nIntro line one.\nIntro line two.\n\n"
+        "## Section A\nAlpha paragraph text.\nMore alpha text here.\n\n"
+        "Second alpha paragraph.\n\n"
+        "## Section B\nBeta text.\n"
+    ),
+    "no_structural_breaks": "\n".join(
+        f"line {i} " + "word " * (i % 5 + 1) for i in range(14)
+    ),
+    "indented_heading_and_blank_runs": (
+        "Lead paragraph line.\n\n\n   \n  # Indented heading\nBody under heading.\n\n"
+        "- item one\n- item two\n\nTail."
+    ),
+}
+
+# (document, target_chunk_size, min_chunk_size, overlap_lines, expected chunks)
+GOLDEN_CASES = [
+    (
+        "headings_and_paragraphs",
+        60,
+        20,
+        2,
+        [
+            "# Title\nIntro line one.\nIntro line two.",
+            "Intro line two.\n\n## Section A\nAlpha paragraph text.\nMore alpha text here.",
+            "More alpha text here.\n\nSecond alpha paragraph.",
+            "Second alpha paragraph.\n\n## Section B\nBeta text.",
+        ],
+    ),
+    (
+        "headings_and_paragraphs",
+        1000,
+        200,
+        2,
+        [DOCUMENTS["headings_and_paragraphs"].strip()],
+    ),
+    (
+        "no_structural_breaks",
+        60,
+        20,
+        1,
+        [
+            "line 0 word \nline 1 word word \nline 2 word word word \nline 3 word word word word",
+            "line 3 word word word word \nline 4 word word word word word \nline 5 word",
+            "line 5 word \nline 6 word word \nline 7 word word word \nline 8 word word word word",
+            "line 8 word word word word \nline 9 word word word word word \nline 10 word",
+            "line 10 word \nline 11 word word \nline 12 word word word \nline 13 word word word word",
+        ],
+    ),
+    (
+        "indented_heading_and_blank_runs",
+        40,
+        10,
+        2,
+        [
+            "Lead paragraph line.",
+            "# Indented heading\nBody under heading.",
+            "Body under heading.\n\n- item one\n- item two",
+            "- item two\n\nTail.",
+        ],
+    ),
+]
+
+
+@pytest.mark.parametrize("document,target,minimum,overlap,expected", GOLDEN_CASES)
+def test_markdown_chunks_match_golden(document, target, minimum, overlap, expected):
+    text = DOCUMENTS[document]
+    assert markdown_aware_chunker(text, target, minimum, overlap) == expected
+    assert list(iter_markdown_chunks(text, target, minimum, overlap)) == expected
+
+
+@pytest.mark.parametrize("document,target,minimum,overlap,expected", GOLDEN_CASES)
+def test_streamed_lines_match_golden(document, target, minimum, overlap, expected):
+    source = io.StringIO(DOCUMENTS[document])
+    assert list(iter_markdown_chunks(source, target, minimum, overlap)) == expected
+
+
+def test_empty_input_yields_no_chunks():
+    assert markdown_aware_chunker("") == []
+    assert list(iter_markdown_chunks(io.StringIO(""))) == []
+
+
+def test_invalid_sizes_rejected():
+    with pytest.raises(ValueError):
+        list(iter_markdown_chunks("text", target_chunk_size=100, min_chunk_size=200))
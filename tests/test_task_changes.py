@@ -0,0 +1,182 @@
+"""Tests for the task change feed (core/task_changes.py) and wait_for_task_changes."""
+import asyncio
+import time
+
+from agent_mcp.core import globals as g
+from agent_mcp.core.task_changes import TaskChangeLog
+from agent_mcp.core.task_store import TaskStore
+from agent_mcp.tools import task_tools
+
+from conftest import ADMIN_TOKEN, insert_agent, insert_task
+
+
+def _task(task_id, **fields):
+    return {"task_id": task_id, "status": "pending", "assigned_to": "agent_a", **fields}
+
+
+def test_changes_since_returns_only_newer_deltas():
+    store = TaskStore()
+    start = store.changes.latest_seq
+    store["t1"] = _task("t1")
+    store["t2"] = _task("t2", depends_on_tasks=["t1"])
+    _, position, _ = store.changes.changes_since(start)
+
+    store.update_fields("t1", {"status": "completed", "updated_at": "2025-01-02"})
+    changes, next_seq, reset = store.changes.changes_since(position)
+
+    assert not reset
+    assert [(c["task_id"], c["change"]) for c in changes] == [("t1", "updated"), ("t2", "ready")]
+    assert changes[0]["fields"] == ["status", "updated_at"]
+    assert next_seq == changes[-1]["seq"] == store.changes.latest_seq
+    assert store.changes.changes_since(next_seq) == ([], next_seq, False)
+
+
+def test_unchanged_update_is_not_recorded():
+    store = TaskStore()
+    store["t1"] = _task("t1", status="completed")
+    store["t2"] = _task("t2", depends_on_tasks=["t1"])
+    position = store.changes.latest_seq
+
+    store.update_fields("t1", {"status": "completed"})
+    store["t1"] = dict(store["t1"])
+
+    assert store.changes.changes_since(position)[0] == []
+
+
+def test_agent_filter_includes_reassigned_away():
+    store = TaskStore()
+    store["t1"] = _task("t1")
+    position = store.changes.latest_seq
+    store.update_fields("t1", {"assigned_to": "agent_b"})
+
+    for agent_id in ("agent_a", "agent_b"):
+        changes = store.changes.changes_since(position, agent_id=agent_id)[0]
+        assert [c["task_id"] for c in changes] == ["t1"]
+    assert changes[0]["previous_assigned_to"] == "agent_a"
+    assert store.changes.changes_since(position, agent_id="agent_c")[0] == []
+
+
+def test_reset_when_position_is_unavailable():
+    log = TaskChangeLog(max_entries=3)
+    start = log.latest_seq
+    for i in range(5):
+        log.record(f"t{i}", "created")
+
+    assert log.changes_since(start)[2]
+    assert log.changes_since(log.latest_seq + 1)[2]
+    changes, _, reset = log.changes_since(log.latest_seq - 3)
+    assert not reset and len(changes) == 3
+
+
+def test_limit_returns_position_of_last_delivered_change():
+    log = TaskChangeLog()
+    start = log.latest_seq
+    for i in range(5):
+        log.record(f"t{i}", "created")
+
+    changes, next_seq, _ = log.changes_since(start, limit=2)
+    assert [c["task_id"] for c in changes] == ["t0", "t1"]
+    assert next_seq == changes[-1]["seq"]
+
+
+def test_wait_times_out_empty():
+    log = TaskChangeLog()
+
+    async def wait():
+        started = time.perf_counter()
+        result = await log.wait_for_changes(log.latest_seq, 0.1)
+        return result, time.perf_counter() - started
+
+    (changes, next_seq, reset), elapsed = asyncio.run(wait())
+    assert changes == [] and not reset and next_seq == log.latest_seq
+    assert elapsed >= 0.09
+
+
+def test_wait_wakes_on_relevant_change_only():
+    log = TaskChangeLog()
+    start = log.latest_seq
+
+    async def wait():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.02, log.record, "other", "updated", {"assigned_to": "agent_b"})
+        loop.call_later(0.05, log.record, "mine", "updated", {"assigned_to": "agent_a"})
+        return await log.wait_for_changes(start, 5, agent_id="agent_a")
+
+    changes, _, _ = asyncio.run(wait())
+    assert [c["task_id"] for c in changes] == ["mine"]
+
+
+def test_tool_returns_deltas_then_times_out(project_db):
+    insert_agent("agent_a", "agent-a-token")
+
+    async def run():
+        position = g.tasks.changes.latest_seq
+        asyncio.get_running_loop().call_later(
+            0.02, g.tasks.__setitem__, "t1", _task("t1")
+        )
+        first = await task_tools.wait_for_task_changes_tool_impl(
+            {"token": "agent-a-token", "since_seq": position, "timeout": 5}
+        )
+        second = await task_tools.wait_for_task_changes_tool_impl(
+            {"token": "agent-a-token", "since_seq": g.tasks.changes.latest_seq, "timeout": 0.05}
+        )
+        return first[0].text, second[0].text
+
+    first, second = asyncio.run(run())
+    assert "t1 created" in first
+    assert "No task changes within 0.05s" in second
+
+
+def test_tool_rejects_invalid_arguments(project_db):
+    for arguments in ({"since_seq": "x"}, {"since_seq": 1, "timeout": "soon"}, {"since_seq": 1, "limit": 2.5}):
+        result = asyncio.run(
+            task_tools.wait_for_task_changes_tool_impl({"token": ADMIN_TOKEN, **arguments})
+        )
+        assert result[0].text.startswith("Error:")
+
+
+def test_assigning_existing_tasks_is_recorded(project_db):
+    insert_agent("worker", "worker-token")
+    task_id = insert_task("unassigned_task", status="unassigned")["task_id"]
+    position = g.tasks.changes.latest_seq
+
+    async def assign_while_waiting():
+        waiter = asyncio.create_task(
+            g.tasks.changes.wait_for_changes(position, 5, agent_id="worker")
+        )
+        await asyncio.sleep(0.01)
+        await task_tools.assign_task_tool_impl(
+            {"token": ADMIN_TOKEN, "agent_token": "worker-token", "task_ids": [task_id]}
+        )
+        return await waiter
+
+    changes, _, _ = asyncio.run(assign_while_waiting())
+    assert [(c["task_id"], c["change"]) for c in changes] == [(task_id, "updated")]
+    assert "assigned_to" in changes[0]["fields"]
+    assert g.tasks[task_id]["assigned_to"] == "worker"
+
+
+def test_creating_assigned_tasks_is_recorded(project_db):
+    insert_agent("worker", "worker-token")
+    position = g.tasks.changes.latest_seq
+
+    asyncio.run(
+        task_tools.assign_task_tool_impl(
+            {
+                "token": ADMIN_TOKEN,
+                "agent_token": "worker-token",
+                "tasks": [
+                    {"title": "First", "description": "One"},
+                    {"title": "Second", "description": "Two"},
+                ],
+            }
+        )
+    )
+
+    changes = g.tasks.changes.changes_since(position, agent_id="worker")[0]
+    assert [c["change"] for c in changes] == ["created", "created"]
+    for change in changes:
+        cached = g.tasks[change["task_id"]]
+        assert cached["assigned_to"] == "worker"
+        assert cached["depends_on_tasks"] == [] and cached["child_tasks"] == []
+
@@ -0,0 +1,82 @@
+"""Tests for append-only task notes (db/actions/task_notes_db.py) and their migration."""
+import json
+
+from agent_mcp.db.actions.task_notes_db import (
+    RECENT_TASK_NOTES,
+    add_task_note,
+    add_task_notes,
+    attach_recent_notes,
+    cached_notes_fields,
+    get_task_notes,
+)
+from agent_mcp.db.connection import get_db_connection
+from agent_mcp.db.schema import migrate_task_notes
+
+from conftest import insert_task
+
+
+def _note(i):
+    return {"timestamp": f"2025-01-01T00:00:{i:02d}", "author": "admin", "content": f"note {i}"}
+
+
+def test_legacy_notes_are_migrated_once_in_order(project_db):
+    insert_task("objects", updated_at="2025-03-01T00:00:00")
+    insert_task("strings", updated_at="2025-03-02T00:00:00")
+    insert_task("malformed")
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    legacy = {
+        "objects": json.dumps([_note(2), {"content": "no timestamp"}, _note(1)]),
+        "strings": json.dumps(["plain text"]),
+        "malformed": "[not json",
+    }
+    for task_id, notes in legacy.items():
+        cursor.execute("UPDATE tasks SET notes = ? WHERE task_id = ?", (notes, task_id))
+
+    assert migrate_task_notes(cursor) == 4
+    assert migrate_task_notes(cursor) == 0
+
+    cursor.execute("SELECT task_id, timestamp, author, content FROM task_notes ORDER BY note_id")
+    assert [tuple(row) for row in cursor.fetchall()] == [
+        ("objects", "2025-01-01T00:00:02", "admin", "note 2"),
+        ("objects", "2025-03-01T00:00:00", None, "no timestamp"),
+        ("objects", "2025-01-01T00:00:01", "admin", "note 1"),
+        ("strings", "2025-03-02T00:00:00", None, "plain text"),
+    ]
+    cursor.execute("SELECT task_id, notes FROM tasks ORDER BY task_id")
+    assert dict(cursor.fetchall()) == {"malformed": "[not json", "objects": "[]", "strings": "[]"}
+    conn.close()
+
+
+def test_notes_are_read_newest_last_and_paged_backwards(project_db):
+    insert_task("t1")
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    add_task_notes(cursor, [("t1", _note(i)) for i in range(8)])
+    add_task_note(cursor, "t1", "agent_a", "latest", timestamp="2025-01-01T00:00:59")
+
+    assert [n["content"] for n in get_task_notes(cursor, "t1", limit=3)] == [
+        "note 6", "note 7", "latest",
+    ]
+    assert [n["content"] for n in get_task_notes(cursor, "t1", limit=3, before=_note(6)["timestamp"])] == [
+        "note 3", "note 4", "note 5",
+    ]
+    assert len(get_task_notes(cursor, "t1")) == 9
+
+    tasks = attach_recent_notes(cursor, [{"task_id": "t1"}, {"task_id": "no_notes"}])
+    assert tasks[0]["notes_count"] == 9 and len(tasks[0]["notes"]) == RECENT_TASK_NOTES
+    assert tasks[0]["notes"][-1]["content"] == "latest"
+    assert (tasks[1]["notes"], tasks[1]["notes_count"]) == ([], 0)
+    conn.close()
+
+
+def test_cached_notes_keep_only_the_most_recent():
+    task = {"notes": [_note(i) for i in range(RECENT_TASK_NOTES)], "notes_count": 12}
+
+    fields = cached_notes_fields(task, [_note(50), _note(51)])
+
+    assert fields["notes_count"] == 14
+    assert [n["content"] for n in fields["notes"]] == [
+        f"note {i}" for i in list(range(2, RECENT_TASK_NOTES)) + [50, 51]
+    ]
+    assert cached_notes_fields(None, [_note(1)]) == {"notes": [_note(1)], "notes_count": 1}
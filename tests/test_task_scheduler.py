@@ -0,0 +1,42 @@
+"""Tests for ready-task ranking over the dependency DAG (core/task_scheduler.py)."""
+from agent_mcp.core.task_scheduler import critical_path, next_ready_tasks
+from agent_mcp.core.task_store import TaskStore
+
+
+def _store(*tasks):
+    store = TaskStore()
+    for task_id, status, depends_on, priority in tasks:
+        store[task_id] = {
+            "task_id": task_id,
+            "status": status,
+            "depends_on_tasks": depends_on,
+            "priority": priority,
+            "assigned_to": "agent_a",
+            "created_at": f"2025-01-01T00:00:0{len(store)}",
+        }
+    return store
+
+
+def test_critical_path_is_ranked_before_priority():
+    store = _store(
+        ("short", "pending", [], "high"),
+        ("long", "pending", [], "low"),
+        ("long_next", "pending", ["long"], "medium"),
+        ("long_last", "pending", ["long_next"], "medium"),
+    )
+
+    assert critical_path(store) == ["long", "long_next", "long_last"]
+    assert next_ready_tasks(store, "agent_a", limit=2) == [("long", 3), ("short", 1)]
+
+
+def test_completing_a_dependency_makes_dependents_ready():
+    store = _store(
+        ("first", "pending", [], "medium"),
+        ("second", "pending", ["first"], "medium"),
+    )
+    assert next_ready_tasks(store, "agent_a", limit=5) == [("first", 2)]
+
+    store.update_fields("first", {"status": "completed"})
+
+    assert next_ready_tasks(store, "agent_a", limit=5) == [("second", 1)]
+    assert next_ready_tasks(store, "agent_b") == []
@@ -0,0 +1,87 @@
+"""Tests for full-text task search (db/actions/task_search_db.py) and the search_tasks tool."""
+import asyncio
+import re
+
+from agent_mcp.db.actions.task_notes_db import add_task_note
+from agent_mcp.db.actions.task_search_db import build_task_match_query, search_tasks_fts
+from agent_mcp.db.connection import get_db_connection
+from agent_mcp.db.schema import ensure_task_search_index
+from agent_mcp.tools import task_tools
+
+from conftest import ADMIN_TOKEN, insert_task
+
+
+def _search(search_query, **kwargs):
+    return [task_id for task_id, _ in search_tasks_fts(build_task_match_query(search_query), **kwargs)]
+
+
+def _add_search_tasks():
+    insert_task("auth", title="Implement authentication", description="Login flow with tokens")
+    insert_task("author", title="Show the author", description="Display who wrote a note")
+    insert_task("cache", title="Cache layer", description="Add an auth cache in front of the database")
+    insert_task("phrase", title="Session handling", description="The refresh token expires too early")
+    insert_task("scattered", title="Refresh the page", description="Expires header and early token", status="completed")
+
+
+def test_match_query_quotes_words_and_adds_prefixes():
+    assert build_task_match_query('auth "Token Refresh" x') == (
+        '"auth" OR "auth"* OR "token refresh"'
+    )
+    assert build_task_match_query("cache layer", include_notes=False) == (
+        '{title description} : ("cache" OR "cache"* OR "layer" OR "layer"* OR "cache layer")'
+    )
+    assert build_task_match_query("a b") is None
+    assert build_task_match_query('NEAR(auth) OR "') == (
+        '"near" OR "near"* OR "auth" OR "auth"* OR "near auth or"'
+    )
+
+
+def test_words_match_as_prefixes_but_whole_words_rank_first(project_db):
+    _add_search_tasks()
+
+    assert _search("auth") == ["cache", "auth", "author"]
+    assert _search("authentication") == ["auth"]
+
+
+def test_quoted_phrase_matches_only_the_phrase(project_db):
+    _add_search_tasks()
+
+    assert _search('"expires token"') == []
+    assert _search('"refresh token expires"') == ["phrase"]
+    assert _search("refresh token expires")[0] == "phrase"
+    assert _search("refresh token expires", status="completed") == ["scattered"]
+
+
+def test_notes_are_searchable_as_they_are_appended(project_db):
+    _add_search_tasks()
+    conn = get_db_connection()
+    add_task_note(conn.cursor(), "cache", "admin", "Benchmark the eviction policy")
+    conn.commit()
+    conn.close()
+
+    assert _search("eviction") == ["cache"]
+    assert search_tasks_fts(build_task_match_query("eviction", include_notes=False)) == []
+
+
+def test_index_is_rebuilt_for_tasks_written_without_it(project_db):
+    _add_search_tasks()
+    conn = get_db_connection()
+    conn.execute("DROP TABLE tasks_fts")
+    conn.commit()
+    ensure_task_search_index(conn.cursor())
+    conn.commit()
+    conn.close()
+
+    assert _search("authentication") == ["auth"]
+
+
+def test_tool_reports_unrounded_bm25_scores(project_db):
+    _add_search_tasks()
+
+    text = asyncio.run(
+        task_tools.search_tasks_tool_impl({"token": ADMIN_TOKEN, "search_query": "auth"})
+    )[0].text
+
+    scores = re.findall(r"Relevance Score: (\d+)% of best \(BM25 ([^)]+)\)", text)
+    assert [percent for percent, _ in scores] == ["100", "0", "0"]
+    assert all(float(bm25) > 0 for _, bm25 in scores)
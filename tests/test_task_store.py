@@ -0,0 +1,209 @@
+"""Tests for the indexed task cache (core/task_store.py) against brute-force scans."""
+import datetime
+import random
+
+import pytest
+
+from agent_mcp.core.task_store import INDEXED_FIELDS, SORT_ORDERS, TaskStore, _sort_key
+
+AGENTS = (None, "agent_a", "agent_b")
+STATUSES = ("pending", "in_progress", "completed", "failed", "cancelled")
+PRIORITIES = ("low", "medium", "high")
+
+
+def _random_task(rng, task_id, existing_ids):
+    return {
+        "task_id": task_id,
+        "title": f"Task {task_id}",
+        "assigned_to": rng.choice(AGENTS),
+        "status": rng.choice(STATUSES),
+        "priority": rng.choice(PRIORITIES),
+        "parent_task": rng.choice([None, *existing_ids[:3]]),
+        "created_at": f"2025-01-{rng.randint(1, 28):02d}T00:00:00",
+        "updated_at": f"2025-02-{rng.randint(1, 28):02d}T00:00:00",
+        "depends_on_tasks": rng.sample(existing_ids, min(len(existing_ids), rng.randint(0, 2))),
+    }
+
+
+def _random_fields(rng, existing_ids):
+    fields = {}
+    for field, choices in (
+        ("assigned_to", AGENTS),
+        ("status", STATUSES),
+        ("priority", PRIORITIES),
+        ("parent_task", [None, *existing_ids[:3]]),
+    ):
+        if rng.random() < 0.5:
+            fields[field] = rng.choice(choices)
+    if rng.random() < 0.5:
+        fields["updated_at"] = f"2025-03-{rng.randint(1, 28):02d}T00:00:00"
+    if rng.random() < 0.3:
+        fields["depends_on_tasks"] = rng.sample(existing_ids, min(len(existing_ids), 2))
+    return fields
+
+
+def build_random_store(seed, operations=400):
+    """A TaskStore after a random mix of sets, re-sets, update_fields and deletes."""
+    rng = random.Random(seed)
+    store = TaskStore()
+    next_id = 0
+    for _ in range(operations):
+        ids = sorted(store)
+        roll = rng.random()
+        if roll < 0.4 or not ids:
+            task_id = f"task_{next_id:04d}"
+            next_id += 1
+            store[task_id] = _random_task(rng, task_id, ids)
+        elif roll < 0.55:
+            task_id = rng.choice(ids)
+            store[task_id] = _random_task(rng, task_id, [i for i in ids if i != task_id])
+        elif roll < 0.85:
+            task_id = rng.choice(ids)
+            store.update_fields(task_id, _random_fields(rng, [i for i in ids if i != task_id]))
+        else:
+            del store[rng.choice(ids)]
+    return store
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_indexes_match_brute_force(seed):
+    store = build_random_store(seed)
+    tasks = dict(store.items())
+
+    for field in INDEXED_FIELDS:
+        for value in {task.get(field) for task in tasks.values()} | {"missing"}:
+            expected = {task_id for task_id, task in tasks.items() if task.get(field) == value}
+            assert store.ids_where(field, value) == expected
+
+    for assigned_to in AGENTS[1:]:
+        for status in STATUSES:
+            expected = sorted(
+                (task for task in tasks.values()
+                 if task["assigned_to"] == assigned_to and task["status"] == status),
+                key=lambda task: (task["created_at"], task["task_id"]),
+                reverse=True,
+            )
+            assert store.query(assigned_to=assigned_to, status=status) == expected
+            assert store.count_matching(assigned_to=assigned_to, status=status) == len(expected)
+
+    for sort_by in SORT_ORDERS:
+        expected = sorted(tasks, key=lambda task_id: _sort_key(sort_by, task_id, tasks[task_id]))
+        assert [task["task_id"] for task in store.iter_sorted(sort_by, descending=False)] == expected
+
+
+def test_resetting_the_same_dict_is_rejected():
+    store = TaskStore()
+    store["t1"] = {"task_id": "t1", "status": "pending"}
+    task = store["t1"]
+    task["status"] = "completed"
+
+    with pytest.raises(ValueError):
+        store["t1"] = task
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_dependency_graph_matches_brute_force(seed):
+    store = build_random_store(seed)
+    tasks = dict(store.items())
+
+    for task_id, task in tasks.items():
+        assert store.dependencies_of(task_id) == list(dict.fromkeys(task["depends_on_tasks"]))
+        assert store.dependents_of(task_id) == sorted(
+            other_id for other_id, other in tasks.items() if task_id in other["depends_on_tasks"]
+        )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ready_set_matches_brute_force(seed):
+    store = build_random_store(seed)
+    tasks = dict(store.items())
+
+    def unmet(task):
+        return sum(
+            1
+            for dep_id in dict.fromkeys(task["depends_on_tasks"])
+            if tasks.get(dep_id, {}).get("status") != "completed"
+        )
+
+    for task_id, task in tasks.items():
+        assert store.unmet_dependency_count(task_id) == unmet(task)
+    expected = {
+        task_id for task_id, task in tasks.items() if task["status"] == "pending" and unmet(task) == 0
+    }
+    assert store.ready_ids() == expected
+    assert store.ready_ids("agent_a") == {
+        task_id for task_id in expected if tasks[task_id]["assigned_to"] == "agent_a"
+    }
+
+
+
+def _page_through(store, sort_by, page_size, between_pages=lambda page: None):
+    seen, after = [], None
+    while True:
+        page = [
+            task["task_id"]
+            for _, task in zip(range(page_size), store.iter_sorted(sort_by, after=after))
+        ]
+        if not page:
+            return seen
+        seen.extend(page)
+        after = store.sort_key(sort_by, page[-1])
+        between_pages(page)
+
+
+@pytest.mark.parametrize("sort_by", SORT_ORDERS)
+@pytest.mark.parametrize("page_size", (1, 7, 1000))
+def test_keyset_pages_have_no_duplicates_or_gaps(sort_by, page_size):
+    store = build_random_store(7)
+    expected = [task["task_id"] for task in store.iter_sorted(sort_by)]
+
+    assert _page_through(store, sort_by, page_size) == expected
+    assert expected == [
+        task["task_id"] for task in reversed(list(store.iter_sorted(sort_by, descending=False)))
+    ]
+
+
+def test_tasks_added_before_the_cursor_do_not_shift_later_pages():
+    store = build_random_store(8)
+    expected = [task["task_id"] for task in store.iter_sorted("created_at")]
+
+    def add_newer_task(page):
+        task_id = f"new_{page[-1]}"
+        store[task_id] = {"task_id": task_id, "created_at": "2099-01-01T00:00:00"}
+
+    assert _page_through(store, "created_at", 5, add_newer_task) == expected
+
+
+def _brute_force_health(tasks, stale_before):
+    status_counts, priority_counts = {}, {}
+    for task in tasks:
+        status_counts[task["status"]] = status_counts.get(task["status"], 0) + 1
+        priority_counts[task["priority"]] = priority_counts.get(task["priority"], 0) + 1
+    return {
+        "total": len(tasks),
+        "status_distribution": status_counts,
+        "priority_distribution": priority_counts,
+        "blocked": sum(1 for task in tasks if task["status"] == "pending" and task["depends_on_tasks"]),
+        "stale": sum(
+            1
+            for task in tasks
+            if task["status"] in ("pending", "in_progress")
+            and datetime.datetime.fromisoformat(task["updated_at"]) <= stale_before
+        ),
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_health_counts_match_brute_force(seed):
+    store = build_random_store(seed)
+    tasks = list(store.values())
+    stale_before = datetime.datetime(2025, 2, 15)
+
+    assert store.health_counts(stale_before) == _brute_force_health(tasks, stale_before)
+    assert store.health_counts(stale_before, assigned_to="agent_a") == _brute_force_health(
+        [task for task in tasks if task["assigned_to"] == "agent_a"], stale_before
+    )
+    some_ids = [task["task_id"] for task in tasks[::3]]
+    assert store.health_counts(stale_before, task_ids=some_ids) == _brute_force_health(
+        tasks[::3], stale_before
+    )
@@ -0,0 +1,136 @@
+"""Tests for the task tools (tools/task_tools.py) that write to both SQLite and g.tasks."""
+import asyncio
+import re
+import sqlite3
+
+from agent_mcp.core import globals as g
+from agent_mcp.db.connection import get_db_connection
+from agent_mcp.tools import task_tools
+
+from conftest import ADMIN_TOKEN, insert_task, run_with_write_queue
+
+
+def test_delete_updates_cache_after_commit(project_db):
+    insert_task("parent", child_tasks=["doomed"])
+    insert_task("doomed", parent_task="parent")
+    insert_task("dependent", depends_on_tasks=["doomed"])
+
+    result = asyncio.run(
+        task_tools.delete_task_tool_impl(
+            {"token": ADMIN_TOKEN, "task_id": "doomed", "force_delete": True}
+        )
+    )
+
+    assert "deleted successfully" in result[0].text
+    assert "doomed" not in g.tasks
+    assert g.tasks["parent"]["child_tasks"] == []
+    assert g.tasks["dependent"]["depends_on_tasks"] == []
+
+
+def test_failed_delete_leaves_cache_unchanged(project_db, monkeypatch):
+    insert_task("doomed")
+    insert_task("dependent", depends_on_tasks=["doomed"])
+
+    def fail(**kwargs):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(task_tools, "log_agent_action_to_db", fail)
+    result = asyncio.run(
+        task_tools.delete_task_tool_impl(
+            {"token": ADMIN_TOKEN, "task_id": "doomed", "force_delete": True}
+        )
+    )
+
+    assert result[0].text.startswith("Error deleting task")
+    assert "doomed" in g.tasks
+    assert g.tasks["dependent"]["depends_on_tasks"] == ["doomed"]
+
+
+def test_view_tasks_cursor_pages_cover_every_task_once(project_db):
+    for i in range(12):
+        g.tasks[f"task_{i:02d}"] = {
+            "task_id": f"task_{i:02d}",
+            "title": f"Task number {i}",
+            "description": "Some work " * 20,
+            "status": "pending",
+            "priority": "medium",
+            "assigned_to": None,
+            "created_at": f"2025-01-{i + 1:02d}T00:00:00",
+            "updated_at": f"2025-01-{i + 1:02d}T00:00:00",
+            "notes": [],
+        }
+
+    seen, arguments, pages = [], {"token": ADMIN_TOKEN, "max_tokens": 1400}, 0
+    while True:
+        text = asyncio.run(task_tools.view_tasks_tool_impl(arguments))[0].text
+        pages += 1
+        seen.extend(re.findall(r"\btask_\d\d\b", text.split("---")[0]))
+        cursor = re.search(r"view_tasks\(cursor='([^']+)'", text)
+        if not cursor:
+            break
+        arguments = {"token": ADMIN_TOKEN, "max_tokens": 1400, "cursor": cursor.group(1)}
+
+    assert pages > 2
+    assert seen == [f"task_{i:02d}" for i in reversed(range(12))]
+
+
+def test_view_tasks_rejects_invalid_cursor(project_db):
+    result = asyncio.run(
+        task_tools.view_tasks_tool_impl({"token": ADMIN_TOKEN, "cursor": "not-a-cursor"})
+    )
+    assert result[0].text.startswith("Error: Invalid cursor")
+
+
+def _bulk(operations):
+    return run_with_write_queue(
+        task_tools.bulk_task_operations_tool_impl({"token": ADMIN_TOKEN, "operations": operations})
+    )[0].text
+
+
+def _db_task(task_id):
+    conn = get_db_connection()
+    row = dict(conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone())
+    conn.close()
+    return row
+
+
+def test_bulk_operations_compose_in_one_transaction(project_db):
+    insert_task("a")
+    insert_task("b")
+
+    text = _bulk(
+        [
+            {"type": "update_status", "task_id": "a", "status": "in_progress", "notes": "Started"},
+            {"type": "update_priority", "task_id": "a", "priority": "high"},
+            {"type": "reassign", "task_id": "b", "assigned_to": "worker"},
+            {"type": "update_status", "task_id": "missing", "status": "completed"},
+            {"type": "update_status", "task_id": "b", "status": "bogus"},
+        ]
+    )
+
+    assert "Task 'missing' not found" in text and "Invalid status 'bogus'" in text
+    for task in (_db_task("a"), g.tasks["a"]):
+        assert (task["status"], task["priority"]) == ("in_progress", "high")
+    assert _db_task("b")["assigned_to"] == g.tasks["b"]["assigned_to"] == "worker"
+    assert [note["content"] for note in g.tasks["a"]["notes"]] == ["Started"]
+
+
+def test_bulk_operations_roll_back_together(project_db, monkeypatch):
+    insert_task("a")
+    insert_task("b")
+
+    def fail(*args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(task_tools, "add_task_notes", fail)
+    text = _bulk(
+        [
+            {"type": "update_status", "task_id": "a", "status": "completed"},
+            {"type": "add_note", "task_id": "b", "content": "Never stored"},
+        ]
+    )
+
+    assert text.startswith("Database error in bulk operations")
+    for task_id in ("a", "b"):
+        assert _db_task(task_id)["status"] == g.tasks[task_id]["status"] == "pending"
+    assert g.tasks["b"]["notes"] == []